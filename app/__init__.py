@@ -1,67 +1,32 @@
-from decimal import Decimal
-from typing import Callable
+"""
+The calculator application package.
 
-from app.operations import add, subtract, divide, multiply
-from app.calculation import Calculation
-from app.calculations import Calculations
+The public names below are imported on first access, so light modules such as
+app.command_registry and app.daemon can be used without importing NumPy and pandas.
+"""
 
+import importlib
 
-class Calculator:
-    """
-    A class for performing basic arithmetic operations.
-
-    Methods:
-        perform(a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]) -> Decimal:
-            Executes the specified operation on two Decimal values and records the calculation.
-
-        add(a: Decimal, b: Decimal) -> Decimal:
-            Calculates the sum of two Decimal values.
+_LAZY_EXPORTS = {
+    "Calculator": "app.calculator",
+    "VECTORIZED_OPERATIONS": "app.calculator",
+    "Calculation": "app.calculation",
+    "Calculations": "app.calculations",
+    "add": "app.operations",
+    "subtract": "app.operations",
+    "multiply": "app.operations",
+    "divide": "app.operations",
+}
 
-        subtract(a: Decimal, b: Decimal) -> Decimal:
-            Computes the difference between two Decimal values.
+__all__ = list(_LAZY_EXPORTS)
 
-        multiply(a: Decimal, b: Decimal) -> Decimal:
-            Determines the product of two Decimal values.
 
-        divide(a: Decimal, b: Decimal) -> Decimal:
-            Finds the quotient when one Decimal value is divided by another.
+def __getattr__(name):
     """
-
-    @staticmethod
-    def perform(a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]) -> Decimal:
-        """
-        Perform the specified arithmetic operation and logs the result for future reference.
-
-        Args:
-            a (Decimal): The first number in the operation.
-            b (Decimal): The second number in the operation.
-            operation (Callable[[Decimal, Decimal], Decimal]): The function representing the arithmetic operation.
-
-        Returns:
-            Decimal: The result of the arithmetic operation.
-        """
-        # Create and log the calculation
-        calculation = Calculation.create(a, b, operation)
-        Calculations.add_calculation(calculation)
-        # Run the operation and return the output
-        return calculation.operate()
-
-    @staticmethod
-    def add(a: Decimal, b: Decimal) -> Decimal:
-        """Calculate the sum of two Decimal numbers."""
-        return Calculator.perform(a, b, add)
-
-    @staticmethod
-    def subtract(a: Decimal, b: Decimal) -> Decimal:
-        """Calculate the difference between two Decimal numbers."""
-        return Calculator.perform(a, b, subtract)
-
-    @staticmethod
-    def multiply(a: Decimal, b: Decimal) -> Decimal:
-        """Calculate the product of two Decimal numbers."""
-        return Calculator.perform(a, b, multiply)
-
-    @staticmethod
-    def divide(a: Decimal, b: Decimal) -> Decimal:
-        """Divide one Decimal number by another."""
-        return Calculator.perform(a, b, divide)
+    Imports a public name from its defining module on first access.
+    """
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'app' has no attribute '{name}'")
@@ -0,0 +1,58 @@
+"""
+This module holds the thread handling shared by the helpers that work periodically in
+the background, such as the history autosaver and the memory monitor.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class BackgroundLoop(ABC):
+    """
+    Runs the _run method of a subclass on a daemon thread between start and stop.
+
+    _run should return soon after the _stopping event is set, typically by looping on
+    self._stopping.wait(seconds).
+    """
+
+    def __init__(self, thread_name: str):
+        """
+        Initializes the BackgroundLoop. Call start to start the thread.
+
+        Args:
+            thread_name (str): Name of the background thread.
+        """
+        self._thread_name = thread_name
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the background thread is running.
+        """
+        return self._thread is not None
+
+    def start(self) -> None:
+        """
+        Starts the background thread.
+        """
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self._thread_name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread and waits for it to finish.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @abstractmethod
+    def _run(self) -> None:
+        """
+        Does the periodic work until _stopping is set.
+        """
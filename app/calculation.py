@@ -1,5 +1,5 @@
 from decimal import Decimal
-from typing import Callable
+from typing import Callable, Optional
 
 
 class Calculation:
@@ -9,7 +9,7 @@ class Calculation:
     Attributes:
         num1 (Decimal): The first value in the calculation.
         num2 (Decimal): The second value in the calculation.
-        result (Decimal): The result of the operation.
+        result (Decimal): The result of the operation, computed on first access and then memoized.
         operation (Callable[[Decimal, Decimal], Decimal]): The mathematical function to execute.
 
     Methods:
@@ -23,7 +23,11 @@ class Calculation:
             Provides a string representation of the Calculation instance for easy readability.
     """
 
-    def __init__(self, num1: Decimal, num2: Decimal, operation: Callable[[Decimal, Decimal], Decimal]):
+    # Slots keep instances free of a per-instance __dict__; '_result' stays unset until computed
+    __slots__ = ("num1", "num2", "operation", "_result")
+
+    def __init__(self, num1: Decimal, num2: Decimal, operation: Callable[[Decimal, Decimal], Decimal],
+                 result: Optional[Decimal] = None):
         """
         Set up a Calculation instance with two values and a specified operation.
 
@@ -31,11 +35,28 @@ class Calculation:
             num1 (Decimal): The first number.
             num2 (Decimal): The second number.
             operation (Callable[[Decimal, Decimal], Decimal]): The arithmetic function to apply.
+            result (Optional[Decimal]): An already known result, e.g. one restored from history.
+                When omitted the result is computed on first access.
         """
         self.num1 = num1
         self.num2 = num2
         self.operation = operation
-        self.result = self.operate()  # Automatically calculate the result upon instantiation
+        if result is not None:
+            self._result = result
+
+    @property
+    def result(self) -> Decimal:
+        """
+        The result of the operation, computed on first access and then memoized.
+
+        Returns:
+            Decimal: The result produced by the operation.
+        """
+        try:
+            return self._result
+        except AttributeError:
+            self._result = self.operate()
+            return self._result
 
     def operate(self) -> Decimal:
         """
@@ -1,6 +1,12 @@
+from app import operations
 from app.calculation import Calculation
+from app.history_archive import HistoryArchive
+from app.history_backend import HistoryBackend
+from app.mapped_history import MappedHistory
 from app.pandas_facade import PandasFacade
+from app.retention_policy import RetentionPolicy
 from decimal import Decimal
+from typing import Dict, Iterable, Optional, Sequence, Tuple
 import os
 import pandas as pd
 
@@ -16,6 +22,12 @@ class Calculations:
         add_calculation(calculation: Calculation):
             Adds a new calculation to the history.
 
+        add_calculations(calculations: Iterable[Calculation]):
+            Adds several calculations to the history in a single batch write.
+
+        add_results(operation: str, num1: Sequence, num2: Sequence, results: Sequence):
+            Adds precomputed results of one operation to the history in a single batch write.
+
         clear_calculations():
             Clears all calculation records from the history.
 
@@ -28,34 +40,97 @@ class Calculations:
         filter_by_operation(operation: str) -> pd.DataFrame:
             Filters the calculation history by the specified operation.
 
+        filter_by_time(start: float = None, end: float = None) -> pd.DataFrame:
+            Returns the calculations recorded within a time range.
+
+        aggregate_by_time(bucket_seconds: float, start: float = None, end: float = None) -> pd.DataFrame:
+            Counts calculations and averages their durations per time bucket.
+
+        get_statistics(operation: str = None) -> pd.DataFrame:
+            Returns running per-operation statistics of operands and results.
+
         save_history(filepath: str = "data/calculations.csv"):
             Saves the history DataFrame to a specified CSV file (defaults to 'data/calculations.csv').
 
-        load_history(filepath: str = "data/calculations.csv"):
-            Loads calculation history from a specified CSV file (defaults to 'data/calculations.csv').
+        archive_history(root: str = "data/archive"):
+            Appends the calculations not archived yet to a partitioned, compressed archive.
+
+        load_history(filepath: str = "data/calculations.csv", operation=None, start=None, end=None):
+            Loads calculation history from a CSV file, a mapped history or the matching part of an archive.
+
+        convert_history(csv_path: str, mapped_path: str):
+            Converts a CSV history file to a memory-mapped history.
 
         delete_calculation(index: int):
             Deletes a specific calculation from the history based on its index.
+
+        set_retention_policy(policy: RetentionPolicy):
+            Bounds the in-memory history, dropping or spilling the oldest calculations.
+
+        set_history_backend(backend: HistoryBackend):
+            Stores the history in a backend, such as a SQLite database shared between processes.
     """
 
     history = PandasFacade()
 
+    # Change mark of the history when it was last archived, by archive root
+    _archive_marks: Dict[str, Tuple[int, int]] = {}
+
     @classmethod
-    def add_calculation(cls, calculation: Calculation):
+    def add_calculation(cls, calculation: Calculation, duration: Optional[float] = None):
         """
-        Add a Calculation instance to the history DataFrame.
+        Add a Calculation instance to the history DataFrame, stamped with the current time.
 
         Args:
             calculation (Calculation): The Calculation instance to add to history.
+            duration (Optional[float]): How long the calculation took, in seconds.
         """
         record = {
             "operation": calculation.operation.__name__,
             "num1": calculation.num1,
             "num2": calculation.num2,
-            "result": calculation.result
+            "result": calculation.result,
+            "duration": duration
         }
         cls.history.add_record(record)
 
+    @classmethod
+    def add_calculations(cls, calculations: Iterable[Calculation]):
+        """
+        Add several Calculation instances to the history in a single batch write.
+
+        Args:
+            calculations (Iterable[Calculation]): The Calculation instances to add, in order.
+        """
+        records = [
+            {
+                "operation": calculation.operation.__name__,
+                "num1": calculation.num1,
+                "num2": calculation.num2,
+                "result": calculation.result
+            }
+            for calculation in calculations
+        ]
+        cls.history.add_records(records)
+
+    @classmethod
+    def add_results(cls, operation: str, num1: Sequence, num2: Sequence, results: Sequence):
+        """
+        Add precomputed results of one operation to the history in a single batch write.
+
+        Args:
+            operation (str): The operation name shared by every row.
+            num1 (Sequence): The first operands.
+            num2 (Sequence): The second operands.
+            results (Sequence): The result of each operand pair.
+        """
+        cls.history.add_records(pd.DataFrame({
+            "operation": operation,
+            "num1": list(num1),
+            "num2": list(num2),
+            "result": list(results)
+        }))
+
     @classmethod
     def clear_calculations(cls):
         """
@@ -71,10 +146,12 @@ class Calculations:
         Returns:
             Calculation: The latest Calculation in history, or None if no calculations exist.
         """
-        if not cls.history.dataframe.empty:
-            latest_record = cls.history.dataframe.iloc[-1]
+        latest_record = cls.history.get_latest_record()
+        if latest_record is not None:
+            # Operations without a function in app.operations, such as mean, keep their name
+            name = latest_record["operation"]
             return Calculation(
-                operation=latest_record["operation"],
+                operation=getattr(operations, name, name),
                 num1=Decimal(latest_record["num1"]),
                 num2=Decimal(latest_record["num2"]),
                 result=Decimal(latest_record["result"])
@@ -87,23 +164,73 @@ class Calculations:
         Retrieve the full calculation history.
 
         Returns:
-            pd.DataFrame: DataFrame of all calculations in the history.
+            pd.DataFrame: DataFrame of all calculations in the history, including spilled ones.
         """
-        return cls.history.dataframe
+        return cls.history.get_all_records()
 
     @classmethod
-    def filter_by_operation(cls, operation: str) -> pd.DataFrame:
+    def filter_by_operation(cls, operation: str, archive: Optional[str] = None) -> pd.DataFrame:
         """
         Retrieve calculations that match the specified operation.
 
         Args:
             operation (str): The operation type to filter by (e.g., 'add', 'subtract').
+            archive (Optional[str]): Root of a history archive to search instead of the
+                in-memory history. Only that operation's partitions are read.
 
         Returns:
             pd.DataFrame: DataFrame of calculations matching the specified operation.
         """
+        if archive is not None:
+            return cls.history.parse_records(HistoryArchive(archive).read(operation=operation))
         return cls.history.filter_operations(operation)
 
+    @classmethod
+    def filter_by_time(cls, start: Optional[float] = None, end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Retrieve calculations recorded within a time range.
+
+        Args:
+            start (Optional[float]): Earliest timestamp in epoch seconds, or None for no lower bound.
+            end (Optional[float]): Latest timestamp in epoch seconds, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: DataFrame of calculations with start <= timestamp <= end.
+        """
+        return cls.history.filter_by_time(start, end)
+
+    @classmethod
+    def aggregate_by_time(cls, bucket_seconds: float, start: Optional[float] = None,
+                          end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Count calculations and average their durations per time bucket.
+
+        Args:
+            bucket_seconds (float): Width of each bucket in seconds, e.g. 60 for per-minute figures.
+            start (Optional[float]): Earliest timestamp to include, or None for no lower bound.
+            end (Optional[float]): Latest timestamp to include, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: Per-bucket 'count' and 'mean_duration', indexed by bucket start time.
+        """
+        return cls.history.aggregate_by_time(bucket_seconds, start, end)
+
+    @classmethod
+    def get_statistics(cls, operation: Optional[str] = None) -> pd.DataFrame:
+        """
+        Get per-operation statistics of the operands and results without scanning the history.
+
+        The statistics are maintained as calculations are added and deleted.
+
+        Args:
+            operation (Optional[str]): Only report this operation.
+
+        Returns:
+            pd.DataFrame: Rows indexed by (operation, column) for the columns 'num1', 'num2' and
+                'result', with 'records', 'non_numeric', 'count', 'sum', 'min', 'max', 'mean' and 'variance'.
+        """
+        return cls.history.operation_stats(operation)
+
     @classmethod
     def save_history(cls, filepath: str = "data/calculations.csv"):
         """
@@ -120,18 +247,78 @@ class Calculations:
         cls.history.save_to_csv(filepath)
 
     @classmethod
-    def load_history(cls, filepath: str = "data/calculations.csv"):
+    def archive_history(cls, root: str = "data/archive"):
         """
-        Load calculation history from a CSV file.
+        Append the calculations added since the last call to a partitioned, compressed archive.
+
+        When the history was replaced since then, some of the added calculations were
+        already evicted, or this process has not archived to root before, the whole history
+        is read instead and only calculations newer than the archive's latest one are appended.
+
+        Args:
+            root (str): Directory of the archive. Defaults to 'data/archive'.
+        """
+        key = os.path.abspath(root)
+        previous = cls._archive_marks.get(key)
+        records, complete, mark = cls.history.changes_since(previous)
+        if not complete and len(records) != mark[1] - previous[1]:
+            records, complete = cls.history.get_all_records(), True
+        archive = HistoryArchive(root)
+        latest = archive.latest_timestamp()
+        if complete and latest is not None:
+            records = records[pd.to_numeric(records["timestamp"], errors="coerce") > latest]
+        archive.append(records)
+        cls._archive_marks[key] = mark
+
+    @classmethod
+    def load_history(cls, filepath: str = "data/calculations.csv", operation: Optional[str] = None,
+                     start: Optional[float] = None, end: Optional[float] = None, merge: bool = False):
+        """
+        Load calculation history from a CSV file, a mapped history or a history archive.
+
+        When filepath is an archive, only the partitions and segments that can hold records
+        matching operation, start and end are read. A CSV file is streamed in chunks and
+        filtered as it is read. A mapped history is opened without being read; its rows are
+        paged in as queries need them. The filters are ignored for mapped histories.
 
         Args:
             filepath (str): Path from which to load the history. Defaults to 'data/calculations.csv'.
+            operation (Optional[str]): Only load calculations of this operation.
+            start (Optional[float]): Earliest timestamp to load, in epoch seconds.
+            end (Optional[float]): Latest timestamp to load, in epoch seconds.
+            merge (bool): Add the loaded calculations to the current history instead of
+                replacing it. A mapped history is then read in full.
         """
-        if os.path.exists(filepath):
-            cls.history.load_from_csv(filepath)
+        if HistoryArchive.is_archive(filepath):
+            records = HistoryArchive(filepath).read(operation=operation, start=start, end=end)
+            if merge:
+                cls.history.add_records(records)
+            else:
+                cls.history.replace_records(records)
+        elif MappedHistory.is_mapped(filepath):
+            if merge:
+                cls.history.add_records(MappedHistory(filepath).get_all_records())
+            else:
+                cls.history.load_mapped(filepath)
+        elif os.path.exists(filepath):
+            cls.history.load_from_csv(filepath, operations=None if operation is None else [operation],
+                                      start=start, end=end, merge=merge)
         else:
             print(f"Warning: File {filepath} not found. No data loaded.")
 
+    @classmethod
+    def convert_history(cls, csv_path: str, mapped_path: str):
+        """
+        Convert a CSV history file to a memory-mapped history that load_history opens instantly.
+
+        The CSV file is streamed in chunks, so it may be larger than memory.
+
+        Args:
+            csv_path (str): The CSV history file.
+            mapped_path (str): Directory to write the mapped history to.
+        """
+        MappedHistory.convert_csv(csv_path, mapped_path)
+
     @classmethod
     def delete_calculation(cls, index: int):
         """
@@ -141,3 +328,25 @@ class Calculations:
             index (int): The index of the calculation to delete.
         """
         cls.history.remove_record(index)
+
+    @classmethod
+    def set_retention_policy(cls, policy: RetentionPolicy):
+        """
+        Bound the in-memory history with a retention policy.
+
+        Args:
+            policy (RetentionPolicy): The limits to apply. Evicted calculations are dropped,
+                or spilled to disk if the policy names a spill path.
+        """
+        cls.history.set_policy(policy)
+
+    @classmethod
+    def set_history_backend(cls, backend: Optional[HistoryBackend]):
+        """
+        Store the history in a backend instead of process memory.
+
+        Args:
+            backend (Optional[HistoryBackend]): The storage to use, e.g. a SQLiteHistoryBackend
+                shared by several processes, or None to return to in-memory storage.
+        """
+        cls.history.set_backend(backend)
@@ -0,0 +1,126 @@
+"""
+This module defines the Calculator class, the entry point for arithmetic operations
+whose calculations are recorded in the shared Calculations history.
+"""
+
+import time
+from decimal import Decimal
+from typing import Callable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.operations import add, subtract, divide, multiply
+from app.calculation import Calculation
+from app.calculations import Calculations
+
+# NumPy equivalents of the basic operations, used to compute whole arrays in one call
+VECTORIZED_OPERATIONS = {
+    add: np.add,
+    subtract: np.subtract,
+    multiply: np.multiply,
+    divide: np.true_divide,
+}
+
+
+class Calculator:
+    """
+    A class for performing basic arithmetic operations.
+
+    Methods:
+        perform(a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]) -> Decimal:
+            Executes the specified operation on two Decimal values and records the calculation.
+
+        perform_many(operands: Union[Sequence[Tuple[Decimal, Decimal]], np.ndarray],
+                     operation: Callable[[Decimal, Decimal], Decimal]) -> Union[List[Decimal], np.ndarray]:
+            Executes the operation on many operand pairs and records them in one batch.
+
+        add(a: Decimal, b: Decimal) -> Decimal:
+            Calculates the sum of two Decimal values.
+
+        subtract(a: Decimal, b: Decimal) -> Decimal:
+            Computes the difference between two Decimal values.
+
+        multiply(a: Decimal, b: Decimal) -> Decimal:
+            Determines the product of two Decimal values.
+
+        divide(a: Decimal, b: Decimal) -> Decimal:
+            Finds the quotient when one Decimal value is divided by another.
+    """
+
+    @staticmethod
+    def perform(a: Decimal, b: Decimal, operation: Callable[[Decimal, Decimal], Decimal]) -> Decimal:
+        """
+        Perform the specified arithmetic operation and logs the result for future reference.
+
+        Args:
+            a (Decimal): The first number in the operation.
+            b (Decimal): The second number in the operation.
+            operation (Callable[[Decimal, Decimal], Decimal]): The function representing the arithmetic operation.
+
+        Returns:
+            Decimal: The result of the arithmetic operation.
+        """
+        # Create the calculation, time its single evaluation and log it
+        calculation = Calculation.create(a, b, operation)
+        started = time.perf_counter()
+        result = calculation.result
+        Calculations.add_calculation(calculation, duration=time.perf_counter() - started)
+        return result
+
+    @staticmethod
+    def perform_many(operands: Union[Sequence[Tuple[Decimal, Decimal]], np.ndarray],
+                     operation: Callable[[Decimal, Decimal], Decimal]) -> Union[List[Decimal], np.ndarray]:
+        """
+        Perform one arithmetic operation on many operand pairs and log them all in a single batch.
+
+        Every result is computed exactly once. A numeric NumPy array of shape (n, 2) is computed
+        with a single vectorized call when the operation has a NumPy equivalent; other inputs are treated as (a, b) pairs of Decimal values.
+        Nothing is logged if any pair fails.
+
+        Args:
+            operands (Union[Sequence[Tuple[Decimal, Decimal]], np.ndarray]): The operand pairs.
+            operation (Callable[[Decimal, Decimal], Decimal]): The function representing the arithmetic operation.
+
+        Returns:
+            Union[List[Decimal], np.ndarray]: The results, as an array for array input and a list otherwise.
+
+        Raises:
+            ValueError: If the operands are not pairs, or if a division by zero is attempted.
+        """
+        if isinstance(operands, np.ndarray) and operands.dtype.kind in "iuf":
+            if operands.ndim != 2 or operands.shape[1] != 2:
+                raise ValueError("Operands must be an array of shape (n, 2).")
+            first, second = operands[:, 0], operands[:, 1]
+            if operation is divide and np.any(second == 0):
+                raise ValueError("Error: Cannot divide by zero!")
+            vectorized = VECTORIZED_OPERATIONS.get(operation)
+            if vectorized is not None:
+                results = vectorized(first, second)
+            else:
+                results = np.array([operation(a, b) for a, b in zip(first, second)])
+            Calculations.add_results(operation.__name__, first, second, results)
+            return results
+
+        calculations = [Calculation.create(a, b, operation) for a, b in operands]
+        Calculations.add_calculations(calculations)
+        return [calculation.result for calculation in calculations]
+
+    @staticmethod
+    def add(a: Decimal, b: Decimal) -> Decimal:
+        """Calculate the sum of two Decimal numbers."""
+        return Calculator.perform(a, b, add)
+
+    @staticmethod
+    def subtract(a: Decimal, b: Decimal) -> Decimal:
+        """Calculate the difference between two Decimal numbers."""
+        return Calculator.perform(a, b, subtract)
+
+    @staticmethod
+    def multiply(a: Decimal, b: Decimal) -> Decimal:
+        """Calculate the product of two Decimal numbers."""
+        return Calculator.perform(a, b, multiply)
+
+    @staticmethod
+    def divide(a: Decimal, b: Decimal) -> Decimal:
+        """Divide one Decimal number by another."""
+        return Calculator.perform(a, b, divide)
@@ -0,0 +1,396 @@
+"""
+This module spreads a batch of calculations over worker processes on several hosts.
+
+A ClusterWorker is a TCP server that runs calculations from the command registry, so
+the plugins loaded in its process are available. A ClusterCoordinator cuts a batch into
+shards, gives each worker a queue of shards and talks to every worker from its own
+thread. A worker that empties its queue steals shards from the back of the longest other
+queue, so fast workers take over from slow ones. A shard whose worker fails or stops
+answering is retried on another worker; the worker is left out for the rest of the batch.
+
+The protocol is one line of JSON per message, as for the local daemon. A request is
+{"shard": n, "jobs": [[operation, [operand, ...]], ...]} and its reply is
+{"shard": n, "replies": [{"result": "8", "duration": 0.001} or {"error": "..."}, ...]}.
+Operands and results travel as strings so Decimal values keep their exact form; a vector
+travels as '[1, 2, 3]'. Operands cannot name files: a worker only computes with what it is sent.
+"""
+
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from decimal import Decimal, InvalidOperation
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.command import CommandError
+from app.command_registry import command_registry
+from app.numeric_tokens import MalformedNumber
+
+Address = Tuple[str, int]
+
+# An operation name and its operands
+Job = Tuple[str, Sequence]
+
+
+def parse_address(text: str, default_host: str = "127.0.0.1") -> Address:
+    """
+    Parses 'host:port' or 'port' into an address.
+
+    Args:
+        text (str): The address.
+        default_host (str): Host used when text only names a port.
+
+    Returns:
+        Address: The (host, port) pair.
+
+    Raises:
+        ValueError: If the port is not a number.
+    """
+    host, _, port = text.strip().rpartition(":")
+    return host or default_host, int(port)
+
+
+def parse_wire_operand(operand: object, position: int):
+    """
+    Converts an operand received from a peer to a Decimal, or to a NumPy array for a
+    vector written as '[1, 2, 3]'.
+
+    Unlike the REPL, peers cannot name a file of numbers with '@file', and the error does
+    not repeat the operand, so a peer learns nothing about the worker's files.
+
+    Args:
+        operand (object): The operand, as a string or a number.
+        position (int): Its position among the operands, from 1, for the error message.
+
+    Returns:
+        Union[Decimal, np.ndarray]: The number or the vector.
+
+    Raises:
+        InvalidOperation: If the operand is not a number or a vector of numbers.
+    """
+    text = str(operand)
+    try:
+        if text.startswith("["):
+            # Imported here so workers that only see scalars start without NumPy
+            from app.vector_operands import parse_vector
+            vector = parse_vector(text)
+            if vector is not None:
+                return vector
+        return Decimal(text)
+    except MalformedNumber as e:
+        raise InvalidOperation(f"element {e.index + 1} of operand {position} is not a valid number") from None
+    except InvalidOperation:
+        raise InvalidOperation(f"operand {position} is not a number or a '[...]' vector") from None
+
+
+def execute_job(operation: str, operands: Sequence, dispatcher) -> Dict:
+    """
+    Runs one calculation and describes its outcome for the wire.
+
+    Args:
+        operation (str): Name of the command in the registry.
+        operands (Sequence): The operands, as strings or numbers, or vectors as '[1, 2, 3]'.
+        dispatcher (AdaptiveDispatcher): Executes the command.
+
+    Returns:
+        Dict: {'result': str, 'duration': float} or {'error': str}. A vector result is
+            written in full, as '[2, 4, 6]'.
+    """
+    command_class = command_registry.get(operation)
+    if command_class is None:
+        return {"error": f"Invalid operation type: {operation}"}
+    try:
+        values = [parse_wire_operand(operand, position) for position, operand in enumerate(operands, 1)]
+        command = command_class(*values)
+    except (InvalidOperation, TypeError) as e:
+        return {"error": f"Invalid operands for {operation}: {e}"}
+    started = time.perf_counter()
+    outcome = dispatcher.run(command)
+    if isinstance(outcome, Exception):
+        return {"error": str(outcome)}
+    if getattr(outcome, "ndim", 0):
+        from app.vector_operands import format_vector
+        outcome = format_vector(outcome, threshold=outcome.size)
+    return {"result": str(outcome), "duration": time.perf_counter() - started}
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """
+    Answers each shard request line with a line of replies.
+    """
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get("ping"):
+                    reply = {"pong": True}
+                else:
+                    replies = [execute_job(operation, operands, self.server.dispatcher)
+                               for operation, operands in request["jobs"]]
+                    reply = {"shard": request["shard"], "replies": replies}
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"error": f"Invalid cluster request: {e}"}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class ClusterWorker(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    Serves shards of calculations to coordinators over TCP.
+
+    Attributes:
+        dispatcher (AdaptiveDispatcher): Executes the calculations.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Address, dispatcher=None):
+        """
+        Binds the worker to its address. Load the plugins before serving.
+
+        Args:
+            address (Address): Host and port to listen on; port 0 picks a free port.
+            dispatcher (Optional[AdaptiveDispatcher]): Executes the calculations.
+                Defaults to a new AdaptiveDispatcher.
+        """
+        if dispatcher is None:
+            from app.dispatcher import AdaptiveDispatcher
+            dispatcher = AdaptiveDispatcher()
+        self.dispatcher = dispatcher
+        super().__init__(address, _WorkerHandler)
+
+    @property
+    def address(self) -> Address:
+        """
+        The address the worker listens on.
+        """
+        return self.server_address[:2]
+
+
+class Shard:
+    """
+    A contiguous slice of a batch, sent to one worker at a time.
+
+    Attributes:
+        first (int): Position of the first job in the batch.
+        jobs (List[Job]): The jobs.
+        attempts (int): Number of times the shard was lost.
+    """
+
+    __slots__ = ("first", "jobs", "attempts")
+
+    def __init__(self, first: int, jobs: List[Job]):
+        """
+        Initializes the Shard.
+
+        Args:
+            first (int): Position of the first job in the batch.
+            jobs (List[Job]): The jobs.
+        """
+        self.first = first
+        self.jobs = jobs
+        self.attempts = 0
+
+
+class ClusterCoordinator:
+    """
+    Runs batches of calculations on a set of ClusterWorkers.
+
+    Attributes:
+        workers (List[Address]): The worker addresses.
+        shard_size (int): Number of jobs per shard.
+        max_attempts (int): Number of times a shard is sent before its jobs fail.
+        timeout (float): Seconds to wait for a worker to connect or answer a shard.
+        stolen (int): Number of shards taken from another worker's queue in the last batch.
+        retried (int): Number of shards resent after a worker failed in the last batch.
+        lost_workers (List[Address]): Workers left out of the last batch after a failure.
+    """
+
+    def __init__(self, workers: Sequence[Address], shard_size: int = 64, max_attempts: int = 3,
+                 timeout: float = 30.0):
+        """
+        Initializes the ClusterCoordinator.
+
+        Args:
+            workers (Sequence[Address]): The worker addresses.
+            shard_size (int): Number of jobs per shard.
+            max_attempts (int): Number of times a shard is sent before its jobs fail.
+            timeout (float): Seconds to wait for a worker to connect or answer a shard.
+
+        Raises:
+            ValueError: If there are no workers or shard_size or max_attempts is not positive.
+        """
+        if not workers:
+            raise ValueError("At least one worker is required")
+        if shard_size <= 0 or max_attempts <= 0:
+            raise ValueError("shard_size and max_attempts must be positive")
+        self.workers = [tuple(address) for address in workers]
+        self.shard_size = shard_size
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.stolen = 0
+        self.retried = 0
+        self.lost_workers: List[Address] = []
+        self._condition = threading.Condition()
+        self._queues: Dict[Address, Deque[Shard]] = {}
+        self._in_flight = 0
+        self._outcomes: List = []
+        self._replies: List[Optional[Dict]] = []
+
+    def run(self, jobs: Sequence[Job], history=None) -> List:
+        """
+        Runs a batch on the workers and waits for every job.
+
+        Args:
+            jobs (Sequence[Job]): (operation, operands) pairs.
+            history (Optional[PandasFacade]): Receives a record of every successful job,
+                in batch order, once the batch is done.
+
+        Returns:
+            List: One outcome per job, in order: the result as a Decimal, or a
+                CommandError carrying the worker's error or describing the lost shard.
+        """
+        jobs = [(operation, [str(operand) for operand in operands]) for operation, operands in jobs]
+        self.stolen = self.retried = 0
+        self.lost_workers = []
+        self._outcomes = [None] * len(jobs)
+        self._replies = [None] * len(jobs)
+        self._queues = {address: deque() for address in self.workers}
+        for number, first in enumerate(range(0, len(jobs), self.shard_size)):
+            self._queues[self.workers[number % len(self.workers)]].append(Shard(first, jobs[first:first + self.shard_size]))
+        threads = [threading.Thread(target=self._drive, args=(address,), name=f"coordinator-{address[0]}:{address[1]}",
+                                    daemon=True) for address in self.workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Shards still queued had no live worker left to run them
+        for queue in self._queues.values():
+            for shard in queue:
+                self._fail(shard, "No worker left to run the job")
+        if history is not None:
+            records = [self._record(job, reply) for job, reply in zip(jobs, self._replies) if reply and "result" in reply]
+            history.add_records(records)
+        return self._outcomes
+
+    def _drive(self, address: Address) -> None:
+        """
+        Sends shards to one worker until none are left or the worker fails.
+        """
+        connection = None
+        try:
+            while True:
+                shard = self._next_shard(address)
+                if shard is None:
+                    return
+                try:
+                    if connection is None:
+                        connection = socket.create_connection(address, timeout=self.timeout)
+                        reader = connection.makefile("rb")
+                    replies = self._exchange(connection, reader, shard)
+                except (OSError, ValueError) as e:
+                    self._lose(address, shard, e)
+                    return
+                self._complete(shard, replies)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _next_shard(self, address: Address) -> Optional[Shard]:
+        """
+        Takes the next shard of a worker's queue, or steals one, or waits while shards are in flight.
+        """
+        with self._condition:
+            while True:
+                own = self._queues[address]
+                if own:
+                    shard = own.popleft()
+                else:
+                    victim = max((queue for queue in self._queues.values() if queue), key=len, default=None)
+                    if victim is None:
+                        if not self._in_flight:
+                            return None
+                        # A shard in flight elsewhere may still be lost and need a new home
+                        self._condition.wait()
+                        continue
+                    shard = victim.pop()
+                    self.stolen += 1
+                self._in_flight += 1
+                return shard
+
+    def _exchange(self, connection: socket.socket, reader, shard: Shard) -> List[Dict]:
+        """
+        Sends a shard and reads the worker's replies.
+        """
+        connection.sendall(json.dumps({"shard": shard.first, "jobs": shard.jobs}).encode() + b"\n")
+        line = reader.readline()
+        if not line:
+            raise ConnectionError("The worker closed the connection")
+        reply = json.loads(line)
+        replies = reply.get("replies") if isinstance(reply, dict) else None
+        if (not isinstance(replies, list) or len(replies) != len(shard.jobs)
+                or not all(isinstance(job_reply, dict) for job_reply in replies)):
+            raise ValueError("The worker sent a malformed reply")
+        return replies
+
+    def _complete(self, shard: Shard, replies: List[Dict]) -> None:
+        """
+        Stores the replies of a finished shard.
+        """
+        with self._condition:
+            for offset, reply in enumerate(replies):
+                position = shard.first + offset
+                self._replies[position] = reply
+                if "result" in reply:
+                    try:
+                        self._outcomes[position] = Decimal(reply["result"])
+                    except InvalidOperation:
+                        self._outcomes[position] = reply["result"]
+                else:
+                    self._outcomes[position] = CommandError(reply.get("error", "The worker sent no result"))
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _lose(self, address: Address, shard: Shard, error: Exception) -> None:
+        """
+        Leaves out a failed worker and requeues its shard on the live worker with the shortest queue.
+        """
+        logging.error(f"Cluster worker {address[0]}:{address[1]} failed: {error}")
+        with self._condition:
+            self.lost_workers.append(address)
+            shard.attempts += 1
+            live = [other for other in self.workers if other not in self.lost_workers]
+            if shard.attempts >= self.max_attempts or not live:
+                self._fail(shard, f"Shard lost after {shard.attempts} attempts: {error}")
+            else:
+                self.retried += 1
+                self._queues[min(live, key=lambda other: len(self._queues[other]))].append(shard)
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _fail(self, shard: Shard, message: str) -> None:
+        """
+        Fails every job of a shard.
+        """
+        for offset in range(len(shard.jobs)):
+            self._outcomes[shard.first + offset] = CommandError(message)
+
+    @staticmethod
+    def _record(job: Job, reply: Dict) -> Dict:
+        """
+        Builds the history record of a successful job, shaped like those of the REPL.
+
+        The worker's clock is not used: the merging process stamps the records, so hosts
+        with skewed clocks cannot reorder the history.
+        """
+        operation, operands = job
+        record = {"operation": operation, "result": reply["result"], "duration": reply.get("duration")}
+        if len(operands) == 2:
+            record["num1"], record["num2"] = operands
+        else:
+            record["numbers"] = ", ".join(operands)
+        return record
@@ -9,7 +9,23 @@ Each operation is implemented as a command that can be executed to obtain a resu
 from abc import ABC, abstractmethod
 from decimal import Decimal
 from app.command_registry import register_command
+import time
 from queue import Queue
+from typing import List, Optional, Tuple
+
+
+class CommandError(Exception):
+    """
+    Reports a command that failed with an unexpected error or whose worker died.
+
+    Unlike the exception it replaces, it can always be sent back from a worker process.
+    """
+
+
+class CommandTimeout(CommandError):
+    """
+    Reports a command that did not finish before its deadline.
+    """
 
 
 class Command(ABC):
@@ -18,8 +34,48 @@ class Command(ABC):
 
     Each command must implement the execute method, which performs the 
     required calculation and returns a Decimal result.
+
+    Commands use __slots__ instead of a per-instance __dict__. Subclasses declare
+    their operands in their own __slots__; the base only reserves '_result', which
+    stays unset until the result property first executes the command.
     """
 
+    __slots__ = ("_result",)
+
+    # Number of elements from which an array result is returned through shared memory
+    SHARED_RESULT_SIZE = 10_000
+
+    # Where the AdaptiveDispatcher runs this command: 'inline', 'thread' or 'process'.
+    # None lets the dispatcher decide from the measured cost of earlier runs.
+    execution_mode: Optional[str] = None
+
+    # Seconds this command may run before its worker is replaced, or None for the dispatcher default
+    timeout: Optional[float] = None
+
+    @property
+    def result(self) -> Decimal:
+        """
+        The result of the command, executed on first access and then memoized.
+
+        Returns:
+            Decimal: The result of the command's execution.
+        """
+        try:
+            return self._result
+        except AttributeError:
+            self._result = self.execute()
+            return self._result
+
+    @property
+    def input_size(self) -> int:
+        """
+        The size of the command's input, which its execution time is assumed to grow with.
+
+        Returns:
+            int: The number of operands.
+        """
+        return 2
+
     @abstractmethod
     def execute(self) -> Decimal:
         """
@@ -33,25 +89,223 @@ class Command(ABC):
         """
         raise NotImplementedError("Each command must implement the execute method.")
 
-    def execute_in_process(self, result_queue: Queue) -> None:
+    def outcome(self):
+        """
+        Executes the command, returning errors instead of raising them.
+
+        Returns:
+            The result; the ValueError or ZeroDivisionError the command raised; or a
+            CommandError describing any other exception.
+        """
+        try:
+            return self.result
+        except (ValueError, ZeroDivisionError) as e:
+            return e
+        except Exception as e:
+            return CommandError(f"{type(self).__name__} failed: {type(e).__name__}: {e}")
+
+    def report(self, timed: bool = False):
+        """
+        Executes the command in a worker and returns what to send back to the parent.
+
+        Large NumPy results are placed in shared memory and only their handle is returned;
+        the parent unwraps it with receive_result.
+
+        Args:
+            timed (bool): Return a (result, seconds) pair with the execution time instead.
+
+        Returns:
+            The outcome of the command, or a (outcome, seconds) pair.
+        """
+        started = time.perf_counter()
+        result = self.outcome()
+        if getattr(result, "size", 0) >= self.SHARED_RESULT_SIZE:
+            from app.shared_operands import SharedArray
+            result = SharedArray.create(result)
+            result.close()
+        return (result, time.perf_counter() - started) if timed else result
+
+    def execute_in_process(self, result_queue: Queue, timed: bool = False) -> None:
         """
         Executes the command and places the result in the result queue.
 
+        Every exception is caught, so the queue always receives exactly one item; see
+        outcome and report for what it holds.
+
         Args:
             result_queue (Queue): The queue to place the result or error.
+            timed (bool): Queue a (result, seconds) pair with the execution time instead.
         """
-        try:
-            result = self.execute()
-            result_queue.put(result)
-        except (ValueError, ZeroDivisionError) as e:
-            result_queue.put(e)
+        result_queue.put(self.report(timed))
+
+    @staticmethod
+    def receive_result(result):
+        """
+        Unwraps a value taken from the result queue of execute_in_process.
+
+        Args:
+            result: The queued result, error or shared memory handle.
+
+        Returns:
+            The result, with shared results copied out of their released block.
+        """
+        from app.shared_operands import SharedArray
+        return result.take() if isinstance(result, SharedArray) else result
+
+
+class VariadicCommand(Command):
+    """
+    Base class for commands taking any number of Decimal operands, such as mean or mode.
+
+    The operands can be moved into shared memory with share_operands before the command
+    is sent to a worker process, so only a small handle is pickled instead of every
+    Decimal. Subclasses read the operands through numbers, operand_floats or operand_sum.
+
+    Attributes:
+        numbers (Sequence[Decimal]): The operands, a tuple or SharedOperands.
+    """
+
+    __slots__ = ("numbers",)
+
+    def __init__(self, *numbers: Decimal):
+        """
+        Initializes the command with its operands.
+
+        Args:
+            numbers (Decimal): The operands.
+        """
+        self.numbers = numbers
+
+    @property
+    def input_size(self) -> int:
+        """
+        The number of operands.
+        """
+        return len(self.numbers)
+
+    def share_operands(self, threshold: Optional[int] = None) -> bool:
+        """
+        Moves the operands into a shared memory block owned by the calling process.
+
+        Args:
+            threshold (Optional[int]): Minimum number of operands worth sharing.
+                Defaults to SHARED_MEMORY_THRESHOLD.
+
+        Returns:
+            bool: True if the operands are now shared, False if they stay a tuple because
+                there are too few or they cannot be represented exactly.
+        """
+        from app.shared_operands import SHARED_MEMORY_THRESHOLD, SharedOperands
+        if not isinstance(self.numbers, tuple):
+            return True
+        if len(self.numbers) < (SHARED_MEMORY_THRESHOLD if threshold is None else threshold):
+            return False
+        shared = SharedOperands.create(self.numbers)
+        if shared is None:
+            return False
+        self.numbers = shared
+        return True
+
+    def release_operands(self) -> None:
+        """
+        Destroys the shared memory block of shared operands. Call it after the workers are done.
+        """
+        if not isinstance(self.numbers, tuple):
+            self.numbers.release()
+
+    def operand_floats(self) -> List[float]:
+        """
+        Returns the operands as floats.
+
+        Returns:
+            List[float]: The operands, read from shared memory without materializing Decimals when shared.
+        """
+        if isinstance(self.numbers, tuple):
+            return [float(number) for number in self.numbers]
+        return self.numbers.floats().tolist()
+
+    def operand_sum(self) -> Decimal:
+        """
+        Returns the sum of the operands.
+
+        Returns:
+            Decimal: The sum, computed on integer mantissas when the operands are shared.
+        """
+        if isinstance(self.numbers, tuple):
+            return sum(self.numbers)
+        return self.numbers.exact_sum()
+
+
+def is_vector(value: object) -> bool:
+    """
+    Returns whether an operand is a vector: a list, a tuple or an array such as a NumPy array.
+    """
+    return isinstance(value, (list, tuple)) or getattr(value, "ndim", 0) > 0
 
 
-class AddCommand(Command):
+class BinaryCommand(Command):
     """
-    Command to perform addition of two Decimal values.
+    Base class for the arithmetic commands taking two operands.
+
+    Each operand is a Decimal or a vector: a list, a tuple or a NumPy array. Two Decimals
+    are combined exactly; otherwise the operation is applied element-wise with
+    broadcasting by app.vector_operands, and the result is a NumPy array.
+
+    Subclasses name their operand slots in OPERANDS and their element-wise operation
+    ('add', 'subtract', 'multiply' or 'divide') in OPERATION.
     """
 
+    __slots__ = ()
+
+    OPERANDS = ("operand1", "operand2")
+    OPERATION: Optional[str] = None
+
+    @property
+    def operands(self) -> Tuple:
+        """
+        The two operands, in order.
+        """
+        return tuple(getattr(self, name) for name in self.OPERANDS)
+
+    @property
+    def vectorized(self) -> bool:
+        """
+        Whether either operand is a vector.
+        """
+        return any(is_vector(operand) for operand in self.operands)
+
+    @property
+    def input_size(self) -> int:
+        """
+        The number of elements of the larger operand, or 2 for two scalars.
+        """
+        sizes = [getattr(operand, "size", None) or (len(operand) if isinstance(operand, (list, tuple)) else 1)
+                 for operand in self.operands]
+        return max(2, *sizes)
+
+    def elementwise(self):
+        """
+        Applies the operation element-wise to vector operands.
+
+        Returns:
+            np.ndarray: The element-wise results.
+
+        Raises:
+            ValueError: If an element is not a number, the shapes do not broadcast, or a
+                divisor element is zero.
+        """
+        from app.vector_operands import elementwise
+        return elementwise(self.OPERATION, *self.operands)
+
+
+class AddCommand(BinaryCommand):
+    """
+    Command to perform addition of two Decimal values, or element-wise addition of vectors.
+    """
+
+    __slots__ = ("operand1", "operand2")
+    OPERATION = "add"
+
     def __init__(self, operand1: Decimal, operand2: Decimal) -> None:
         """
         Initializes the AddCommand with two Decimal operands.
@@ -68,18 +322,23 @@ class AddCommand(Command):
         Executes the addition operation.
 
         Returns:
-            Decimal: The sum of operand1 and operand2.
+            Decimal: The sum of operand1 and operand2, or an array of sums for vectors.
         """
+        if self.vectorized:
+            return self.elementwise()
         return self.operand1 + self.operand2
 
 register_command("add", AddCommand)
 
 
-class SubtractCommand(Command):
+class SubtractCommand(BinaryCommand):
     """
-    Command to perform subtraction of two Decimal values.
+    Command to perform subtraction of two Decimal values, or element-wise subtraction of vectors.
     """
 
+    __slots__ = ("operand1", "operand2")
+    OPERATION = "subtract"
+
     def __init__(self, operand1: Decimal, operand2: Decimal) -> None:
         """
         Initializes the SubtractCommand with two Decimal operands.
@@ -96,18 +355,23 @@ class SubtractCommand(Command):
         Executes the subtraction operation.
 
         Returns:
-            Decimal: The result of subtracting operand2 from operand1.
+            Decimal: The result of subtracting operand2 from operand1, or an array of differences for vectors.
         """
+        if self.vectorized:
+            return self.elementwise()
         return self.operand1 - self.operand2
 
 register_command("subtract", SubtractCommand)
 
 
-class MultiplyCommand(Command):
+class MultiplyCommand(BinaryCommand):
     """
-    Command to perform multiplication of two Decimal values.
+    Command to perform multiplication of two Decimal values, or element-wise multiplication of vectors.
     """
 
+    __slots__ = ("operand1", "operand2")
+    OPERATION = "multiply"
+
     def __init__(self, operand1: Decimal, operand2: Decimal) -> None:
         """
         Initializes the MultiplyCommand with two Decimal operands.
@@ -124,18 +388,23 @@ class MultiplyCommand(Command):
         Executes the multiplication operation.
 
         Returns:
-            Decimal: The product of operand1 and operand2.
+            Decimal: The product of operand1 and operand2, or an array of products for vectors.
         """
+        if self.vectorized:
+            return self.elementwise()
         return self.operand1 * self.operand2
 
 register_command("multiply", MultiplyCommand)
 
 
-class DivideCommand(Command):
+class DivideCommand(BinaryCommand):
     """
-    Command to perform division of two Decimal values.
+    Command to perform division of two Decimal values, or element-wise division of vectors.
     """
 
+    __slots__ = ("operand1", "operand2")
+    OPERATION = "divide"
+
     def __init__(self, operand1: Decimal, operand2: Decimal) -> None:
         """
         Initializes the DivideCommand with two Decimal operands.
@@ -152,11 +421,13 @@ class DivideCommand(Command):
         Executes the division operation.
 
         Returns:
-            Decimal: The result of dividing operand1 by operand2.
+            Decimal: The result of dividing operand1 by operand2, or an array of quotients for vectors.
 
         Raises:
             ValueError: If division by zero is attempted.
         """
+        if self.vectorized:
+            return self.elementwise()
         if self.operand2 == 0:
             raise ValueError("Cannot divide by zero")
         return self.operand1 / self.operand2
@@ -0,0 +1,133 @@
+"""
+This module defines the CalculatorDaemon class and the forward_to_daemon client function.
+
+The daemon is a long-lived process that keeps the command registry, the plugins and the
+calculation history loaded and serves calculations over a Unix domain socket, so short
+command-line invocations can skip the expensive startup work. Requests and replies are
+single lines of JSON: the client sends {"args": [...]} and receives {"output": "..."}.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from typing import Callable, List, Optional
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "calculator.sock")
+
+
+def socket_path_from_environment() -> str:
+    """
+    Returns the daemon socket path from CALCULATOR_SOCKET, or the default path.
+
+    Returns:
+        str: Path of the Unix domain socket.
+    """
+    return os.getenv("CALCULATOR_SOCKET") or DEFAULT_SOCKET_PATH
+
+
+def forward_to_daemon(args: List[str], socket_path: Optional[str] = None, timeout: float = 30.0) -> Optional[str]:
+    """
+    Sends a calculation to a running daemon and returns its printed output.
+
+    Args:
+        args (List[str]): The command-line arguments describing the calculation.
+        socket_path (Optional[str]): Path of the daemon socket. Defaults to socket_path_from_environment().
+        timeout (float): Seconds to wait for the daemon's reply.
+
+    Returns:
+        Optional[str]: The daemon's output, or None if no daemon is listening.
+    """
+    socket_path = socket_path or socket_path_from_environment()
+    if not os.path.exists(socket_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall(json.dumps({"args": args}).encode() + b"\n")
+            with client.makefile("rb") as reply:
+                line = reply.readline()
+    except OSError:
+        # Refused, vanished or timed out: behave as if no daemon were running
+        return None
+    if not line:
+        return None
+    return json.loads(line)["output"]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads JSON requests line by line and answers each with the handler's output.
+    """
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                args = json.loads(line)["args"]
+                output = self.server.run_calculation(args)
+            except (ValueError, KeyError, TypeError) as e:
+                output = f"Invalid daemon request: {e}\n"
+            self.wfile.write(json.dumps({"output": output}).encode() + b"\n")
+
+
+class CalculatorDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves calculations over a Unix domain socket.
+
+    Connections are accepted on separate threads, but calculations run one at a time
+    because the handler captures what the calculation prints.
+
+    Attributes:
+        socket_path (str): Path of the Unix domain socket.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, handler: Callable[[List[str]], str], socket_path: Optional[str] = None):
+        """
+        Binds the daemon to its socket, replacing a stale socket file left by a dead daemon.
+
+        Args:
+            handler (Callable[[List[str]], str]): Runs a calculation from command-line
+                arguments and returns the text it printed.
+            socket_path (Optional[str]): Path of the socket. Defaults to socket_path_from_environment().
+
+        Raises:
+            RuntimeError: If another daemon is already listening on the socket.
+        """
+        self.socket_path = socket_path or socket_path_from_environment()
+        self._handler = handler
+        self._handler_lock = threading.Lock()
+        if os.path.exists(self.socket_path):
+            if forward_to_daemon(["ping"], self.socket_path, timeout=1.0) is not None:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            os.remove(self.socket_path)
+        super().__init__(self.socket_path, _RequestHandler)
+
+    def run_calculation(self, args: List[str]) -> str:
+        """
+        Runs one calculation through the handler.
+
+        Args:
+            args (List[str]): The command-line arguments describing the calculation.
+
+        Returns:
+            str: The text printed by the calculation.
+        """
+        if args == ["ping"]:
+            return "pong\n"
+        with self._handler_lock:
+            return self._handler(args)
+
+    def server_close(self) -> None:
+        """
+        Closes the socket and removes the socket file.
+        """
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        logging.info(f"Daemon on {self.socket_path} stopped.")
@@ -0,0 +1,324 @@
+"""
+This module defines the AdaptiveDispatcher class, which decides per command whether to
+execute it inline, on a worker thread or in a separate process.
+
+Starting a process costs milliseconds, which dwarfs a two-operand addition but is
+worth paying for a long standard deviation that would otherwise hold up the caller. The
+dispatcher measures how long each command class takes per unit of input and picks the
+cheapest mode that fits the estimated cost of the next run. A command class can pin its
+mode with the execution_mode class attribute, and a dispatcher can pin it with override.
+
+Process runs go to a WorkerSupervisor, which enforces deadlines by replacing the worker.
+A thread cannot be stopped, so a thread run that misses its deadline is abandoned and
+reported as a CommandTimeout, and its command class runs in a process from then on.
+"""
+
+import concurrent.futures
+import contextvars
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Optional, Set
+
+from app.command import Command, CommandTimeout
+from app.supervisor import WorkerSupervisor
+from app.tracing import tracer
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+MODES = (INLINE, THREAD, PROCESS)
+
+
+class OperationCost:
+    """
+    Running estimate of how long one command class takes per unit of input.
+
+    Attributes:
+        samples (int): Number of executions observed.
+        seconds_per_unit (float): Exponentially weighted mean execution time per input unit.
+    """
+
+    __slots__ = ("samples", "seconds_per_unit")
+
+    def __init__(self):
+        """
+        Initializes an OperationCost with no observations.
+        """
+        self.samples = 0
+        self.seconds_per_unit = 0.0
+
+    def observe(self, size: int, seconds: float, smoothing: float) -> None:
+        """
+        Folds one execution into the estimate.
+
+        Args:
+            size (int): The input size of the execution.
+            seconds (float): How long the execution took.
+            smoothing (float): Weight of the new observation, between 0 and 1.
+        """
+        rate = seconds / max(size, 1)
+        if self.samples:
+            self.seconds_per_unit += smoothing * (rate - self.seconds_per_unit)
+        else:
+            self.seconds_per_unit = rate
+        self.samples += 1
+
+    def estimate(self, size: int) -> float:
+        """
+        Returns the expected execution time for an input size.
+
+        Args:
+            size (int): The input size.
+
+        Returns:
+            float: The expected number of seconds.
+        """
+        return self.seconds_per_unit * max(size, 1)
+
+
+class AdaptiveDispatcher:
+    """
+    Executes commands inline, on a thread or in a separate process, according to
+    their measured cost.
+
+    Commands expected to finish within inline_limit run inline, since handing them to a
+    thread would cost more than the work. Commands expected to take longer than
+    process_limit run in a separate process, where they cannot hold the interpreter lock
+    of the caller; the rest run on a worker thread. Until a command class has been
+    observed, inputs of up to UNMEASURED_INLINE_SIZE run inline and larger ones on a
+    thread; when a deadline applies they all start on a thread, since an inline run
+    cannot be abandoned.
+
+    Attributes:
+        inline_limit (float): Expected seconds below which a command runs inline.
+        process_limit (float): Expected seconds above which a command runs in a process.
+        smoothing (float): Weight of each new observation in the cost estimates.
+        costs (Dict[type, OperationCost]): Cost estimate per command class.
+        overrides (Dict[type, str]): Execution mode forced per command class.
+        timeout (Optional[float]): Deadline of commands that do not set their own timeout.
+        isolated (Set[type]): Command classes that missed a deadline on a thread and now
+            always run in a process, unless overridden.
+        supervisor (WorkerSupervisor): Runs the commands executed in a process.
+    """
+
+    # Largest input that runs inline before its command class has been measured
+    UNMEASURED_INLINE_SIZE = 1000
+
+    def __init__(self, inline_limit: float = 0.005, process_limit: float = 0.5, smoothing: float = 0.2,
+                 timeout: Optional[float] = None,
+                 supervisor: Optional[WorkerSupervisor] = None):
+        """
+        Initializes the AdaptiveDispatcher.
+
+        Args:
+            inline_limit (float): Expected seconds below which a command runs inline.
+            process_limit (float): Expected seconds above which a command runs in a process.
+            smoothing (float): Weight of each new observation, between 0 (excluded) and 1.
+            timeout (Optional[float]): Deadline in seconds of commands without a timeout of
+                their own, or None for no deadline.
+            supervisor (Optional[WorkerSupervisor]): Runs process executions. Defaults to a
+                new WorkerSupervisor.
+
+        Raises:
+            ValueError: If the limits are not increasing or smoothing is out of range.
+        """
+        if not 0 <= inline_limit <= process_limit:
+            raise ValueError("inline_limit must be between 0 and process_limit")
+        if not 0 < smoothing <= 1:
+            raise ValueError("smoothing must be in (0, 1]")
+        self.inline_limit = inline_limit
+        self.process_limit = process_limit
+        self.smoothing = smoothing
+        self.costs: Dict[type, OperationCost] = {}
+        self.overrides: Dict[type, str] = {}
+        self.timeout = timeout
+        self.isolated: Set[type] = set()
+        self.supervisor = supervisor or WorkerSupervisor()
+        self._lock = threading.Lock()
+        self._chosen = threading.local()
+
+    @property
+    def last_mode(self) -> Optional[str]:
+        """
+        The execution mode of the last command submitted from the calling thread, or None.
+        """
+        return getattr(self._chosen, "mode", None)
+
+    @last_mode.setter
+    def last_mode(self, mode: Optional[str]) -> None:
+        self._chosen.mode = mode
+
+    def override(self, command_class: type, mode: Optional[str]) -> None:
+        """
+        Forces the execution mode of a command class, or lets the dispatcher decide again.
+
+        Args:
+            command_class (type): The command class.
+            mode (Optional[str]): 'inline', 'thread', 'process', or None to remove the override.
+
+        Raises:
+            ValueError: If mode is not a known execution mode.
+        """
+        if mode is None:
+            self.overrides.pop(command_class, None)
+            return
+        if mode not in MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+        self.overrides[command_class] = mode
+
+    def choose(self, command: Command, timeout: Optional[float] = None) -> str:
+        """
+        Picks the execution mode of a command.
+
+        Args:
+            command (Command): The command to execute.
+            timeout (Optional[float]): Deadline in seconds overriding the command's own.
+
+        Returns:
+            str: 'inline', 'thread' or 'process'.
+        """
+        mode = self.overrides.get(type(command)) or command.execution_mode
+        if mode is not None:
+            return mode
+        if type(command) in self.isolated:
+            return PROCESS
+        size = command.input_size
+        cost = self.costs.get(type(command))
+        if cost is None or not cost.samples:
+            unbounded = self.deadline(command, timeout) is None
+            return INLINE if unbounded and size <= self.UNMEASURED_INLINE_SIZE else THREAD
+        estimate = cost.estimate(size)
+        if estimate < self.inline_limit:
+            return INLINE
+        return PROCESS if estimate > self.process_limit else THREAD
+
+    def deadline(self, command: Command, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Returns the seconds a command may run.
+
+        Args:
+            command (Command): The command to execute.
+            timeout (Optional[float]): Deadline in seconds overriding the command's own.
+
+        Returns:
+            Optional[float]: timeout if given, else the command's own timeout, else the
+                dispatcher's, or None for no deadline.
+        """
+        if timeout is not None:
+            return timeout
+        return command.timeout if command.timeout is not None else self.timeout
+
+    def observe(self, command: Command, seconds: float) -> None:
+        """
+        Records how long a command took to execute.
+
+        Args:
+            command (Command): The executed command.
+            seconds (float): Its execution time, excluding any dispatch overhead.
+        """
+        with self._lock:
+            cost = self.costs.setdefault(type(command), OperationCost())
+            cost.observe(command.input_size, seconds, self.smoothing)
+
+    def submit(self, command: Command, timeout: Optional[float] = None) -> Future:
+        """
+        Starts executing a command in the mode chosen for it.
+
+        Errors the command raises become the result of the future, as returned by
+        Command.outcome. Process runs resolve to a CommandTimeout at their deadline; thread
+        runs are only abandoned by run.
+
+        Args:
+            command (Command): The command to execute.
+            timeout (Optional[float]): Deadline in seconds overriding the command's own.
+
+        Returns:
+            Future: Resolves to the result of the command or the error it reported.
+        """
+        with tracer.span("dispatch.choose"):
+            mode = self.last_mode = self.choose(command, timeout)
+        if mode == INLINE:
+            future = Future()
+            try:
+                future.set_result(self._run_here(command))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if mode == PROCESS:
+            return self._start_thread(self._run_in_process, command, self.deadline(command, timeout))
+        return self._start_thread(self._run_here, command)
+
+    def run(self, command: Command, timeout: Optional[float] = None):
+        """
+        Executes a command in the mode chosen for it and waits for the outcome, at most
+        until its deadline plus the supervisor's grace period.
+
+        Args:
+            command (Command): The command to execute.
+            timeout (Optional[float]): Deadline in seconds overriding the command's own.
+
+        Returns:
+            The outcome of the command, as returned by Command.outcome, or a CommandTimeout.
+        """
+        deadline = self.deadline(command, timeout)
+        try:
+            with tracer.span("dispatcher.run"):
+                future = self.submit(command, timeout)
+                return future.result(None if deadline is None else deadline + self.supervisor.grace)
+        except concurrent.futures.TimeoutError:
+            self.observe(command, deadline)
+            self.isolated.add(type(command))
+            return CommandTimeout(f"{type(command).__name__} did not finish within {deadline} seconds")
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes. Running thread executions are not waited for.
+        """
+        self.supervisor.shutdown()
+
+    @staticmethod
+    def _start_thread(target, command: Command, *args) -> Future:
+        """
+        Runs target(command, *args) on a new daemon thread, so an abandoned execution cannot
+        keep the interpreter from exiting as a ThreadPoolExecutor thread would. The thread
+        runs in a copy of the caller's context, so it stays part of the caller's trace.
+        """
+        future = Future()
+        context = contextvars.copy_context()
+
+        def work():
+            try:
+                future.set_result(target(command, *args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=context.run, args=(work,), name=f"dispatch-{type(command).__name__}",
+                         daemon=True).start()
+        return future
+
+    def _run_here(self, command: Command):
+        """
+        Executes a command on the calling thread and records its cost.
+        """
+        started = time.perf_counter()
+        try:
+            with tracer.span("command.execute", command=type(command).__name__):
+                return command.outcome()
+        finally:
+            self.observe(command, time.perf_counter() - started)
+
+    def _run_in_process(self, command: Command, timeout: Optional[float]):
+        """
+        Executes a command in a supervised worker process and records the cost it reports.
+        """
+        share = getattr(command, "share_operands", None)
+        with tracer.span("operands.share"):
+            shared = share() if share is not None else False
+        try:
+            result, seconds = self.supervisor.run(command, timeout)
+        finally:
+            if shared:
+                command.release_operands()
+        self.observe(command, seconds)
+        return result
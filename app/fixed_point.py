@@ -0,0 +1,505 @@
+"""
+This module defines the FixedPointColumn class, which stores a numeric history column as
+scaled 64-bit integers sharing one decimal exponent per column, and the OverflowColumn class,
+which keeps the values that cannot be represented exactly at that exponent as packed text.
+The exponent each value was written with is kept beside its mantissa as an int8, so a value
+reads back with the same digits however far the column scale has risen since.
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+INT64_MAX = int(np.iinfo(np.int64).max)
+
+# Plain decimal notation: sign, integer digits, fraction digits and exponent. Text that Decimal
+# accepts in other forms (underscores, non-ASCII digits) does not match and is kept as overflow.
+_NUMBER_PATTERN = r"^([+-]?)(\d*)(?:\.(\d*))?(?:[eE]([+-]?\d{1,9}))?$"
+
+
+def parse_decimal(value: object) -> Optional[Decimal]:
+    """
+    Converts a stored history value to a Decimal.
+
+    Args:
+        value (object): A Decimal, number, numeric string or missing marker.
+
+    Returns:
+        Optional[Decimal]: The parsed value, or None if the value is missing.
+
+    Raises:
+        InvalidOperation: If the value is not numeric.
+    """
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, Decimal):
+        return value
+    text = str(value).strip()
+    if not text or text.lower() == "nan":
+        return None
+    return Decimal(text)
+
+
+def parse_number(value: object) -> object:
+    """
+    Returns a stored value as a Decimal where it is numeric, or unchanged otherwise.
+
+    Args:
+        value (object): A value read from an overflow table or from text.
+
+    Returns:
+        object: The Decimal value, NaN for missing values, or the original value.
+    """
+    try:
+        number = parse_decimal(value)
+    except (InvalidOperation, ValueError, TypeError):
+        return value
+    return np.nan if number is None else number
+
+
+class _ParsedValues:
+    """
+    A batch of values split into the parts of their decimal text, one array entry per value.
+
+    Attributes:
+        text (pd.Series): The stripped text of each value.
+        missing (np.ndarray): Whether the value is missing.
+        numeric (np.ndarray): Whether the value is a finite number in plain decimal notation.
+        negative (np.ndarray): Whether the value has a minus sign.
+        digits (pd.Series): The significant digits without leading zeros, '0' for zero.
+        places (np.ndarray): The decimal places the value needs; negative for trailing zeros
+            written as an exponent.
+    """
+
+    def __init__(self, values: Sequence[object]):
+        """
+        Parses the values.
+
+        Args:
+            values (Sequence[object]): Decimal values, numbers, text or missing markers.
+        """
+        series = pd.Series(list(values) if not isinstance(values, pd.Series) else values.to_numpy(),
+                           dtype=object)
+        self.missing = series.isna().to_numpy()
+        self.text = series.astype(str).str.strip()
+        self.missing |= ((self.text == "") | (self.text.str.lower() == "nan")).to_numpy()
+        parts = self.text.str.extract(_NUMBER_PATTERN)
+        integer, fraction = parts[1].fillna(""), parts[2].fillna("")
+        self.numeric = (parts[0].notna() & ((integer.str.len() + fraction.str.len()) > 0)).to_numpy() & ~self.missing
+        self.negative = (parts[0] == "-").to_numpy()
+        self.digits = (integer + fraction).str.lstrip("0").replace("", "0")
+        exponent = pd.to_numeric(parts[3], errors="coerce").fillna(0).to_numpy(dtype="int64")
+        self.places = fraction.str.len().to_numpy(dtype="int64") - exponent
+
+    def wanted_places(self, limit: int) -> np.ndarray:
+        """
+        Returns the decimal places of the numeric values that need no more than limit.
+        """
+        places = np.maximum(self.places[self.numeric], 0)
+        return places[places <= limit]
+
+
+class FixedPointColumn:
+    """
+    Codec for one numeric column stored as scaled int64 mantissas.
+
+    A value v is stored as the integer v * 10**scale. The scale only grows, and only as far
+    as the existing mantissas still fit in int64; values needing more decimal places than
+    MAX_SCALE, non-finite values, non-numeric values and values too large for int64 are
+    returned as overflow for the caller to keep verbatim. Alongside the mantissas the caller
+    keeps the exponent of each value as written ('3' has 0, '1.50' has -2), which decode
+    uses to restore the value's own form rather than the column scale's.
+
+    Values are encoded from their decimal text in whole-batch string and array operations,
+    so the cost per value does not include building a Decimal.
+
+    Attributes:
+        scale (int): Number of decimal places shared by every mantissa in the column.
+    """
+
+    # Upper bound on the column scale so one high-precision value cannot force every
+    # other value of the column into overflow
+    MAX_SCALE = 8
+
+    def __init__(self, scale: int = 0):
+        """
+        Initializes the FixedPointColumn.
+
+        Args:
+            scale (int): Starting number of decimal places.
+        """
+        self.scale = scale
+
+    def encode(self, existing: pd.Series,
+               values: Sequence[object]) -> Tuple[pd.Series, pd.Series, np.ndarray, pd.Series]:
+        """
+        Encodes a batch of values, raising the column scale first if the batch needs it.
+
+        Args:
+            existing (pd.Series): The column's current Int64 mantissas.
+            values (Sequence[object]): The new values in append order.
+
+        Returns:
+            Tuple[pd.Series, pd.Series, np.ndarray, pd.Series]: The existing mantissas rescaled
+                to the new scale, the Int64 mantissas of the batch (NA for missing and overflow
+                values), the int8 exponents of the batch, and the exact text of the overflow
+                values indexed by their position in the batch.
+        """
+        parsed = _ParsedValues(values)
+        wanted = parsed.wanted_places(self.MAX_SCALE)
+        existing = self._rescale(existing, max(self.scale, int(wanted.max()) if len(wanted) else 0))
+        return (existing, *self._encode_parsed(parsed))
+
+    def encode_fixed(self, values: Sequence[object]) -> Tuple[pd.Series, np.ndarray, pd.Series]:
+        """
+        Encodes a batch of values at the current scale, which is never changed.
+
+        Args:
+            values (Sequence[object]): The values in order.
+
+        Returns:
+            Tuple[pd.Series, np.ndarray, pd.Series]: The Int64 mantissas of the batch (NA for
+                missing and overflow values), their int8 exponents, and the exact text of the
+                overflow values indexed by their position in the batch.
+        """
+        return self._encode_parsed(_ParsedValues(values))
+
+    @classmethod
+    def required_scale(cls, values: Sequence[object]) -> Tuple[int, int]:
+        """
+        Measures the decimal places and magnitude a batch of values needs.
+
+        Args:
+            values (Sequence[object]): The values to inspect. Non-numeric values are ignored.
+
+        Returns:
+            Tuple[int, int]: The most decimal places of any value, capped at MAX_SCALE, and the
+                largest absolute integer part of any value that fits in int64 at all.
+        """
+        parsed = _ParsedValues(values)
+        wanted = parsed.wanted_places(cls.MAX_SCALE)
+        places = int(wanted.max()) if len(wanted) else 0
+        # Values too large for int64 overflow at any scale, so they must not lower it; of the
+        # rest, only the values with the most integer digits can hold the largest integer part
+        widths = parsed.digits.str.len().to_numpy() - parsed.places
+        widths = np.where(parsed.numeric & (widths <= len(str(INT64_MAX))), widths, -1)
+        widest = np.flatnonzero(widths == widths.max()) if len(widths) and widths.max() >= 0 else []
+        largest = max((abs(int(Decimal(parsed.text.iat[position]))) for position in widest), default=0)
+        return places, largest
+
+    @staticmethod
+    def scale_for(places: int, largest: int) -> int:
+        """
+        Picks the largest scale up to places at which largest still fits in int64.
+
+        Args:
+            places (int): The decimal places wanted.
+            largest (int): The largest absolute integer part to represent.
+
+        Returns:
+            int: The chosen scale.
+        """
+        while places > 0 and (largest + 1) * 10 ** places > INT64_MAX:
+            places -= 1
+        return places
+
+    def decode(self, mantissas: pd.Series, exponents: Optional[np.ndarray] = None) -> List[object]:
+        """
+        Decodes mantissas back to Decimal values.
+
+        Args:
+            mantissas (pd.Series): Int64 mantissas of this column.
+            exponents (Optional[np.ndarray]): The exponent of each value as written. Without
+                them every value is decoded with the column scale's exponent.
+
+        Returns:
+            List[object]: Decimal values, with NaN where the mantissa is missing.
+        """
+        if exponents is None:
+            return [np.nan if mantissa is pd.NA else Decimal(int(mantissa)).scaleb(-self.scale)
+                    for mantissa in mantissas]
+        # Drop the trailing zeros the column scale added below each value's own exponent
+        shifts = np.clip(self.scale + np.asarray(exponents, dtype="int64"), 0, 18)
+        significands = mantissas.to_numpy(dtype="int64", na_value=0) // np.power(10, shifts, dtype="int64")
+        missing = mantissas.isna().to_numpy()
+        return [np.nan if absent else Decimal(int(significand)).scaleb(int(shift) - self.scale)
+                for absent, significand, shift in zip(missing, significands, shifts)]
+
+    def to_float(self, mantissas: pd.Series) -> np.ndarray:
+        """
+        Converts mantissas to floats without materializing Decimal objects.
+
+        Args:
+            mantissas (pd.Series): Int64 mantissas of this column.
+
+        Returns:
+            np.ndarray: float64 values, with NaN where the mantissa is missing.
+        """
+        return mantissas.to_numpy(dtype="float64", na_value=np.nan) / (10 ** self.scale)
+
+    def rescale_to(self, mantissas: pd.Series, scale: int,
+                   exponents: Optional[np.ndarray] = None) -> Tuple[pd.Series, pd.Series]:
+        """
+        Converts mantissas of this column to another scale, which becomes the column's scale.
+
+        Args:
+            mantissas (pd.Series): Int64 mantissas at the current scale.
+            scale (int): The new scale.
+            exponents (Optional[np.ndarray]): The exponent of each value as written, used to
+                give the values that no longer fit their exact text.
+
+        Returns:
+            Tuple[pd.Series, pd.Series]: The Int64 mantissas at the new scale (NA for missing
+                values and values that no longer fit), and the exact text of the values that
+                no longer fit indexed by position.
+        """
+        values = mantissas.to_numpy(dtype="int64", na_value=0)
+        present = mantissas.notna().to_numpy()
+        if scale >= self.scale:
+            factor = 10 ** (scale - self.scale)
+            fits = np.abs(values) <= INT64_MAX // factor
+            rescaled = np.where(fits, values, 0) * factor
+        else:
+            factor = 10 ** (self.scale - scale)
+            fits = values % factor == 0
+            rescaled = values // factor
+        lost = np.flatnonzero(present & ~fits)
+        texts = self.decode(mantissas.iloc[lost], None if exponents is None else np.asarray(exponents)[lost])
+        overflow = pd.Series([str(text) for text in texts], index=lost, dtype=object)
+        self.scale = scale
+        return pd.Series(pd.arrays.IntegerArray(rescaled, ~(present & fits))), overflow
+
+    def _rescale(self, existing: pd.Series, wanted_scale: int) -> pd.Series:
+        """
+        Raises the scale towards wanted_scale as far as the existing mantissas allow.
+
+        Args:
+            existing (pd.Series): The column's current Int64 mantissas.
+            wanted_scale (int): The scale the next batch would like.
+
+        Returns:
+            pd.Series: The existing mantissas at the new scale.
+        """
+        if wanted_scale <= self.scale:
+            return existing
+        largest = int(existing.abs().max()) if existing.notna().any() else 0
+        while wanted_scale > self.scale and largest * 10 ** (wanted_scale - self.scale) > INT64_MAX:
+            wanted_scale -= 1
+        if wanted_scale > self.scale:
+            existing = existing * (10 ** (wanted_scale - self.scale))
+            self.scale = wanted_scale
+        return existing
+
+    def _encode_parsed(self, parsed: _ParsedValues) -> Tuple[pd.Series, np.ndarray, pd.Series]:
+        """
+        Computes the mantissas of parsed values at the current scale.
+
+        Args:
+            parsed (_ParsedValues): The batch to encode.
+
+        Returns:
+            Tuple[pd.Series, np.ndarray, pd.Series]: The Int64 mantissas, the int8 exponents
+                (0 where there is no mantissa) and the text of the values that did not fit,
+                indexed by position.
+        """
+        shift = self.scale - parsed.places
+        zero = (parsed.digits == "0").to_numpy()
+        width = np.where(zero, 1, parsed.digits.str.len().to_numpy() + shift)
+        # A zero fits at any exponent, but only exponents up to 18 are kept beside the mantissas
+        candidates = parsed.numeric & (shift >= 0) & (parsed.places >= -18)
+        # Up to 18 digits always fit in int64; 19 digits only sometimes
+        fits = candidates & (width <= 18)
+        mantissas = np.zeros(len(shift), dtype="int64")
+        positions = np.flatnonzero(fits)
+        mantissas[positions] = (parsed.digits.iloc[positions].astype("int64").to_numpy()
+                                * np.power(10, shift[positions], dtype="int64"))
+        for position in np.flatnonzero(candidates & (width == 19)):
+            mantissa = int(parsed.digits.iat[position]) * 10 ** int(shift[position])
+            if mantissa <= INT64_MAX:
+                mantissas[position] = mantissa
+                fits[position] = True
+        mantissas = np.where(parsed.negative, -mantissas, mantissas)
+        overflow = ~fits & ~parsed.missing
+        exponents = np.where(fits, -parsed.places, 0).astype("int8")
+        return (pd.Series(pd.arrays.IntegerArray(mantissas, ~fits)), exponents,
+                parsed.text[overflow])
+
+
+class OverflowColumn:
+    """
+    The values of one numeric column that did not fit its mantissas, stored as flat arrays.
+
+    Each value is kept as its exact text, packed into one UTF-8 byte array with offsets,
+    next to its float value for aggregation. Entries are sorted by key, the row id or row
+    position the value belongs to, so the values of a batch of rows are found with a single
+    binary search. The arrays may be memory-mapped.
+
+    Attributes:
+        keys (np.ndarray): int64 row keys, ascending.
+        floats (np.ndarray): float64 value of each entry, NaN where it is not numeric.
+        offsets (np.ndarray): int64 start of each entry's text in data, followed by the end of the last.
+        data (np.ndarray): uint8 UTF-8 text of every entry, concatenated.
+    """
+
+    def __init__(self, keys: Optional[np.ndarray] = None, floats: Optional[np.ndarray] = None,
+                 offsets: Optional[np.ndarray] = None, data: Optional[np.ndarray] = None):
+        """
+        Initializes the OverflowColumn from its arrays, or empty. The arrays must not be modified afterwards.
+        """
+        self.keys = np.empty(0, dtype="int64") if keys is None else keys
+        self.floats = np.empty(0, dtype="float64") if floats is None else floats
+        self.offsets = np.zeros(1, dtype="int64") if offsets is None else offsets
+        self.data = np.empty(0, dtype="uint8") if data is None else data
+
+    @classmethod
+    def from_text(cls, keys: np.ndarray, texts: Iterable[str]) -> 'OverflowColumn':
+        """
+        Packs values given as text.
+
+        Args:
+            keys (np.ndarray): The row key of each value, in any order.
+            texts (Iterable[str]): The exact text of each value.
+
+        Returns:
+            OverflowColumn: The packed values.
+        """
+        keys = np.asarray(keys, dtype="int64")
+        texts = pd.Series(list(texts), dtype=object)
+        if len(keys) and not np.all(np.diff(keys) > 0):
+            order = np.argsort(keys, kind="stable")
+            keys, texts = keys[order], texts.iloc[order].reset_index(drop=True)
+        encoded = texts.str.encode("utf-8")
+        offsets = np.zeros(len(keys) + 1, dtype="int64")
+        np.cumsum(encoded.str.len().to_numpy(dtype="int64"), out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype="uint8")
+        floats = pd.to_numeric(texts, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        # Forms the vectorized parser rejects, such as '1E+400', still have a float value
+        for position in np.flatnonzero(np.isnan(floats)):
+            try:
+                floats[position] = float(texts.iat[position])
+            except ValueError:
+                pass
+        return cls(keys, floats, offsets, data)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of values.
+        """
+        return len(self.keys)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory taken by the arrays in bytes.
+        """
+        return int(self.keys.nbytes + self.floats.nbytes + self.offsets.nbytes + self.data.nbytes)
+
+    def entry_bytes(self) -> np.ndarray:
+        """
+        Returns the bytes each entry takes across the arrays.
+
+        Returns:
+            np.ndarray: int64 sizes, one per entry.
+        """
+        return np.diff(self.offsets) + self.keys.itemsize + self.floats.itemsize + self.offsets.itemsize
+
+    def lookup(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the values of rows by their keys.
+
+        Args:
+            keys (np.ndarray): Row keys, in any order.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The positions in keys that have a value, and the
+                entry holding each of those values.
+        """
+        keys = np.asarray(keys, dtype="int64")
+        if not len(self.keys) or not len(keys):
+            return np.empty(0, dtype="int64"), np.empty(0, dtype="int64")
+        entries = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        positions = np.flatnonzero(self.keys[entries] == keys)
+        return positions, entries[positions]
+
+    def texts(self, entries: np.ndarray) -> List[str]:
+        """
+        Returns the exact text of some entries.
+
+        Args:
+            entries (np.ndarray): Entry indices, as returned by lookup.
+
+        Returns:
+            List[str]: The text of each entry.
+        """
+        return [bytes(self.data[self.offsets[entry]:self.offsets[entry + 1]]).decode("utf-8")
+                for entry in entries]
+
+    def values(self, entries: np.ndarray) -> List[object]:
+        """
+        Returns some entries as Decimal values where they are numeric, or as text otherwise.
+
+        Args:
+            entries (np.ndarray): Entry indices, as returned by lookup.
+
+        Returns:
+            List[object]: The value of each entry.
+        """
+        return [parse_number(text) for text in self.texts(entries)]
+
+    def take(self, entries: np.ndarray) -> 'OverflowColumn':
+        """
+        Returns a column holding only some entries.
+
+        Args:
+            entries (np.ndarray): Ascending entry indices to keep.
+
+        Returns:
+            OverflowColumn: The selected entries.
+        """
+        entries = np.asarray(entries, dtype="int64")
+        starts = self.offsets[:-1][entries]
+        lengths = self.offsets[1:][entries] - starts
+        offsets = np.zeros(len(entries) + 1, dtype="int64")
+        np.cumsum(lengths, out=offsets[1:])
+        gather = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1], dtype="int64")
+        return OverflowColumn(np.array(self.keys[entries]), np.array(self.floats[entries]), offsets,
+                              np.array(self.data[gather]))
+
+    def without(self, keys: np.ndarray) -> 'OverflowColumn':
+        """
+        Returns a column without the values of some rows.
+
+        Args:
+            keys (np.ndarray): Keys of the departing rows.
+
+        Returns:
+            OverflowColumn: The remaining values.
+        """
+        if not len(self.keys):
+            return self
+        keep = ~np.isin(self.keys, np.asarray(keys, dtype="int64"))
+        return self if keep.all() else self.take(np.flatnonzero(keep))
+
+    def concat(self, other: 'OverflowColumn') -> 'OverflowColumn':
+        """
+        Returns a column holding the values of both columns.
+
+        Args:
+            other (OverflowColumn): Values of other rows, usually newer ones with larger keys.
+
+        Returns:
+            OverflowColumn: The combined values.
+        """
+        if not len(other):
+            return self
+        if not len(self.keys):
+            return other
+        if other.keys[0] > self.keys[-1]:
+            return OverflowColumn(np.concatenate([self.keys, other.keys]),
+                                  np.concatenate([self.floats, other.floats]),
+                                  np.concatenate([self.offsets[:-1], other.offsets + self.offsets[-1]]),
+                                  np.concatenate([self.data, other.data]))
+        return OverflowColumn.from_text(np.concatenate([self.keys, other.keys]),
+                                        self.texts(np.arange(len(self))) + other.texts(np.arange(len(other))))
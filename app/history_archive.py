@@ -0,0 +1,225 @@
+"""
+This module defines the HistoryArchive class, an on-disk layout for large calculation histories.
+
+Records are partitioned by UTC date and operation into gzip-compressed CSV segments:
+
+    <root>/date=2024-11-05/operation=add/segment-00000.csv.gz
+
+A manifest.json at the root lists every segment with its row count and the minimum and
+maximum of its timestamp and numeric columns, so a read only opens the segments whose
+partition and statistics can match the requested operation, time range and value ranges.
+"""
+
+import json
+import math
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+
+# Columns whose per-segment minimum and maximum are kept in the manifest
+STAT_COLUMNS = ("timestamp", "num1", "num2", "result")
+
+
+class HistoryArchive:
+    """
+    A partitioned, compressed archive of calculation records.
+
+    Attributes:
+        root (str): Directory holding the partitions and the manifest.
+    """
+
+    MANIFEST = "manifest.json"
+
+    # Maximum number of rows written to one segment file
+    SEGMENT_ROWS = 100_000
+
+    def __init__(self, root: str):
+        """
+        Initializes the HistoryArchive, reading the manifest if the archive exists.
+
+        Args:
+            root (str): Directory holding the partitions and the manifest.
+        """
+        self.root = root
+        self.segments: List[Dict] = []
+        manifest_path = os.path.join(root, self.MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as manifest:
+                self.segments = json.load(manifest)["segments"]
+
+    @classmethod
+    def is_archive(cls, path: str) -> bool:
+        """
+        Tells whether a path is the root of a history archive.
+
+        Args:
+            path (str): The path to check.
+
+        Returns:
+            bool: True if the path is a directory containing an archive manifest.
+        """
+        return os.path.isfile(os.path.join(path, cls.MANIFEST))
+
+    def __len__(self) -> int:
+        """
+        Returns the number of archived records.
+        """
+        return sum(segment["rows"] for segment in self.segments)
+
+    def append(self, records: pd.DataFrame) -> None:
+        """
+        Writes records to new segments in their date and operation partitions.
+
+        Args:
+            records (pd.DataFrame): Records with at least 'operation' and 'timestamp' columns.
+        """
+        if records.empty:
+            return
+        dates = pd.to_datetime(records["timestamp"].astype(float), unit="s").dt.strftime("%Y-%m-%d")
+        for (date, operation), partition in records.groupby([dates, records["operation"]], sort=True):
+            partition = partition.sort_values("timestamp", kind="stable")
+            for first in range(0, len(partition), self.SEGMENT_ROWS):
+                self._write_segment(date, operation, partition.iloc[first:first + self.SEGMENT_ROWS])
+        self._save_manifest()
+
+    def latest_timestamp(self) -> Optional[float]:
+        """
+        Returns the latest archived timestamp, using only the manifest.
+
+        Returns:
+            Optional[float]: The largest timestamp of any segment, or None for an empty archive.
+        """
+        latest = [segment["stats"]["timestamp"][1] for segment in self.segments if "timestamp" in segment["stats"]]
+        return max(latest) if latest else None
+
+    def clear(self) -> None:
+        """
+        Deletes every partition and the manifest.
+        """
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+        self.segments = []
+
+    def matching_segments(self, operation: Optional[str] = None, start: Optional[float] = None,
+                          end: Optional[float] = None,
+                          ranges: Optional[Dict[str, Tuple[float, float]]] = None) -> List[Dict]:
+        """
+        Selects the segments that may hold matching records, using only the manifest.
+
+        Args:
+            operation (Optional[str]): Only keep segments of this operation.
+            start (Optional[float]): Earliest timestamp of interest in epoch seconds.
+            end (Optional[float]): Latest timestamp of interest in epoch seconds.
+            ranges (Optional[Dict[str, Tuple[float, float]]]): Inclusive (low, high) bounds
+                for numeric columns; use None for an open side.
+
+        Returns:
+            List[Dict]: Manifest entries of the segments to read.
+        """
+        bounds = dict(ranges or {})
+        if start is not None or end is not None:
+            bounds["timestamp"] = (start, end)
+
+        selected = []
+        for segment in self.segments:
+            if operation is not None and segment["operation"] != operation:
+                continue
+            if all(self._may_overlap(segment["stats"].get(column), low, high)
+                   for column, (low, high) in bounds.items()):
+                selected.append(segment)
+        return selected
+
+    def read(self, operation: Optional[str] = None, start: Optional[float] = None, end: Optional[float] = None,
+             ranges: Optional[Dict[str, Tuple[float, float]]] = None) -> pd.DataFrame:
+        """
+        Reads the records matching every given predicate, opening only segments that can match.
+
+        Numeric columns are returned as text so values keep their exact form.
+
+        Args:
+            operation (Optional[str]): Only return records of this operation.
+            start (Optional[float]): Earliest timestamp in epoch seconds, inclusive.
+            end (Optional[float]): Latest timestamp in epoch seconds, inclusive.
+            ranges (Optional[Dict[str, Tuple[float, float]]]): Inclusive (low, high) bounds
+                for numeric columns; use None for an open side.
+
+        Returns:
+            pd.DataFrame: The matching records, sorted by timestamp.
+        """
+        frames = []
+        for segment in self.matching_segments(operation, start, end, ranges):
+            frame = pd.read_csv(os.path.join(self.root, segment["path"]), dtype=str, keep_default_na=False)
+            frames.append(self._filter_rows(frame, start, end, ranges))
+        if not frames:
+            return pd.DataFrame(columns=["operation", *STAT_COLUMNS])
+        records = pd.concat(frames, ignore_index=True)
+        order = pd.to_numeric(records["timestamp"], errors="coerce").sort_values(kind="stable").index
+        return records.loc[order].reset_index(drop=True)
+
+    def _write_segment(self, date: str, operation: str, rows: pd.DataFrame) -> None:
+        """
+        Writes one segment file and records it in the in-memory manifest.
+
+        The operation is percent-encoded in the partition directory, so a name holding a path
+        separator cannot place the segment outside its partition; the manifest keeps the name.
+        """
+        directory = os.path.join(f"date={date}", f"operation={quote(str(operation), safe='')}")
+        os.makedirs(os.path.join(self.root, directory), exist_ok=True)
+        index = sum(1 for segment in self.segments if segment["date"] == date and segment["operation"] == operation)
+        path = os.path.join(directory, f"segment-{index:05d}.csv.gz")
+        rows.to_csv(os.path.join(self.root, path), index=False, compression="gzip")
+
+        stats = {}
+        for column in STAT_COLUMNS:
+            if column in rows:
+                values = pd.to_numeric(rows[column].astype(str), errors="coerce").dropna()
+                if not values.empty:
+                    stats[column] = [float(values.min()), float(values.max())]
+        self.segments.append({"path": path, "date": date, "operation": operation, "rows": len(rows), "stats": stats})
+
+    def _save_manifest(self) -> None:
+        """
+        Atomically replaces the manifest with the in-memory segment list.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        manifest_path = os.path.join(self.root, self.MANIFEST)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as manifest:
+            json.dump({"segments": self.segments}, manifest, indent=1)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    @staticmethod
+    def _may_overlap(stats: Optional[List[float]], low: Optional[float], high: Optional[float]) -> bool:
+        """
+        Tells whether a segment's [min, max] can intersect [low, high].
+
+        Segments without statistics for the column have no numeric values there and cannot match.
+        """
+        if stats is None:
+            return False
+        minimum, maximum = stats
+        if low is not None and maximum < float(low):
+            return False
+        if high is not None and minimum > float(high):
+            return False
+        return True
+
+    @staticmethod
+    def _filter_rows(frame: pd.DataFrame, start: Optional[float], end: Optional[float],
+                     ranges: Optional[Dict[str, Tuple[float, float]]]) -> pd.DataFrame:
+        """
+        Applies the predicates row by row to a segment that may only partly match.
+        """
+        bounds = dict(ranges or {})
+        if start is not None or end is not None:
+            bounds["timestamp"] = (start, end)
+        mask = pd.Series(True, index=frame.index)
+        for column, (low, high) in bounds.items():
+            values = pd.to_numeric(frame[column], errors="coerce") if column in frame else pd.Series(math.nan, index=frame.index)
+            if low is not None:
+                mask &= values >= float(low)
+            if high is not None:
+                mask &= values <= float(high)
+        return frame[mask]
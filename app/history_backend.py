@@ -0,0 +1,113 @@
+"""
+This module defines the HistoryBackend interface, the storage a PandasFacade can delegate
+its records to instead of keeping them in process memory.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional
+
+import pandas as pd
+
+
+class HistoryBackend(ABC):
+    """
+    Abstract base class for calculation history storage.
+
+    Backends receive records with every timestamp already assigned and return decoded
+    records: string operations, Decimal numbers and float 'timestamp' and 'duration'
+    columns, ordered by timestamp.
+    """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """
+        Returns the number of stored records.
+        """
+
+    @abstractmethod
+    def append(self, records: pd.DataFrame) -> None:
+        """
+        Stores a batch of records.
+
+        Args:
+            records (pd.DataFrame): The records to store, each with a 'timestamp'.
+        """
+
+    def import_records(self, chunks: Iterable[pd.DataFrame], replace: bool = False) -> None:
+        """
+        Stores every batch produced by chunks, but only once all of them have been produced,
+        so the stored records are left unchanged if producing a batch fails.
+
+        This default keeps the batches in memory until the end; backends able to stage
+        them elsewhere should override it.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Batches of records, each with a 'timestamp'.
+            replace (bool): Remove the stored records first, in the same step.
+        """
+        batches = list(chunks)
+        if replace:
+            self.clear()
+        for batch in batches:
+            self.append(batch)
+
+    @abstractmethod
+    def get_all_records(self) -> pd.DataFrame:
+        """
+        Returns every stored record.
+
+        Returns:
+            pd.DataFrame: The complete history, oldest first.
+        """
+
+    @abstractmethod
+    def filter_operations(self, operation: str) -> pd.DataFrame:
+        """
+        Returns the records of one operation.
+
+        Args:
+            operation (str): The operation name to filter by.
+
+        Returns:
+            pd.DataFrame: The matching records, oldest first.
+        """
+
+    @abstractmethod
+    def filter_by_time(self, start: Optional[float] = None, end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Returns the records with start <= timestamp <= end.
+
+        Args:
+            start (Optional[float]): Earliest timestamp in epoch seconds, or None for no lower bound.
+            end (Optional[float]): Latest timestamp in epoch seconds, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: The matching records, oldest first.
+        """
+
+    @abstractmethod
+    def get_latest_record(self) -> Optional[pd.Series]:
+        """
+        Returns the most recent record.
+
+        Returns:
+            Optional[pd.Series]: The record, or None if the history is empty.
+        """
+
+    @abstractmethod
+    def remove_record(self, index: int) -> bool:
+        """
+        Removes a record by its position in timestamp order.
+
+        Args:
+            index (int): Position of the record to delete.
+
+        Returns:
+            bool: True if a record was removed, False if the index was out of bounds.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Removes every record.
+        """
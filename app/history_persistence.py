@@ -0,0 +1,360 @@
+"""
+This module keeps saving and loading the calculation history off the interactive path.
+
+HistoryAutosaver runs a background thread that appends newly added records to a CSV file
+whenever enough of them accumulate or enough time passes. save_in_background and
+load_in_background run a single save or load on a worker thread and return a
+PersistenceJob whose progress can be polled while the REPL stays responsive.
+
+read_history_csv streams a history CSV file in chunks typed by HISTORY_SCHEMA, keeping
+only the requested columns, operations and time range, so PandasFacade.load_from_csv can
+encode a large file chunk by chunk instead of materializing it first.
+"""
+
+import collections
+import logging
+import os
+import threading
+import time
+from typing import Callable, Collection, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.background_loop import BackgroundLoop
+from app.mapped_history import MappedHistory
+
+
+class PersistenceJob:
+    """
+    A save or load of the history running on a background thread.
+
+    Attributes:
+        description (str): What the job does, e.g. 'Saving history to history.csv'.
+        completed (int): Units of work done so far.
+        total (Optional[int]): Units of work in the whole job, once known.
+        error (Optional[BaseException]): The exception that ended the job, if it failed.
+    """
+
+    def __init__(self, description: str, work: Callable[['PersistenceJob'], None]):
+        """
+        Starts the job.
+
+        Args:
+            description (str): What the job does.
+            work (Callable[[PersistenceJob], None]): Does the work, updating completed and total as it goes.
+        """
+        self.description = description
+        self.completed = 0
+        self.total: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, args=(work,), name=description, daemon=True)
+        self._thread.start()
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether the job has ended, successfully or not.
+        """
+        return not self._thread.is_alive()
+
+    @property
+    def progress(self) -> Optional[float]:
+        """
+        The fraction of the job done, or None while the size of the job is unknown.
+        """
+        if self.finished and self.error is None:
+            return 1.0
+        if not self.total:
+            return None
+        return min(self.completed / self.total, 1.0)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for the job to end.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            bool: True if the job has ended.
+        """
+        self._thread.join(timeout)
+        return self.finished
+
+    def status(self) -> str:
+        """
+        Describes the state of the job in one line.
+
+        Returns:
+            str: The description followed by the progress, 'done' or the error.
+        """
+        if self.finished:
+            return f"{self.description}: failed: {self.error}" if self.error else f"{self.description}: done"
+        progress = self.progress
+        return f"{self.description}: {'started' if progress is None else f'{progress:.0%}'}"
+
+    def _run(self, work: Callable[['PersistenceJob'], None]) -> None:
+        try:
+            work(self)
+        except Exception as e:
+            logging.error(f"{self.description} failed: {e}")
+            self.error = e
+
+
+# Rows written per chunk by save jobs, and read per chunk by load jobs
+CHUNK_ROWS = 50_000
+
+# Types of the history columns in CSV files. Numbers are read as text so they keep their
+# exact decimal form, 'numbers' holds the operand list of mean, stddev and mode records
+# from the REPL, and any other column is read as text as well.
+HISTORY_SCHEMA = {
+    "operation": str,
+    "num1": str,
+    "num2": str,
+    "result": str,
+    "numbers": str,
+    "timestamp": "float64",
+    "duration": "float64",
+}
+
+
+def read_history_csv(filepath: str, columns: Optional[Collection[str]] = None,
+                     operations: Optional[Collection[str]] = None, start: Optional[float] = None,
+                     end: Optional[float] = None, chunk_rows: int = CHUNK_ROWS,
+                     progress: Optional[Callable[[int], None]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Reads a history CSV file in chunks typed by HISTORY_SCHEMA.
+
+    Args:
+        filepath (str): The CSV file, as written by PandasFacade.save_to_csv or HistoryAutosaver.
+        columns (Optional[Collection[str]]): Columns to read. 'operation' is always read,
+            and 'timestamp' too when start or end is given. Defaults to every column.
+        operations (Optional[Collection[str]]): Only keep records of these operations.
+        start (Optional[float]): Only keep records stamped at or after this time, in epoch seconds.
+        end (Optional[float]): Only keep records stamped at or before this time.
+        chunk_rows (int): Rows parsed per chunk, before filtering.
+        progress (Optional[Callable[[int], None]]): Called with the number of bytes read after each chunk.
+
+    Yields:
+        pd.DataFrame: The matching records of each chunk, in file order; chunks left
+            empty by the filters are skipped.
+
+    Raises:
+        ValueError: If a timestamp or duration is not a number.
+    """
+    wanted = None
+    if columns is not None:
+        wanted = set(columns) | {"operation"} | ({"timestamp"} if start is not None or end is not None else set())
+    # Float columns are parsed with round-trip precision so timestamps come back exactly as saved
+    dtype = collections.defaultdict(lambda: str, HISTORY_SCHEMA)
+    with open(filepath, encoding="utf-8") as handle:
+        reader = pd.read_csv(handle, dtype=dtype, usecols=None if wanted is None else wanted.__contains__,
+                             float_precision="round_trip", chunksize=chunk_rows)
+        for chunk in reader:
+            keep = np.ones(len(chunk), dtype=bool)
+            if operations is not None:
+                keep &= chunk["operation"].isin(list(operations)).to_numpy()
+            if start is not None:
+                keep &= (chunk["timestamp"] >= start).to_numpy()
+            if end is not None:
+                keep &= (chunk["timestamp"] <= end).to_numpy()
+            if progress is not None:
+                progress(handle.tell())
+            if keep.any():
+                yield chunk if keep.all() else chunk[keep]
+
+
+def write_csv_atomically(records: pd.DataFrame, filepath: str,
+                         progress: Optional[Callable[[int], None]] = None) -> None:
+    """
+    Writes records to a CSV file in chunks through a temporary file, so the file at
+    filepath is always either the old or the complete new history.
+
+    Args:
+        records (pd.DataFrame): The records to write.
+        filepath (str): Destination CSV file.
+        progress (Optional[Callable[[int], None]]): Called with the number of rows written after each chunk.
+    """
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = filepath + ".tmp"
+    records.iloc[0:0].to_csv(temporary, index=False)
+    for first in range(0, len(records), CHUNK_ROWS):
+        records.iloc[first:first + CHUNK_ROWS].to_csv(temporary, mode="a", header=False, index=False)
+        if progress is not None:
+            progress(min(first + CHUNK_ROWS, len(records)))
+    os.replace(temporary, filepath)
+
+
+def save_in_background(facade, filepath: str) -> PersistenceJob:
+    """
+    Saves the history to a CSV file on a background thread. Progress is counted in rows.
+
+    Args:
+        facade (PandasFacade): The history to save. Records added after the job starts are not included.
+        filepath (str): Destination CSV file.
+
+    Returns:
+        PersistenceJob: The running job.
+    """
+    def work(job: PersistenceJob) -> None:
+        records = facade.get_all_records()
+        job.total = len(records)
+        write_csv_atomically(records, filepath, progress=lambda rows: setattr(job, "completed", rows))
+
+    return PersistenceJob(f"Saving history to {filepath}", work)
+
+
+def load_in_background(facade, filepath: str, merge: bool = False, columns: Optional[Collection[str]] = None,
+                       operations: Optional[Collection[str]] = None) -> PersistenceJob:
+    """
+    Loads the history from a CSV file or a mapped history on a background thread. The
+    current records are replaced, or kept with the loaded ones merged in, once the whole
+    file is read. Progress is counted in bytes.
+
+    Args:
+        facade (PandasFacade): The history to load into.
+        filepath (str): The CSV file or mapped history directory to load.
+        merge (bool): Add the loaded records to the current ones instead of replacing them.
+        columns (Optional[Collection[str]]): Columns to load from a CSV file. Defaults to all.
+        operations (Optional[Collection[str]]): Only load records of these operations from a CSV file.
+
+    Returns:
+        PersistenceJob: The running job.
+    """
+    def work(job: PersistenceJob) -> None:
+        if MappedHistory.is_mapped(filepath):
+            if merge:
+                facade.add_records(MappedHistory(filepath).get_all_records())
+            else:
+                facade.load_mapped(filepath)
+            return
+        job.total = os.path.getsize(filepath)
+        facade.load_from_csv(filepath, columns=columns, operations=operations, merge=merge,
+                             progress=lambda position: setattr(job, "completed", position))
+
+    return PersistenceJob(f"{'Merging' if merge else 'Loading'} history from {filepath}", work)
+
+
+class HistoryAutosaver(BackgroundLoop):
+    """
+    Periodically appends the records added to a history to a CSV file.
+
+    Only records added after the autosaver is created count, and each flush appends the
+    ones added since the previous flush to the end of the file. Rows already in the file,
+    such as those of an earlier session, are kept: after records are removed or replaced
+    the next flush rewrites the file as those rows followed by the current history, and
+    when new columns appear it rewrites the file with the extra columns.
+
+    Attributes:
+        facade (PandasFacade): The history to save.
+        filepath (str): The CSV file kept up to date.
+        interval (float): Seconds after which pending changes are flushed.
+        row_threshold (int): Number of added records that triggers a flush before the interval ends.
+    """
+
+    # Seconds between checks for pending changes
+    POLL_SECONDS = 0.25
+
+    def __init__(self, facade, filepath: str, interval: float = 30.0, row_threshold: int = 1000):
+        """
+        Initializes the HistoryAutosaver. Call start to begin saving.
+
+        Args:
+            facade (PandasFacade): The history to save.
+            filepath (str): The CSV file to keep up to date.
+            interval (float): Seconds after which pending changes are flushed.
+            row_threshold (int): Number of added records that triggers an early flush.
+
+        Raises:
+            ValueError: If interval or row_threshold is not positive.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if row_threshold <= 0:
+            raise ValueError("row_threshold must be positive")
+        super().__init__("history-autosave")
+        self.facade = facade
+        self.filepath = filepath
+        self.interval = interval
+        self.row_threshold = row_threshold
+        # Only records added from now on are saved, after the rows the file already holds.
+        # None after a failed write, which may have left part of the records in the file
+        self._mark: Optional[Tuple[int, int]] = facade.change_mark()
+        self._columns: List[str] = []
+        self._kept_rows = 0
+        if os.path.exists(filepath):
+            self._columns = list(pd.read_csv(filepath, nrows=0).columns)
+            with open(filepath, encoding="utf-8") as handle:
+                self._kept_rows = max(sum(1 for _ in handle) - 1, 0)
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+
+    @property
+    def dirty_rows(self) -> int:
+        """
+        The number of records added since the last flush, or at least 1 after a removal or replacement.
+        """
+        generation, added = self.facade.change_mark()
+        if self._mark is None or generation != self._mark[0]:
+            return max(added, 1)
+        return added - self._mark[1]
+
+    def stop(self) -> None:
+        """
+        Stops the background thread and flushes the remaining changes.
+        """
+        super().stop()
+        self.flush()
+
+    def flush(self) -> int:
+        """
+        Writes the changes made since the last flush.
+
+        The changes only count as saved once they are written. After a failed write the
+        next flush rewrites the file from the whole history.
+
+        Returns:
+            int: The number of records written.
+        """
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+            if self.dirty_rows == 0:
+                return 0
+            records, complete, mark = self.facade.changes_since(self._mark)
+            new_columns = [column for column in records.columns if column not in self._columns]
+            try:
+                if complete or new_columns or not os.path.exists(self.filepath):
+                    # After a removal or replacement only the rows from before this autosaver are kept
+                    self._rewrite(records, self._kept_rows if complete else None)
+                elif not records.empty:
+                    records.reindex(columns=self._columns).to_csv(self.filepath, mode="a", header=False, index=False)
+            except Exception:
+                self._mark = None
+                raise
+            self._mark = mark
+            return len(records)
+
+    def _rewrite(self, records: pd.DataFrame, kept_rows: Optional[int]) -> None:
+        """
+        Rewrites the file as its first kept_rows rows, or all of them if None, followed by records.
+        """
+        if os.path.exists(self.filepath) and kept_rows != 0:
+            previous = pd.read_csv(self.filepath, dtype=str, keep_default_na=False, nrows=kept_rows)
+            records = pd.concat([previous, records], ignore_index=True)
+        self._columns = list(records.columns)
+        write_csv_atomically(records, self.filepath)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.POLL_SECONDS):
+            dirty = self.dirty_rows
+            overdue = time.monotonic() - self._last_flush >= self.interval
+            if dirty >= self.row_threshold or (dirty and overdue):
+                try:
+                    self.flush()
+                except Exception as e:
+                    # Keep saving: the next attempt may succeed, and stop still flushes
+                    logging.error(f"Autosave to {self.filepath} failed: {e}")
+                    self._stopping.wait(self.interval)
@@ -0,0 +1,261 @@
+"""
+This module defines the RunningStats and HistoryRollup classes, which keep per-operation
+summaries of the calculation history up to date as records are added and removed, so
+summaries are answered without scanning the history.
+"""
+
+import math
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Record columns summarized per operation
+ROLLUP_COLUMNS = ("num1", "num2", "result")
+
+
+class RunningStats:
+    """
+    Count, sum, extremes, mean and variance of a stream of numbers.
+
+    Batches are merged with the parallel form of Welford's algorithm, and the same
+    formulas run backwards to take a batch out again. Taking out a value equal to the
+    minimum or maximum cannot restore the previous extreme, so the extremes are then
+    marked stale until the owner recomputes them.
+
+    Attributes:
+        count (int): Number of values.
+        total (float): Sum of the values.
+        mean (float): Mean of the values, NaN when there are none.
+        m2 (float): Sum of squared deviations from the mean.
+        minimum (float): Smallest value, NaN when there are none.
+        maximum (float): Largest value, NaN when there are none.
+        extrema_stale (bool): Whether minimum and maximum need recomputing.
+    """
+
+    __slots__ = ("count", "total", "mean", "m2", "minimum", "maximum", "extrema_stale")
+
+    def __init__(self):
+        """
+        Initializes empty RunningStats.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.mean = math.nan
+        self.m2 = 0.0
+        self.minimum = math.nan
+        self.maximum = math.nan
+        self.extrema_stale = False
+
+    @property
+    def variance(self) -> float:
+        """
+        The sample variance, NaN with fewer than two values.
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def add(self, count: int, total: float, m2: float, minimum: float, maximum: float) -> None:
+        """
+        Merges the summary of a batch of values.
+
+        Args:
+            count (int): Number of values in the batch.
+            total (float): Sum of the batch.
+            m2 (float): Sum of squared deviations from the batch mean.
+            minimum (float): Smallest value of the batch.
+            maximum (float): Largest value of the batch.
+        """
+        if not count:
+            return
+        batch_mean = total / count
+        if not self.count:
+            self.mean, self.m2 = batch_mean, m2
+        else:
+            combined = self.count + count
+            delta = batch_mean - self.mean
+            self.mean += delta * count / combined
+            self.m2 += m2 + delta * delta * self.count * count / combined
+        self.count += count
+        self.total += total
+        if not self.extrema_stale:
+            self.minimum = minimum if math.isnan(self.minimum) else min(self.minimum, minimum)
+            self.maximum = maximum if math.isnan(self.maximum) else max(self.maximum, maximum)
+
+    def remove(self, count: int, total: float, m2: float, minimum: float, maximum: float) -> None:
+        """
+        Takes the summary of a batch of previously added values out again.
+
+        Args:
+            count (int): Number of values in the batch.
+            total (float): Sum of the batch.
+            m2 (float): Sum of squared deviations from the batch mean.
+            minimum (float): Smallest value of the batch.
+            maximum (float): Largest value of the batch.
+        """
+        if not count:
+            return
+        remaining = self.count - count
+        if remaining <= 0:
+            self.__init__()
+            return
+        batch_mean = total / count
+        mean = (self.mean * self.count - total) / remaining
+        delta = batch_mean - mean
+        self.m2 = max(0.0, self.m2 - m2 - delta * delta * remaining * count / self.count)
+        self.mean = mean
+        self.count = remaining
+        self.total -= total
+        if minimum <= self.minimum or maximum >= self.maximum:
+            self.extrema_stale = True
+
+    def set_extrema(self, minimum: float, maximum: float) -> None:
+        """
+        Replaces stale extremes with recomputed ones.
+
+        Args:
+            minimum (float): The smallest current value.
+            maximum (float): The largest current value.
+        """
+        self.minimum, self.maximum = minimum, maximum
+        self.extrema_stale = False
+
+
+class HistoryRollup:
+    """
+    Running statistics of the numeric columns of the history, per operation.
+
+    Attributes:
+        records (Dict[str, int]): Number of records per operation.
+        stats (Dict[str, Dict[str, RunningStats]]): Statistics per operation and column.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty HistoryRollup.
+        """
+        self.records: Dict[str, int] = {}
+        self.stats: Dict[str, Dict[str, RunningStats]] = {}
+
+    def add(self, operations: pd.Series, values: Mapping[str, np.ndarray]) -> None:
+        """
+        Adds a batch of records.
+
+        Args:
+            operations (pd.Series): The operation of each record.
+            values (Mapping[str, np.ndarray]): Float values of each column in ROLLUP_COLUMNS,
+                NaN where a value is missing or not numeric.
+        """
+        for operation, rows, summaries in self._summarize(operations, values):
+            self.records[operation] = self.records.get(operation, 0) + rows
+            columns = self.stats.setdefault(operation, {column: RunningStats() for column in ROLLUP_COLUMNS})
+            for column, summary in summaries.items():
+                columns[column].add(*summary)
+
+    def remove(self, operations: pd.Series, values: Mapping[str, np.ndarray]) -> None:
+        """
+        Removes a batch of previously added records.
+
+        Args:
+            operations (pd.Series): The operation of each record.
+            values (Mapping[str, np.ndarray]): Float values of each column, as passed to add.
+        """
+        for operation, rows, summaries in self._summarize(operations, values):
+            if operation not in self.stats:
+                continue
+            self.records[operation] -= rows
+            if self.records[operation] <= 0:
+                del self.records[operation], self.stats[operation]
+                continue
+            for column, summary in summaries.items():
+                self.stats[operation][column].remove(*summary)
+
+    def merge(self, other: 'HistoryRollup') -> None:
+        """
+        Adds the records summarized by another rollup.
+
+        Args:
+            other (HistoryRollup): Statistics of records not yet in this rollup.
+        """
+        for operation, columns in other.stats.items():
+            self.records[operation] = self.records.get(operation, 0) + other.records[operation]
+            own = self.stats.setdefault(operation, {column: RunningStats() for column in ROLLUP_COLUMNS})
+            for column, stats in columns.items():
+                own[column].add(stats.count, stats.total, stats.m2, stats.minimum, stats.maximum)
+                own[column].extrema_stale = own[column].extrema_stale or stats.extrema_stale
+
+    def clear(self) -> None:
+        """
+        Forgets every record.
+        """
+        self.records.clear()
+        self.stats.clear()
+
+    def stale_extrema(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yields the (operation, column) pairs whose extremes must be recomputed.
+        """
+        for operation, columns in self.stats.items():
+            for column, stats in columns.items():
+                if stats.extrema_stale:
+                    yield operation, column
+
+    def summary(self, operation: Optional[str] = None) -> pd.DataFrame:
+        """
+        Tabulates the statistics, without touching the history.
+
+        Args:
+            operation (Optional[str]): Only summarize this operation.
+
+        Returns:
+            pd.DataFrame: One row per operation and column, indexed by ('operation', 'column'),
+                with 'records', 'non_numeric' (records without a numeric value in the column, such
+                as a missing operand or an error message),
+                'count', 'sum', 'min', 'max', 'mean' and 'variance'.
+        """
+        rows = []
+        for name in sorted(self.stats):
+            if operation is not None and name != operation:
+                continue
+            for column, stats in self.stats[name].items():
+                rows.append({
+                    "operation": name, "column": column, "records": self.records[name],
+                    "non_numeric": self.records[name] - stats.count, "count": stats.count, "sum": stats.total,
+                    "min": stats.minimum, "max": stats.maximum, "mean": stats.mean, "variance": stats.variance,
+                })
+        columns = ["operation", "column", "records", "non_numeric", "count", "sum", "min", "max", "mean", "variance"]
+        return pd.DataFrame(rows, columns=columns).set_index(["operation", "column"])
+
+    @staticmethod
+    def _summarize(operations: pd.Series, values: Mapping[str, np.ndarray]) -> Iterator[Tuple[str, int, Dict]]:
+        """
+        Computes the batch summary of each column per operation with one groupby.
+        """
+        keys = pd.Series(operations, dtype=object).fillna("").astype(str).to_numpy()
+        if len(keys) and (keys == keys[0]).all():
+            # A batch of one operation, such as a single record, skips the groupby
+            yield keys[0], len(keys), {column: HistoryRollup._column_summary(np.asarray(values[column], dtype="float64"))
+                                       for column in ROLLUP_COLUMNS}
+            return
+        frame = pd.DataFrame({column: np.asarray(values[column], dtype="float64") for column in ROLLUP_COLUMNS})
+        grouped = frame.groupby(keys, sort=False)
+        counts, sums, minimums, maximums = grouped.count(), grouped.sum(), grouped.min(), grouped.max()
+        m2 = grouped.var(ddof=0).fillna(0.0).mul(counts)
+        sizes = grouped.size()
+        for operation in sizes.index:
+            yield operation, int(sizes[operation]), {
+                column: (int(counts.at[operation, column]), float(sums.at[operation, column]),
+                         float(m2.at[operation, column]), float(minimums.at[operation, column]),
+                         float(maximums.at[operation, column]))
+                for column in ROLLUP_COLUMNS
+            }
+
+    @staticmethod
+    def _column_summary(values: np.ndarray) -> Tuple[int, float, float, float, float]:
+        """
+        Computes (count, sum, m2, min, max) of the non-NaN values of one column.
+        """
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return 0, 0.0, 0.0, math.nan, math.nan
+        mean = values.mean()
+        return len(values), float(values.sum()), float(((values - mean) ** 2).sum()), float(values.min()), float(values.max())
@@ -0,0 +1,263 @@
+"""
+This module turns the calculations recorded in the application log into a workload and
+replays it to benchmark the calculator against real traffic.
+
+Calculations are recovered from two kinds of log messages: 'Performing calculation: add
+with values 5 and 3', logged for every two-operand calculation whether it came from the
+REPL, the command line or the daemon, and 'User input received: mean 1 2 3' for the
+statistics commands the REPL computes itself. Vector operands such as '[1, 2, 3]' are
+recovered as typed, spaces included. Rotated files (app.log.5 ... app.log.1)
+are read oldest first, before the current file.
+
+Replays are open loop: each calculation is due at its original offset from the first,
+divided by the speed-up, and its latency is measured from when it was due, so time spent
+waiting behind a slow calculation counts against the one that waited.
+"""
+
+import glob
+import os
+import re
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+LOG_LINE = re.compile(r"^(?P<time>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) - .+? - \w+ - (?P<message>.*)$")
+# An operand as logged: a number, '@file' or a bracketed vector, which may contain spaces
+OPERAND = r"\[[^\]]*\]|\S+"
+PERFORMING = re.compile(rf"^Performing calculation: (?P<operation>\S+) with values (?P<value1>{OPERAND}) "
+                        rf"and (?P<value2>{OPERAND})$")
+USER_INPUT = "User input received: "
+
+# Commands the REPL computes without logging 'Performing calculation'
+REPL_STATISTICS = ("mean", "stddev", "mode")
+
+# Latency percentiles reported by ReplayReport
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class ReplayEvent:
+    """
+    A calculation recovered from the log.
+
+    Attributes:
+        timestamp (float): When it was logged, in seconds since the epoch.
+        operation (str): The operation name.
+        operands (List[str]): The operands as typed.
+    """
+
+    __slots__ = ("timestamp", "operation", "operands")
+
+    def __init__(self, timestamp: float, operation: str, operands: List[str]):
+        """
+        Initializes the ReplayEvent.
+
+        Args:
+            timestamp (float): When it was logged, in seconds since the epoch.
+            operation (str): The operation name.
+            operands (List[str]): The operands as typed.
+        """
+        self.timestamp = timestamp
+        self.operation = operation
+        self.operands = operands
+
+    def __repr__(self) -> str:
+        return f"ReplayEvent({self.timestamp!r}, {self.operation!r}, {self.operands!r})"
+
+
+def log_files(path: str) -> List[str]:
+    """
+    Lists a log file and its rotated predecessors, oldest first.
+
+    Args:
+        path (str): The current log file, e.g. 'logs/app.log'.
+
+    Returns:
+        List[str]: The existing files among path.N, ..., path.1 and path.
+    """
+    rotated = [name for name in glob.glob(glob.escape(path) + ".*") if name[len(path) + 1:].isdigit()]
+    rotated.sort(key=lambda name: int(name[len(path) + 1:]), reverse=True)
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def parse_log(lines: Iterable[str]) -> Iterator[ReplayEvent]:
+    """
+    Recovers the calculations from log lines.
+
+    Args:
+        lines (Iterable[str]): Lines of the application log.
+
+    Yields:
+        ReplayEvent: Each calculation, in log order. Lines of other formats are skipped.
+    """
+    for line in lines:
+        match = LOG_LINE.match(line.rstrip("\n"))
+        if match is None:
+            continue
+        message = match["message"]
+        if message.startswith("Performing calculation: "):
+            calculation = PERFORMING.match(message)
+            if calculation is None:
+                continue
+            operation, operands = calculation["operation"], [calculation["value1"], calculation["value2"]]
+        elif message.startswith(USER_INPUT):
+            parts = message[len(USER_INPUT):].split()
+            # Other REPL input is either not a calculation or logged again as 'Performing calculation'
+            if len(parts) < 2 or parts[0].lower() not in REPL_STATISTICS:
+                continue
+            operation, operands = parts[0].lower(), parts[1:]
+        else:
+            continue
+        timestamp = datetime.strptime(match["time"], "%Y-%m-%d %H:%M:%S,%f").timestamp()
+        yield ReplayEvent(timestamp, operation, operands)
+
+
+def load_events(paths: Sequence[str]) -> List[ReplayEvent]:
+    """
+    Reads the calculations of log files, including their rotated predecessors.
+
+    Args:
+        paths (Sequence[str]): Current log files, e.g. ['logs/app.log'].
+
+    Returns:
+        List[ReplayEvent]: The calculations ordered by time.
+    """
+    events = []
+    for path in paths:
+        for name in log_files(path):
+            with open(name, encoding="utf-8", errors="replace") as handle:
+                events.extend(parse_log(handle))
+    # Stable, so calculations logged within the same millisecond keep their order
+    events.sort(key=lambda event: event.timestamp)
+    return events
+
+
+class ReplayReport:
+    """
+    Throughput and latency of a replay.
+
+    Attributes:
+        latencies (np.ndarray): Seconds from when each calculation was due until it finished.
+        service_times (np.ndarray): Seconds each calculation took once started.
+        errors (int): Number of calculations that reported an error.
+        elapsed (float): Wall-clock seconds of the whole replay.
+    """
+
+    def __init__(self, latencies: Sequence[float], service_times: Sequence[float], errors: int, elapsed: float):
+        """
+        Initializes the ReplayReport.
+
+        Args:
+            latencies (Sequence[float]): Seconds from due time to completion of each calculation.
+            service_times (Sequence[float]): Seconds each calculation took once started.
+            errors (int): Number of calculations that reported an error.
+            elapsed (float): Wall-clock seconds of the whole replay.
+        """
+        self.latencies = np.asarray(latencies, dtype=float)
+        self.service_times = np.asarray(service_times, dtype=float)
+        self.errors = errors
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self) -> float:
+        """
+        Calculations completed per second.
+        """
+        return len(self.latencies) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def percentiles(self, values: Optional[np.ndarray] = None) -> Dict[float, float]:
+        """
+        Returns the latency percentiles in PERCENTILES, plus the maximum under 100.
+
+        Args:
+            values (Optional[np.ndarray]): Durations to summarize. Defaults to the latencies.
+
+        Returns:
+            Dict[float, float]: Seconds at each percentile, empty without calculations.
+        """
+        values = self.latencies if values is None else values
+        if not len(values):
+            return {}
+        points = np.percentile(values, PERCENTILES)
+        return {**dict(zip(PERCENTILES, points.tolist())), 100: float(values.max())}
+
+    def summary(self) -> str:
+        """
+        Describes the replay in a few lines.
+
+        Returns:
+            str: Counts, throughput and latency and service time percentiles in milliseconds.
+        """
+        lines = [f"Replayed {len(self.latencies)} calculations ({self.errors} errors) in {self.elapsed:.3f} s: "
+                 f"{self.throughput:,.1f} calculations/s"]
+        for label, values in (("latency", self.latencies), ("service time", self.service_times)):
+            points = self.percentiles(values)
+            if points:
+                lines.append(f"{label:>12}: " + ", ".join(
+                    f"{'max' if point == 100 else f'p{point:g}'} {seconds * 1000:.3f} ms" for point, seconds in points.items()))
+        return "\n".join(lines)
+
+
+def replay(events: Sequence[ReplayEvent], run: Callable[[str, List[str]], bool], speed: Optional[float] = 1.0,
+           clock: Callable[[], float] = time.perf_counter, sleep: Callable[[float], None] = time.sleep) -> ReplayReport:
+    """
+    Replays calculations one after another at their original pace, faster, or back to back.
+
+    Args:
+        events (Sequence[ReplayEvent]): The calculations, ordered by time.
+        run (Callable[[str, List[str]], bool]): Executes one calculation from its operation
+            and operands and returns False if it reported an error.
+        speed (Optional[float]): Speed-up over the original pace, e.g. 10 for ten times
+            faster, or None to run the calculations back to back.
+        clock (Callable[[], float]): Monotonic clock in seconds.
+        sleep (Callable[[float], None]): Waits a number of seconds.
+
+    Returns:
+        ReplayReport: The measurements.
+
+    Raises:
+        ValueError: If speed is not positive.
+    """
+    if speed is not None and speed <= 0:
+        raise ValueError("speed must be positive")
+    latencies, service_times, errors = [], [], 0
+    started = clock()
+    origin = events[0].timestamp if events else 0.0
+    for event in events:
+        now = clock()
+        if speed is None:
+            due = now
+        else:
+            due = started + (event.timestamp - origin) / speed
+            if now < due:
+                sleep(due - now)
+                now = clock()
+        ok = run(event.operation, event.operands)
+        finished = clock()
+        errors += not ok
+        service_times.append(finished - now)
+        latencies.append(finished - due)
+    return ReplayReport(latencies, service_times, errors, clock() - started)
+
+
+def calculator_runner(dispatcher=None) -> Callable[[str, List[str]], bool]:
+    """
+    Returns a runner executing calculations through the command registry, as the REPL
+    and the daemon do. Load the plugins first.
+
+    Args:
+        dispatcher (Optional[AdaptiveDispatcher]): Executes the commands. Defaults to a new one.
+
+    Returns:
+        Callable[[str, List[str]], bool]: The runner for replay.
+    """
+    from app.cluster import execute_job
+    if dispatcher is None:
+        from app.dispatcher import AdaptiveDispatcher
+        dispatcher = AdaptiveDispatcher()
+
+    def run(operation: str, operands: List[str]) -> bool:
+        return "error" not in execute_job(operation, operands, dispatcher)
+
+    return run
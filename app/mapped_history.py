@@ -0,0 +1,405 @@
+"""
+This module defines the MappedHistory class, a read-only calculation history stored as
+fixed-width binary columns that are memory-mapped instead of parsed.
+
+A mapped history is a directory holding one .npy file per column and a header.json:
+
+    <path>/operation.npy   int32 codes into the 'operation' dictionary (-1 when missing)
+    <path>/num1.npy        int64 fixed-point mantissas (see FixedPointColumn), MISSING when absent
+    <path>/num1.exponent.npy    int8 exponent each value of num1 was written with
+    <path>/timestamp.npy   float64 epoch seconds
+    <path>/num1.overflow_*.npy  the values of num1 that did not fit, as an OverflowColumn
+                                keyed by row position: rows, values, offsets and text
+    <path>/header.json     row count, column scales and string dictionaries
+
+Opening a mapped history only reads the header. Column files, overflow files included, are
+mapped on first use and the operating system pages in just the parts a query touches.
+"""
+
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from app.fixed_point import FixedPointColumn, OverflowColumn
+
+NUMERIC_COLUMNS = ("num1", "num2", "result")
+FLOAT_COLUMNS = ("timestamp", "duration")
+
+# Mantissa marking a missing or overflowing value; never produced by FixedPointColumn,
+# whose mantissas are bounded by INT64_MAX in magnitude
+MISSING = int(np.iinfo(np.int64).min)
+
+# The arrays of an OverflowColumn, by the suffix of the file holding them
+OVERFLOW_ARRAYS = {"rows": "keys", "values": "floats", "offsets": "offsets", "text": "data"}
+
+
+class MappedHistory:
+    """
+    A memory-mapped, read-only calculation history.
+
+    Text columns such as 'operation' are dictionary encoded, so filtering by operation
+    compares int32 codes without touching the other columns. Timestamps written in order
+    are searched by binary search.
+
+    Attributes:
+        path (str): Directory holding the column files and the header.
+        scales (Dict[str, int]): The fixed-point scale of each numeric column.
+        dictionaries (Dict[str, List[str]]): The distinct values of each text column, indexed by code.
+        sorted_by_time (bool): Whether the timestamps are sorted, which enables binary search.
+    """
+
+    HEADER = "header.json"
+
+    # Rows read per chunk when converting a CSV file
+    CHUNK_SIZE = 100_000
+
+    def __init__(self, path: str):
+        """
+        Opens a mapped history by reading its header. No column data is read.
+
+        Args:
+            path (str): Directory written by MappedHistory.write or MappedHistory.convert_csv.
+        """
+        self.path = path
+        with open(os.path.join(path, self.HEADER), encoding="utf-8") as header_file:
+            header = json.load(header_file)
+        self._row_count: int = header["rows"]
+        self.scales: Dict[str, int] = header["scales"]
+        self.dictionaries: Dict[str, List[str]] = header["dictionaries"]
+        self.sorted_by_time: bool = header["sorted_by_time"]
+        self._columns: Dict[str, np.ndarray] = {}
+        self._overflow: Dict[str, OverflowColumn] = {}
+
+    @classmethod
+    def is_mapped(cls, path: str) -> bool:
+        """
+        Tells whether a path is a mapped history.
+
+        Args:
+            path (str): The path to check.
+
+        Returns:
+            bool: True if the path is a directory containing a mapped history header.
+        """
+        return os.path.isfile(os.path.join(path, cls.HEADER))
+
+    @classmethod
+    def write(cls, path: str, records: pd.DataFrame) -> 'MappedHistory':
+        """
+        Writes records as a mapped history, replacing any mapped history at path.
+
+        Args:
+            path (str): Directory to write.
+            records (pd.DataFrame): Records with numbers as Decimal values, numbers or text.
+
+        Returns:
+            MappedHistory: The written history, opened.
+        """
+        return cls._write_chunks(path, lambda: [records])
+
+    @classmethod
+    def convert_csv(cls, csv_path: str, path: str, chunk_size: Optional[int] = None) -> 'MappedHistory':
+        """
+        Converts a history CSV file to a mapped history without loading the whole file.
+
+        The CSV file is streamed twice in chunks: once to size the columns and pick their
+        scales, and once to fill them.
+
+        Args:
+            csv_path (str): The CSV file, as written by PandasFacade.save_to_csv.
+            path (str): Directory to write.
+            chunk_size (Optional[int]): Rows per chunk. Defaults to CHUNK_SIZE.
+
+        Returns:
+            MappedHistory: The written history, opened.
+        """
+        return cls._write_chunks(path, lambda: pd.read_csv(
+            csv_path, dtype=str, keep_default_na=False, chunksize=chunk_size or cls.CHUNK_SIZE))
+
+    def __len__(self) -> int:
+        """
+        Returns the number of records.
+        """
+        return self._row_count
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns the raw, memory-mapped values of a column.
+
+        Args:
+            name (str): The column name.
+
+        Returns:
+            np.ndarray: A read-only array backed by the column file.
+        """
+        if name not in self._columns:
+            self._columns[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+        return self._columns[name]
+
+    def overflow(self, name: str) -> OverflowColumn:
+        """
+        Returns the values of a numeric column that did not fit its mantissas.
+
+        Args:
+            name (str): One of 'num1', 'num2' or 'result'.
+
+        Returns:
+            OverflowColumn: The values keyed by row position, backed by the overflow files.
+        """
+        if name not in self._overflow:
+            self._overflow[name] = OverflowColumn(**{
+                attribute: np.load(os.path.join(self.path, f"{name}.overflow_{suffix}.npy"), mmap_mode="r")
+                for suffix, attribute in OVERFLOW_ARRAYS.items()})
+        return self._overflow[name]
+
+    def rows(self, first: int, last: int) -> pd.DataFrame:
+        """
+        Decodes a contiguous range of records.
+
+        Args:
+            first (int): Position of the first record.
+            last (int): Position after the last record.
+
+        Returns:
+            pd.DataFrame: The decoded records.
+        """
+        return self._decode(slice(first, last))
+
+    def get_all_records(self) -> pd.DataFrame:
+        """
+        Decodes every record.
+
+        Returns:
+            pd.DataFrame: The complete history.
+        """
+        return self.rows(0, self._row_count)
+
+    def get_latest_record(self) -> Optional[pd.Series]:
+        """
+        Decodes the last record only.
+
+        Returns:
+            Optional[pd.Series]: The last record, or None if the history is empty.
+        """
+        if not self._row_count:
+            return None
+        return self.rows(self._row_count - 1, self._row_count).iloc[0]
+
+    def filter_operations(self, operation: str) -> pd.DataFrame:
+        """
+        Decodes the records of one operation, reading only the operation codes to find them.
+
+        Args:
+            operation (str): The operation name to filter by.
+
+        Returns:
+            pd.DataFrame: The matching records.
+        """
+        try:
+            code = self.dictionaries["operation"].index(operation)
+        except ValueError:
+            return self._decode(np.empty(0, dtype="int64"))
+        return self._decode(np.flatnonzero(self.column("operation") == code))
+
+    def filter_by_time(self, start: Optional[float] = None, end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Decodes the records with start <= timestamp <= end.
+
+        Args:
+            start (Optional[float]): Earliest timestamp in epoch seconds, or None for no lower bound.
+            end (Optional[float]): Latest timestamp in epoch seconds, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: The matching records.
+        """
+        timestamps = self.column("timestamp")
+        if self.sorted_by_time:
+            first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+            last = self._row_count if end is None else int(np.searchsorted(timestamps, end, side="right"))
+            return self.rows(first, last)
+        mask = np.ones(self._row_count, dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps <= end
+        return self._decode(np.flatnonzero(mask))
+
+    def numeric_column(self, column: str) -> np.ndarray:
+        """
+        Returns a numeric column as floats for vectorized aggregation.
+
+        Args:
+            column (str): One of 'num1', 'num2' or 'result'.
+
+        Returns:
+            np.ndarray: float64 values, NaN where the value is missing or not numeric.
+        """
+        mantissas = self.column(column)
+        values = np.where(mantissas == MISSING, np.nan, mantissas / 10 ** self.scales[column])
+        overflow = self.overflow(column)
+        values[overflow.keys] = overflow.floats
+        return values
+
+    def _decode(self, index: Union[slice, np.ndarray]) -> pd.DataFrame:
+        """
+        Decodes the records selected by a slice or an array of positions.
+        """
+        decoded = {}
+        rows = np.arange(*index.indices(self._row_count)) if isinstance(index, slice) else index
+        for name, dictionary in self.dictionaries.items():
+            codes = np.asarray(self.column(name)[index])
+            decoded[name] = pd.Categorical.from_codes(codes, categories=dictionary).astype(object)
+        for name in NUMERIC_COLUMNS:
+            mantissas = np.asarray(self.column(name)[index])
+            codec = FixedPointColumn(self.scales[name])
+            decoded[name] = codec.decode(pd.Series(pd.arrays.IntegerArray(mantissas, mantissas == MISSING)),
+                                         self._exponents(name, index))
+            overflow = self.overflow(name)
+            positions, entries = overflow.lookup(rows)
+            for position, value in zip(positions, overflow.values(entries)):
+                decoded[name][position] = value
+        for name in FLOAT_COLUMNS:
+            decoded[name] = np.asarray(self.column(name)[index])
+        columns = ["operation", *NUMERIC_COLUMNS, *FLOAT_COLUMNS]
+        columns += [name for name in self.dictionaries if name not in columns]
+        return pd.DataFrame({name: pd.Series(decoded[name], dtype=object if name not in FLOAT_COLUMNS else "float64")
+                             for name in columns})
+
+    def _exponents(self, name: str, index: Union[slice, np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Returns the exponents of the selected values of a numeric column, or None for
+        histories written before exponents were kept, whose values take the column scale.
+        """
+        if not os.path.exists(os.path.join(self.path, f"{name}.exponent.npy")):
+            return None
+        return np.asarray(self.column(f"{name}.exponent")[index])
+
+    @classmethod
+    def _write_chunks(cls, path: str, chunks: Callable[[], Iterable[pd.DataFrame]]) -> 'MappedHistory':
+        """
+        Writes the records produced by chunks, which is called once per pass.
+        """
+        # First pass: count the rows, size the numeric columns and collect the dictionaries
+        row_count = 0
+        places = {name: 0 for name in NUMERIC_COLUMNS}
+        largest = {name: 0 for name in NUMERIC_COLUMNS}
+        dictionaries: Dict[str, Dict[str, int]] = {"operation": {}}
+        sorted_by_time = True
+        previous = -np.inf
+        for chunk in chunks():
+            row_count += len(chunk)
+            for name in NUMERIC_COLUMNS:
+                if name in chunk:
+                    chunk_places, chunk_largest = FixedPointColumn.required_scale(chunk[name].tolist())
+                    places[name] = max(places[name], chunk_places)
+                    largest[name] = max(largest[name], chunk_largest)
+            for name in chunk.columns:
+                if name not in NUMERIC_COLUMNS and name not in FLOAT_COLUMNS:
+                    dictionary = dictionaries.setdefault(name, {})
+                    for value in cls._text_values(chunk[name]).dropna().unique():
+                        dictionary.setdefault(value, len(dictionary))
+            timestamps = cls._float_values(chunk, "timestamp")
+            if len(timestamps):
+                sorted_by_time = sorted_by_time and not np.isnan(timestamps).any() and bool(
+                    timestamps[0] >= previous and np.all(np.diff(timestamps) >= 0))
+                previous = timestamps[-1]
+
+        os.makedirs(path, exist_ok=True)
+        header_path = os.path.join(path, cls.HEADER)
+        if os.path.exists(header_path):
+            os.remove(header_path)
+        scales = {name: FixedPointColumn.scale_for(places[name], largest[name]) for name in NUMERIC_COLUMNS}
+        dtypes = {name: "int32" for name in dictionaries}
+        dtypes.update({name: "int64" for name in NUMERIC_COLUMNS})
+        dtypes.update({f"{name}.exponent": "int8" for name in NUMERIC_COLUMNS})
+        dtypes.update({name: "float64" for name in FLOAT_COLUMNS})
+        overflow = {name: OverflowColumn() for name in NUMERIC_COLUMNS}
+        if not row_count:
+            for name, dtype in dtypes.items():
+                np.save(os.path.join(path, f"{name}.npy"), np.empty(0, dtype=dtype))
+        else:
+            overflow = cls._fill_columns(path, chunks, row_count, dtypes, scales, dictionaries)
+        for name, values in overflow.items():
+            for suffix, attribute in OVERFLOW_ARRAYS.items():
+                np.save(os.path.join(path, f"{name}.overflow_{suffix}.npy"), getattr(values, attribute))
+
+        # The header goes last, so a reader never opens half-written columns
+        header = {
+            "rows": row_count,
+            "scales": scales,
+            "dictionaries": {name: list(dictionary) for name, dictionary in dictionaries.items()},
+            "sorted_by_time": sorted_by_time,
+        }
+        with open(header_path + ".tmp", "w", encoding="utf-8") as header_file:
+            json.dump(header, header_file)
+        os.replace(header_path + ".tmp", header_path)
+        return cls(path)
+
+    @classmethod
+    def _fill_columns(cls, path: str, chunks: Callable[[], Iterable[pd.DataFrame]], row_count: int,
+                      dtypes: Dict[str, str], scales: Dict[str, int],
+                      dictionaries: Dict[str, Dict[str, int]]) -> Dict[str, OverflowColumn]:
+        """
+        Second pass of _write_chunks: encodes every chunk into the column files.
+
+        Returns:
+            Dict[str, OverflowColumn]: Per numeric column, the values that did not fit, keyed by row position.
+        """
+        columns = {
+            name: np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode="w+",
+                                            dtype=dtype, shape=(row_count,))
+            for name, dtype in dtypes.items()
+        }
+        overflow: Dict[str, List[OverflowColumn]] = {name: [] for name in NUMERIC_COLUMNS}
+        first = 0
+        for chunk in chunks():
+            last = first + len(chunk)
+            for name, dictionary in dictionaries.items():
+                values = cls._text_values(chunk[name]) if name in chunk else pd.Series(np.nan, index=chunk.index)
+                columns[name][first:last] = values.map(dictionary).fillna(-1).to_numpy(dtype="int32")
+            for name in NUMERIC_COLUMNS:
+                values = chunk[name].tolist() if name in chunk else [None] * len(chunk)
+                mantissas, exponents, batch_overflow = FixedPointColumn(scales[name]).encode_fixed(values)
+                columns[name][first:last] = mantissas.to_numpy(dtype="int64", na_value=MISSING)
+                columns[f"{name}.exponent"][first:last] = exponents
+                overflow[name].append(OverflowColumn.from_text(first + batch_overflow.index.to_numpy(), batch_overflow))
+            for name in FLOAT_COLUMNS:
+                columns[name][first:last] = cls._float_values(chunk, name)
+            first = last
+        for column in columns.values():
+            column.flush()
+        return {name: cls._concat_overflow(parts) for name, parts in overflow.items()}
+
+    @staticmethod
+    def _concat_overflow(parts: List[OverflowColumn]) -> OverflowColumn:
+        """
+        Joins the overflow values of consecutive chunks in one pass.
+        """
+        if not parts:
+            return OverflowColumn()
+        ends = np.cumsum([0] + [len(part.data) for part in parts[:-1]])
+        return OverflowColumn(np.concatenate([part.keys for part in parts]),
+                              np.concatenate([part.floats for part in parts]),
+                              np.concatenate([part.offsets[:-1] + end for part, end in zip(parts, ends)]
+                                             + [parts[-1].offsets[-1:] + ends[-1]]),
+                              np.concatenate([part.data for part in parts]))
+
+    @staticmethod
+    def _text_values(values: pd.Series) -> pd.Series:
+        """
+        Returns text column values as strings, NaN where missing or empty.
+        """
+        text = values.where(values.notna(), None).map(lambda value: None if value is None else str(value))
+        return text.replace("", None)
+
+    @staticmethod
+    def _float_values(chunk: pd.DataFrame, name: str) -> np.ndarray:
+        """
+        Returns a column of a chunk as floats, NaN where it is missing or not numeric.
+        """
+        if name not in chunk:
+            return np.full(len(chunk), np.nan)
+        return pd.to_numeric(chunk[name], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
@@ -0,0 +1,433 @@
+"""
+This module reports where the memory of a long-running calculator process goes.
+
+collect_memory_report measures the subsystems directly: the history's DataFrame with
+DataFrame.memory_usage(deep=True), the command objects still alive, and the caches kept
+beside them. When tracemalloc is tracing, it also attributes every traced allocation to
+the application module that caused it, even when pandas or numpy made the allocation,
+and lists the top allocation sites.
+
+MemoryMonitor takes such measurements and tracemalloc snapshots periodically on a
+background thread, so a slow leak in a daemon or worker shows up as growth between
+the oldest and newest snapshots.
+"""
+
+import collections
+import functools
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.background_loop import BackgroundLoop
+from app.command import Command
+
+# Stack frames recorded per allocation, enough to reach the application code behind a pandas call
+TRACE_FRAMES = 16
+
+# Application modules grouped by the subsystem they belong to; others count as 'other'
+SUBSYSTEMS = {
+    "history": ("pandas_facade", "fixed_point", "history_archive", "history_backend", "history_persistence",
+                "history_rollup", "mapped_history", "retention_policy", "sharded_buffer", "sqlite_history"),
+    "commands": ("command", "command_registry", "calculation", "calculations", "calculator", "operations",
+                 "plugins"),
+    "execution": ("dispatcher", "scheduler", "supervisor", "shared_operands", "cluster", "daemon"),
+}
+
+_APP_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+_ROOT_DIRECTORY = os.path.dirname(_APP_DIRECTORY)
+
+
+def format_bytes(size: float) -> str:
+    """
+    Formats a byte count with a binary unit, e.g. '1.5 MiB'.
+    """
+    if abs(size) < 1024:
+        return f"{size:.0f} B"
+    for unit in ("KiB", "MiB"):
+        size /= 1024
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GiB"
+
+
+def resident_set_size() -> Optional[int]:
+    """
+    Returns the resident set size of this process.
+
+    Returns:
+        Optional[int]: Bytes currently resident, or None where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def subsystem_of(filename: str) -> Optional[str]:
+    """
+    Names the subsystem of an application source file.
+
+    Args:
+        filename (str): A source file from a traceback.
+
+    Returns:
+        Optional[str]: A key of SUBSYSTEMS, 'main' or 'other' for files of this application,
+            or None for files outside it.
+    """
+    path = os.path.abspath(filename)
+    if path == os.path.join(_ROOT_DIRECTORY, "main.py"):
+        return "main"
+    if not path.startswith(_APP_DIRECTORY + os.sep):
+        return None
+    module = os.path.relpath(path, _APP_DIRECTORY).split(os.sep)[0]
+    module = module[:-3] if module.endswith(".py") else module
+    for subsystem, modules in SUBSYSTEMS.items():
+        if module in modules:
+            return subsystem
+    return "other"
+
+
+@functools.lru_cache(maxsize=None)
+def library_of(filename: str) -> str:
+    """
+    Names the third-party package or standard library a source file belongs to.
+    """
+    parts = os.path.abspath(filename).split(os.sep)
+    if "site-packages" in parts:
+        index = parts.index("site-packages")
+        if index + 1 < len(parts):
+            name = parts[index + 1]
+            return name[:-3] if name.endswith(".py") else name
+    return "python"
+
+
+def allocations_by_subsystem(snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+    """
+    Attributes traced memory to the innermost application frame of each allocation.
+
+    Allocations without an application frame are attributed to their library, e.g. 'pandas'.
+
+    Args:
+        snapshot (tracemalloc.Snapshot): The traced allocations.
+
+    Returns:
+        Dict[str, int]: Bytes per subsystem or library, largest first.
+    """
+    totals: Dict[str, int] = collections.Counter()
+    # Grouping by traceback first visits each distinct call path once instead of every block
+    for statistic in snapshot.statistics("traceback"):
+        frames = statistic.traceback
+        # Frames run from the oldest to the most recent call
+        owner = next((name for name in (subsystem_of(frame.filename) for frame in reversed(frames)) if name), None)
+        totals[owner or library_of(frames[-1].filename)] += statistic.size
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    """
+    Takes a tracemalloc snapshot without tracemalloc's own allocations.
+
+    Raises:
+        RuntimeError: If tracemalloc is not tracing.
+    """
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def command_memory() -> Dict[str, Tuple[int, int]]:
+    """
+    Counts the command objects still alive and the memory they hold.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: Number of instances and bytes, including their operands
+            and memoized results, per command class.
+    """
+    totals: Dict[str, List[int]] = {}
+    # isinstance against the abstract base is slow over every tracked object; decide once per type
+    is_command: Dict[type, bool] = {}
+    for candidate in gc.get_objects():
+        kind = type(candidate)
+        matches = is_command.get(kind)
+        if matches is None:
+            matches = is_command[kind] = issubclass(kind, Command)
+        if not matches:
+            continue
+        size = sys.getsizeof(candidate)
+        for cls in type(candidate).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                value = getattr(candidate, name, None)
+                if value is not None:
+                    size += sys.getsizeof(value)
+                    if isinstance(value, (list, tuple)):
+                        size += sum(sys.getsizeof(item) for item in value)
+        entry = totals.setdefault(type(candidate).__name__, [0, 0])
+        entry[0] += 1
+        entry[1] += size
+    return {name: (count, size) for name, (count, size) in sorted(totals.items())}
+
+
+class MemoryReport:
+    """
+    Memory used by the calculator's subsystems at one point in time.
+
+    Attributes:
+        taken_at (float): When the report was collected, in epoch seconds.
+        rss (Optional[int]): Resident set size of the process in bytes.
+        history (Dict[str, int]): 'rows', 'bytes' and 'bytes_per_row' of the resident history,
+            plus 'overflow_values', 'mapped_rows' and 'spilled' counts.
+        history_columns (Dict[str, int]): Deep bytes per history column, plus the 'overflow' columns.
+        commands (Dict[str, Tuple[int, int]]): Live command instances and their bytes per class.
+        caches (Dict[str, int]): Bytes or entries held by caches, see collect_memory_report.
+        traced (Optional[Tuple[int, int]]): Current and peak bytes traced by tracemalloc.
+        subsystems (Dict[str, int]): Traced bytes per subsystem, empty when not tracing.
+        top_sites (List[tracemalloc.Statistic]): The largest allocation sites, empty when not tracing.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty MemoryReport; use collect_memory_report to fill one.
+        """
+        self.taken_at = time.time()
+        self.rss: Optional[int] = None
+        self.history: Dict[str, int] = {}
+        self.history_columns: Dict[str, int] = {}
+        self.commands: Dict[str, Tuple[int, int]] = {}
+        self.caches: Dict[str, int] = {}
+        self.traced: Optional[Tuple[int, int]] = None
+        self.subsystems: Dict[str, int] = {}
+        self.top_sites: List[tracemalloc.Statistic] = []
+
+    def summary(self) -> str:
+        """
+        Describes the report in a few lines.
+
+        Returns:
+            str: The report formatted for the REPL.
+        """
+        lines = [f"Resident set size: {format_bytes(self.rss) if self.rss is not None else 'unavailable'}"]
+        if self.history:
+            lines.append(f"History: {self.history['rows']:,} resident rows, {format_bytes(self.history['bytes'])} "
+                         f"({self.history['bytes_per_row']:,.1f} bytes per row)")
+            lines.append("  " + ", ".join(f"{column} {format_bytes(size)}"
+                                          for column, size in self.history_columns.items()))
+            extras = [f"{self.history[key]:,} {label}" for key, label in
+                      (("overflow_values", "overflow values"), ("mapped_rows", "memory-mapped rows"),
+                       ("spilled", "spilled to disk")) if self.history.get(key)]
+            if extras:
+                lines.append("  " + ", ".join(extras))
+        count = sum(count for count, _ in self.commands.values())
+        size = sum(size for _, size in self.commands.values())
+        lines.append(f"Commands: {count:,} live objects, {format_bytes(size)}")
+        for name, (count, size) in self.commands.items():
+            lines.append(f"  {name}: {count:,} ({format_bytes(size)})")
+        if self.caches:
+            lines.append("Caches: " + ", ".join(f"{name} {format_bytes(size) if name.endswith('bytes') else f'{size:,}'}"
+                                                for name, size in self.caches.items()))
+        if self.traced is None:
+            lines.append("Allocation tracing is off; 'memory trace' starts it.")
+            return "\n".join(lines)
+        current, peak = self.traced
+        lines.append(f"Traced allocations: {format_bytes(current)} (peak {format_bytes(peak)})")
+        lines.append("  " + ", ".join(f"{name} {format_bytes(size)}" for name, size in self.subsystems.items()))
+        if self.top_sites:
+            lines.append("Top allocation sites:")
+            for statistic in self.top_sites:
+                frame = statistic.traceback[-1]
+                lines.append(f"  {format_bytes(statistic.size):>10} in {statistic.count:>7,} blocks  "
+                             f"{frame.filename}:{frame.lineno}")
+        return "\n".join(lines)
+
+
+def collect_memory_report(history=None, dispatcher=None, top: int = 10,
+                          snapshot: Optional[tracemalloc.Snapshot] = None) -> MemoryReport:
+    """
+    Measures the memory of the calculator's subsystems.
+
+    Args:
+        history (Optional[PandasFacade]): The calculation history to measure.
+        dispatcher (Optional[AdaptiveDispatcher]): The dispatcher whose cost table to count.
+        top (int): Number of allocation sites to list when tracemalloc is tracing.
+        snapshot (Optional[tracemalloc.Snapshot]): A snapshot already taken, to avoid taking another.
+
+    Returns:
+        MemoryReport: The measurements.
+    """
+    report = MemoryReport()
+    report.rss = resident_set_size()
+    if history is not None:
+        _measure_history(report, history)
+    report.commands = command_memory()
+    if dispatcher is not None:
+        report.caches["dispatcher cost entries"] = len(dispatcher.costs)
+    if tracemalloc.is_tracing():
+        report.traced = tracemalloc.get_traced_memory()
+        snapshot = snapshot or take_snapshot()
+        report.subsystems = allocations_by_subsystem(snapshot)
+        report.top_sites = snapshot.statistics("lineno")[:top]
+    return report
+
+
+def _measure_history(report: MemoryReport, history) -> None:
+    """
+    Fills the history figures and history caches of a report.
+    """
+    if history.backend is not None:
+        # The records live in the backend, so only the buffers are resident
+        report.history = {"rows": 0, "bytes": 0, "bytes_per_row": 0}
+        return
+    snapshot = history.snapshot()
+    columns = snapshot.frame.memory_usage(deep=True, index=False)
+    rows = len(snapshot.frame)
+    total = int(columns.sum()) + snapshot.overflow_bytes
+    report.history = {"rows": rows, "bytes": total, "bytes_per_row": total / rows if rows else 0,
+                      "overflow_values": snapshot.overflow_count,
+                      "mapped_rows": len(history.mapped) if history.mapped is not None else 0,
+                      "spilled": len(history.spill) if history.spill is not None else 0}
+    report.history_columns = {str(column): int(size) for column, size in columns.items()}
+    report.history_columns["overflow"] = snapshot.overflow_bytes
+    if snapshot.cached_view is not None:
+        report.caches["decoded history bytes"] = int(snapshot.cached_view.memory_usage(deep=True, index=False).sum())
+    report.caches["rollup operations"] = len(history.rollup.records)
+
+
+class MemorySample:
+    """
+    One periodic measurement taken by a MemoryMonitor.
+
+    Attributes:
+        report (MemoryReport): The subsystem figures.
+        snapshot (tracemalloc.Snapshot): The traced allocations at the time.
+    """
+
+    __slots__ = ("report", "snapshot")
+
+    def __init__(self, report: MemoryReport, snapshot: tracemalloc.Snapshot):
+        self.report = report
+        self.snapshot = snapshot
+
+
+class MemoryMonitor(BackgroundLoop):
+    """
+    Periodically measures memory on a background thread to reveal leaks in long-lived processes.
+
+    Starting the monitor starts tracemalloc if it is not already tracing. The monitor keeps
+    the most recent samples; a warning is logged when traced memory has grown across every
+    one of them.
+
+    Attributes:
+        history (Optional[PandasFacade]): The calculation history to measure.
+        dispatcher (Optional[AdaptiveDispatcher]): The dispatcher whose cost table to count.
+        interval (float): Seconds between samples.
+        samples (Deque[MemorySample]): The most recent samples, oldest first.
+    """
+
+    def __init__(self, history=None, dispatcher=None, interval: float = 60.0, keep: int = 10):
+        """
+        Initializes the MemoryMonitor. Call start to begin sampling.
+
+        Args:
+            history (Optional[PandasFacade]): The calculation history to measure.
+            dispatcher (Optional[AdaptiveDispatcher]): The dispatcher whose cost table to count.
+            interval (float): Seconds between samples.
+            keep (int): Number of samples to keep, at least 2.
+
+        Raises:
+            ValueError: If interval is not positive or keep is less than 2.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if keep < 2:
+            raise ValueError("keep must be at least 2")
+        super().__init__("memory-monitor")
+        self.history = history
+        self.dispatcher = dispatcher
+        self.interval = interval
+        self.samples: Deque[MemorySample] = collections.deque(maxlen=keep)
+        self._started_tracing = False
+        self._warned = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Starts tracing if needed, takes a first sample and starts the background thread.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._started_tracing = True
+        self.sample()
+        super().start()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread, and tracemalloc if the monitor started it.
+        """
+        super().stop()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def sample(self) -> MemorySample:
+        """
+        Takes a sample now.
+
+        Returns:
+            MemorySample: The new sample, also appended to samples.
+
+        Raises:
+            RuntimeError: If tracemalloc is not tracing.
+        """
+        snapshot = take_snapshot()
+        report = collect_memory_report(self.history, self.dispatcher, snapshot=snapshot)
+        sample = MemorySample(report, snapshot)
+        with self._lock:
+            self.samples.append(sample)
+            growing = self.leak_suspected()
+        if growing and not self._warned:
+            first, last = self.samples[0].report.traced[0], self.samples[-1].report.traced[0]
+            logging.warning(f"Traced memory grew in each of the last {len(self.samples)} samples, "
+                            f"from {format_bytes(first)} to {format_bytes(last)}; 'memory growth' shows where.")
+        self._warned = growing
+        return sample
+
+    def leak_suspected(self) -> bool:
+        """
+        Whether the samples are full and traced memory grew between every consecutive pair.
+        """
+        samples = list(self.samples)
+        if len(samples) < (self.samples.maxlen or 0):
+            return False
+        traced = [sample.report.traced[0] for sample in samples]
+        return all(later > earlier for earlier, later in zip(traced, traced[1:]))
+
+    def growth(self, top: int = 10) -> List[tracemalloc.StatisticDiff]:
+        """
+        Compares the newest sample with the oldest one.
+
+        Args:
+            top (int): Number of allocation sites to return.
+
+        Returns:
+            List[tracemalloc.StatisticDiff]: The sites whose memory grew most, empty with fewer than two samples.
+        """
+        with self._lock:
+            if len(self.samples) < 2:
+                return []
+            oldest, newest = self.samples[0].snapshot, self.samples[-1].snapshot
+        differences = newest.compare_to(oldest, "lineno")
+        return [difference for difference in differences if difference.size_diff > 0][:top]
+
+    def _run(self) -> None:
+        """
+        Samples every interval until stopped.
+        """
+        while not self._stopping.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logging.error(f"Memory sample failed: {e}")
@@ -0,0 +1,213 @@
+"""
+This module parses many numbers at once, such as the operands of a REPL line or the
+contents of a vector file.
+
+Numbers are separated by whitespace or commas. parse_decimals converts them to Decimal
+in one batch; parse_floats hands the whole buffer to NumPy's C parser and returns a
+float64 array, for statistics that compute in floating point anyway and would otherwise
+convert every number twice. Both accept exactly the tokens matching NUMBER, even where
+Decimal, float or NumPy would read more, such as '1_000' or 'sNaN'. Both report the first
+malformed token with its position as a MalformedNumber, which is an InvalidOperation like
+the error Decimal raises, so existing handlers keep working.
+"""
+
+import re
+import warnings
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# A token is a run of characters other than whitespace and commas
+TOKEN = re.compile(r"[^\s,]+")
+
+# A number in decimal notation with an optional exponent, an infinity or NaN, in ASCII
+NUMBER = re.compile(r"[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?|inf|infinity|nan)", re.IGNORECASE | re.ASCII)
+
+# The characters numbers and separators are written with, deleted to find any other
+_NUMBER_CHARACTERS = dict.fromkeys(map(ord, "0123456789+-.eEinftyaINFTYA \t\n\r\f\v,"))
+
+# A NaN with a diagnostic payload, which Decimal reads although it uses no other character
+_NAN_PAYLOAD = re.compile(r"nan\d", re.IGNORECASE)
+
+
+class MalformedNumber(InvalidOperation, ValueError):
+    """
+    Raised when a token is not a number.
+
+    Attributes:
+        token (str): The offending token.
+        index (int): Its position among the tokens, from 0.
+        line (Optional[int]): Line of the text it is on, from 1, when the text spans several lines.
+        column (Optional[int]): Column it starts at, from 1, when parsed from text rather than tokens.
+    """
+
+    def __init__(self, token: str, index: int, line: Optional[int] = None, column: Optional[int] = None):
+        """
+        Initializes the MalformedNumber.
+
+        Args:
+            token (str): The offending token.
+            index (int): Its position among the tokens, from 0.
+            line (Optional[int]): Line it is on, if the text spans several lines.
+            column (Optional[int]): Column it starts at, if known.
+        """
+        if column is None:
+            where = f"(number {index + 1})"
+        elif line is None:
+            where = f"at column {column}"
+        else:
+            where = f"at line {line}, column {column}"
+        super().__init__(f"{token!r} is not a valid number {where}")
+        self.token = token
+        self.index = index
+        self.line = line
+        self.column = column
+
+
+def tokenize(text: str, start: int = 0) -> List[str]:
+    """
+    Splits text into number tokens.
+
+    Args:
+        text (str): Numbers separated by whitespace or commas.
+        start (int): Offset at which the numbers begin, e.g. after a command name.
+
+    Returns:
+        List[str]: The tokens, in order.
+    """
+    return text[start:].replace(",", " ").split()
+
+
+def _locate(text: str, start: int, index: int, token: str) -> MalformedNumber:
+    """
+    Builds the error for the index-th token of text, finding where it is.
+    """
+    for number, match in enumerate(TOKEN.finditer(text, start)):
+        if number == index:
+            position = match.start()
+            break
+    else:
+        return MalformedNumber(token, index)
+    line_start = text.rfind("\n", 0, position) + 1
+    line = text.count("\n", 0, position) + 1 if "\n" in text else None
+    return MalformedNumber(token, index, line, position - line_start + 1)
+
+
+def _first_invalid(tokens: Sequence[str]) -> int:
+    """
+    Returns the index of the first token that does not match NUMBER, or -1 if they all do.
+    """
+    for index, match in enumerate(map(NUMBER.fullmatch, tokens)):
+        if match is None:
+            return index
+    return -1
+
+
+def _needs_checking(body: str) -> bool:
+    """
+    Tells whether text may hold a token that does not match NUMBER.
+
+    The check is two scans in C, so well-formed text is never matched token by token.
+    Text for which it returns False only holds tokens that match NUMBER or that Decimal,
+    float and NumPy reject as well.
+    """
+    if body.translate(_NUMBER_CHARACTERS):
+        return True
+    return ("a" in body or "A" in body) and _NAN_PAYLOAD.search(body) is not None
+
+
+def parse_decimal_tokens(tokens: Sequence[str]) -> List[Decimal]:
+    """
+    Converts tokens that are already split, such as operands received as JSON, to Decimal.
+
+    Args:
+        tokens (Sequence[str]): The numbers as text.
+
+    Returns:
+        List[Decimal]: The numbers.
+
+    Raises:
+        MalformedNumber: If a token is not a number; its position is the token's index.
+    """
+    index = _first_invalid(tokens)
+    if index >= 0:
+        raise MalformedNumber(tokens[index], index)
+    return list(map(Decimal, tokens))
+
+
+def parse_decimals(text: str, start: int = 0) -> List[Decimal]:
+    """
+    Parses every number in text as a Decimal.
+
+    Args:
+        text (str): Numbers separated by whitespace or commas.
+        start (int): Offset at which the numbers begin; columns are still counted from
+            the start of text.
+
+    Returns:
+        List[Decimal]: The numbers, exactly as written.
+
+    Raises:
+        MalformedNumber: If a token is not a number.
+    """
+    tokens = tokenize(text, start)
+    if not _needs_checking(text[start:]):
+        try:
+            return list(map(Decimal, tokens))
+        except InvalidOperation:
+            pass
+    index = _first_invalid(tokens)
+    if index >= 0:
+        raise _locate(text, start, index, tokens[index])
+    return list(map(Decimal, tokens))
+
+
+def parse_floats(text: str, start: int = 0) -> "np.ndarray":
+    """
+    Parses every number in text as a float.
+
+    Well-formed text is converted by NumPy without creating a Python object per number;
+    the tokens are only examined one by one when the text may hold a malformed one.
+
+    Args:
+        text (str): Numbers separated by whitespace or commas.
+        start (int): Offset at which the numbers begin; columns are still counted from
+            the start of text.
+
+    Returns:
+        np.ndarray: A float64 array of the numbers, each correctly rounded.
+
+    Raises:
+        MalformedNumber: If a token is not a number.
+    """
+    # Imported here so the REPL, which parses Decimals, starts without NumPy
+    import numpy as np
+
+    body = text[start:]
+    if "," in body:
+        body = body.replace(",", " ")
+    tokens = body.split()
+    if not tokens:
+        # NumPy reads blank text as [-1.0]
+        return np.empty(0, dtype=np.float64)
+    # NumPy's parser also reads 'nan(...)', and float reads '1_000' and non-ASCII digits
+    if _needs_checking(body):
+        index = _first_invalid(tokens)
+        if index >= 0:
+            raise _locate(text, start, index, tokens[index])
+    with warnings.catch_warnings():
+        # NumPy warns, and will later raise, when it stops at a token it cannot read
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            values = np.fromstring(body, dtype=np.float64, sep=" ")
+        except (DeprecationWarning, ValueError):
+            values = None
+    if values is not None and len(values) == len(tokens):
+        return values
+    index = _first_invalid(tokens)
+    if index >= 0:
+        raise _locate(text, start, index, tokens[index])
+    # Separated by whitespace NumPy's parser does not skip; every token is a number
+    return np.array(tokens, dtype=np.float64)
@@ -3,38 +3,365 @@ This module defines the PandasFacade class, which simplifies typical DataFrame o
 such as adding and removing records, filtering by criteria, and saving/loading data to/from files.
 """
 
+import copy
+import threading
+import time
 import pandas as pd
-from typing import Dict
+import numpy as np
+from typing import Callable, Collection, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+from app.fixed_point import FixedPointColumn, OverflowColumn, parse_number
+from app.history_backend import HistoryBackend
+from app.history_persistence import read_history_csv
+from app.history_rollup import HistoryRollup
+from app.mapped_history import MappedHistory
+from app.retention_policy import RetentionPolicy, HistorySpill
+from app.sharded_buffer import ShardedAppendBuffer
+
+# Offset turning time.monotonic() into epoch seconds, fixed at import so history
+# timestamps never go backwards when the wall clock is adjusted
+_MONOTONIC_EPOCH = time.time() - time.monotonic()
+
+
+def history_time() -> float:
+    """
+    Returns the current time for history timestamps.
+
+    Returns:
+        float: Seconds since the epoch, never decreasing within the process.
+    """
+    return _MONOTONIC_EPOCH + time.monotonic()
+
+
+class HistorySnapshot:
+    """
+    An immutable, self-consistent view of the resident history.
+
+    Every change to a PandasFacade produces a new snapshot instead of modifying the
+    current one, so a reader holding a snapshot never observes a half-applied update.
+
+    Attributes:
+        frame (pd.DataFrame): The compact rows, sorted by 'timestamp': categorical 'operation',
+            Int64 mantissas for the numeric columns, float 'timestamp' and 'duration' in
+            seconds, a hidden '_row_id' and, per numeric column, a hidden int8 exponent such
+            as '_num1_exponent' holding the exponent each value was written with.
+        scales (Dict[str, int]): The fixed-point scale of each numeric column.
+        overflow (Dict[str, OverflowColumn]): Per numeric column, the values that did not fit, keyed by row id.
+    """
+
+    def __init__(self, frame: pd.DataFrame, scales: Dict[str, int], overflow: Dict[str, OverflowColumn]):
+        """
+        Initializes the HistorySnapshot. The arguments must not be modified afterwards.
+        """
+        self.frame = frame
+        self.scales = scales
+        self.overflow = overflow
+        self._view: Optional[pd.DataFrame] = None
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """
+        The sorted timestamps of the rows, which serve as the time index.
+
+        Returns:
+            np.ndarray: float64 epoch seconds, one per row.
+        """
+        return self.frame["timestamp"].to_numpy()
+
+    def time_slice(self, start: Optional[float], end: Optional[float]) -> pd.DataFrame:
+        """
+        Returns the compact rows with start <= timestamp <= end by binary search.
+
+        Args:
+            start (Optional[float]): Earliest timestamp, or None for no lower bound.
+            end (Optional[float]): Latest timestamp, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: The matching rows of the compact frame.
+        """
+        timestamps = self.timestamps
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        return self.frame.iloc[first:last]
+
+    @property
+    def view(self) -> pd.DataFrame:
+        """
+        The decoded rows of this snapshot, built on first access.
+
+        Returns:
+            pd.DataFrame: The rows with string operations and Decimal numbers.
+        """
+        if self._view is None:
+            self._view = self.decode(self.frame)
+        return self._view
+
+    @property
+    def overflow_count(self) -> int:
+        """
+        The number of values kept in the overflow columns.
+        """
+        return sum(len(column) for column in self.overflow.values())
+
+    @property
+    def overflow_bytes(self) -> int:
+        """
+        The memory taken by the overflow columns in bytes.
+        """
+        return sum(column.nbytes for column in self.overflow.values())
+
+    def row_overflow_bytes(self) -> np.ndarray:
+        """
+        Returns the bytes each row keeps in the overflow columns.
+
+        Returns:
+            np.ndarray: int64 sizes, one per row of the frame.
+        """
+        sizes = np.zeros(len(self.frame), dtype="int64")
+        row_ids = self.frame["_row_id"].to_numpy()
+        for column in self.overflow.values():
+            positions, entries = column.lookup(row_ids)
+            sizes[positions] += column.entry_bytes()[entries]
+        return sizes
+
+    @property
+    def cached_view(self) -> Optional[pd.DataFrame]:
+        """
+        The decoded rows if view has already built them, without building them otherwise.
+        """
+        return self._view
+
+    def decode(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converts compact rows of this snapshot back to the public representation.
+
+        Args:
+            frame (pd.DataFrame): Rows taken from this snapshot's frame.
+
+        Returns:
+            pd.DataFrame: The rows with string operations and Decimal numbers.
+        """
+        decoded = frame.drop(columns=list(PandasFacade.HIDDEN_COLUMNS)).reset_index(drop=True)
+        decoded["operation"] = decoded["operation"].astype(object)
+        row_ids = frame["_row_id"].to_numpy()
+        for column in PandasFacade.NUMERIC_COLUMNS:
+            exponents = frame[PandasFacade.EXPONENT_COLUMNS[column]].to_numpy()
+            values = FixedPointColumn(self.scales[column]).decode(frame[column], exponents)
+            overflow = self.overflow[column]
+            positions, entries = overflow.lookup(row_ids)
+            for position, value in zip(positions, overflow.values(entries)):
+                values[position] = value
+            decoded[column] = pd.Series(values, dtype=object)
+        return decoded
 
 
 class PandasFacade:
     """
     Simplifies common data operations on a Pandas DataFrame.
+
+    Records are stored compactly: 'operation' is categorical and the numeric columns
+    'num1', 'num2' and 'result' are scaled int64 mantissas (see FixedPointColumn), with
+    values that do not fit kept as exact text in an OverflowColumn per column. The dataframe
+    property decodes them back to Decimal values.
+
+    Every record carries a 'timestamp' (epoch seconds from history_time, assigned when the
+    record is added unless it brings its own) and an optional 'duration' in seconds. Rows
+    are kept sorted by timestamp, so filter_by_time and aggregate_by_time locate a time
+    range by binary search instead of scanning the history.
+
+    The facade is safe to share between threads. add_record only appends to a buffer
+    owned by the calling thread; buffered records are merged into a new HistorySnapshot
+    whenever the history is read or a buffer grows past MERGE_THRESHOLD. Reads always
+    see a complete snapshot that includes every record added before the read started.
+
+    The resident records are kept within the limits of a RetentionPolicy. Records evicted
+    by the policy are dropped, or spilled to disk when the policy names a spill segment,
+    in which case they remain visible through get_all_records and filter_operations.
+
+    A history loaded with load_mapped is not read into memory at all: it stays a
+    memory-mapped MappedHistory in front of the spilled and resident records, and reads
+    decode only the mapped rows they return.
+
+    A facade given a HistoryBackend keeps no records itself. add_record writes each record
+    straight through to the backend, so other processes sharing it see the record at
+    once, and every read is answered by the backend. The retention policy does not apply then.
+
+    Per-operation statistics of the numeric columns are kept in a HistoryRollup that is
+    updated as records are encoded, removed or dropped, so operation_stats is answered
+    without scanning the history.
     """
 
-    def __init__(self):
+    NUMERIC_COLUMNS = ("num1", "num2", "result")
+
+    # The hidden column holding the exponent each value of a numeric column was written with
+    EXPONENT_COLUMNS = {column: f"_{column}_exponent" for column in NUMERIC_COLUMNS}
+
+    # Columns of the compact frame that are not part of the records
+    HIDDEN_COLUMNS = ("_row_id", *EXPONENT_COLUMNS.values())
+
+    # Pending records in one thread's buffer that trigger an opportunistic merge
+    MERGE_THRESHOLD = 256
+
+    def __init__(self, policy: Optional[RetentionPolicy] = None, backend: Optional[HistoryBackend] = None):
         """
         Initializes the PandasFacade with a DataFrame containing default columns.
 
         The DataFrame will have columns: 'operation', 'num1', 'num2', 'result'.
+
+        Args:
+            policy (Optional[RetentionPolicy]): Limits on the resident history. Defaults to unbounded.
+            backend (Optional[HistoryBackend]): Storage to delegate the records to. Defaults to memory.
+        """
+        self._lock = threading.RLock()
+        self._pending = ShardedAppendBuffer()
+        # Set while drained records are being merged, until the snapshot holding them is published
+        self._merging = False
+        self._snapshot = self._empty_snapshot()
+        self._next_row_id = 0
+        # Bumped by every change other than an append, so change trackers know to start over
+        self._generation = 0
+        self.rollup = HistoryRollup()
+        # Set by load_mapped; the mapped rows are added to the rollup on the first operation_stats
+        self._unrolled_mapped: Optional[MappedHistory] = None
+        self.policy: RetentionPolicy = RetentionPolicy()
+        self.spill: Optional[HistorySpill] = None
+        self.mapped: Optional[MappedHistory] = None
+        self.backend = backend
+        self.set_policy(policy or RetentionPolicy())
+
+    @property
+    def dataframe(self) -> pd.DataFrame:
         """
-        self.dataframe: pd.DataFrame = pd.DataFrame(columns=["operation", "num1", "num2", "result"])
+        The resident records with numeric columns decoded to Decimal values.
+
+        Returns:
+            pd.DataFrame: The decoded records. Treat it as read-only; it is shared with other readers.
+        """
+        if self.backend is not None:
+            return self.get_all_records()
+        return self.snapshot().view
+
+    def snapshot(self) -> HistorySnapshot:
+        """
+        Merges pending records and returns the current snapshot.
+
+        Returns:
+            HistorySnapshot: A consistent view of the resident history.
+        """
+        # A merge in progress may have drained this thread's records without publishing them yet
+        if len(self._pending) or self._merging:
+            with self._lock:
+                self._merge_pending()
+        return self._snapshot
+
+    def set_policy(self, policy: RetentionPolicy) -> None:
+        """
+        Replaces the retention policy and immediately evicts rows that exceed it.
+
+        Args:
+            policy (RetentionPolicy): The new limits on the resident history.
+        """
+        with self._lock:
+            self._merge_pending()
+            self.policy = policy
+            if self.spill is None or self.spill.path != policy.spill_path:
+                self.spill = HistorySpill(policy.spill_path) if policy.spill_path else None
+            self._snapshot = self._enforce_policy(self._snapshot)
+
+    def set_backend(self, backend: Optional[HistoryBackend]) -> None:
+        """
+        Switches the storage the records are delegated to. Records stored so far stay where they are.
+
+        Args:
+            backend (Optional[HistoryBackend]): The new storage, or None to keep records in memory.
+        """
+        with self._lock:
+            self._merge_pending()
+            self.backend = backend
+            self._generation += 1
 
     def add_record(self, record: Dict[str, str]) -> None:
         """
         Appends a new entry to the DataFrame.
 
         Args:
-            record (Dict[str, str]): Dictionary containing details of an operation. 
-                Keys must match the DataFrame columns: 'operation', 'num1', 'num2', 'result'.
+            record (Dict[str, str]): Dictionary containing details of an operation.
+                Keys must match the DataFrame columns: 'operation', 'num1', 'num2', 'result',
+                and optionally 'duration'. A missing 'timestamp' is set to the current time.
+        """
+        if self.backend is not None:
+            with self._lock:
+                self._merge_pending()
+                if self.backend is not None:
+                    self.backend.append(self._stamped(pd.DataFrame([record]), np.array([history_time()])))
+                    self._next_row_id += 1
+                    return
+        if self._pending.append((history_time(), record)) >= self.MERGE_THRESHOLD:
+            # Merge opportunistically, but never wait behind another merging thread
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._merge_pending()
+                finally:
+                    self._lock.release()
+
+    def flush(self) -> None:
+        """
+        Merges the records still buffered by add_record, so they reach the backend when one is set.
+        """
+        with self._lock:
+            self._merge_pending()
+
+    def add_records(self, records: Union[Sequence[Dict[str, str]], pd.DataFrame]) -> None:
+        """
+        Appends a batch of entries to the DataFrame in a single write.
+
+        Args:
+            records (Union[Sequence[Dict[str, str]], pd.DataFrame]): The entries to append, in order,
+                either as dictionaries like those accepted by add_record or as a DataFrame.
         """
-        self.dataframe = pd.concat([self.dataframe, pd.DataFrame([record])], ignore_index=True)
+        batch = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+        if batch.empty:
+            return
+        with self._lock:
+            self._merge_pending()
+            if self.backend is not None:
+                self.backend.append(self._stamped(batch, np.full(len(batch), history_time())))
+                self._next_row_id += len(batch)
+                return
+            snapshot = self._append(self._snapshot, batch, np.full(len(batch), history_time()))
+            self._snapshot = self._enforce_policy(snapshot)
 
     def clear_data(self) -> None:
         """
         Resets the DataFrame, removing all records and keeping the column headers.
+        Spilled records are deleted as well, and a mapped history is detached but left on disk.
+        """
+        with self._lock:
+            self._pending.drain()
+            self._snapshot = self._empty_snapshot(self._snapshot.frame.iloc[0:0])
+            self.mapped = None
+            self._generation += 1
+            self.rollup.clear()
+            self._unrolled_mapped = None
+            if self.backend is not None:
+                self.backend.clear()
+            if self.spill is not None:
+                self.spill.clear()
+
+    def get_all_records(self) -> pd.DataFrame:
+        """
+        Returns every record: mapped ones first, then spilled ones, then the resident ones.
+
+        Returns:
+            pd.DataFrame: The complete history.
         """
-        self.dataframe = pd.DataFrame(columns=self.dataframe.columns)
+        if self.backend is not None:
+            self.snapshot()
+            return self.backend.get_all_records()
+        resident = self.snapshot().view
+        spilled = self.parse_records(self.spill.read()) if self.spill is not None and len(self.spill) else None
+        mapped = self.mapped.get_all_records() if self.mapped is not None else None
+        return self._concat_layers(mapped, spilled, resident)
 
     def filter_operations(self, operation: str) -> pd.DataFrame:
         """
@@ -46,38 +373,686 @@ class PandasFacade:
         Returns:
             pd.DataFrame: DataFrame containing only the records matching the specified operation.
         """
-        return self.dataframe[self.dataframe["operation"] == operation]
+        snapshot = self.snapshot()
+        if self.backend is not None:
+            return self.backend.filter_operations(operation)
+        resident = snapshot.decode(snapshot.frame[snapshot.frame["operation"] == operation])
+        spilled = None
+        if self.spill is not None and len(self.spill):
+            spilled = self.parse_records(self.spill.filter_operations(operation))
+        mapped = self.mapped.filter_operations(operation) if self.mapped is not None else None
+        return self._concat_layers(mapped, spilled, resident)
+
+    def filter_by_time(self, start: Optional[float] = None, end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Returns the records with start <= timestamp <= end.
+
+        The resident records are located by binary search on the time index; the spill
+        segment is only scanned when the range reaches back before the oldest resident record.
+        A mapped history is searched the same way on its memory-mapped timestamps.
+
+        Args:
+            start (Optional[float]): Earliest timestamp in epoch seconds, or None for no lower bound.
+            end (Optional[float]): Latest timestamp in epoch seconds, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: The matching records, oldest first.
+        """
+        snapshot = self.snapshot()
+        if self.backend is not None:
+            return self.backend.filter_by_time(start, end)
+        resident = snapshot.decode(snapshot.time_slice(start, end))
+        timestamps = snapshot.timestamps
+        reaches_spill = start is None or not len(timestamps) or start < timestamps[0]
+        spilled = None
+        if self.spill is not None and len(self.spill) and reaches_spill:
+            spilled = self.parse_records(self.spill.filter_time(start, end))
+        mapped = self.mapped.filter_by_time(start, end) if self.mapped is not None else None
+        return self._concat_layers(mapped, spilled, resident)
+
+    def aggregate_by_time(self, bucket_seconds: float, start: Optional[float] = None,
+                          end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Summarizes the resident records per time bucket.
+
+        Args:
+            bucket_seconds (float): Width of each bucket, e.g. 60 for calculations per minute.
+            start (Optional[float]): Earliest timestamp to include, or None for no lower bound.
+            end (Optional[float]): Latest timestamp to include, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: One row per non-empty bucket, indexed by the bucket start time, with
+                'count' (number of calculations) and 'mean_duration' (mean duration in seconds,
+                NaN where no duration was recorded).
+
+        Raises:
+            ValueError: If bucket_seconds is not positive.
+        """
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        if self.backend is not None:
+            rows = self.filter_by_time(start, end)
+        else:
+            rows = self.snapshot().time_slice(start, end)
+        buckets = np.floor(rows["timestamp"].to_numpy() / bucket_seconds) * bucket_seconds
+        grouped = rows["duration"].groupby(pd.to_datetime(buckets, unit="s"))
+        summary = pd.DataFrame({"count": grouped.size(), "mean_duration": grouped.mean()})
+        summary.index.name = "bucket"
+        return summary
+
+    def get_latest_record(self) -> Optional[pd.Series]:
+        """
+        Returns the most recent resident record without decoding the whole frame.
+        Without resident records, the last record of the mapped history is returned.
+
+        Returns:
+            Optional[pd.Series]: The decoded record, or None if there are no records.
+        """
+        snapshot = self.snapshot()
+        if self.backend is not None:
+            return self.backend.get_latest_record()
+        if snapshot.frame.empty:
+            return self.mapped.get_latest_record() if self.mapped is not None else None
+        return snapshot.decode(snapshot.frame.iloc[-1:]).iloc[0]
+
+    def numeric_column(self, column: str) -> np.ndarray:
+        """
+        Returns a resident numeric column as floats for vectorized aggregation.
+
+        Args:
+            column (str): One of 'num1', 'num2' or 'result'.
+
+        Returns:
+            np.ndarray: float64 values, NaN where the value is missing or not numeric.
+        """
+        if self.backend is not None:
+            return np.array([self._to_float(value) for value in self.get_all_records()[column]], dtype="float64")
+        snapshot = self.snapshot()
+        values = FixedPointColumn(snapshot.scales[column]).to_float(snapshot.frame[column])
+        overflow = snapshot.overflow[column]
+        positions, entries = overflow.lookup(snapshot.frame["_row_id"].to_numpy())
+        values[positions] = overflow.floats[entries]
+        return values
+
+    def change_mark(self) -> Tuple[int, int]:
+        """
+        Returns a cheap marker of the history's state for change tracking. Nothing is merged.
+
+        Returns:
+            Tuple[int, int]: The generation, which changes whenever records are removed or
+                replaced, and the number of records added so far, buffered ones included.
+        """
+        return self._generation, self._next_row_id + len(self._pending)
+
+    def changes_since(self, mark: Optional[Tuple[int, int]]) -> Tuple[pd.DataFrame, bool, Tuple[int, int]]:
+        """
+        Returns the records added since a mark taken from a previous call.
+
+        When records were removed or replaced since the mark, or there is no usable mark,
+        the whole history is returned instead. Records evicted by the retention policy
+        before they were collected are only found in the spill segment.
+
+        Args:
+            mark (Optional[Tuple[int, int]]): The mark returned by the previous call, or None.
+
+        Returns:
+            Tuple[pd.DataFrame, bool, Tuple[int, int]]: The records, whether they are the whole
+                history rather than an addition to it, and the mark to pass to the next call.
+        """
+        with self._lock:
+            self._merge_pending()
+            snapshot = self._snapshot
+            new_mark = (self._generation, self._next_row_id)
+            if self.backend is not None:
+                return self.backend.get_all_records(), True, new_mark
+            if mark is None or mark[0] != new_mark[0]:
+                spilled = self.parse_records(self.spill.read()) if self.spill is not None and len(self.spill) else None
+                mapped = self.mapped.get_all_records() if self.mapped is not None else None
+                return self._concat_layers(mapped, spilled, snapshot.view), True, new_mark
+        added = snapshot.frame[snapshot.frame["_row_id"].to_numpy() >= mark[1]]
+        return snapshot.decode(added), False, new_mark
+
+    def operation_stats(self, operation: Optional[str] = None) -> pd.DataFrame:
+        """
+        Returns per-operation statistics of the numeric columns from the running rollup.
+
+        The cost does not depend on the size of the history, except that a column whose
+        minimum or maximum was removed has its extremes recomputed once, and that a mapped
+        history is summarized in one vectorized pass the first time statistics are asked for.
+        With a backend, the statistics are computed from the backend's records.
+
+        Args:
+            operation (Optional[str]): Only report this operation.
+
+        Returns:
+            pd.DataFrame: One row per operation and column, see HistoryRollup.summary.
+        """
+        if self.backend is not None:
+            rollup = HistoryRollup()
+            records = self.get_all_records()
+            rollup.add(records["operation"], {column: np.array([self._to_float(value) for value in records[column]])
+                                              if column in records else np.full(len(records), np.nan)
+                                              for column in self.NUMERIC_COLUMNS})
+            return rollup.summary(operation)
+        with self._lock:
+            self._merge_pending()
+            if self._unrolled_mapped is not None:
+                mapped, self._unrolled_mapped = self._unrolled_mapped, None
+                operations = pd.Categorical.from_codes(mapped.column("operation"), mapped.dictionaries["operation"])
+                self.rollup.add(pd.Series(operations), {column: mapped.numeric_column(column)
+                                                        for column in self.NUMERIC_COLUMNS})
+            for name, column in list(self.rollup.stale_extrema()):
+                values = self.filter_operations(name)[column].map(self._to_float).astype("float64")
+                self.rollup.stats[name][column].set_extrema(values.min(), values.max())
+            return self.rollup.summary(operation)
+
+    def memory_usage(self) -> int:
+        """
+        Returns the deep memory usage of the resident records, overflow columns included.
+
+        Returns:
+            int: Size in bytes.
+        """
+        snapshot = self.snapshot()
+        return int(snapshot.frame.memory_usage(deep=True, index=False).sum()) + snapshot.overflow_bytes
 
     def save_to_csv(self, filepath: str) -> None:
         """
-        Exports the DataFrame to a CSV file.
+        Exports the DataFrame, including spilled records, to a CSV file.
 
         Args:
             filepath (str): The file path where the DataFrame should be saved.
         """
-        self.dataframe.to_csv(filepath, index=False)
+        self.get_all_records().to_csv(filepath, index=False)
 
-    def load_from_csv(self, filepath: str) -> None:
+    def load_from_csv(self, filepath: str, columns: Optional[Collection[str]] = None,
+                      operations: Optional[Collection[str]] = None, start: Optional[float] = None,
+                      end: Optional[float] = None, merge: bool = False,
+                      progress: Optional[Callable[[int], None]] = None) -> None:
         """
         Imports data from a CSV file into the DataFrame.
 
+        The file is read in chunks with the column types of HISTORY_SCHEMA, so numbers keep
+        their exact text and each chunk is encoded before the next is parsed. Rows without a
+        timestamp are stamped with the current time. Loaded rows are evicted under the
+        retention policy like any other rows; a replacing load also discards the rows
+        spilled before it and detaches a mapped history.
+
+        The file is encoded into a private snapshot without holding the history's lock, so
+        other threads keep reading and adding records while it loads. Readers see the history
+        as it was until the whole file is loaded, and it stays that way if the file turns out
+        to be malformed. The loaded rows are then swapped in, together with the records added
+        during the load, which a replacing load keeps too. A backend is handed the records
+        with HistoryBackend.import_records, which likewise stores nothing unless the whole
+        file is read.
+
         Args:
             filepath (str): Path to the CSV file to load.
+            columns (Optional[Collection[str]]): Columns to load; 'operation' is always loaded.
+                Defaults to every column.
+            operations (Optional[Collection[str]]): Only load records of these operations.
+            start (Optional[float]): Only load records stamped at or after this time, in epoch seconds.
+            end (Optional[float]): Only load records stamped at or before this time.
+            merge (bool): Add the records to the current ones, in timestamp order, instead of
+                replacing them.
+            progress (Optional[Callable[[int], None]]): Called with the number of bytes read after each chunk.
+
+        Raises:
+            ValueError: If a timestamp or duration in the file is not a number.
+        """
+        chunks = read_history_csv(filepath, columns, operations, start, end, progress=progress)
+        if self.backend is not None:
+            self._load_into_backend(chunks, merge)
+            return
+        with self._lock:
+            self._merge_pending()
+            first_added = self._next_row_id
+            spill = self.spill
+        # The file is encoded into a private snapshot with its own statistics and spill segment,
+        # without the lock, so the history stays readable and writable while it loads
+        loaded = self._empty_snapshot()
+        rollup = HistoryRollup()
+        staging = HistorySpill(spill.path + ".loading") if spill is not None else None
+        if staging is not None:
+            staging.clear()
+        row_count = 0
+        try:
+            for chunk in chunks:
+                loaded = self._append(loaded, chunk, np.full(len(chunk), history_time()), row_count, rollup)
+                loaded = self._enforce_policy(loaded, staging, rollup)
+                row_count += len(chunk)
+        except BaseException:
+            if staging is not None:
+                staging.clear()
+            raise
+
+        with self._lock:
+            self._merge_pending()
+            loaded = self._rebased(loaded, self._next_row_id)
+            self._next_row_id += row_count
+            current = self._snapshot
+            if merge:
+                self.rollup.merge(rollup)
+                if staging is not None and self.spill is not None:
+                    self.spill.adopt(staging)
+            else:
+                # Records added while the file was loading are kept alongside the loaded ones
+                added = current.frame["_row_id"].to_numpy() >= first_added
+                rollup.add(*self._rollup_input(current, current.frame[added]))
+                current = HistorySnapshot(current.frame[added].reset_index(drop=True), current.scales,
+                                          self._without_overflow(current.overflow, current.frame["_row_id"][~added]))
+                self.rollup = rollup
+                if self.spill is not None and staging is not None:
+                    self.spill.replace_with(staging)
+                elif self.spill is not None:
+                    self.spill.clear()
+                self._generation += 1
+                # A mapped history loaded earlier is replaced as well
+                self.mapped = None
+                self._unrolled_mapped = None
+            if staging is not None:
+                staging.clear()
+            self._snapshot = self._enforce_policy(self._combine(current, loaded))
+
+    def _load_into_backend(self, chunks: Iterator[pd.DataFrame], merge: bool) -> None:
+        """
+        Imports the chunks of a history file into the backend, which stores them only once
+        the whole file has been read.
+
+        Args:
+            chunks (Iterator[pd.DataFrame]): The records, as read by read_history_csv.
+            merge (bool): Add the records to the stored ones instead of replacing them.
+        """
+        row_count = 0
+
+        def stamped() -> Iterator[pd.DataFrame]:
+            nonlocal row_count
+            for chunk in chunks:
+                row_count += len(chunk)
+                yield self._stamped(chunk, np.full(len(chunk), history_time()))
+
+        with self._lock:
+            self._merge_pending()
+            self.backend.import_records(stamped(), replace=not merge)
+            self._next_row_id += row_count
+            if not merge:
+                self._generation += 1
+                self.rollup.clear()
+                self.mapped = None
+                self._unrolled_mapped = None
+
+    def load_mapped(self, path: str) -> None:
         """
-        self.dataframe = pd.read_csv(filepath)
+        Replaces the history with a mapped history, which is opened but not loaded. Spilled
+        records are deleted.
+
+        Args:
+            path (str): Directory written by MappedHistory.write or MappedHistory.convert_csv.
+        """
+        mapped = MappedHistory(path)
+        with self._lock:
+            self._pending.drain()
+            self._snapshot = self._empty_snapshot(self._snapshot.frame.iloc[0:0])
+            self.mapped = mapped
+            self._generation += 1
+            self.rollup.clear()
+            self._unrolled_mapped = mapped
+            if self.spill is not None:
+                self.spill.clear()
+
+    def replace_records(self, records: pd.DataFrame) -> None:
+        """
+        Replaces the resident records with the given ones.
+
+        Rows without a timestamp are stamped with the current time, and the new rows are
+        evicted under the retention policy like any other rows. Records spilled before the
+        replacement are deleted, and a mapped history is detached but left on disk.
+
+        Args:
+            records (pd.DataFrame): The new records, with numbers as Decimal values, numbers or text.
+        """
+        with self._lock:
+            self._pending.drain()
+            self._generation += 1
+            self.rollup.clear()
+            if self.spill is not None:
+                self.spill.clear()
+            self.mapped = None
+            self._unrolled_mapped = None
+            if self.backend is not None:
+                self.backend.clear()
+                self.backend.append(self._stamped(records, np.full(len(records), history_time())))
+                return
+            snapshot = self._append(self._empty_snapshot(), records, np.full(len(records), history_time()))
+            self._snapshot = self._enforce_policy(snapshot)
 
     def remove_record(self, index: int) -> None:
         """
-        Removes a record by its index position.
+        Removes a record by its index position among the resident records.
 
         Args:
             index (int): Index of the record to delete.
-        
+
         Raises:
             IndexError: If the provided index is out of bounds of the DataFrame.
         """
-        if 0 <= index < len(self.dataframe):
-            self.dataframe = self.dataframe.drop(index).reset_index(drop=True)
-            print(f"Record at index {index} removed.")
+        with self._lock:
+            self._merge_pending()
+            self._generation += 1
+            if self.backend is not None:
+                if self.backend.remove_record(index):
+                    print(f"Record at index {index} removed.")
+                else:
+                    print(f"Index {index} is out of bounds. Deletion unsuccessful.")
+                return
+            snapshot = self._snapshot
+            if 0 <= index < len(snapshot.frame):
+                self.rollup.remove(*self._rollup_input(snapshot, snapshot.frame.iloc[[index]]))
+                self._snapshot = HistorySnapshot(
+                    snapshot.frame.drop(index).reset_index(drop=True),
+                    snapshot.scales,
+                    self._without_overflow(snapshot.overflow, snapshot.frame["_row_id"].iloc[[index]]),
+                )
+                print(f"Record at index {index} removed.")
+            else:
+                print(f"Index {index} is out of bounds. Deletion unsuccessful.")
+
+    @staticmethod
+    def parse_number(value: object) -> object:
+        """
+        Returns a stored value as a Decimal where it is numeric, or unchanged otherwise.
+
+        Args:
+            value (object): A value read from an overflow column or from text.
+
+        Returns:
+            object: The Decimal value, NaN for missing values, or the original value.
+        """
+        return parse_number(value)
+
+    def parse_records(self, records: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converts records read back as text, from a spill segment or an archive, so their
+        numeric columns hold Decimal values and their timestamps and durations are floats.
+
+        Args:
+            records (pd.DataFrame): Records read back as text.
+
+        Returns:
+            pd.DataFrame: The records with numeric columns as Decimal values.
+        """
+        for column in self.NUMERIC_COLUMNS:
+            if column in records:
+                records[column] = [self.parse_number(value) for value in records[column]]
+        for column in ("timestamp", "duration"):
+            if column in records:
+                records[column] = self._float_column(records, column)
+        return records
+
+    def _merge_pending(self) -> None:
+        """
+        Moves every buffered record into a new snapshot, or into the backend in one batch.
+        The caller must hold the lock.
+        """
+        # Raised before the drain, so readers that find the buffer empty wait for the publication
+        self._merging = True
+        try:
+            pending = self._pending.drain()
+            if not pending:
+                return
+            added_at = np.fromiter((entry[0] for entry in pending), dtype="float64", count=len(pending))
+            records = pd.DataFrame([entry[1] for entry in pending])
+            if self.backend is not None:
+                self.backend.append(self._stamped(records, added_at))
+                self._next_row_id += len(records)
+                return
+            self._snapshot = self._enforce_policy(self._append(self._snapshot, records, added_at))
+        finally:
+            self._merging = False
+
+    def _append(self, snapshot: HistorySnapshot, records: pd.DataFrame, added_at: np.ndarray,
+                first_row_id: Optional[int] = None, rollup: Optional[HistoryRollup] = None) -> HistorySnapshot:
+        """
+        Encodes a batch of decoded records and returns a snapshot with the batch appended.
+
+        Args:
+            snapshot (HistorySnapshot): The snapshot to extend.
+            records (pd.DataFrame): The records to append, in order.
+            added_at (np.ndarray): Timestamp for each record that does not carry its own.
+            first_row_id (Optional[int]): Row id of the first record. Defaults to the next row
+                id of the history, which is advanced past the batch.
+            rollup (Optional[HistoryRollup]): Statistics to add the records to. Defaults to the history's.
+
+        Returns:
+            HistorySnapshot: The extended snapshot.
+        """
+        batch = records.reset_index(drop=True)
+        if first_row_id is None:
+            first_row_id = self._next_row_id
+            self._next_row_id += len(batch)
+        row_ids = np.arange(first_row_id, first_row_id + len(batch), dtype="int64")
+
+        frame = snapshot.frame
+        scales = dict(snapshot.scales)
+        overflow = {}
+        encoded = batch.drop(columns=[column for column in self.NUMERIC_COLUMNS if column in batch])
+        rollup_values = {}
+        for column in self.NUMERIC_COLUMNS:
+            codec = FixedPointColumn(scales[column])
+            values = batch[column].tolist() if column in batch else [None] * len(batch)
+            existing, mantissas, exponents, batch_overflow = codec.encode(frame[column], values)
+            frame = frame.assign(**{column: existing})
+            scales[column] = codec.scale
+            encoded[column] = mantissas
+            encoded[self.EXPONENT_COLUMNS[column]] = exponents
+            rollup_values[column] = codec.to_float(mantissas)
+            positions = batch_overflow.index.to_numpy()
+            added = OverflowColumn.from_text(row_ids[positions], batch_overflow)
+            overflow[column] = snapshot.overflow[column].concat(added)
+            rollup_values[column][positions] = added.floats
+        (self.rollup if rollup is None else rollup).add(encoded["operation"], rollup_values)
+        encoded["timestamp"] = self._float_column(batch, "timestamp").fillna(pd.Series(added_at))
+        encoded["duration"] = self._float_column(batch, "duration")
+        encoded["_row_id"] = row_ids
+
+        categories = frame["operation"].cat.categories.union(pd.Index(encoded["operation"].dropna().unique()))
+        frame["operation"] = frame["operation"].cat.set_categories(categories)
+        encoded["operation"] = pd.Categorical(encoded["operation"], categories=categories)
+
+        encoded = encoded.reindex(columns=list(frame.columns) + [c for c in encoded.columns if c not in frame.columns])
+        in_order = encoded["timestamp"].is_monotonic_increasing and (
+            frame.empty or encoded.empty or encoded["timestamp"].iloc[0] >= frame["timestamp"].iloc[-1])
+        if len(frame):
+            frame = pd.concat([frame, encoded], ignore_index=True)
+        else:
+            frame = encoded.astype({column: frame[column].dtype for column in frame.columns})
+        if not in_order:
+            # Records from racing threads or loaded files can arrive out of order; restore the time index
+            frame = frame.sort_values("timestamp", kind="stable", ignore_index=True)
+        return HistorySnapshot(frame, scales, overflow)
+
+    def _enforce_policy(self, snapshot: HistorySnapshot, spill: Optional[HistorySpill] = None,
+                        rollup: Optional[HistoryRollup] = None) -> HistorySnapshot:
+        """
+        Evicts the oldest rows that exceed the retention policy, spilling them to disk
+        when a spill segment is configured.
+
+        Args:
+            snapshot (HistorySnapshot): The snapshot to bound.
+            spill (Optional[HistorySpill]): Segment receiving the evicted rows. Defaults to the history's.
+            rollup (Optional[HistoryRollup]): Statistics to take dropped rows out of. Defaults to the history's.
+
+        Returns:
+            HistorySnapshot: The snapshot without the evicted rows.
+        """
+        spill = self.spill if spill is None else spill
+        rollup = self.rollup if rollup is None else rollup
+        extra_bytes = snapshot.row_overflow_bytes() if self.policy.max_bytes is not None else None
+        count = self.policy.eviction_count(snapshot.frame, snapshot.timestamps, history_time(), extra_bytes)
+        if not count:
+            return snapshot
+        evicted = snapshot.frame.iloc[:count]
+        if spill is not None:
+            spill.append(snapshot.decode(evicted))
         else:
-            print(f"Index {index} is out of bounds. Deletion unsuccessful.")
+            # Dropped rows leave the history, so they leave its statistics too
+            rollup.remove(*self._rollup_input(snapshot, evicted))
+        return HistorySnapshot(
+            snapshot.frame.iloc[count:].reset_index(drop=True),
+            snapshot.scales,
+            self._without_overflow(snapshot.overflow, evicted["_row_id"]),
+        )
+
+    def _combine(self, first: HistorySnapshot, second: HistorySnapshot) -> HistorySnapshot:
+        """
+        Joins the rows of two snapshots with distinct row ids into one, in timestamp order.
+
+        Each numeric column is brought to the larger of the two scales; values that do
+        not fit at that scale move to the overflow column.
+
+        Args:
+            first (HistorySnapshot): One set of rows.
+            second (HistorySnapshot): The other set of rows.
+
+        Returns:
+            HistorySnapshot: The rows of both.
+        """
+        if second.frame.empty and len(first.frame):
+            return first
+        if first.frame.empty:
+            return second
+        frames, scales, overflow = [first.frame, second.frame], {}, {}
+        for column in self.NUMERIC_COLUMNS:
+            scales[column] = max(first.scales[column], second.scales[column])
+            parts = []
+            for side, snapshot in enumerate((first, second)):
+                codec = FixedPointColumn(snapshot.scales[column])
+                exponents = frames[side][self.EXPONENT_COLUMNS[column]].to_numpy()
+                mantissas, lost = codec.rescale_to(frames[side][column], scales[column], exponents)
+                frames[side] = frames[side].assign(**{column: mantissas.set_axis(frames[side].index)})
+                lost_ids = frames[side]["_row_id"].to_numpy()[lost.index.to_numpy()]
+                parts.append(snapshot.overflow[column].concat(OverflowColumn.from_text(lost_ids, lost)))
+            overflow[column] = parts[0].concat(parts[1])
+        categories = frames[0]["operation"].cat.categories.union(frames[1]["operation"].cat.categories)
+        frames = [frame.assign(operation=frame["operation"].cat.set_categories(categories)) for frame in frames]
+        columns = list(frames[0].columns) + [c for c in frames[1].columns if c not in frames[0].columns]
+        frame = pd.concat([frame.reindex(columns=columns) for frame in frames], ignore_index=True)
+        if not frame["timestamp"].is_monotonic_increasing:
+            frame = frame.sort_values("timestamp", kind="stable", ignore_index=True)
+        return HistorySnapshot(frame, scales, overflow)
+
+    @staticmethod
+    def _rebased(snapshot: HistorySnapshot, offset: int) -> HistorySnapshot:
+        """
+        Returns a snapshot whose row ids are shifted by offset.
+        """
+        overflow = {column: OverflowColumn(values.keys + offset, values.floats, values.offsets, values.data)
+                    for column, values in snapshot.overflow.items()}
+        return HistorySnapshot(snapshot.frame.assign(_row_id=snapshot.frame["_row_id"] + offset),
+                               snapshot.scales, overflow)
+
+    @staticmethod
+    def _without_overflow(overflow: Dict[str, OverflowColumn], row_ids: pd.Series) -> Dict[str, OverflowColumn]:
+        """
+        Returns the overflow columns without the values of rows leaving the frame.
+
+        Args:
+            overflow (Dict[str, OverflowColumn]): The current overflow columns.
+            row_ids (pd.Series): Row ids of the departing rows.
+
+        Returns:
+            Dict[str, OverflowColumn]: The remaining overflow values.
+        """
+        departing = row_ids.to_numpy(dtype="int64")
+        return {column: values.without(departing) for column, values in overflow.items()}
+
+    def _rollup_input(self, snapshot: HistorySnapshot, rows: pd.DataFrame) -> Tuple[pd.Series, Dict[str, np.ndarray]]:
+        """
+        Returns the operations and float values of compact rows in the form HistoryRollup expects.
+
+        Args:
+            snapshot (HistorySnapshot): The snapshot the rows belong to.
+            rows (pd.DataFrame): Rows of the snapshot's frame.
+
+        Returns:
+            Tuple[pd.Series, Dict[str, np.ndarray]]: The operations and the values of each numeric column.
+        """
+        values = {}
+        for column in self.NUMERIC_COLUMNS:
+            values[column] = FixedPointColumn(snapshot.scales[column]).to_float(rows[column])
+            overflow = snapshot.overflow[column]
+            positions, entries = overflow.lookup(rows["_row_id"].to_numpy())
+            values[column][positions] = overflow.floats[entries]
+        return rows["operation"].astype(object).reset_index(drop=True), values
+
+    @classmethod
+    def _stamped(cls, records: pd.DataFrame, added_at: np.ndarray) -> pd.DataFrame:
+        """
+        Returns the records with float timestamps and durations, stamping rows that carry no timestamp.
+
+        Args:
+            records (pd.DataFrame): The records to store.
+            added_at (np.ndarray): Timestamp for each record that does not carry its own.
+
+        Returns:
+            pd.DataFrame: A copy of the records ready for a backend.
+        """
+        stamped = records.reset_index(drop=True)
+        stamped["timestamp"] = cls._float_column(stamped, "timestamp").fillna(pd.Series(added_at))
+        stamped["duration"] = cls._float_column(stamped, "duration")
+        return stamped
+
+    @staticmethod
+    def _concat_layers(mapped: Optional[pd.DataFrame], spilled: Optional[pd.DataFrame],
+                       resident: pd.DataFrame) -> pd.DataFrame:
+        """
+        Joins the records read from each storage layer, oldest layer first.
+        """
+        layers = [layer for layer in (mapped, spilled) if layer is not None and not layer.empty]
+        if not layers:
+            return resident
+        return pd.concat([*layers, resident], ignore_index=True)
+
+    @staticmethod
+    def _float_column(records: pd.DataFrame, column: str) -> pd.Series:
+        """
+        Returns a column of the records as floats, NaN where it is missing or not numeric.
+        """
+        if column not in records:
+            return pd.Series(np.nan, index=range(len(records)), dtype="float64")
+        return pd.to_numeric(records[column], errors="coerce").astype("float64").reset_index(drop=True)
+
+    @staticmethod
+    def _to_float(value: object) -> float:
+        """
+        Returns an overflow value as a float, or NaN if it is not numeric.
+        """
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    @classmethod
+    def _empty_snapshot(cls, frame: Optional[pd.DataFrame] = None) -> HistorySnapshot:
+        """
+        Creates an empty snapshot, optionally keeping the columns of an existing frame.
+
+        Args:
+            frame (Optional[pd.DataFrame]): An empty compact frame to reuse. Defaults to the default columns.
+
+        Returns:
+            HistorySnapshot: A snapshot without rows.
+        """
+        if frame is None:
+            frame = pd.DataFrame({
+                "operation": pd.Categorical([]),
+                "num1": pd.Series([], dtype="Int64"),
+                "num2": pd.Series([], dtype="Int64"),
+                "result": pd.Series([], dtype="Int64"),
+                "timestamp": pd.Series([], dtype="float64"),
+                "duration": pd.Series([], dtype="float64"),
+                "_row_id": pd.Series([], dtype="int64"),
+                **{name: pd.Series([], dtype="int8") for name in cls.EXPONENT_COLUMNS.values()},
+            })
+        return HistorySnapshot(frame, {column: 0 for column in cls.NUMERIC_COLUMNS},
+                               {column: OverflowColumn() for column in cls.NUMERIC_COLUMNS})
@@ -1,18 +1,18 @@
 """
 This module defines the AddCommand class, which represents the addition operation.
-It inherits from the Command base class and implements the execute method for performing the addition.
+It inherits from the BinaryCommand base class and implements the execute method for performing the addition.
 """
 
 from decimal import Decimal
-from app.command import Command
+from app.command import BinaryCommand
 from app.command_registry import register_command
 
 
-class AddCommand(Command):
+class AddCommand(BinaryCommand):
     """
     Command for performing addition of two decimal numbers.
 
-    This class inherits from the Command base class and implements the execute method 
+    This class inherits from the BinaryCommand base class and implements the execute method 
     to return the sum of two numbers.
 
     Attributes:
@@ -20,6 +20,10 @@ class AddCommand(Command):
         b (Decimal): The second number to be added.
     """
 
+    __slots__ = ("a", "b")
+    OPERANDS = ("a", "b")
+    OPERATION = "add"
+
     def __init__(self, a: Decimal, b: Decimal):
         """
         Initializes the AddCommand with two decimal numbers.
@@ -36,8 +40,11 @@ class AddCommand(Command):
         Executes the addition of two decimal numbers.
 
         Returns:
-            Decimal: The sum of a and b.
+            Decimal: The sum of a and b, or an array of sums when either
+                operand is a vector (list, tuple or NumPy array), computed element-wise.
         """
+        if self.vectorized:
+            return self.elementwise()
         return self.a + self.b
 
 
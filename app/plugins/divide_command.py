@@ -1,18 +1,18 @@
 """
 This module defines the DivideCommand class, which represents the division operation.
-It inherits from the Command base class and implements the execute method for performing division.
+It inherits from the BinaryCommand base class and implements the execute method for performing division.
 """
 
 from decimal import Decimal
-from app.command import Command
+from app.command import BinaryCommand
 from app.command_registry import register_command
 
 
-class DivideCommand(Command):
+class DivideCommand(BinaryCommand):
     """
     Command for performing division of two decimal numbers.
 
-    This class inherits from the Command base class and implements the execute method 
+    This class inherits from the BinaryCommand base class and implements the execute method 
     to return the result of dividing the first number by the second. If division by zero 
     is attempted, a ValueError is raised.
 
@@ -21,6 +21,10 @@ class DivideCommand(Command):
         b (Decimal): The divisor, the number by which to divide.
     """
 
+    __slots__ = ("a", "b")
+    OPERANDS = ("a", "b")
+    OPERATION = "divide"
+
     def __init__(self, a: Decimal, b: Decimal):
         """
         Initializes the DivideCommand with two decimal numbers.
@@ -40,11 +44,14 @@ class DivideCommand(Command):
         If division by zero is attempted, a ValueError is raised.
 
         Returns:
-            Decimal: The result of the division (a / b).
+            Decimal: The result of the division (a / b), or an array of quotients when either
+                operand is a vector (list, tuple or NumPy array), computed element-wise.
 
         Raises:
             ValueError: If b is zero, to prevent division by zero.
         """
+        if self.vectorized:
+            return self.elementwise()
         if self.b == 0:
             raise ValueError("Cannot divide by zero")
         return self.a / self.b
@@ -6,29 +6,22 @@ to return the mean of two numbers.
 """
 
 from decimal import Decimal
-from app.command import Command
+from app.command import VariadicCommand
 from app.command_registry import register_command
 
 
-class MeanCommand(Command):
+class MeanCommand(VariadicCommand):
     """
     Command for calculating the arithmetic mean (average) of multiple decimal numbers.
 
-    This class inherits from the Command base class and implements the execute method 
+    This class inherits from the VariadicCommand base class and implements the execute method 
     to return the result of calculating the mean of the provided numbers.
 
     Attributes:
         numbers (list of Decimal): The list of numbers for which the mean is calculated.
     """
 
-    def __init__(self, *numbers: Decimal):
-        """
-        Initializes the MeanCommand with multiple decimal numbers.
-
-        Args:
-            numbers (Decimal): One or more decimal numbers for which the mean is calculated.
-        """
-        self.numbers = numbers
+    __slots__ = ()
 
     def execute(self) -> Decimal:
         """
@@ -41,7 +34,7 @@ class MeanCommand(Command):
         """
         if not self.numbers:
             raise ValueError("At least one number must be provided.")
-        total = sum(self.numbers)
+        total = self.operand_sum()
         return total / len(self.numbers)
 
 
@@ -1,19 +1,19 @@
 """
 This module defines the MultiplyCommand class, which represents the multiplication
-of two decimal numbers. It inherits from the Command base class and implements 
+of two decimal numbers. It inherits from the BinaryCommand base class and implements 
 the execute method to return the product of two numbers.
 """
 
 from decimal import Decimal
-from app.command import Command
+from app.command import BinaryCommand
 from app.command_registry import register_command
 
 
-class MultiplyCommand(Command):
+class MultiplyCommand(BinaryCommand):
     """
     Command for multiplying two decimal numbers.
 
-    This class inherits from the Command base class and implements the execute method 
+    This class inherits from the BinaryCommand base class and implements the execute method 
     to return the result of multiplying two numbers (a * b).
 
     Attributes:
@@ -21,6 +21,10 @@ class MultiplyCommand(Command):
         b (Decimal): The second number to be multiplied.
     """
 
+    __slots__ = ("a", "b")
+    OPERANDS = ("a", "b")
+    OPERATION = "multiply"
+
     def __init__(self, a: Decimal, b: Decimal):
         """
         Initializes the MultiplyCommand with two decimal numbers.
@@ -39,8 +43,11 @@ class MultiplyCommand(Command):
         The multiplication is performed by multiplying the two numbers.
 
         Returns:
-            Decimal: The product of the two numbers (a * b).
+            Decimal: The product of the two numbers (a * b), or an array of products when either
+                operand is a vector (list, tuple or NumPy array), computed element-wise.
         """
+        if self.vectorized:
+            return self.elementwise()
         return self.a * self.b
 
 
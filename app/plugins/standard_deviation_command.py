@@ -1,27 +1,20 @@
 from decimal import Decimal
-from app.command import Command
+from app.command import VariadicCommand
 from app.command_registry import register_command
 import statistics
 
-class StdDevCommand(Command):
+class StdDevCommand(VariadicCommand):
     """
     Command for calculating the standard deviation of multiple decimal numbers.
 
-    This class inherits from the Command base class and implements the execute method 
+    This class inherits from the VariadicCommand base class and implements the execute method 
     to return the result of calculating the standard deviation of the provided numbers.
 
     Attributes:
         numbers (list of Decimal): The list of numbers for which the standard deviation is calculated.
     """
 
-    def __init__(self, *numbers: Decimal):
-        """
-        Initializes the StdDevCommand with multiple decimal numbers.
-
-        Args:
-            numbers (Decimal): One or more decimal numbers for which the standard deviation is calculated.
-        """
-        self.numbers = numbers
+    __slots__ = ()
 
     def execute(self) -> Decimal:
         """
@@ -36,7 +29,7 @@ class StdDevCommand(Command):
             raise ValueError("At least two numbers must be provided to calculate standard deviation.")
         
         # Convert Decimal to float for compatibility with statistics.stdev
-        numbers_float = [float(num) for num in self.numbers]
+        numbers_float = self.operand_floats()
         stddev_value = statistics.stdev(numbers_float)
         
         return Decimal(str(stddev_value))  # Convert result back to Decimal for consistency
@@ -1,19 +1,19 @@
 """
 This module defines the SubtractCommand class, which represents the subtraction
-of two decimal numbers. It inherits from the Command base class and implements 
+of two decimal numbers. It inherits from the BinaryCommand base class and implements 
 the execute method to return the result of subtracting the second number from the first.
 """
 
 from decimal import Decimal
-from app.command import Command
+from app.command import BinaryCommand
 from app.command_registry import register_command
 
 
-class SubtractCommand(Command):
+class SubtractCommand(BinaryCommand):
     """
     Command for subtracting one decimal number from another.
 
-    This class inherits from the Command base class and implements the execute method 
+    This class inherits from the BinaryCommand base class and implements the execute method 
     to return the result of subtracting the second number (b) from the first (a).
 
     Attributes:
@@ -21,6 +21,10 @@ class SubtractCommand(Command):
         b (Decimal): The number to subtract.
     """
 
+    __slots__ = ("a", "b")
+    OPERANDS = ("a", "b")
+    OPERATION = "subtract"
+
     def __init__(self, a: Decimal, b: Decimal):
         """
         Initializes the SubtractCommand with two decimal numbers.
@@ -40,8 +44,11 @@ class SubtractCommand(Command):
         the first number (a).
 
         Returns:
-            Decimal: The result of subtracting b from a (a - b).
+            Decimal: The result of subtracting b from a (a - b), or an array of differences when either
+                operand is a vector (list, tuple or NumPy array), computed element-wise.
         """
+        if self.vectorized:
+            return self.elementwise()
         return self.a - self.b
 
 
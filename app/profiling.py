@@ -0,0 +1,185 @@
+"""
+This module profiles calculations with cProfile so a slow command can be investigated
+from the REPL or the command line without rerunning the application under an external
+profiler.
+
+parse_profile_arguments reads the options of 'profile [-n N] [-o FILE] [--top K]
+[--sort KEY] <command ...>', profile_calls runs a callable under cProfile one or more
+times, and ProfileReport prints the hottest functions or dumps the statistics to a file
+that pstats, snakeviz or gprof2dot can read later.
+"""
+
+import cProfile
+import io
+import pstats
+import time
+from typing import Callable, List, Optional
+
+# Orderings accepted by --sort, as understood by pstats.Stats.sort_stats
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+PROFILE_USAGE = "profile [-n REPEAT] [-o STATS_FILE] [--top K] [--sort cumulative|tottime|ncalls] <command ...>"
+
+
+class ProfileOptions:
+    """
+    What to profile and how to report it.
+
+    Attributes:
+        command (List[str]): The command to profile, split into words.
+        repeat (int): Number of times to run it.
+        output (Optional[str]): File receiving the raw statistics, if any.
+        top (int): Number of functions to print.
+        sort (str): Ordering of the printed functions, one of SORT_KEYS.
+    """
+
+    __slots__ = ("command", "repeat", "output", "top", "sort")
+
+    def __init__(self, command: List[str], repeat: int = 1, output: Optional[str] = None, top: int = 20,
+                 sort: str = "cumulative"):
+        """
+        Initializes the ProfileOptions.
+
+        Args:
+            command (List[str]): The command to profile, split into words.
+            repeat (int): Number of times to run it.
+            output (Optional[str]): File receiving the raw statistics, if any.
+            top (int): Number of functions to print.
+            sort (str): Ordering of the printed functions, one of SORT_KEYS.
+        """
+        self.command = command
+        self.repeat = repeat
+        self.output = output
+        self.top = top
+        self.sort = sort
+
+
+def parse_profile_arguments(words: List[str]) -> ProfileOptions:
+    """
+    Parses the words following 'profile' or '--profile'.
+
+    Args:
+        words (List[str]): Options followed by the command, e.g. ['-n', '100', 'add', '5', '3'].
+
+    Returns:
+        ProfileOptions: The parsed options.
+
+    Raises:
+        ValueError: If an option is unknown or invalid, or no command follows the options.
+    """
+    options = ProfileOptions([])
+    index = 0
+    while index < len(words) and words[index].startswith("-") and words[index] not in ("-", "--"):
+        option = words[index]
+        if index + 1 >= len(words):
+            raise ValueError(f"Option {option} requires a value")
+        value = words[index + 1]
+        if option in ("-n", "--repeat", "--top"):
+            try:
+                number = int(value)
+            except ValueError:
+                raise ValueError(f"Option {option} requires a whole number, not {value}") from None
+            if number < 1:
+                raise ValueError(f"Option {option} must be at least 1")
+            if option == "--top":
+                options.top = number
+            else:
+                options.repeat = number
+        elif option in ("-o", "--output"):
+            options.output = value
+        elif option == "--sort":
+            if value not in SORT_KEYS:
+                raise ValueError(f"Unknown sort key {value}; use one of {', '.join(SORT_KEYS)}")
+            options.sort = value
+        else:
+            raise ValueError(f"Unknown option {option}")
+        index += 2
+    if index < len(words) and words[index] == "--":
+        index += 1
+    options.command = words[index:]
+    if not options.command:
+        raise ValueError(f"Nothing to profile. Use: {PROFILE_USAGE}")
+    return options
+
+
+class ProfileReport:
+    """
+    The statistics gathered by profile_calls.
+
+    Attributes:
+        stats (pstats.Stats): The accumulated statistics of all repetitions.
+        repeat (int): Number of times the callable ran.
+        elapsed (float): Wall-clock seconds of all repetitions, profiler overhead included.
+    """
+
+    def __init__(self, stats: pstats.Stats, repeat: int, elapsed: float):
+        """
+        Initializes the ProfileReport.
+
+        Args:
+            stats (pstats.Stats): The accumulated statistics of all repetitions.
+            repeat (int): Number of times the callable ran.
+            elapsed (float): Wall-clock seconds of all repetitions.
+        """
+        self.stats = stats
+        self.repeat = repeat
+        self.elapsed = elapsed
+
+    def hot_functions(self, top: int = 20, sort: str = "cumulative") -> str:
+        """
+        Formats the functions that took the most time.
+
+        Args:
+            top (int): Number of functions to include.
+            sort (str): Ordering, one of SORT_KEYS.
+
+        Returns:
+            str: A heading with the run time per repetition, then the pstats table.
+        """
+        output = io.StringIO()
+        self.stats.stream = output
+        self.stats.sort_stats(sort).print_stats(top)
+        per_run = self.elapsed / self.repeat * 1000
+        heading = f"Profiled {self.repeat} run(s) in {self.elapsed:.3f} s ({per_run:.3f} ms per run)"
+        # print_stats opens with the profiled file names and a blank line; keep the summary and table
+        return heading + "\n" + output.getvalue().strip("\n")
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the raw statistics for later analysis, e.g. with python -m pstats.
+
+        Args:
+            path (str): The destination file.
+        """
+        self.stats.dump_stats(path)
+
+
+def profile_calls(function: Callable[[], object], repeat: int = 1) -> ProfileReport:
+    """
+    Runs a callable under cProfile.
+
+    Only the calling thread is profiled: work handed to other threads or processes shows
+    up as the time spent waiting for it.
+
+    Args:
+        function (Callable[[], object]): The work to profile.
+        repeat (int): Number of times to run it.
+
+    Returns:
+        ProfileReport: The statistics accumulated over all runs.
+
+    Raises:
+        ValueError: If repeat is less than 1.
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        for _ in range(repeat):
+            function()
+    finally:
+        profiler.disable()
+    elapsed = time.perf_counter() - started
+    return ProfileReport(pstats.Stats(profiler), repeat, elapsed)
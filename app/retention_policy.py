@@ -0,0 +1,301 @@
+"""
+This module defines the RetentionPolicy and HistorySpill classes, which keep the in-memory
+calculation history bounded. Rows evicted under a policy are either dropped or appended to
+an on-disk spill segment that remains queryable alongside the resident rows.
+"""
+
+import os
+from typing import Iterator, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class RetentionPolicy:
+    """
+    Describes how much calculation history may stay resident in memory.
+
+    Rows are always evicted oldest first, so an eviction is a prefix of the history.
+
+    Attributes:
+        max_rows (Optional[int]): Maximum number of resident rows, or None for no limit.
+        max_bytes (Optional[int]): Maximum deep memory usage of the resident rows, including what
+            they keep outside the frame such as overflow values, or None for no limit.
+        max_age (Optional[float]): Maximum age of a resident row in seconds, or None for no limit.
+        spill_path (Optional[str]): CSV segment receiving evicted rows. Evicted rows are dropped when None.
+    """
+
+    # Number of trailing rows sampled to estimate the deep memory usage of one row
+    BYTES_SAMPLE_ROWS = 256
+
+    def __init__(self, max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+                 max_age: Optional[float] = None, spill_path: Optional[str] = None):
+        """
+        Initializes the RetentionPolicy. With no arguments the history is unbounded.
+
+        Args:
+            max_rows (Optional[int]): Maximum number of resident rows.
+            max_bytes (Optional[int]): Maximum deep memory usage of the resident rows in bytes.
+            max_age (Optional[float]): Maximum age of a resident row in seconds.
+            spill_path (Optional[str]): CSV segment receiving evicted rows.
+
+        Raises:
+            ValueError: If a limit is negative.
+        """
+        for name, limit in (("max_rows", max_rows), ("max_bytes", max_bytes), ("max_age", max_age)):
+            if limit is not None and limit < 0:
+                raise ValueError(f"{name} must not be negative")
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.spill_path = spill_path
+
+    @classmethod
+    def from_environment(cls, settings: Optional[Mapping[str, str]] = None) -> 'RetentionPolicy':
+        """
+        Builds a policy from the HISTORY_MAX_ROWS, HISTORY_MAX_BYTES, HISTORY_MAX_AGE
+        and HISTORY_SPILL_PATH settings.
+
+        Args:
+            settings (Optional[Mapping[str, str]]): Settings to read. Defaults to os.environ.
+
+        Returns:
+            RetentionPolicy: The configured policy. Unset settings leave that limit disabled.
+        """
+        settings = os.environ if settings is None else settings
+        max_rows = settings.get("HISTORY_MAX_ROWS")
+        max_bytes = settings.get("HISTORY_MAX_BYTES")
+        max_age = settings.get("HISTORY_MAX_AGE")
+        return cls(
+            max_rows=int(max_rows) if max_rows else None,
+            max_bytes=int(max_bytes) if max_bytes else None,
+            max_age=float(max_age) if max_age else None,
+            spill_path=settings.get("HISTORY_SPILL_PATH") or None,
+        )
+
+    @property
+    def is_bounded(self) -> bool:
+        """
+        Whether the policy limits the resident history at all.
+
+        Returns:
+            bool: True if any of max_rows, max_bytes or max_age is set.
+        """
+        return any(limit is not None for limit in (self.max_rows, self.max_bytes, self.max_age))
+
+    def eviction_count(self, dataframe: pd.DataFrame, timestamps: np.ndarray, now: float,
+                       extra_bytes: Optional[np.ndarray] = None) -> int:
+        """
+        Computes how many of the oldest rows must be evicted to satisfy the policy.
+
+        Args:
+            dataframe (pd.DataFrame): The resident history, oldest row first.
+            timestamps (np.ndarray): Sorted record timestamps in seconds, one per resident row.
+            now (float): The current time on the same clock as the timestamps.
+            extra_bytes (Optional[np.ndarray]): Bytes each row keeps outside the dataframe, counted
+                against max_bytes with the row.
+
+        Returns:
+            int: The number of leading rows to evict.
+        """
+        row_count = len(dataframe)
+        if row_count == 0 or not self.is_bounded:
+            return 0
+
+        count = 0
+        if self.max_rows is not None:
+            count = max(count, row_count - self.max_rows)
+        if self.max_age is not None:
+            count = max(count, int(np.searchsorted(timestamps, now - self.max_age, side="left")))
+        if self.max_bytes is not None:
+            sample = dataframe.tail(self.BYTES_SAMPLE_ROWS)
+            bytes_per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+            if extra_bytes is None or not extra_bytes.any():
+                keep = int(self.max_bytes // bytes_per_row) if bytes_per_row else row_count
+                count = max(count, row_count - keep)
+            else:
+                # Bytes left after evicting each possible prefix, which only ever shrink
+                remaining = np.concatenate([[extra_bytes.sum()], extra_bytes.sum() - np.cumsum(extra_bytes)])
+                remaining = remaining + bytes_per_row * np.arange(row_count, -1, -1)
+                count = max(count, int(np.argmax(remaining <= self.max_bytes)))
+        return min(count, row_count)
+
+
+class HistorySpill:
+    """
+    Append-only CSV segments holding history rows evicted from memory.
+
+    Rows are appended to the last segment. Rows carrying a column the last segment lacks
+    start a new segment with the widened header, so spilled rows are never rewritten; the
+    first segment lives at path and the following ones at path.1, path.2 and so on.
+    Values are read back as strings so spilled rows keep the exact textual form of their numbers.
+
+    Attributes:
+        path (str): Location of the first spill segment.
+    """
+
+    # Rows read per chunk when scanning the segments
+    CHUNK_SIZE = 10_000
+
+    def __init__(self, path: str):
+        """
+        Initializes the HistorySpill for a segment file, which need not exist yet.
+
+        Args:
+            path (str): Location of the first spill segment.
+        """
+        self.path = path
+        # The header of each segment file, in order
+        self._segments: List[List[str]] = []
+        self._columns: List[str] = []
+        self._row_count = 0
+        while os.path.exists(self._segment_path(len(self._segments))):
+            header = pd.read_csv(self._segment_path(len(self._segments)), nrows=0)
+            self._segments.append(list(header.columns))
+            self._columns += [column for column in header.columns if column not in self._columns]
+        self._row_count = sum(len(chunk) for chunk in self._chunks())
+
+    def __len__(self) -> int:
+        """
+        Returns the number of spilled rows.
+        """
+        return self._row_count
+
+    def append(self, dataframe: pd.DataFrame) -> None:
+        """
+        Appends evicted rows to the end of the last segment.
+
+        Rows carrying a column the last segment has not seen start a new segment with the
+        widened header instead.
+
+        Args:
+            dataframe (pd.DataFrame): The evicted rows, oldest first.
+        """
+        if dataframe.empty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if not self._segments or any(column not in self._segments[-1] for column in dataframe.columns):
+            self._columns += [column for column in dataframe.columns if column not in self._columns]
+            self._segments.append(list(self._columns))
+            pd.DataFrame(columns=self._columns).to_csv(self._segment_path(len(self._segments) - 1), index=False)
+
+        segment = len(self._segments) - 1
+        dataframe.reindex(columns=self._segments[segment]).to_csv(
+            self._segment_path(segment), mode="a", header=False, index=False)
+        self._row_count += len(dataframe)
+
+    def read(self) -> pd.DataFrame:
+        """
+        Reads every spilled row.
+
+        Returns:
+            pd.DataFrame: The spilled rows, oldest first.
+        """
+        if not self._row_count:
+            return pd.DataFrame(columns=self._columns)
+        if len(self._segments) == 1:
+            return pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        return pd.concat(list(self._chunks()), ignore_index=True)
+
+    def filter_time(self, start: Optional[float], end: Optional[float]) -> pd.DataFrame:
+        """
+        Scans the segments chunk by chunk and keeps the rows within a time range.
+
+        Args:
+            start (Optional[float]): Earliest timestamp, or None for no lower bound.
+            end (Optional[float]): Latest timestamp, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: The spilled rows with start <= timestamp <= end, oldest first.
+        """
+        matches = []
+        for chunk in self._chunks():
+            timestamps = pd.to_numeric(chunk.get("timestamp"), errors="coerce")
+            mask = pd.Series(True, index=chunk.index)
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps <= end
+            matches.append(chunk[mask])
+        if not matches:
+            return pd.DataFrame(columns=self._columns)
+        return pd.concat(matches, ignore_index=True)
+
+    def filter_operations(self, operation: str) -> pd.DataFrame:
+        """
+        Scans the segments chunk by chunk and keeps the rows of one operation.
+
+        Args:
+            operation (str): The operation name to filter by.
+
+        Returns:
+            pd.DataFrame: The spilled rows matching the operation, oldest first.
+        """
+        matches = [chunk[chunk["operation"] == operation] for chunk in self._chunks()]
+        if not matches:
+            return pd.DataFrame(columns=self._columns)
+        return pd.concat(matches, ignore_index=True)
+
+    def clear(self) -> None:
+        """
+        Deletes the segment files and forgets all spilled rows.
+        """
+        for segment in range(len(self._segments)):
+            if os.path.exists(self._segment_path(segment)):
+                os.remove(self._segment_path(segment))
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._segments, self._columns = [], []
+        self._row_count = 0
+
+    def replace_with(self, other: "HistorySpill") -> None:
+        """
+        Makes other's rows the contents of this spill, moving its segment files into place.
+
+        Args:
+            other (HistorySpill): Segments written elsewhere; they are left empty.
+        """
+        for segment in range(len(other._segments)):
+            os.replace(other._segment_path(segment), self._segment_path(segment))
+        for segment in range(len(other._segments), len(self._segments)):
+            if os.path.exists(self._segment_path(segment)):
+                os.remove(self._segment_path(segment))
+        if not other._segments and os.path.exists(self.path):
+            os.remove(self.path)
+        self._segments, self._columns, self._row_count = other._segments, other._columns, other._row_count
+        other._segments, other._columns, other._row_count = [], [], 0
+
+    def adopt(self, other: "HistorySpill") -> None:
+        """
+        Adds other's rows after this spill's, moving its segment files into place.
+
+        Args:
+            other (HistorySpill): Segments written elsewhere; they are left empty.
+        """
+        for segment, columns in enumerate(other._segments):
+            os.replace(other._segment_path(segment), self._segment_path(len(self._segments)))
+            self._segments.append(columns)
+            self._columns += [column for column in columns if column not in self._columns]
+        self._row_count += other._row_count
+        other._segments, other._columns, other._row_count = [], [], 0
+
+    def _segment_path(self, segment: int) -> str:
+        """
+        Returns the location of a segment file.
+        """
+        return self.path if segment == 0 else f"{self.path}.{segment}"
+
+    def _chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Yields the segments in chunks of CHUNK_SIZE rows, each with every spilled column.
+        """
+        for segment, columns in enumerate(self._segments):
+            path = self._segment_path(segment)
+            if not os.path.exists(path):
+                continue
+            for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=self.CHUNK_SIZE):
+                # Columns added by later segments read as empty, as missing values are written
+                yield chunk if columns == self._columns else chunk.reindex(columns=self._columns, fill_value="")
@@ -0,0 +1,350 @@
+"""
+This module defines the JobScheduler class, which sits in front of the AdaptiveDispatcher
+and decides which command runs next.
+
+Jobs wait in one bounded queue per priority class and a fixed number of slots execute
+them, always taking the most urgent class first, so an interactive request overtakes any
+backlog of bulk jobs. A full queue pushes back on its producer, which either blocks
+until there is room or gets a SchedulerFull error, so memory stays bounded however far
+ahead the producer runs. Each job may carry a deadline covering both its wait in the
+queue and its execution; a job that expires before it starts is failed or dropped.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, Optional, Union
+
+from app.command import Command, CommandTimeout
+from app.tracing import tracer
+
+INTERACTIVE = 0
+NORMAL = 1
+BULK = 2
+PRIORITIES = (INTERACTIVE, NORMAL, BULK)
+
+# What happens to a job whose deadline passes while it is queued
+FAIL = "fail"
+DROP = "drop"
+
+
+class SchedulerFull(Exception):
+    """
+    Raised when a job is submitted to a full queue and no room frees up in time.
+    """
+
+
+class ScheduledJob:
+    """
+    A command waiting in a JobScheduler queue.
+
+    Attributes:
+        command (Command): The command to execute.
+        priority (int): Its priority class.
+        deadline (Optional[float]): time.monotonic() value by which it must finish, or None.
+        future (Future): Resolves to its outcome.
+        context (contextvars.Context): The submitter's context, which the job runs in, so it
+            stays part of the submitter's trace.
+        queued_at (int): time.perf_counter_ns() value when it was queued.
+        mode (Optional[str]): Execution mode the dispatcher chose for it, once it has run.
+    """
+
+    __slots__ = ("command", "priority", "deadline", "future", "context", "queued_at", "mode")
+
+    def __init__(self, command: Command, priority: int, deadline: Optional[float]):
+        """
+        Initializes the ScheduledJob.
+
+        Args:
+            command (Command): The command to execute.
+            priority (int): Its priority class.
+            deadline (Optional[float]): time.monotonic() value by which it must finish, or None.
+        """
+        self.command = command
+        self.priority = priority
+        self.deadline = deadline
+        self.future = Future()
+        self.context = contextvars.copy_context()
+        self.queued_at = time.perf_counter_ns()
+        self.mode: Optional[str] = None
+
+    def expired(self, now: float) -> bool:
+        """
+        Returns whether the deadline has passed.
+
+        Args:
+            now (float): The current time.monotonic() value.
+        """
+        return self.deadline is not None and now >= self.deadline
+
+
+class JobScheduler:
+    """
+    Executes commands by priority class with bounded queues, deadlines and backpressure.
+
+    Attributes:
+        dispatcher (AdaptiveDispatcher): Executes the commands.
+        concurrency (int): Number of jobs executing at once.
+        capacities (Dict[int, int]): Largest number of queued jobs per priority class.
+        on_expire (str): 'fail' resolves expired jobs to a CommandTimeout; 'drop' cancels them.
+        completed (int): Number of jobs executed.
+        expired (int): Number of jobs that expired before they started.
+        rejected (int): Number of submissions refused because a queue was full.
+    """
+
+    def __init__(self, dispatcher, concurrency: Optional[int] = None,
+                 capacity: Union[int, Dict[int, int]] = 1000, on_expire: str = FAIL):
+        """
+        Initializes the JobScheduler. Its threads start with the first queued job.
+
+        Args:
+            dispatcher (AdaptiveDispatcher): Executes the commands.
+            concurrency (Optional[int]): Number of jobs executing at once. Defaults to the CPU count.
+            capacity (Union[int, Dict[int, int]]): Largest number of queued jobs, for every
+                priority class or per class.
+            on_expire (str): 'fail' or 'drop'.
+
+        Raises:
+            ValueError: If concurrency or a capacity is not positive, or on_expire is unknown.
+        """
+        if concurrency is not None and concurrency <= 0:
+            raise ValueError("concurrency must be positive")
+        capacities = capacity if isinstance(capacity, dict) else dict.fromkeys(PRIORITIES, capacity)
+        if set(capacities) != set(PRIORITIES) or min(capacities.values()) <= 0:
+            raise ValueError("capacity must be positive for every priority class")
+        if on_expire not in (FAIL, DROP):
+            raise ValueError(f"on_expire must be '{FAIL}' or '{DROP}'")
+        self.dispatcher = dispatcher
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.capacities = capacities
+        self.on_expire = on_expire
+        self.completed = 0
+        self.expired = 0
+        self.rejected = 0
+        self._queues: Dict[int, Deque[ScheduledJob]] = {priority: deque() for priority in PRIORITIES}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._work_ready = threading.Condition(self._lock)
+        self._room_ready = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def submit(self, command: Command, priority: int = NORMAL, timeout: Optional[float] = None,
+               block: bool = True, wait: Optional[float] = None) -> Future:
+        """
+        Queues a command.
+
+        Args:
+            command (Command): The command to execute.
+            priority (int): INTERACTIVE, NORMAL or BULK.
+            timeout (Optional[float]): Seconds from now by which the job must finish, or None.
+            block (bool): Whether to wait for room when the queue is full.
+            wait (Optional[float]): Longest wait for room in seconds, or None to wait indefinitely.
+
+        Returns:
+            Future: Resolves to the outcome of the command, as returned by AdaptiveDispatcher.run.
+
+        Raises:
+            ValueError: If priority is not a known priority class.
+            SchedulerFull: If the queue is full and no room frees up in time.
+            RuntimeError: If the scheduler has been shut down.
+        """
+        return self._enqueue(command, priority, timeout, block, wait).future
+
+    def _enqueue(self, command: Command, priority: int, timeout: Optional[float], block: bool = True,
+                 wait: Optional[float] = None) -> ScheduledJob:
+        """
+        Queues a command as submit does and returns its job.
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority class: {priority}")
+        job = ScheduledJob(command, priority, None if timeout is None else time.monotonic() + timeout)
+        with self._lock:
+            self._wait_for_room(priority, block, wait)
+            self._queues[priority].append(job)
+            self._start_threads()
+            self._work_ready.notify()
+        return job
+
+    def run(self, command: Command, priority: int = INTERACTIVE, timeout: Optional[float] = None):
+        """
+        Executes a command and waits for the outcome.
+
+        When a slot is free and nothing of equal or higher priority is queued, the command
+        runs on the calling thread without being queued. Either way, the dispatcher's
+        last_mode on the calling thread is afterwards the mode the command ran in.
+
+        Args:
+            command (Command): The command to execute.
+            priority (int): INTERACTIVE, NORMAL or BULK.
+            timeout (Optional[float]): Seconds from now by which the command must finish, or None.
+
+        Returns:
+            The outcome of the command, as returned by AdaptiveDispatcher.run.
+        """
+        with self._lock:
+            direct = (self._active < self.concurrency and priority in self._queues
+                      and not any(self._queues[more_urgent] for more_urgent in PRIORITIES[:priority + 1]))
+            if direct:
+                self._active += 1
+        if not direct:
+            job = self._enqueue(command, priority, timeout)
+            outcome = job.future.result()
+            self.dispatcher.last_mode = job.mode
+            return outcome
+        try:
+            return self.dispatcher.run(command, timeout)
+        finally:
+            self._finish()
+
+    def pending(self, priority: Optional[int] = None) -> int:
+        """
+        Returns the number of queued jobs.
+
+        Args:
+            priority (Optional[int]): Only count this priority class.
+        """
+        with self._lock:
+            if priority is not None:
+                return len(self._queues[priority])
+            return sum(len(jobs) for jobs in self._queues.values())
+
+    def pressure(self, priority: int) -> float:
+        """
+        Returns how full a queue is, so producers can slow down before they are blocked.
+
+        Args:
+            priority (int): The priority class.
+
+        Returns:
+            float: Queued jobs as a fraction of the capacity, from 0 to 1.
+        """
+        return self.pending(priority) / self.capacities[priority]
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        """
+        Stops the scheduler threads once running jobs finish.
+
+        Args:
+            cancel_pending (bool): Cancel queued jobs, or run them all first.
+        """
+        with self._lock:
+            if cancel_pending:
+                for jobs in self._queues.values():
+                    while jobs:
+                        jobs.popleft().future.cancel()
+            self._stopping = True
+            self._work_ready.notify_all()
+            self._room_ready.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join()
+
+    def _wait_for_room(self, priority: int, block: bool, wait: Optional[float]) -> None:
+        """
+        Waits, holding the lock, until the queue of a priority class has room.
+        """
+        if self._stopping:
+            raise RuntimeError("The scheduler has been shut down")
+        give_up = None if wait is None else time.monotonic() + wait
+        while len(self._queues[priority]) >= self.capacities[priority]:
+            # Expired jobs only hold memory; clear them before refusing anyone
+            self._purge_expired(priority)
+            if len(self._queues[priority]) < self.capacities[priority]:
+                break
+            remaining = None if give_up is None else give_up - time.monotonic()
+            if not block or (remaining is not None and remaining <= 0):
+                self.rejected += 1
+                raise SchedulerFull(f"The queue of priority class {priority} is full")
+            self._room_ready.wait(remaining)
+            if self._stopping:
+                raise RuntimeError("The scheduler has been shut down")
+
+    def _purge_expired(self, priority: int) -> None:
+        """
+        Removes the expired jobs of a priority class, holding the lock.
+        """
+        now = time.monotonic()
+        jobs = self._queues[priority]
+        live = [job for job in jobs if not job.expired(now)]
+        for job in jobs:
+            if job.expired(now):
+                self._expire(job)
+        jobs.clear()
+        jobs.extend(live)
+
+    def _expire(self, job: ScheduledJob) -> None:
+        """
+        Fails or drops a job whose deadline passed before it started.
+        """
+        self.expired += 1
+        if self.on_expire == DROP:
+            job.future.cancel()
+        elif job.future.set_running_or_notify_cancel():
+            job.future.set_result(CommandTimeout(f"{type(job.command).__name__} expired before it started"))
+
+    def _start_threads(self) -> None:
+        """
+        Starts the scheduler threads if they are not running, holding the lock.
+        """
+        while len(self._threads) < self.concurrency:
+            thread = threading.Thread(target=self._serve, name=f"scheduler-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _take(self) -> Optional[ScheduledJob]:
+        """
+        Waits for a free slot and the most urgent live job, or returns None on shutdown.
+        """
+        with self._lock:
+            while True:
+                if self._active < self.concurrency:
+                    now = time.monotonic()
+                    for priority in PRIORITIES:
+                        jobs = self._queues[priority]
+                        while jobs:
+                            job = jobs.popleft()
+                            self._room_ready.notify()
+                            if job.expired(now):
+                                self._expire(job)
+                            elif job.future.set_running_or_notify_cancel():
+                                self._active += 1
+                                return job
+                if self._stopping and not any(self._queues.values()):
+                    return None
+                self._work_ready.wait()
+
+    def _finish(self) -> None:
+        """
+        Frees the slot of a finished job.
+        """
+        with self._lock:
+            self._active -= 1
+            self.completed += 1
+            self._work_ready.notify()
+
+    def _serve(self) -> None:
+        while True:
+            job = self._take()
+            if job is None:
+                return
+            try:
+                job.future.set_result(job.context.run(self._execute, job))
+            except BaseException as e:
+                job.future.set_exception(e)
+            finally:
+                self._finish()
+
+    def _execute(self, job: ScheduledJob):
+        """
+        Runs a dequeued job within what remains of its deadline.
+        """
+        tracer.add_span("scheduler.queued", job.queued_at, time.perf_counter_ns(), priority=job.priority)
+        remaining = None if job.deadline is None else max(job.deadline - time.monotonic(), 0.0)
+        try:
+            return self.dispatcher.run(job.command, remaining)
+        finally:
+            job.mode = self.dispatcher.last_mode
@@ -0,0 +1,95 @@
+"""
+This module defines the ShardedAppendBuffer class, which lets many threads append items
+concurrently without contending on a single lock. Each thread writes to its own shard;
+a consumer periodically drains every shard and receives the items in global append order.
+"""
+
+import itertools
+import threading
+from typing import Any, List, Tuple
+
+
+class _Shard:
+    """
+    The append buffer owned by a single thread.
+
+    Attributes:
+        owner (threading.Thread): The thread appending to this shard.
+        lock (threading.Lock): Guards items against a concurrent drain.
+        items (List[Tuple[int, Any]]): Pending items tagged with their sequence number.
+    """
+
+    def __init__(self, owner: threading.Thread):
+        self.owner = owner
+        self.lock = threading.Lock()
+        self.items: List[Tuple[int, Any]] = []
+
+
+class ShardedAppendBuffer:
+    """
+    A multi-producer append buffer with one shard per producing thread.
+
+    Producers only take the lock of their own shard, so appends from different threads
+    never wait for each other. Every item is tagged with a process-wide sequence number
+    so drain can restore the order in which items were appended.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty ShardedAppendBuffer.
+        """
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._registry_lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of items waiting to be drained.
+        """
+        return sum(len(shard.items) for shard in list(self._shards))
+
+    def append(self, item: Any) -> int:
+        """
+        Appends an item to the calling thread's shard.
+
+        Args:
+            item (Any): The item to buffer.
+
+        Returns:
+            int: The number of items now pending in the calling thread's shard.
+        """
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            with self._registry_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        sequence = next(self._sequence)
+        with shard.lock:
+            shard.items.append((sequence, item))
+            return len(shard.items)
+
+    def drain(self) -> List[Any]:
+        """
+        Removes and returns every pending item in append order.
+
+        Shards of threads that have finished are released once they are empty.
+
+        Returns:
+            List[Any]: The drained items, oldest first.
+        """
+        drained: List[Tuple[int, Any]] = []
+        with self._registry_lock:
+            shards = list(self._shards)
+        # Decide which owners have finished before draining, so none of them can append afterwards
+        finished = [shard for shard in shards if not shard.owner.is_alive()]
+        for shard in shards:
+            with shard.lock:
+                drained.extend(shard.items)
+                shard.items = []
+        if finished:
+            with self._registry_lock:
+                self._shards = [shard for shard in self._shards if shard not in finished]
+        drained.sort(key=lambda entry: entry[0])
+        return [item for _, item in drained]
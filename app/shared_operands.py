@@ -0,0 +1,201 @@
+"""
+This module moves large numeric payloads between processes through shared memory.
+
+A SharedArray is a NumPy array living in a multiprocessing.shared_memory block. Pickling
+it, as multiprocessing does for process arguments and queue items, only sends the block
+name, shape and dtype; the receiving process maps the same block and gets a view without
+copying. SharedOperands builds on it to carry Decimal operands exactly, as int64
+fixed-point mantissas sharing one scale.
+
+The process that creates a block owns it and must release it once the other side is done.
+"""
+
+from decimal import Decimal
+from multiprocessing import shared_memory
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.fixed_point import FixedPointColumn
+
+# Number of values from which a payload is worth placing in shared memory
+SHARED_MEMORY_THRESHOLD = 10_000
+
+
+class SharedArray:
+    """
+    A picklable handle to a NumPy array stored in a shared memory block.
+
+    Attributes:
+        name (str): Name of the shared memory block.
+        shape (Tuple[int, ...]): Shape of the array.
+        dtype (str): NumPy dtype of the array.
+    """
+
+    __slots__ = ("name", "shape", "dtype", "_memory")
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str):
+        """
+        Initializes a handle to an existing block. The block is attached on first use.
+
+        Args:
+            name (str): Name of the shared memory block.
+            shape (Tuple[int, ...]): Shape of the array.
+            dtype (str): NumPy dtype of the array.
+        """
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self._memory: Optional[shared_memory.SharedMemory] = None
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> 'SharedArray':
+        """
+        Copies an array into a new shared memory block owned by the calling process.
+
+        Args:
+            array (np.ndarray): The values to share.
+
+        Returns:
+            SharedArray: A handle to the new block.
+        """
+        array = np.ascontiguousarray(array)
+        memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        handle = cls(memory.name, array.shape, array.dtype.str)
+        handle._memory = memory
+        handle.array()[...] = array
+        return handle
+
+    def array(self) -> np.ndarray:
+        """
+        Returns a view of the shared values, attaching to the block if needed.
+
+        Returns:
+            np.ndarray: An array backed by the shared memory. Drop it before calling close.
+        """
+        if self._memory is None:
+            self._memory = shared_memory.SharedMemory(name=self.name)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self._memory.buf)
+
+    def take(self) -> np.ndarray:
+        """
+        Copies the values out, then closes and destroys the block.
+
+        Returns:
+            np.ndarray: A private copy of the values.
+        """
+        values = self.array().copy()
+        self.close()
+        self.unlink()
+        return values
+
+    def close(self) -> None:
+        """
+        Detaches the calling process from the block. Views returned by array must be gone.
+        """
+        if self._memory is not None:
+            self._memory.close()
+
+    def unlink(self) -> None:
+        """
+        Destroys the block once every process has detached from it.
+        """
+        if self._memory is None:
+            self._memory = shared_memory.SharedMemory(name=self.name)
+        try:
+            self._memory.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __reduce__(self):
+        return SharedArray, (self.name, self.shape, self.dtype)
+
+
+class SharedOperands:
+    """
+    A read-only sequence of Decimal operands stored as fixed-point mantissas in shared memory.
+
+    Iterating yields Decimal values, so code written for a tuple of Decimals keeps working;
+    floats and exact_sum work on the shared mantissas directly.
+
+    Attributes:
+        mantissas (SharedArray): int64 mantissas of the operands.
+        scale (int): Number of decimal places shared by every mantissa.
+    """
+
+    __slots__ = ("mantissas", "scale")
+
+    def __init__(self, mantissas: SharedArray, scale: int):
+        """
+        Initializes the SharedOperands from an existing block.
+
+        Args:
+            mantissas (SharedArray): int64 mantissas of the operands.
+            scale (int): Number of decimal places shared by every mantissa.
+        """
+        self.mantissas = mantissas
+        self.scale = scale
+
+    @classmethod
+    def create(cls, numbers: Sequence[Decimal]) -> Optional['SharedOperands']:
+        """
+        Places Decimal operands in a new shared memory block owned by the calling process.
+
+        Args:
+            numbers (Sequence[Decimal]): The operands.
+
+        Returns:
+            Optional[SharedOperands]: The shared operands, or None if some operand cannot be
+                represented exactly as an int64 mantissa at a common scale.
+        """
+        try:
+            scale = max(0, -min(number.as_tuple().exponent for number in numbers))
+        except TypeError:
+            # NaN and infinities have non-numeric exponents
+            return None
+        if scale > FixedPointColumn.MAX_SCALE:
+            return None
+        factor = Decimal(10) ** scale
+        try:
+            mantissas = np.fromiter((int(number * factor) for number in numbers), dtype="int64", count=len(numbers))
+        except OverflowError:
+            return None
+        return cls(SharedArray.create(mantissas), scale)
+
+    def __len__(self) -> int:
+        return self.mantissas.shape[0]
+
+    def __iter__(self) -> Iterator[Decimal]:
+        for mantissa in self.mantissas.array().tolist():
+            yield Decimal(mantissa).scaleb(-self.scale)
+
+    def __getitem__(self, index: int) -> Decimal:
+        return Decimal(int(self.mantissas.array()[index])).scaleb(-self.scale)
+
+    def floats(self) -> np.ndarray:
+        """
+        Returns the operands as float64 values.
+
+        Returns:
+            np.ndarray: The operands, converted from the shared mantissas.
+        """
+        return self.mantissas.array() / 10 ** self.scale
+
+    def exact_sum(self) -> Decimal:
+        """
+        Sums the operands exactly using integer arithmetic on the mantissas.
+
+        Returns:
+            Decimal: The sum of the operands.
+        """
+        return Decimal(sum(self.mantissas.array().tolist())).scaleb(-self.scale)
+
+    def release(self) -> None:
+        """
+        Detaches from and destroys the block. Call it in the process that created the operands.
+        """
+        self.mantissas.close()
+        self.mantissas.unlink()
+
+    def __reduce__(self):
+        return SharedOperands, (self.mantissas, self.scale)
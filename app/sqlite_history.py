@@ -0,0 +1,285 @@
+"""
+This module defines the SQLiteHistoryBackend class, a HistoryBackend that keeps the
+calculation history in a SQLite database so several local processes can share it.
+
+The database runs in WAL mode, so readers never block the single writer and writers
+never block readers. Each batch is inserted in one transaction with executemany, which
+prepares the INSERT statement once; the other statements are module constants and are
+reused from the per-connection statement cache.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.fixed_point import parse_number
+from app.history_backend import HistoryBackend
+
+# Columns with a column of their own in the table; any other record fields are kept as JSON in 'extra'
+COLUMNS = ("operation", "num1", "num2", "result", "timestamp", "duration")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY,
+        operation TEXT,
+        num1 TEXT,
+        num2 TEXT,
+        result TEXT,
+        timestamp REAL NOT NULL,
+        duration REAL,
+        extra TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp)",
+    "CREATE INDEX IF NOT EXISTS history_operation ON history (operation, timestamp)",
+)
+
+SELECT = "SELECT operation, num1, num2, result, timestamp, duration, extra FROM history"
+ORDER = " ORDER BY timestamp, id"
+INSERT = ("INSERT INTO history (operation, num1, num2, result, timestamp, duration, extra) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+DELETE_AT = "DELETE FROM history WHERE id = (SELECT id FROM history" + ORDER + " LIMIT 1 OFFSET ?)"
+
+# Connection-private table that imports are staged in before they touch the shared history
+STAGING = ("CREATE TEMP TABLE IF NOT EXISTS history_staging (id INTEGER PRIMARY KEY, operation TEXT, "
+           "num1 TEXT, num2 TEXT, result TEXT, timestamp REAL NOT NULL, duration REAL, extra TEXT)")
+STAGE = ("INSERT INTO temp.history_staging (operation, num1, num2, result, timestamp, duration, extra) "
+         "VALUES (?, ?, ?, ?, ?, ?, ?)")
+UNSTAGE = ("INSERT INTO history (operation, num1, num2, result, timestamp, duration, extra) "
+           "SELECT operation, num1, num2, result, timestamp, duration, extra FROM temp.history_staging ORDER BY id")
+
+
+class SQLiteHistoryBackend(HistoryBackend):
+    """
+    Stores the calculation history in a SQLite database in WAL mode.
+
+    Numbers are stored as text so Decimal values keep their exact form. Each thread and
+    each process opens its own connection, so a backend created before forking stays
+    usable in the child processes.
+
+    Attributes:
+        path (str): Location of the database file.
+    """
+
+    # Seconds a connection waits for another process's write lock before failing
+    BUSY_TIMEOUT = 30.0
+
+    def __init__(self, path: str):
+        """
+        Opens the database, creating the file, the table and its indexes if needed.
+
+        Args:
+            path (str): Location of the database file.
+        """
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of stored records.
+        """
+        return self._connection().execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def append(self, records: pd.DataFrame) -> None:
+        """
+        Inserts a batch of records in a single transaction.
+
+        Args:
+            records (pd.DataFrame): The records to store, each with a 'timestamp'.
+        """
+        if records.empty:
+            return
+        extra_columns = [column for column in records.columns if column not in COLUMNS]
+        rows = (self._row(record, extra_columns) for record in records.to_dict("records"))
+        with self._transaction() as connection:
+            connection.executemany(INSERT, rows)
+
+    def import_records(self, chunks: Iterable[pd.DataFrame], replace: bool = False) -> None:
+        """
+        Stages every batch in a temporary table of this connection, then moves them into
+        the history in one transaction, after removing the stored records if replace is set.
+
+        Other processes keep reading and writing the history while the batches are staged,
+        and see the import all at once. If producing a batch fails, the staged rows are
+        discarded and the history is left unchanged.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Batches of records, each with a 'timestamp'.
+            replace (bool): Remove the stored records first, in the same transaction.
+        """
+        connection = self._connection()
+        connection.execute(STAGING)
+        connection.execute("DELETE FROM temp.history_staging")
+        try:
+            for records in chunks:
+                extra_columns = [column for column in records.columns if column not in COLUMNS]
+                rows = (self._row(record, extra_columns) for record in records.to_dict("records"))
+                connection.execute("BEGIN")
+                connection.executemany(STAGE, rows)
+                connection.execute("COMMIT")
+            with self._transaction() as transaction:
+                if replace:
+                    transaction.execute("DELETE FROM history")
+                transaction.execute(UNSTAGE)
+        finally:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            connection.execute("DELETE FROM temp.history_staging")
+
+    def get_all_records(self) -> pd.DataFrame:
+        """
+        Returns every stored record.
+
+        Returns:
+            pd.DataFrame: The complete history, oldest first.
+        """
+        return self._query(SELECT + ORDER)
+
+    def filter_operations(self, operation: str) -> pd.DataFrame:
+        """
+        Returns the records of one operation using the operation index.
+
+        Args:
+            operation (str): The operation name to filter by.
+
+        Returns:
+            pd.DataFrame: The matching records, oldest first.
+        """
+        return self._query(SELECT + " WHERE operation = ?" + ORDER, (operation,))
+
+    def filter_by_time(self, start: Optional[float] = None, end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Returns the records with start <= timestamp <= end using the timestamp index.
+
+        Args:
+            start (Optional[float]): Earliest timestamp in epoch seconds, or None for no lower bound.
+            end (Optional[float]): Latest timestamp in epoch seconds, or None for no upper bound.
+
+        Returns:
+            pd.DataFrame: The matching records, oldest first.
+        """
+        return self._query(SELECT + " WHERE timestamp >= ? AND timestamp <= ?" + ORDER,
+                           (-np.inf if start is None else start, np.inf if end is None else end))
+
+    def get_latest_record(self) -> Optional[pd.Series]:
+        """
+        Returns the most recent record.
+
+        Returns:
+            Optional[pd.Series]: The record, or None if the history is empty.
+        """
+        records = self._query(SELECT + " ORDER BY timestamp DESC, id DESC LIMIT 1")
+        return None if records.empty else records.iloc[0]
+
+    def remove_record(self, index: int) -> bool:
+        """
+        Removes a record by its position in timestamp order.
+
+        Args:
+            index (int): Position of the record to delete.
+
+        Returns:
+            bool: True if a record was removed, False if the index was out of bounds.
+        """
+        if index < 0:
+            return False
+        with self._transaction() as connection:
+            return connection.execute(DELETE_AT, (index,)).rowcount > 0
+
+    def clear(self) -> None:
+        """
+        Removes every record.
+        """
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM history")
+
+    def close(self) -> None:
+        """
+        Closes the calling thread's connection. Other threads keep theirs.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns the connection of the calling thread, opening it on first use in this process.
+        """
+        if getattr(self._local, "connection", None) is None or self._local.pid != os.getpid():
+            # Transactions are opened explicitly by _transaction, so autocommit mode is used
+            connection = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return self._local.connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Runs a block in a write transaction, committing on success and rolling back on error.
+
+        The write lock is taken when the transaction begins, so two processes never both
+        read inside a transaction and then wait on each other to write.
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _query(self, sql: str, parameters: Tuple = ()) -> pd.DataFrame:
+        """
+        Runs a SELECT and decodes the rows.
+        """
+        rows = self._connection().execute(sql, parameters).fetchall()
+        records = pd.DataFrame.from_records(rows, columns=[*COLUMNS, "extra"])
+        for column in ("num1", "num2", "result"):
+            records[column] = pd.Series([parse_number(value) for value in records[column]], dtype=object)
+        for column in ("timestamp", "duration"):
+            records[column] = pd.to_numeric(records[column]).astype("float64")
+        extra = records.pop("extra")
+        if extra.notna().any():
+            fields = pd.DataFrame([json.loads(value) if value else {} for value in extra])
+            records = pd.concat([records, fields], axis=1)
+        return records
+
+    @staticmethod
+    def _row(record: dict, extra_columns: List[str]) -> Tuple:
+        """
+        Converts a record to the parameters of the INSERT statement.
+        """
+        extra = {column: record[column] for column in extra_columns if not pd.isna(record[column])}
+        return (
+            SQLiteHistoryBackend._text(record.get("operation")),
+            SQLiteHistoryBackend._text(record.get("num1")),
+            SQLiteHistoryBackend._text(record.get("num2")),
+            SQLiteHistoryBackend._text(record.get("result")),
+            float(record["timestamp"]),
+            None if pd.isna(record.get("duration")) else float(record["duration"]),
+            json.dumps(extra, default=str) if extra else None,
+        )
+
+    @staticmethod
+    def _text(value: object) -> Optional[str]:
+        """
+        Returns a value as stored text, or None if it is missing.
+        """
+        if value is None or (not isinstance(value, str) and pd.isna(value)) or value == "":
+            return None
+        return str(value)
@@ -0,0 +1,257 @@
+"""
+This module defines the WorkerSupervisor class, which runs commands in a pool of
+long-lived worker processes and keeps the pool healthy.
+
+Each command gets a deadline. The supervisor waits on both the worker's result pipe and
+its process sentinel, so a worker that crashes is noticed at once and a worker that
+hangs is noticed when the deadline passes. Either way the worker is killed and replaced,
+and the caller gets a CommandError or CommandTimeout instead of waiting forever: a call
+to run never takes much longer than its timeout.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Connection, wait
+from multiprocessing.reduction import ForkingPickler
+from typing import Optional, Set
+
+from app.command import Command, CommandError, CommandTimeout
+from app.tracing import tracer
+
+
+def serve_commands(connection: Connection) -> None:
+    """
+    Runs in a worker process: executes the commands received on a pipe and sends back
+    (outcome, seconds) pairs until the pipe closes or None arrives.
+
+    Args:
+        connection (Connection): The worker's end of the pipe.
+    """
+    while True:
+        try:
+            command = connection.recv()
+        except (EOFError, OSError):
+            return
+        if command is None:
+            return
+        payload = command.report(timed=True)
+        try:
+            connection.send(payload)
+        except Exception as e:
+            # The outcome could not be pickled; report that instead
+            connection.send((CommandError(f"{type(command).__name__} returned an unsendable result: {e}"), payload[1]))
+
+
+class Worker:
+    """
+    A worker process and the parent's end of its pipe.
+
+    Attributes:
+        process (multiprocessing.Process): The worker process.
+        connection (Connection): The parent's end of the pipe.
+    """
+
+    __slots__ = ("process", "connection")
+
+    def __init__(self, context):
+        """
+        Starts a worker process.
+
+        Args:
+            context: The multiprocessing context to start it with.
+        """
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=serve_commands, args=(child,), name="calculator-worker", daemon=True)
+        self.process.start()
+        child.close()
+
+    def stop(self, grace: float) -> None:
+        """
+        Terminates the worker, killing it if it does not exit within the grace period.
+
+        Args:
+            grace (float): Seconds to wait after terminating before killing.
+        """
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(grace)
+            if self.process.is_alive():
+                self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerSupervisor:
+    """
+    Runs commands in supervised worker processes with deadlines.
+
+    Workers are started on demand, up to max_workers, and reused between commands. A
+    worker that dies or exceeds its deadline is killed and replaced right away.
+
+    Attributes:
+        max_workers (int): Largest number of worker processes.
+        default_timeout (Optional[float]): Deadline of commands that do not set their own timeout.
+        grace (float): Seconds a terminated worker gets to exit before it is killed.
+        crashes (int): Number of workers that died while running a command.
+        timeouts (int): Number of commands that missed their deadline.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, default_timeout: Optional[float] = None,
+                 grace: float = 1.0, context=None):
+        """
+        Initializes the WorkerSupervisor. No worker starts until the first command.
+
+        Args:
+            max_workers (Optional[int]): Largest number of worker processes. Defaults to the CPU count.
+            default_timeout (Optional[float]): Deadline in seconds of commands without a timeout
+                of their own, or None for no deadline.
+            grace (float): Seconds a terminated worker gets to exit before it is killed.
+            context: The multiprocessing context to start workers with. Defaults to the default context.
+
+        Raises:
+            ValueError: If max_workers or default_timeout is not positive.
+        """
+        if max_workers is not None and max_workers <= 0:
+            raise ValueError("max_workers must be positive")
+        if default_timeout is not None and default_timeout <= 0:
+            raise ValueError("default_timeout must be positive")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.default_timeout = default_timeout
+        self.grace = grace
+        self.crashes = 0
+        self.timeouts = 0
+        self._context = context or multiprocessing.get_context()
+        self._idle: "queue.LifoQueue[Worker]" = queue.LifoQueue()
+        self._workers: Set[Worker] = set()
+        self._lock = threading.Lock()
+
+    def run(self, command: Command, timeout: Optional[float] = None):
+        """
+        Executes a command in a worker process and waits for the outcome until its deadline.
+
+        Args:
+            command (Command): The command to execute. It must be picklable.
+            timeout (Optional[float]): Deadline in seconds, overriding command.timeout and default_timeout.
+
+        Returns:
+            Tuple: The outcome, as returned by Command.outcome, and the execution time in
+                seconds. On a crash the outcome is a CommandError and on a missed deadline a
+                CommandTimeout, and the time is how long the caller waited.
+        """
+        if timeout is None:
+            timeout = command.timeout if command.timeout is not None else self.default_timeout
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        # Pickle first, so a command that cannot be sent fails without tying up a worker
+        with tracer.span("supervisor.pickle"):
+            request = ForkingPickler.dumps(command)
+        with tracer.span("supervisor.acquire"):
+            worker = self._acquire(deadline)
+        if worker is None:
+            self.timeouts += 1
+            return CommandTimeout(f"No worker became free within {timeout} seconds"), time.monotonic() - started
+        try:
+            with tracer.span("supervisor.transfer", bytes=len(request)):
+                worker.connection.send_bytes(request)
+                ready = wait([worker.connection, worker.process.sentinel],
+                             None if deadline is None else max(deadline - time.monotonic(), 0))
+            if worker.connection in ready:
+                received = time.perf_counter_ns()
+                with tracer.span("supervisor.receive"):
+                    result, seconds = worker.connection.recv()
+                    self._release(worker)
+        except (EOFError, OSError):
+            ready = [worker.process.sentinel]
+        except Exception as e:
+            # A reply that cannot be unpickled leaves the connection in an unknown state
+            error = CommandError(f"The result of {type(command).__name__} could not be received: {e}")
+            logging.error(f"{error}; replacing the worker.")
+            self._replace(worker)
+            return error, time.monotonic() - started
+        else:
+            if worker.connection in ready:
+                # The worker is back in the pool, so a failure to convert the result is not its crash
+                with tracer.span("supervisor.receive"):
+                    result = Command.receive_result(result)
+                # The worker only reports how long it ran; place that just before its reply arrived
+                tracer.add_span("command.execute", received - int(seconds * 1e9), received, pid=worker.process.pid,
+                                tid=worker.process.pid, process_name="worker", command=type(command).__name__)
+                return result, seconds
+        name = type(command).__name__
+        if ready:
+            self.crashes += 1
+            worker.process.join(self.grace)
+            error = CommandError(f"The worker running {name} died (exit code {worker.process.exitcode})")
+        else:
+            self.timeouts += 1
+            error = CommandTimeout(f"{name} did not finish within {timeout} seconds")
+        logging.error(f"{error}; replacing the worker.")
+        self._replace(worker)
+        return error, time.monotonic() - started
+
+    @property
+    def worker_count(self) -> int:
+        """
+        The number of running worker processes.
+        """
+        return len(self._workers)
+
+    def shutdown(self) -> None:
+        """
+        Stops every worker. Commands still running are abandoned.
+        """
+        with self._lock:
+            workers, self._workers = self._workers, set()
+            self._idle = queue.LifoQueue()
+        for worker in workers:
+            worker.stop(self.grace)
+
+    def _acquire(self, deadline: Optional[float]) -> Optional[Worker]:
+        """
+        Takes an idle worker, starting one if the pool is not full, or waits for one until the deadline.
+        """
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if len(self._workers) < self.max_workers:
+                        with tracer.span("worker.spawn"):
+                            worker = Worker(self._context)
+                        self._workers.add(worker)
+                        return worker
+                try:
+                    worker = self._idle.get(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    return None
+            if worker.process.is_alive():
+                return worker
+            # Died while idle
+            self._replace(worker)
+
+    def _release(self, worker: Worker) -> None:
+        """
+        Returns a healthy worker to the idle pool.
+        """
+        with self._lock:
+            if worker in self._workers:
+                self._idle.put(worker)
+                return
+        worker.stop(self.grace)
+
+    def _replace(self, worker: Worker) -> None:
+        """
+        Stops a dead or hung worker and starts a fresh one in its place.
+        """
+        worker.stop(self.grace)
+        with self._lock:
+            if worker not in self._workers:
+                return
+            self._workers.discard(worker)
+            replacement = Worker(self._context)
+            self._workers.add(replacement)
+            self._idle.put(replacement)
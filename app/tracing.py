@@ -0,0 +1,264 @@
+"""
+This module records sampled timing spans for the stages of a calculation and exports
+them in the Chrome trace event format, which chrome://tracing, Perfetto
+(ui.perfetto.dev) and speedscope display as a timeline.
+
+A request opens a trace with tracer.trace(name); whether it is sampled is decided once,
+at the outermost trace, with probability sample_rate. Stages inside it open spans with
+tracer.span(name). Spans of an unsampled request, or outside any trace, cost a context
+variable lookup and record nothing, so the tracer can stay in place in production with a
+low sample rate.
+
+The sampling decision lives in a context variable: it follows a request onto the threads
+the dispatcher and scheduler start for it, provided they run it in a copy of the caller's
+context. Work done in worker processes is recorded by the parent with add_span from the
+time the worker reports.
+"""
+
+import collections
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from typing import Deque, Dict, Optional, Tuple
+
+# Whether the current request is sampled: None outside any trace
+_sampled: contextvars.ContextVar[Optional[bool]] = contextvars.ContextVar("trace_sampled", default=None)
+
+
+class _NoSpan:
+    """
+    Stands in for a span that is not recorded.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def annotate(self, **args) -> None:
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Span:
+    """
+    A stage being timed. Use it as a context manager; it is recorded when it exits.
+
+    Attributes:
+        name (str): What the stage does, e.g. 'dispatch.choose'.
+        args (Dict[str, object]): Details shown with the span in the trace viewer.
+    """
+
+    __slots__ = ("tracer", "name", "args", "start", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict[str, object], token=None):
+        """
+        Initializes the Span.
+
+        Args:
+            tracer (Tracer): The tracer recording it.
+            name (str): What the stage does.
+            args (Dict[str, object]): Details shown with the span.
+            token: Reset on exit when the span opened a sampled trace.
+        """
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+        self.token = token
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_span(self.name, self.start, end, **self.args)
+        if self.token is not None:
+            _sampled.reset(self.token)
+
+    def annotate(self, **args) -> None:
+        """
+        Adds details to the span, e.g. a result known only once the stage has run.
+        """
+        self.args.update(args)
+
+
+class _Unsampled:
+    """
+    Marks a request as not sampled for as long as it is open.
+    """
+
+    __slots__ = ("token",)
+
+    def __enter__(self) -> _NoSpan:
+        self.token = _sampled.set(False)
+        return NO_SPAN
+
+    def __exit__(self, *exc_info) -> None:
+        _sampled.reset(self.token)
+
+
+class Tracer:
+    """
+    Records spans of sampled requests in a bounded buffer.
+
+    Attributes:
+        sample_rate (float): Fraction of requests traced, from 0 to 1.
+        events (Deque[Tuple]): Recorded spans as (name, start_ns, end_ns, pid, tid, args), oldest
+            dropped first once max_events are kept.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, max_events: int = 100_000, seed: Optional[int] = None):
+        """
+        Initializes the Tracer.
+
+        Args:
+            sample_rate (float): Fraction of requests traced, from 0 to 1.
+            max_events (int): Largest number of spans kept.
+            seed (Optional[int]): Seed of the sampling decisions, for reproducible tests.
+
+        Raises:
+            ValueError: If sample_rate is outside [0, 1] or max_events is not positive.
+        """
+        if max_events <= 0:
+            raise ValueError("max_events must be positive")
+        self.sample_rate = sample_rate
+        self.events: Deque[Tuple] = collections.deque(maxlen=max_events)
+        self._random = random.Random(seed)
+        self._thread_names: Dict[int, str] = {}
+        self._process_names: Dict[int, str] = {os.getpid(): "calculator"}
+        self._origin = time.perf_counter_ns()
+
+    @property
+    def sample_rate(self) -> float:
+        """
+        Fraction of requests traced, from 0 to 1.
+        """
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, value: float) -> None:
+        if not 0.0 <= value <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self._sample_rate = value
+
+    @staticmethod
+    def sampling() -> bool:
+        """
+        Whether the current request is being traced.
+        """
+        return _sampled.get() is True
+
+    def trace(self, name: str, **args):
+        """
+        Opens a request, deciding whether it is sampled, or a span when a request is already open.
+
+        Args:
+            name (str): What the request does, e.g. 'calculation'.
+            args: Details shown with the request in the trace viewer.
+
+        Returns:
+            A context manager; its value has an annotate method.
+        """
+        sampled = _sampled.get()
+        if sampled is not None:
+            return Span(self, name, args) if sampled else NO_SPAN
+        if self._sample_rate and (self._sample_rate >= 1.0 or self._random.random() < self._sample_rate):
+            return Span(self, name, args, _sampled.set(True))
+        return _Unsampled()
+
+    def span(self, name: str, **args):
+        """
+        Times a stage of the current request.
+
+        Args:
+            name (str): What the stage does, e.g. 'history.add_record'.
+            args: Details shown with the span in the trace viewer.
+
+        Returns:
+            A context manager recording the span if the request is sampled, NO_SPAN otherwise.
+        """
+        return Span(self, name, args) if _sampled.get() is True else NO_SPAN
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, pid: Optional[int] = None,
+                 tid: Optional[int] = None, process_name: Optional[str] = None, **args) -> None:
+        """
+        Records a stage timed elsewhere, e.g. from the execution time a worker process reports.
+        Nothing is recorded unless the current request is sampled.
+
+        Args:
+            name (str): What the stage does.
+            start_ns (int): time.perf_counter_ns() value when it started.
+            end_ns (int): time.perf_counter_ns() value when it ended.
+            pid (Optional[int]): Process it ran in. Defaults to this process.
+            tid (Optional[int]): Thread it ran on. Defaults to the calling thread.
+            process_name (Optional[str]): Label of the process in the trace viewer.
+            args: Details shown with the span.
+        """
+        if _sampled.get() is not True:
+            return
+        if tid is None:
+            tid = threading.get_native_id()
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+        if pid is None:
+            pid = os.getpid()
+        elif process_name is not None:
+            self._process_names[pid] = process_name
+        self.events.append((name, start_ns, end_ns, pid, tid, args))
+
+    def clear(self) -> None:
+        """
+        Discards the recorded spans.
+        """
+        self.events.clear()
+
+    def to_chrome_trace(self) -> Dict[str, object]:
+        """
+        Converts the recorded spans to the Chrome trace event format.
+
+        Returns:
+            Dict[str, object]: A JSON-serializable object with 'traceEvents' in microseconds.
+        """
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}}
+                  for pid, name in self._process_names.items()]
+        events += [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                   for tid, name in self._thread_names.items()]
+        for name, start, end, pid, tid, args in list(self.events):
+            events.append({"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+                           "ts": (start - self._origin) / 1000, "dur": (end - start) / 1000,
+                           "args": {key: str(value) for key, value in args.items()}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> int:
+        """
+        Writes the recorded spans to a Chrome trace file.
+
+        Args:
+            path (str): The destination, e.g. 'logs/trace.json'.
+
+        Returns:
+            int: The number of spans written.
+        """
+        trace = self.to_chrome_trace()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(trace, handle)
+        return sum(1 for event in trace["traceEvents"] if event["ph"] == "X")
+
+
+# The tracer shared by the application; sampling is off until sample_rate is set
+tracer = Tracer()
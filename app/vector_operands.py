@@ -0,0 +1,178 @@
+"""
+This module lets the arithmetic commands operate on vectors element-wise.
+
+An operand of add, subtract, multiply or divide may be a NumPy array, a list or tuple of
+numbers, or, in the REPL and on the command line, a bracketed list such as '[1, 2.5, 3]'
+or '@values.txt' naming a file of numbers. A scalar operand is broadcast against a
+vector, and vectors of compatible shapes are broadcast against each other as in NumPy.
+
+The element-wise arithmetic runs on NumPy arrays rather than Decimal values. Lists of
+small integers become int64 arrays, so their sums, differences and products stay exact;
+any other list becomes float64, and division always produces float64. NumPy arrays
+passed in from Python keep their dtype.
+"""
+
+from decimal import Decimal
+from typing import Optional, Union
+
+import numpy as np
+
+from app.numeric_tokens import parse_floats
+
+# NumPy ufunc applied element-wise by each arithmetic command
+OPERATIONS = {
+    "add": np.add,
+    "subtract": np.subtract,
+    "multiply": np.multiply,
+    "divide": np.true_divide,
+}
+
+# Integer lists within this magnitude are kept as int64: the product of two of them cannot overflow
+EXACT_INTEGER_LIMIT = 2 ** 31
+
+# Elements printed before the display of a vector is abbreviated with '...'
+DISPLAY_THRESHOLD = 20
+
+
+def as_array(value: object) -> np.ndarray:
+    """
+    Converts an operand to a numeric NumPy array.
+
+    Args:
+        value (object): A NumPy array, a possibly nested list or tuple of numbers, or a scalar.
+
+    Returns:
+        np.ndarray: An int64 array for integers below EXACT_INTEGER_LIMIT, a float64 array
+            for other numbers, or a numeric NumPy array unchanged except for booleans,
+            which become int64.
+
+    Raises:
+        ValueError: If an element is not a number.
+    """
+    if isinstance(value, np.ndarray) and value.dtype.kind in "iuf":
+        return value
+    if isinstance(value, np.ndarray) and value.dtype.kind == "b":
+        return value.astype(np.int64)
+    values = np.asarray(value, dtype=object)
+    flat = values.ravel()
+    try:
+        if all(_small_integer(item) for item in flat):
+            return values.astype(np.int64)
+        return values.astype(np.float64)
+    except (TypeError, ValueError, ArithmeticError):
+        raise ValueError("Vector operands must contain only numbers") from None
+
+
+def narrow_integers(values: np.ndarray) -> np.ndarray:
+    """
+    Converts parsed floats to int64 when every one is a whole number below
+    EXACT_INTEGER_LIMIT, which floats represent exactly, as as_array does for lists.
+
+    Args:
+        values (np.ndarray): A float64 array.
+
+    Returns:
+        np.ndarray: An int64 copy, or values unchanged.
+    """
+    if np.all((np.abs(values) < EXACT_INTEGER_LIMIT) & (values == np.rint(values))):
+        return values.astype(np.int64)
+    return values
+
+
+def _small_integer(item: object) -> bool:
+    """
+    Whether a vector element is an integer that as_array may keep as int64.
+    """
+    if isinstance(item, (int, np.integer)) and not isinstance(item, bool):
+        return abs(int(item)) < EXACT_INTEGER_LIMIT
+    if isinstance(item, Decimal) and item.is_finite() and item == item.to_integral_value():
+        return abs(item) < EXACT_INTEGER_LIMIT
+    return False
+
+
+def elementwise(operation: str, operand1: object, operand2: object) -> np.ndarray:
+    """
+    Applies an arithmetic operation element by element, broadcasting scalars and vectors.
+
+    Args:
+        operation (str): 'add', 'subtract', 'multiply' or 'divide'.
+        operand1 (object): The first operand, a vector or a scalar.
+        operand2 (object): The second operand, a vector or a scalar.
+
+    Returns:
+        np.ndarray: The element-wise results.
+
+    Raises:
+        ValueError: If an element is not a number, the shapes do not broadcast, or a
+            divisor element is zero.
+    """
+    left, right = as_array(operand1), as_array(operand2)
+    if operation == "divide" and (right == 0).any():
+        raise ValueError("Cannot divide by zero")
+    try:
+        return OPERATIONS[operation](left, right)
+    except ValueError:
+        raise ValueError(f"Vectors of shapes {left.shape} and {right.shape} cannot be combined "
+                         f"element-wise") from None
+
+
+def parse_vector(text: str) -> Optional[np.ndarray]:
+    """
+    Parses a vector typed in the REPL or on the command line.
+
+    The elements are parsed in bulk straight into an array, with the dtype as_array would
+    give the same numbers as a list.
+
+    Args:
+        text (str): An operand such as '[1, 2.5, 3]', '[1 2 3]' or '@values.txt'.
+
+    Returns:
+        Optional[np.ndarray]: The elements, or None if text is a scalar operand. A file
+            holds numbers separated by whitespace or commas.
+
+    Raises:
+        MalformedNumber: If an element is not a number, with its column in text or, for
+            a file, its line and column in the file.
+        OSError: If a named file cannot be read.
+    """
+    if text.startswith("@"):
+        with open(text[1:], encoding="utf-8") as handle:
+            values = parse_floats(handle.read())
+    elif text.startswith("[") and text.endswith("]"):
+        values = parse_floats(text[:-1], start=1)
+    else:
+        return None
+    return narrow_integers(values)
+
+
+def parse_operand(text: str) -> Union[Decimal, np.ndarray]:
+    """
+    Parses an operand typed in the REPL or on the command line.
+
+    Args:
+        text (str): A number, a bracketed vector or '@file'.
+
+    Returns:
+        Union[Decimal, np.ndarray]: The number or the vector.
+
+    Raises:
+        InvalidOperation: If the text, or an element, is not a number.
+        OSError: If a named file cannot be read.
+    """
+    vector = parse_vector(text)
+    return Decimal(text) if vector is None else vector
+
+
+def format_vector(values: np.ndarray, threshold: int = DISPLAY_THRESHOLD) -> str:
+    """
+    Formats a vector result for display and the history, abbreviating long ones.
+
+    Args:
+        values (np.ndarray): The result.
+        threshold (int): Elements printed in full before the display is abbreviated.
+
+    Returns:
+        str: For example '[2, 4, 6]'.
+    """
+    return np.array2string(values, separator=", ", threshold=threshold, max_line_width=10 ** 6,
+                           formatter={"int": str, "float_kind": lambda value: repr(float(value))})
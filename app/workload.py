@@ -0,0 +1,318 @@
+"""
+This module generates synthetic calculation workloads with NumPy for tests, load tests
+and benchmarks.
+
+A Workload stores its records column-wise: an operation code per record and the operands
+of all records in one array of int64 fixed-point mantissas, with offsets marking where each
+record's operands start, so binary operations and variadic statistics share one layout.
+Everything is drawn in vectorized batches from a seeded generator, so millions of records
+take seconds and the same seed always produces the same records.
+"""
+
+import json
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, TextIO, Tuple
+
+import numpy as np
+
+BINARY_OPERATIONS = ("add", "subtract", "multiply", "divide")
+VARIADIC_OPERATIONS = ("mean", "stddev", "mode")
+
+DISTRIBUTIONS = ("uniform", "integers", "normal", "loguniform")
+
+# Most decimal places an operand may have, as for FixedPointColumn
+MAX_SCALE = 8
+
+# Largest magnitude of an int64 mantissa
+MAX_MANTISSA = np.iinfo(np.int64).max
+
+# Mantissas below this are formatted exactly through float64
+EXACT_FLOAT_MANTISSA = 10 ** 15
+
+
+class Workload:
+    """
+    A batch of generated calculation records.
+
+    Attributes:
+        names (Tuple[str, ...]): Operation names, indexed by the codes.
+        codes (np.ndarray): int8 operation code of each record.
+        offsets (np.ndarray): int64 array of len(codes) + 1 positions; the operands of
+            record i are values[offsets[i]:offsets[i + 1]].
+        values (np.ndarray): int64 mantissas of every operand.
+        scale (int): Decimal places of every mantissa.
+    """
+
+    __slots__ = ("names", "codes", "offsets", "values", "scale")
+
+    def __init__(self, names: Sequence[str], codes: np.ndarray, offsets: np.ndarray, values: np.ndarray, scale: int):
+        """
+        Initializes the Workload from its columns.
+
+        Args:
+            names (Sequence[str]): Operation names, indexed by the codes.
+            codes (np.ndarray): Operation code of each record.
+            offsets (np.ndarray): Start of each record's operands, followed by the total count.
+            values (np.ndarray): Mantissas of every operand.
+            scale (int): Decimal places of every mantissa.
+        """
+        self.names = tuple(names)
+        self.codes = codes
+        self.offsets = offsets
+        self.values = values
+        self.scale = scale
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def operations(self) -> np.ndarray:
+        """
+        The operation name of each record.
+        """
+        return np.asarray(self.names, dtype=object)[self.codes]
+
+    def operand_texts(self) -> List[str]:
+        """
+        Formats every operand as an exact decimal string.
+
+        Returns:
+            List[str]: One string per operand, e.g. '-12.50'.
+        """
+        if not len(self.values) or np.abs(self.values).max() < EXACT_FLOAT_MANTISSA:
+            # The float nearest to each value still rounds back to it at this many places
+            return [f"%.{self.scale}f" % value for value in self.operand_floats().tolist()]
+        magnitudes = np.abs(self.values)
+        factor = 10 ** self.scale
+        signs = np.where(self.values < 0, "-", "").tolist()
+        whole, fraction = (magnitudes // factor).tolist(), (magnitudes % factor).tolist()
+        if not self.scale:
+            return [f"{sign}{number}" for sign, number in zip(signs, whole)]
+        template = f"%s%d.%0{self.scale}d"
+        return [template % parts for parts in zip(signs, whole, fraction)]
+
+    def operand_floats(self) -> np.ndarray:
+        """
+        Returns every operand as a float64 value.
+        """
+        return self.values / 10 ** self.scale
+
+    def jobs(self) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Yields each record as an (operation, operands) pair, the job format of the cluster coordinator.
+        """
+        texts = self.operand_texts()
+        offsets = self.offsets.tolist()
+        names = self.names
+        for index, code in enumerate(self.codes.tolist()):
+            yield names[code], texts[offsets[index]:offsets[index + 1]]
+
+    def write_jsonl(self, handle: TextIO) -> None:
+        """
+        Writes one JSON object per record, e.g. {"operation": "add", "operands": ["1.50", "2.00"]}.
+
+        Args:
+            handle (TextIO): The text stream to write to.
+        """
+        # Operation names and decimal strings need no escaping, so records are formatted directly
+        prefixes = ['{"operation": %s, "operands": ["' % json.dumps(name) for name in self.names]
+        handle.writelines(prefixes[code] + '", "'.join(operands) + '"]}\n'
+                          for code, (_, operands) in zip(self.codes.tolist(), self.jobs()))
+
+    def save(self, path: str) -> None:
+        """
+        Writes the workload to an uncompressed .npz file.
+
+        Args:
+            path (str): Destination file.
+        """
+        np.savez(path, names=np.asarray(self.names), codes=self.codes, offsets=self.offsets,
+                 values=self.values, scale=np.int64(self.scale))
+
+    @classmethod
+    def load(cls, path: str) -> 'Workload':
+        """
+        Reads a workload written by save.
+
+        Args:
+            path (str): The .npz file.
+
+        Returns:
+            Workload: The stored workload.
+        """
+        with np.load(path) as stored:
+            return cls(stored["names"].tolist(), stored["codes"], stored["offsets"], stored["values"], int(stored["scale"]))
+
+    @classmethod
+    def concat(cls, workloads: Sequence['Workload']) -> 'Workload':
+        """
+        Joins workloads generated with the same operations and scale.
+
+        Args:
+            workloads (Sequence[Workload]): The parts, in order.
+
+        Returns:
+            Workload: A workload holding every record.
+        """
+        first = workloads[0]
+        starts = np.cumsum([0] + [len(part.values) for part in workloads[:-1]])
+        offsets = np.concatenate([part.offsets[:-1] + start for part, start in zip(workloads, starts)]
+                                 + [np.array([sum(len(part.values) for part in workloads)], dtype=np.int64)])
+        return cls(first.names, np.concatenate([part.codes for part in workloads]), offsets.astype(np.int64),
+                   np.concatenate([part.values for part in workloads]), first.scale)
+
+
+class WorkloadGenerator:
+    """
+    Draws reproducible workloads from a seeded NumPy generator.
+
+    Records are drawn in batches of CHUNK_RECORDS, so a seed yields the same records
+    however the output is consumed.
+
+    Attributes:
+        mix (Dict[str, float]): Relative frequency of each operation.
+        distribution (str): 'uniform', 'integers', 'normal' or 'loguniform'.
+        low (float): Lower end of the operand range.
+        high (float): Upper end of the operand range.
+        scale (int): Decimal places of the operands.
+        zero_divisor_rate (float): Fraction of divisions whose divisor is zero.
+        variadic_size (Tuple[int, int]): Smallest and largest number of operands of a statistics record.
+        seed (Optional[int]): Seed of the generator.
+    """
+
+    # Records drawn per batch
+    CHUNK_RECORDS = 65_536
+
+    def __init__(self, mix: Optional[Mapping[str, float]] = None, distribution: str = "uniform",
+                 low: float = -1000.0, high: float = 1000.0, scale: int = 2, zero_divisor_rate: float = 0.0,
+                 variadic_size: Tuple[int, int] = (2, 10), seed: Optional[int] = None):
+        """
+        Initializes the WorkloadGenerator.
+
+        Args:
+            mix (Optional[Mapping[str, float]]): Relative frequency of each operation. Defaults
+                to the four binary operations in equal parts.
+            distribution (str): How operands are drawn: 'uniform' or 'integers' between low
+                and high, 'normal' centred between them with 99.7% inside, or 'loguniform'
+                spread evenly over the orders of magnitude between them (low must be positive).
+            low (float): Lower end of the operand range.
+            high (float): Upper end of the operand range.
+            scale (int): Decimal places of the operands, at most MAX_SCALE.
+            zero_divisor_rate (float): Fraction of divisions whose divisor is zero.
+            variadic_size (Tuple[int, int]): Smallest and largest number of operands of a
+                statistics record.
+            seed (Optional[int]): Seed of the generator.
+
+        Raises:
+            ValueError: If an argument is out of range or names an unknown operation or distribution.
+        """
+        mix = dict(mix or dict.fromkeys(BINARY_OPERATIONS, 1.0))
+        unknown = set(mix) - set(BINARY_OPERATIONS + VARIADIC_OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unknown operations in mix: {', '.join(sorted(unknown))}")
+        if min(mix.values()) < 0 or sum(mix.values()) <= 0:
+            raise ValueError("mix weights must not be negative and must not all be zero")
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        if not low < high or (distribution == "loguniform" and low <= 0):
+            raise ValueError("low must be below high, and positive for loguniform")
+        if not 0 <= scale <= MAX_SCALE:
+            raise ValueError(f"scale must be between 0 and {MAX_SCALE}")
+        if max(abs(low), abs(high)) * 10 ** scale * 2 >= MAX_MANTISSA:
+            raise ValueError("Operands this large do not fit int64 mantissas at this scale")
+        if not 0 <= zero_divisor_rate <= 1:
+            raise ValueError("zero_divisor_rate must be between 0 and 1")
+        if not 1 <= variadic_size[0] <= variadic_size[1]:
+            raise ValueError("variadic_size must be an increasing pair of positive sizes")
+        self.mix = mix
+        self.distribution = distribution
+        self.low = low
+        self.high = high
+        self.scale = scale
+        self.zero_divisor_rate = zero_divisor_rate
+        self.variadic_size = tuple(variadic_size)
+        self.seed = seed
+        self._names = tuple(mix)
+        self._weights = np.array([mix[name] for name in self._names], dtype=float) / sum(mix.values())
+        self._variadic = np.isin(self._names, VARIADIC_OPERATIONS)
+        self._divide = self._names.index("divide") if "divide" in mix else -1
+
+    def generate(self, count: int) -> Workload:
+        """
+        Generates a workload.
+
+        Args:
+            count (int): Number of records.
+
+        Returns:
+            Workload: The records.
+        """
+        chunks = list(self.chunks(count))
+        return Workload.concat(chunks) if chunks else self._draw(np.random.default_rng(self.seed), 0)
+
+    def chunks(self, count: int) -> Iterator[Workload]:
+        """
+        Generates a workload in batches of at most CHUNK_RECORDS records, for output too
+        large to hold at once.
+
+        Args:
+            count (int): Total number of records.
+
+        Yields:
+            Workload: The next batch.
+        """
+        rng = np.random.default_rng(self.seed)
+        for first in range(0, count, self.CHUNK_RECORDS):
+            yield self._draw(rng, min(self.CHUNK_RECORDS, count - first))
+
+    def _draw(self, rng: np.random.Generator, count: int) -> Workload:
+        """
+        Draws one batch of records.
+        """
+        codes = rng.choice(len(self._names), size=count, p=self._weights).astype(np.int8)
+        sizes = np.full(count, 2, dtype=np.int64)
+        variadic = self._variadic[codes]
+        sizes[variadic] = rng.integers(self.variadic_size[0], self.variadic_size[1] + 1, size=int(variadic.sum()))
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        values = np.rint(self._operands(rng, int(offsets[-1])) * 10 ** self.scale).astype(np.int64)
+        if self._divide >= 0:
+            divisors = offsets[:-1][codes == self._divide] + 1
+            zero = rng.random(len(divisors)) < self.zero_divisor_rate
+            # Only the requested share of divisors may be zero; replace accidental zeros by one
+            accidental = divisors[~zero][values[divisors[~zero]] == 0]
+            values[accidental] = 10 ** self.scale
+            values[divisors[zero]] = 0
+        return Workload(self._names, codes, offsets, values, self.scale)
+
+    def _operands(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        """
+        Draws operands from the configured distribution.
+        """
+        if self.distribution == "integers":
+            return rng.integers(int(np.ceil(self.low)), int(np.floor(self.high)) + 1, size=count).astype(float)
+        if self.distribution == "normal":
+            centre, spread = (self.low + self.high) / 2, (self.high - self.low) / 6
+            return np.clip(rng.normal(centre, spread, size=count), self.low, self.high)
+        if self.distribution == "loguniform":
+            return np.exp(rng.uniform(np.log(self.low), np.log(self.high), size=count))
+        return rng.uniform(self.low, self.high, size=count)
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Parses an operation mix such as 'add=3,divide=1,mean=0.5'.
+
+    Args:
+        text (str): Comma-separated operation=weight pairs; a bare name has weight 1.
+
+    Returns:
+        Dict[str, float]: The weight of each operation.
+
+    Raises:
+        ValueError: If a weight is not a number.
+    """
+    mix = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
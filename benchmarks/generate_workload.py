@@ -0,0 +1,66 @@
+"""
+Generates a reproducible synthetic workload for load tests, benchmarks and batch runs.
+
+Run from the repository root:
+
+    python -m benchmarks.generate_workload OUTPUT [--count N] [--seed S] [--mix add=3,mean=1] ...
+
+OUTPUT ending in .npz receives the compact binary form (load it with Workload.load);
+any other name, or '-' for standard output, receives one JSON object per line in the
+job format of `python main.py --cluster`.
+"""
+
+import argparse
+import sys
+import time
+
+from app.workload import DISTRIBUTIONS, Workload, WorkloadGenerator, parse_mix
+
+
+def parse_size_range(text: str):
+    """
+    Parses 'N' or 'MIN:MAX' into a (min, max) pair.
+    """
+    low, _, high = text.partition(":")
+    return int(low), int(high or low)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output", help="Destination file: .npz for binary, anything else or '-' for JSON lines")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Number of records")
+    parser.add_argument("--seed", type=int, default=0, help="Seed; the same seed gives the same records")
+    parser.add_argument("--mix", type=parse_mix, default=None,
+                        help="Operation weights, e.g. add=3,divide=1,stddev=0.5 (default: four binary operations equally)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform", help="Operand distribution")
+    parser.add_argument("--low", type=float, default=-1000.0, help="Lower end of the operand range")
+    parser.add_argument("--high", type=float, default=1000.0, help="Upper end of the operand range")
+    parser.add_argument("--scale", type=int, default=2, help="Decimal places of the operands")
+    parser.add_argument("--zero-divisor-rate", type=float, default=0.0, help="Fraction of divisions by zero")
+    parser.add_argument("--variadic-size", type=parse_size_range, default=(2, 10),
+                        help="Operands per mean/stddev/mode record, as N or MIN:MAX")
+    args = parser.parse_args()
+
+    try:
+        generator = WorkloadGenerator(args.mix, args.distribution, args.low, args.high, args.scale,
+                                      args.zero_divisor_rate, args.variadic_size, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    if args.output.endswith(".npz"):
+        generator.generate(args.count).save(args.output)
+    elif args.output == "-":
+        for chunk in generator.chunks(args.count):
+            chunk.write_jsonl(sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            for chunk in generator.chunks(args.count):
+                chunk.write_jsonl(handle)
+    seconds = time.perf_counter() - started
+    print(f"Wrote {args.count:,} records in {seconds:.2f} s ({args.count / max(seconds, 1e-9):,.0f} records/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Measures the memory footprint and construction throughput of calculation and command objects.
+
+Run from the repository root:
+
+    python -m benchmarks.object_footprint [--count N]
+
+The script only uses the public constructors, so it can be run against older revisions
+of the code to compare results before and after a change.
+"""
+
+import argparse
+import timeit
+import tracemalloc
+from decimal import Decimal
+
+from app.calculation import Calculation
+from app.command import AddCommand
+from app.operations import add
+from app.plugins.add_command import AddCommand as AddPlugin
+from app.plugins.mean_command import MeanCommand
+
+# Factories building one object each from shared operands, so only the object itself is measured
+A, B = Decimal("1.5"), Decimal("2.5")
+FACTORIES = {
+    "Calculation": lambda: Calculation(A, B, add),
+    "command.AddCommand": lambda: AddCommand(A, B),
+    "plugins.AddCommand": lambda: AddPlugin(A, B),
+    "plugins.MeanCommand": lambda: MeanCommand(A, B, A),
+}
+
+
+def bytes_per_object(factory, count: int) -> float:
+    """
+    Measures the average number of bytes allocated to keep one object alive.
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [factory() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    # Discount the list holding the objects
+    allocated -= objects.__sizeof__()
+    return allocated / count
+
+
+def objects_per_second(factory, count: int) -> float:
+    """
+    Measures how many objects can be constructed per second.
+    """
+    seconds = min(timeit.repeat(factory, number=count, repeat=5))
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100_000, help="Objects built per measurement")
+    args = parser.parse_args()
+
+    print(f"{'object':<22}{'bytes/object':>14}{'objects/s':>14}")
+    for name, factory in FACTORIES.items():
+        size = bytes_per_object(factory, args.count)
+        rate = objects_per_second(factory, args.count)
+        print(f"{name:<22}{size:>14.1f}{rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
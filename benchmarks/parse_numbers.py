@@ -0,0 +1,64 @@
+"""
+Measures how fast numbers are parsed from text, in MB/s, per-token and in bulk.
+
+Run from the repository root:
+
+    python -m benchmarks.parse_numbers [FILE] [--count N] [--seed S] [--repeat R]
+
+FILE holds numbers separated by whitespace or commas, e.g. a vector file used as an
+'@FILE' operand; without it, N random numbers with two decimal places are generated.
+The per-token rows are the list comprehensions the REPL used before app.numeric_tokens.
+"""
+
+import argparse
+import random
+import timeit
+from decimal import Decimal
+
+from app.numeric_tokens import MalformedNumber, parse_decimals, parse_floats
+
+PARSERS = {
+    "per-token Decimal": lambda text: [Decimal(token) for token in text.replace(",", " ").split()],
+    "per-token Decimal->float": lambda text: [float(number) for number in
+                                              [Decimal(token) for token in text.replace(",", " ").split()]],
+    "parse_decimals": parse_decimals,
+    "parse_floats": parse_floats,
+}
+
+
+def generate_text(count: int, seed: int) -> str:
+    """
+    Builds a line of count numbers between -1000 and 1000 with two decimal places.
+    """
+    rng = random.Random(seed)
+    return " ".join(f"{rng.uniform(-1000, 1000):.2f}" for _ in range(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("file", nargs="?", help="File of numbers to parse instead of generated ones")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Numbers generated when no file is given")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated numbers")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per parser; the fastest is reported")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as handle:
+            text = handle.read()
+    else:
+        text = generate_text(args.count, args.seed)
+    megabytes = len(text.encode()) / 1e6
+    try:
+        numbers = len(parse_floats(text))
+    except MalformedNumber as e:
+        parser.error(f"{args.file}: {e}")
+    print(f"Parsing {numbers:,} numbers ({megabytes:.1f} MB)")
+
+    print(f"{'parser':<26}{'MB/s':>10}{'numbers/s':>16}")
+    for name, parse in PARSERS.items():
+        seconds = min(timeit.repeat(lambda: parse(text), number=1, repeat=args.repeat))
+        print(f"{name:<26}{megabytes / seconds:>10.1f}{numbers / seconds:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Replays the calculations recorded in application logs and reports throughput and latency.
+
+Run from the repository root:
+
+    python -m benchmarks.replay_logs [LOG ...] [--speed X | --as-fast-as-possible] [--limit N]
+
+Each LOG is a current log file (default logs/app.log); its rotated predecessors
+(LOG.1, LOG.2, ...) are replayed first. Calculations run in this process through the
+command registry, as they do in the REPL and the daemon.
+"""
+
+import argparse
+import logging
+
+from app.log_replay import calculator_runner, load_events, replay
+from main import load_plugins
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("logs", nargs="*", default=["logs/app.log"], help="Current log files to replay")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--speed", type=float, default=1.0, help="Speed-up over the original pace (default 1)")
+    pace.add_argument("--as-fast-as-possible", action="store_true", help="Run the calculations back to back")
+    parser.add_argument("--limit", type=int, default=None, help="Replay at most this many calculations")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    # Keep the calculator's own logging out of the measurements
+    logging.disable(logging.CRITICAL)
+    load_plugins()
+    events = load_events(args.logs)[:args.limit]
+    if not events:
+        print(f"No calculations found in {', '.join(args.logs)}.")
+        return
+    span = events[-1].timestamp - events[0].timestamp
+    speed = None if args.as_fast_as_possible else args.speed
+    print(f"Replaying {len(events)} calculations logged over {span:.1f} s"
+          + (" back to back." if speed is None else f" at {speed:g}x."))
+    print(replay(events, calculator_runner(), speed).summary())
+
+
+if __name__ == "__main__":
+    main()
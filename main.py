@@ -1,17 +1,55 @@
 import sys
 import os
+import io
+import contextlib
+import signal
+import time
 import importlib
-import multiprocessing
+import re
 from decimal import Decimal, InvalidOperation
 from dotenv import load_dotenv
 from app.command_registry import command_registry  
-from app.pandas_facade import PandasFacade 
+from app.daemon import CalculatorDaemon, forward_to_daemon
+from app.dispatcher import INLINE, AdaptiveDispatcher
+from app.numeric_tokens import MalformedNumber, parse_decimals, parse_floats
+from app.scheduler import JobScheduler
+from app.tracing import tracer
 
 import logging
 import logging.config
 
-# Initialize PandasFacade instance to manage calculation history
-history_manager = PandasFacade()
+class LazyHistoryManager:
+    """
+    Stands in for the PandasFacade holding the calculation history and creates it on
+    first use, so a calculation forwarded to the daemon never has to import pandas.
+    """
+
+    def __init__(self):
+        self._facade = None
+
+    def __getattr__(self, name):
+        if self._facade is None:
+            from app.pandas_facade import PandasFacade
+            self._facade = PandasFacade()
+        return getattr(self._facade, name)
+
+# PandasFacade instance to manage calculation history, created on first use
+history_manager = LazyHistoryManager()
+
+# Runs each calculation inline, on a thread or in a process according to its measured cost
+dispatcher = AdaptiveDispatcher()
+
+# Runs interactive calculations ahead of any queued background work
+scheduler = JobScheduler(dispatcher)
+
+# An operand or command word of REPL input: a bracketed vector or a run of non-spaces
+INPUT_TOKEN = re.compile(r"\[[^\]]*\]|\S+")
+
+# Saves and loads started from the REPL that have not been reported as finished yet
+background_jobs = []
+
+# Periodic memory sampler started by 'memory watch' or MEMORY_SNAPSHOT_INTERVAL
+memory_monitor = None
 
 def load_environment_variables():
     load_dotenv()
@@ -46,59 +84,86 @@ def load_plugins():
             importlib.import_module(module_name)  
     logging.info("All plugins loaded successfully.")
 
+def parse_operand(text):
+    """
+    Converts an operand typed by the user to a Decimal, or to a NumPy array for a
+    vector written as '[1, 2, 3]' or '@file'.
+    """
+    if text.startswith(("[", "@")):
+        from app.vector_operands import parse_operand as parse_vector_operand
+        return parse_vector_operand(text)
+    return Decimal(text)
+
+def format_result(result, abbreviate=True):
+    """
+    Formats a vector result as '[2, 4, 6]', abbreviating long ones for display unless
+    abbreviate is False; other results are returned unchanged.
+    """
+    if getattr(result, "ndim", 0):
+        from app.vector_operands import format_vector
+        return format_vector(result) if abbreviate else format_vector(result, threshold=result.size)
+    return result
+
 def perform_calculation_and_display(value1, value2, operation_type):
     """
-    Executes the specified arithmetic operation on two inputs using multiprocessing
-    and displays the outcome.
+    Executes the specified arithmetic operation on two inputs through the adaptive
+    dispatcher and displays the outcome.
     """
-    try:
-        logging.info(f"Performing calculation: {operation_type} with values {value1} and {value2}")
+    with tracer.trace("calculation", operation=operation_type):
+        try:
+            logging.info(f"Performing calculation: {operation_type} with values {value1} and {value2}")
         
-        # Convert inputs to Decimal
-        decimal_value1 = Decimal(value1)
-        decimal_value2 = Decimal(value2)
-        logging.debug(f"Converted values to Decimal: {decimal_value1}, {decimal_value2}")
-
-        # Get the command class from the registry
-        command_class = command_registry.get(operation_type)
-        if not command_class:
-            logging.error(f"Invalid operation type: {operation_type}")
-            print(f"Invalid operation type: {operation_type}")
-            return
+            # Convert inputs to Decimal
+            with tracer.span("parse.decimal"):
+                decimal_value1 = parse_operand(value1)
+                decimal_value2 = parse_operand(value2)
+            logging.debug(f"Converted values to Decimal: {decimal_value1}, {decimal_value2}")
 
-        # Create an instance of the command with the provided arguments
-        command_instance = command_class(decimal_value1, decimal_value2)
-        logging.debug(f"Command instance created: {command_instance}")
-
-        # Set up multiprocessing to execute the command
-        result_queue = multiprocessing.Queue()
-        logging.info("Starting process to execute the command.")
-        process = multiprocessing.Process(target=command_instance.execute_in_process, args=(result_queue,))
-        process.start()
-        process.join()
-
-        # Get the result from the process
-        result = result_queue.get()
-        logging.info(f"Process completed. Result: {result}")
-
-        # Display the result or handle any errors
-        if isinstance(result, Exception):
-            logging.error(f"An error occurred during the operation: {result}")
-            print(f"An error occurred: {result}")
-        else:
-            logging.info(f"Calculation result: {value1} {operation_type} {value2} = {result}")
-            print(f"The result of {value1} {operation_type} {value2} is {result}")
+            # Get the command class from the registry
+            with tracer.span("registry.lookup"):
+                command_class = command_registry.get(operation_type)
+            if not command_class:
+                logging.error(f"Invalid operation type: {operation_type}")
+                print(f"Invalid operation type: {operation_type}")
+                return
+
+            # Create an instance of the command with the provided arguments
+            command_instance = command_class(decimal_value1, decimal_value2)
+            logging.debug(f"Command instance created: {command_instance}")
+
+            # Execute inline, on a thread or in a separate process depending on the measured cost
+            started = time.perf_counter()
+            logging.info("Executing the command.")
+            result = scheduler.run(command_instance)
+            logging.info(f"Execution completed ({dispatcher.last_mode}). Result: {result}")
+
+            # Display the result or handle any errors
+            if isinstance(result, Exception):
+                logging.error(f"An error occurred during the operation: {result}")
+                print(f"An error occurred: {result}")
+            else:
+                shown = format_result(result)
+                logging.info(f"Calculation result: {value1} {operation_type} {value2} = {shown}")
+                print(f"The result of {value1} {operation_type} {value2} is {shown}")
             
-            # Save the calculation to the history using PandasFacade
-            record = {"operation": operation_type, "num1": str(value1), "num2": str(value2), "result": str(result)}
-            history_manager.add_record(record)
+                # Save the calculation to the history using PandasFacade; a vector result takes one
+                # row and keeps every element, even when the printed line is abbreviated
+                record = {"operation": operation_type, "num1": str(value1), "num2": str(value2),
+                          "result": str(format_result(result, abbreviate=False)),
+                          "duration": time.perf_counter() - started}
+                with tracer.span("history.add_record"):
+                    history_manager.add_record(record)
 
-    except InvalidOperation:
-        logging.error(f"Invalid input: {value1} or {value2} is not a valid number.")
-        print(f"Invalid input: {value1} or {value2} is not a valid number.")
-    except Exception as e:
-        logging.error(f"An unexpected error occurred: {e}")
-        print(f"An unexpected error occurred: {e}")
+        except MalformedNumber as e:
+            # An element of a vector operand, reported at its column within the operand
+            logging.error(f"Invalid input: {e}")
+            print(f"Invalid input: {e}.")
+        except InvalidOperation:
+            logging.error(f"Invalid input: {value1} or {value2} is not a valid number.")
+            print(f"Invalid input: {value1} or {value2} is not a valid number.")
+        except Exception as e:
+            logging.error(f"An unexpected error occurred: {e}")
+            print(f"An unexpected error occurred: {e}")
 
 def display_menu():
     """
@@ -106,7 +171,19 @@ def display_menu():
     """
     logging.info("Displaying available commands.")
     print("Available commands:", ", ".join(command_registry.keys()))
-    print("Additional options: save history, load history, clear history, view history")
+    print("Additional options: save history, load history, merge history, clear history, view history, history stats,")
+    print("                    progress, profile [-n N] [-o FILE] <command ...>,")
+    print("                    memory [trace|watch SECONDS|growth|stop]")
+
+def report_finished_jobs():
+    """
+    Prints the outcome of background saves and loads that finished since the last prompt.
+    """
+    for job in [job for job in background_jobs if job.finished]:
+        background_jobs.remove(job)
+        if job.error is None:
+            logging.info(f"{job.description} finished.")
+        print(job.status())
 
 import statistics
 from decimal import Decimal, InvalidOperation
@@ -120,6 +197,7 @@ def repl():
     display_menu()  # Display menu at the start
 
     while True:
+        report_finished_jobs()
         user_input = input("Enter command (e.g., 'mean 1 2 3 4 5' or 'save history'): ").strip()
         logging.info(f"User input received: {user_input}")
 
@@ -132,15 +210,33 @@ def repl():
             continue
         elif user_input.lower() == 'save_history':
             filepath = input("Enter file path to save history (e.g., 'history.csv'): ")
-            history_manager.save_to_csv(filepath)
-            logging.info(f"History saved to {filepath}.")
-            print("History saved successfully.")
+            from app.history_persistence import save_in_background
+            background_jobs.append(save_in_background(history_manager, filepath))
+            logging.info(f"Saving history to {filepath} in the background.")
+            print("Saving history in the background. Type 'progress' to follow it.")
+            continue
+        elif user_input.lower() in ('load_history', 'merge_history'):
+            merge = user_input.lower() == 'merge_history'
+            filepath = input(f"Enter file path to {'merge' if merge else 'load'} history from (e.g., 'history.csv'): ")
+            from app.history_persistence import load_in_background
+            background_jobs.append(load_in_background(history_manager, filepath, merge=merge))
+            logging.info(f"{'Merging' if merge else 'Loading'} history from {filepath} in the background.")
+            print(f"{'Merging' if merge else 'Loading'} history in the background. Type 'progress' to follow it.")
             continue
-        elif user_input.lower() == 'load_history':
-            filepath = input("Enter file path to load history (e.g., 'history.csv'): ")
-            history_manager.load_from_csv(filepath)
-            logging.info(f"History loaded from {filepath}.")
-            print("History loaded successfully.")
+        elif user_input.lower() in ('history stats', 'history_stats'):
+            logging.info("Displaying history statistics.")
+            statistics_table = history_manager.operation_stats()
+            if statistics_table.empty:
+                print("No calculations in history.")
+            else:
+                print("History Statistics:")
+                print(statistics_table.to_string())
+            continue
+        elif user_input.lower() == 'progress':
+            for job in background_jobs:
+                print(job.status())
+            if not background_jobs:
+                print("No saves or loads are running.")
             continue
         elif user_input.lower() == 'clear_history':
             history_manager.clear_data()
@@ -150,101 +246,376 @@ def repl():
         elif user_input.lower() == 'view_history':
             logging.info("Displaying calculation history.")
             print("Calculation History:")
-            print(history_manager.dataframe)
+            print(history_manager.get_all_records())
             continue
-        
-        # Handle command input, splitting by spaces
-        parts = user_input.split()
-        if len(parts) < 3:
-            logging.warning(f"Invalid input format: {user_input}. Expected format: <operation> <num1> <num2>")
-            print("Invalid input format. Use: <operation> <num1> <num2>")
+        elif user_input.lower().split()[:1] == ['memory']:
+            memory_command(user_input.lower().split()[1:])
             continue
-        
-        operation = parts[0]
-        # For 'mean', 'stddev', and 'mode', we want to accept any number of arguments
-        if operation.lower() == 'mean':
-            try:
-                numbers = [Decimal(num) for num in parts[1:]]
-                mean_value = sum(numbers) / len(numbers)
-                logging.info(f"Mean of {numbers} is {mean_value}")
-                print(f"The mean of {', '.join(parts[1:])} is {mean_value}")
-                
-                # Save to history
-                record = {"operation": "mean", "numbers": ', '.join(parts[1:]), "result": str(mean_value)}
-                history_manager.add_record(record)
-            except InvalidOperation as e:
-                logging.error(f"Invalid number in input: {e}")
-                print("Invalid number in input.")
+        elif user_input.lower().split()[:1] == ['profile']:
+            profile_command(user_input.split()[1:])
             continue
-        
-        # Handle standard deviation
-        elif operation.lower() == 'stddev':
-            try:
-                numbers = [Decimal(num) for num in parts[1:]]
-                # Calculate standard deviation using statistics library
-                numbers_float = [float(num) for num in numbers]  # Convert Decimal to float for statistics module
-                stddev_value = statistics.stdev(numbers_float)
-                logging.info(f"Standard deviation of {numbers} is {stddev_value}")
-                print(f"The standard deviation of {', '.join(parts[1:])} is {stddev_value}")
-                
-                # Save to history
-                record = {"operation": "stddev", "numbers": ', '.join(parts[1:]), "result": str(stddev_value)}
+
+        execute_calculation(user_input)
+
+def execute_calculation(user_input):
+    """
+    Runs a calculation typed at the REPL, e.g. 'add 5 3' or 'mean 1 2 3', and displays the outcome.
+    """
+    with tracer.trace("repl.input"):
+        _execute_calculation(user_input)
+
+def _execute_calculation(user_input):
+    # Handle command input, splitting by spaces
+    with tracer.span("repl.parse"):
+        # A bracketed vector such as '[1, 2, 3]' is one operand even if it contains spaces
+        parts = INPUT_TOKEN.findall(user_input)
+    if len(parts) < 3:
+        logging.warning(f"Invalid input format: {user_input}. Expected format: <operation> <num1> <num2>")
+        print("Invalid input format. Use: <operation> <num1> <num2>")
+        return
+    
+    operation = parts[0]
+    # Where the numbers start, so a malformed one is reported at its column in the input
+    numbers_start = user_input.find(operation) + len(operation)
+    # For 'mean', 'stddev', and 'mode', we want to accept any number of arguments
+    if operation.lower() == 'mean':
+        try:
+            numbers = parse_decimals(user_input, numbers_start)
+            mean_value = sum(numbers) / len(numbers)
+            logging.info(f"Mean of {numbers} is {mean_value}")
+            print(f"The mean of {', '.join(parts[1:])} is {mean_value}")
+            
+            # Save to history
+            record = {"operation": "mean", "numbers": ', '.join(parts[1:]), "result": str(mean_value)}
+            with tracer.span("history.add_record"):
                 history_manager.add_record(record)
-            except InvalidOperation as e:
-                logging.error(f"Invalid number in input: {e}")
-                print("Invalid number in input.")
-            except statistics.StatisticsError as e:
-                logging.error(f"Error in calculating standard deviation: {e}")
-                print("Standard deviation requires at least two numbers.")
-            continue
-        
-        # Handle mode
-        elif operation.lower() == 'mode':
-            try:
-                numbers = [Decimal(num) for num in parts[1:]]
-                # Calculate mode using statistics library
-                numbers_float = [float(num) for num in numbers]  # Convert Decimal to float for statistics module
-                mode_value = statistics.mode(numbers_float)
-                logging.info(f"Mode of {numbers} is {mode_value}")
-                print(f"The mode of {', '.join(parts[1:])} is {mode_value}")
-                
-                # Save to history
-                record = {"operation": "mode", "numbers": ', '.join(parts[1:]), "result": str(mode_value)}
+        except InvalidOperation as e:
+            logging.error(f"Invalid number in input: {e}")
+            print(f"Invalid input: {e}.")
+        return
+    
+    # Handle standard deviation
+    elif operation.lower() == 'stddev':
+        try:
+            # Parse straight to floats for the statistics module, without Decimals in between
+            numbers_float = parse_floats(user_input, numbers_start).tolist()
+            # Calculate standard deviation using statistics library
+            stddev_value = statistics.stdev(numbers_float)
+            logging.info(f"Standard deviation of {numbers_float} is {stddev_value}")
+            print(f"The standard deviation of {', '.join(parts[1:])} is {stddev_value}")
+            
+            # Save to history
+            record = {"operation": "stddev", "numbers": ', '.join(parts[1:]), "result": str(stddev_value)}
+            with tracer.span("history.add_record"):
                 history_manager.add_record(record)
-            except InvalidOperation as e:
-                logging.error(f"Invalid number in input: {e}")
-                print("Invalid number in input.")
-            except statistics.StatisticsError as e:
-                logging.error(f"Error in calculating mode: {e}")
-                print("Mode calculation failed. Ensure there is a mode in the set.")
-            continue
-        
-        # Otherwise handle two-number operations like add, subtract, etc.
-        num1, num2 = parts[1], parts[2]
-        logging.info(f"Processing command: {operation} {num1} {num2}")
-        perform_calculation_and_display(num1, num2, operation)
+        except InvalidOperation as e:
+            logging.error(f"Invalid number in input: {e}")
+            print(f"Invalid input: {e}.")
+        except statistics.StatisticsError as e:
+            logging.error(f"Error in calculating standard deviation: {e}")
+            print("Standard deviation requires at least two numbers.")
+        return
+    
+    # Handle mode
+    elif operation.lower() == 'mode':
+        try:
+            # Parse straight to floats for the statistics module, without Decimals in between
+            numbers_float = parse_floats(user_input, numbers_start).tolist()
+            # Calculate mode using statistics library
+            mode_value = statistics.mode(numbers_float)
+            logging.info(f"Mode of {numbers_float} is {mode_value}")
+            print(f"The mode of {', '.join(parts[1:])} is {mode_value}")
+            
+            # Save to history
+            record = {"operation": "mode", "numbers": ', '.join(parts[1:]), "result": str(mode_value)}
+            with tracer.span("history.add_record"):
+                history_manager.add_record(record)
+        except InvalidOperation as e:
+            logging.error(f"Invalid number in input: {e}")
+            print(f"Invalid input: {e}.")
+        except statistics.StatisticsError as e:
+            logging.error(f"Error in calculating mode: {e}")
+            print("Mode calculation failed. Ensure there is a mode in the set.")
+        return
+    
+    # Otherwise handle two-number operations like add, subtract, etc.
+    num1, num2 = parts[1], parts[2]
+    logging.info(f"Processing command: {operation} {num1} {num2}")
+    perform_calculation_and_display(num1, num2, operation)
+
+def start_memory_monitor(interval):
+    """
+    Starts sampling memory every interval seconds, replacing a running sampler.
+    """
+    global memory_monitor
+    from app.memory_report import MemoryMonitor
+    if memory_monitor is not None:
+        memory_monitor.stop()
+    memory_monitor = MemoryMonitor(history_manager, dispatcher, interval=interval)
+    memory_monitor.start()
+    logging.info(f"Memory snapshots every {interval} seconds.")
+
+def memory_command(words):
+    """
+    Reports memory per subsystem ('memory'), starts allocation tracing ('memory trace'),
+    takes periodic snapshots ('memory watch SECONDS'), shows what grew between the oldest
+    and newest snapshots ('memory growth') or stops tracing and snapshots ('memory stop').
+    """
+    global memory_monitor
+    import tracemalloc
+    from app.memory_report import TRACE_FRAMES, collect_memory_report, format_bytes
+    action = words[0] if words else "report"
+    if action == "report":
+        logging.info("Displaying memory usage.")
+        print(collect_memory_report(history_manager, dispatcher).summary())
+    elif action == "trace":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        logging.info("Allocation tracing started.")
+        print("Tracing allocations made from now on; 'memory' reports them.")
+    elif action == "watch":
+        try:
+            interval = float(words[1]) if len(words) > 1 else 60.0
+            start_memory_monitor(interval)
+        except ValueError as e:
+            print(f"Invalid interval: {e}")
+            return
+        print(f"Taking a memory snapshot every {interval:g} seconds; 'memory growth' compares them.")
+    elif action == "growth":
+        if memory_monitor is None:
+            print("No snapshots are being taken. Use: memory watch SECONDS")
+            return
+        memory_monitor.sample()
+        samples = list(memory_monitor.samples)
+        first, last = samples[0].report, samples[-1].report
+        print(f"Traced memory went from {format_bytes(first.traced[0])} to {format_bytes(last.traced[0])} "
+              f"over {last.taken_at - first.taken_at:.0f} s and {len(samples)} snapshots.")
+        for difference in memory_monitor.growth():
+            frame = difference.traceback[-1]
+            print(f"  {format_bytes(difference.size_diff):>10} in {difference.count_diff:>+7,} blocks  "
+                  f"{frame.filename}:{frame.lineno}")
+    elif action == "stop":
+        if memory_monitor is not None:
+            memory_monitor.stop()
+            memory_monitor = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        logging.info("Memory tracing stopped.")
+        print("Memory tracing stopped.")
+    else:
+        print("Use: memory [trace|watch SECONDS|growth|stop]")
+
+def profile_command(words, command_line=False):
+    """
+    Runs a calculation under cProfile, as 'profile [-n N] [-o FILE] [--top K] <command ...>'
+    in the REPL or 'main.py --profile [options] <num1> <num2> <operation>' on the command
+    line, and prints the hottest functions.
+    """
+    from app.profiling import parse_profile_arguments, profile_calls
+    try:
+        options = parse_profile_arguments(words)
+    except ValueError as e:
+        print(e)
+        return
+    if command_line:
+        # The command line puts the operation last
+        *numbers, operation = options.command
+        options.command = [operation, *numbers]
+    calculation = " ".join(options.command)
+    logging.info(f"Profiling {calculation} {options.repeat} time(s).")
+
+    # Run the command on this thread so the profile covers its execution, not just the wait for it
+    command_class = command_registry.get(options.command[0])
+    previous_mode = dispatcher.overrides.get(command_class)
+    if command_class is not None:
+        dispatcher.override(command_class, INLINE)
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            report = profile_calls(lambda: execute_calculation(calculation), options.repeat)
+    finally:
+        if command_class is not None:
+            dispatcher.override(command_class, previous_mode)
+
+    # Every run prints the same outcome; show it once
+    print(output.getvalue().splitlines()[-1] if output.getvalue() else "")
+    print(report.hot_functions(options.top, options.sort))
+    if options.output:
+        report.dump(options.output)
+        logging.info(f"Profile statistics written to {options.output}.")
+        print(f"Statistics written to {options.output}; inspect them with: python -m pstats {options.output}")
+
+def run_daemon_request(args):
+    """
+    Runs one calculation received by the daemon and returns what it printed.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        if len(args) == 3 and any(str(value).startswith("@") for value in args[:2]):
+            # The daemon may run as another user, so it never opens files named by a client
+            print("The daemon does not read '@file' operands; run the calculation without a daemon.")
+        elif len(args) == 3:
+            value1, value2, operation_type = args
+            logging.info(f"Daemon request received: {value1}, {value2}, {operation_type}")
+            perform_calculation_and_display(value1, value2, operation_type)
+        else:
+            print("Invalid input format. Use: <num1> <num2> <operation>")
+    return output.getvalue()
+
+def run_daemon():
+    """
+    Serves calculations over a Unix domain socket until interrupted, keeping the
+    plugins and the calculation history loaded between requests.
+    """
+    daemon = CalculatorDaemon(run_daemon_request)
+
+    # Stop cleanly on SIGTERM as well as on Ctrl+C
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, interrupt)
+
+    logging.info(f"Daemon listening on {daemon.socket_path}")
+    print(f"Calculator daemon listening on {daemon.socket_path}. Press Ctrl+C to stop.")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Daemon interrupted.")
+    finally:
+        daemon.server_close()
+
+def run_cluster_worker(address_text):
+    """
+    Serves shards of calculations to cluster coordinators until interrupted.
+    """
+    from app.cluster import ClusterWorker, parse_address
+    worker = ClusterWorker(parse_address(address_text, default_host="0.0.0.0"), dispatcher)
+    logging.info(f"Cluster worker listening on {worker.address[0]}:{worker.address[1]}")
+    print(f"Cluster worker listening on {worker.address[0]}:{worker.address[1]}. Press Ctrl+C to stop.")
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Cluster worker interrupted.")
+    finally:
+        worker.server_close()
+
+def run_cluster_batch(jobs_path, workers_text):
+    """
+    Runs the jobs of a JSON lines file on the workers listed in workers_text, prints each
+    outcome and adds the successful calculations to the history.
+    """
+    import json
+    from app.cluster import ClusterCoordinator, parse_address
+    if not workers_text:
+        print("Set CLUSTER_WORKERS to a comma-separated list of worker addresses (host:port).")
+        return
+    with open(jobs_path, encoding="utf-8") as handle:
+        jobs = [(job["operation"], job["operands"]) for job in map(json.loads, handle) if job]
+    coordinator = ClusterCoordinator([parse_address(address) for address in workers_text.split(",")])
+    outcomes = coordinator.run(jobs, history=history_manager)
+    for (operation, operands), outcome in zip(jobs, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"{operation} {' '.join(map(str, operands))} failed: {outcome}")
+        else:
+            print(f"{operation} {' '.join(map(str, operands))} = {outcome}")
+    logging.info(f"Cluster batch of {len(jobs)} jobs done: {coordinator.stolen} shards stolen, "
+                 f"{coordinator.retried} retried, lost workers {coordinator.lost_workers}")
+    print(f"Ran {len(jobs)} jobs on {len(coordinator.workers) - len(coordinator.lost_workers)} of "
+          f"{len(coordinator.workers)} workers.")
 
 def main():
     """
-    Main function to either process command-line arguments or start the REPL loop.
+    Main function to either process command-line arguments, run the daemon or start the REPL loop.
     """
+    # A one-shot calculation is forwarded to a running daemon when there is one,
+    # skipping logging setup, plugin loading and worker process startup.
+    # '@file' operands are read here, with the caller's own file access, never by the daemon
+    if len(sys.argv) == 4 and not any(value.startswith("@") for value in sys.argv[1:3]):
+        load_dotenv()
+        output = forward_to_daemon(sys.argv[1:])
+        if output is not None:
+            print(output, end="")
+            return
+
+    configure_logging()
+    settings = load_environment_variables()
+
+    logging.info(f"Environment: {settings.get('ENVIRONMENT')}")
+    logging.info("Application started.")
+
     # Load plugins dynamically at startup
     load_plugins()
 
+    # Bound the history according to the HISTORY_* environment variables
+    from app.retention_policy import RetentionPolicy
+    history_manager.set_policy(RetentionPolicy.from_environment())
+
+    # Share the history with other processes through a SQLite database when one is configured
+    if settings.get("HISTORY_DATABASE"):
+        from app.sqlite_history import SQLiteHistoryBackend
+        history_manager.set_backend(SQLiteHistoryBackend(settings["HISTORY_DATABASE"]))
+
+    # Give every calculation a deadline, after which its worker is replaced
+    dispatcher.timeout = float(settings.get("COMMAND_TIMEOUT") or 30)
+
+    # Trace a fraction of the calculations, written out as a Chrome trace on exit
+    tracer.sample_rate = float(settings.get("TRACE_SAMPLE_RATE") or 0)
+
+    # Sample memory periodically to reveal leaks in long-running sessions when configured
+    if settings.get("MEMORY_SNAPSHOT_INTERVAL"):
+        start_memory_monitor(float(settings["MEMORY_SNAPSHOT_INTERVAL"]))
+
+    # Keep a CSV copy of the history up to date in the background when configured
+    autosaver = None
+    if settings.get("HISTORY_AUTOSAVE_PATH"):
+        from app.history_persistence import HistoryAutosaver
+        autosaver = HistoryAutosaver(
+            history_manager,
+            settings["HISTORY_AUTOSAVE_PATH"],
+            interval=float(settings.get("HISTORY_AUTOSAVE_INTERVAL") or 30),
+            row_threshold=int(settings.get("HISTORY_AUTOSAVE_ROWS") or 1000),
+        )
+        autosaver.start()
+
+    try:
+        run()
+    finally:
+        scheduler.shutdown()
+        dispatcher.shutdown()
+        # Store records still buffered by add_record before the process exits
+        history_manager.flush()
+        if autosaver is not None:
+            autosaver.stop()
+        if memory_monitor is not None:
+            memory_monitor.stop()
+        if tracer.events:
+            trace_file = settings.get("TRACE_FILE") or "logs/trace.json"
+            logging.info(f"Wrote {tracer.export(trace_file)} trace spans to {trace_file}.")
+
+def run():
+    """
+    Runs the calculation, daemon or REPL selected by the command-line arguments.
+    """
     # If command-line arguments are provided, execute once and exit
     if len(sys.argv) == 4:
         _, value1, value2, operation_type = sys.argv
         logging.info(f"Command-line input detected: {value1}, {value2}, {operation_type}")
         perform_calculation_and_display(value1, value2, operation_type)
+    elif len(sys.argv) == 2 and sys.argv[1] == "--daemon":
+        logging.info("Starting daemon.")
+        run_daemon()
+    elif len(sys.argv) == 3 and sys.argv[1] == "--worker":
+        logging.info("Starting cluster worker.")
+        run_cluster_worker(sys.argv[2])
+    elif len(sys.argv) == 3 and sys.argv[1] == "--cluster":
+        logging.info(f"Running cluster batch {sys.argv[2]}.")
+        run_cluster_batch(sys.argv[2], os.getenv("CLUSTER_WORKERS"))
+    elif len(sys.argv) >= 2 and sys.argv[1] == "--profile":
+        logging.info(f"Command-line profile requested: {' '.join(sys.argv[2:])}")
+        profile_command(sys.argv[2:], command_line=True)
     else:
         # Start the REPL if no command-line arguments are provided
         logging.info("Starting REPL loop.")
         repl()
 
 if __name__ == '__main__':
-    configure_logging()
-    settings = load_environment_variables()
-
-    logging.info(f"Environment: {settings.get('ENVIRONMENT')}")
-    logging.info("Application started.")
     main()
@@ -1,16 +1,16 @@
 '''
 This module configures test settings and generates data for arithmetic operation testing
-using the pytest framework. It leverages the Faker library to produce random data for
-operations like addition, subtraction, multiplication, and division. The generated
-data is used to create dynamic tests that validate the functionality of arithmetic operations.
+using the pytest framework. It draws reproducible random operands with the NumPy workload
+generator for operations like addition, subtraction, multiplication, and division. The
+generated data is used to create dynamic tests that validate the functionality of arithmetic operations.
 '''
 
 from decimal import Decimal
-from faker import Faker
 from app.operations import add, subtract, multiply, divide
+from app.workload import WorkloadGenerator
 
-# Instantiate a Faker object for generating random data
-fake = Faker()
+# Seed of the generated test data, so failures can be reproduced
+TEST_DATA_SEED = 2024
 
 def generate_test_data(record_count):
     """
@@ -24,27 +24,15 @@ def generate_test_data(record_count):
         'divide': divide
     }
 
-    # Generate the specified number of test cases
-    for idx in range(record_count):
-        num1 = Decimal(fake.random_number(digits=2))
-        num2 = Decimal(fake.random_number(digits=2)) if idx % 4 != 3 else Decimal(fake.random_number(digits=1))
-        op_name = fake.random_element(elements=list(operations.keys()))
+    # Two-digit integer operands; divisors are never zero
+    generator = WorkloadGenerator(mix=dict.fromkeys(operations, 1.0), distribution="integers", low=0, high=99,
+                                  scale=0, seed=TEST_DATA_SEED)
+    for op_name, (num1, num2) in generator.generate(record_count).jobs():
+        num1, num2 = Decimal(num1), Decimal(num2)
         op_func = operations[op_name]
 
-        # Adjust for division by zero in test data
-        if op_func == divide:
-            num2 = Decimal('1') if num2 == Decimal('0') else num2
-
-        try:
-            if op_func == divide and num2 == Decimal('0'):
-                result = "ZeroDivisionError"
-            else:
-                result = op_func(num1, num2)
-        except ZeroDivisionError:
-            result = "ZeroDivisionError"
-
         # Yield each set of test data
-        yield num1, num2, op_name, op_func, result
+        yield num1, num2, op_name, op_func, op_func(num1, num2)
 
 def pytest_addoption(parser):
     """
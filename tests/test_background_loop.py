@@ -0,0 +1,29 @@
+from app.background_loop import BackgroundLoop
+
+
+class Counter(BackgroundLoop):
+    def __init__(self):
+        super().__init__("counter")
+        self.ticks = 0
+
+    def _run(self):
+        while not self._stopping.wait(0.01):
+            self.ticks += 1
+
+
+def test_loop_runs_until_stopped_and_restarts():
+    loop = Counter()
+    assert not loop.running
+    loop.start()
+    assert loop.running and loop._thread.name == "counter"
+    loop.stop()
+    assert not loop.running
+    ticks = loop.ticks
+    loop.start()
+    loop._stopping.wait(0.05)
+    loop.stop()
+    assert loop.ticks >= ticks
+    # Stopping again, or before starting, does nothing
+    loop.stop()
+    Counter().stop()
+
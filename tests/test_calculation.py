@@ -51,3 +51,29 @@ def test_strrepr():
     str_match = "Calculation(3, 3, add, 6)"
     assert calc.__strrepr__() == str_match, f"Expected '{str_match}' but got '{calc.__strrepr__()}'"
 
+
+
+def test_result_is_lazy_and_memoized():
+    """
+    Test that the result is computed on first access only, and that instances have no __dict__.
+    """
+    calls = []
+
+    def counting_add(a, b):
+        calls.append((a, b))
+        return a + b
+
+    calc = Calculation(Decimal('2'), Decimal('3'), counting_add)
+    assert calls == []
+    assert calc.result == Decimal('5')
+    assert calc.result == Decimal('5')
+    assert len(calls) == 1
+    assert not hasattr(calc, '__dict__')
+
+
+def test_known_result_is_not_recomputed():
+    """
+    Test that a result passed to the constructor is used as-is.
+    """
+    calc = Calculation(Decimal('1'), Decimal('0'), divide, result=Decimal('0'))
+    assert calc.result == Decimal('0')
@@ -91,6 +91,26 @@ def test_get_latest_after_clear():
     assert latest is None, "History is empty, but get_latest returned a value."
 
 
+def test_get_latest(sample_calculations):
+    """
+    Test retrieving the most recent calculation with its stored result.
+    """
+    latest = Calculations.get_latest()
+    assert latest.operation is divide
+    assert (latest.num1, latest.num2, latest.result) == (Decimal('8'), Decimal('2'), Decimal('4'))
+
+
+def test_get_latest_keeps_operations_without_a_function():
+    """
+    Test that operations missing from app.operations, such as mean, come back by name.
+    """
+    Calculations.clear_calculations()
+    Calculations.history.add_record({"operation": "mean", "numbers": "1, 2", "result": "1.5"})
+    latest = Calculations.get_latest()
+    assert latest.operation == "mean"
+    assert latest.result == Decimal("1.5")
+
+
 # Running the tests using pytest
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from decimal import Decimal
+from app import Calculator
+from app.calculations import Calculations
+from app.operations import add, subtract, multiply, divide
+
+
+@pytest.fixture(autouse=True)
+def empty_history():
+    Calculations.clear_calculations()
+    yield
+    Calculations.clear_calculations()
+
+
+def test_perform_records_calculation():
+    assert Calculator.multiply(Decimal("6"), Decimal("7")) == Decimal("42")
+    history = Calculations.get_all_calculations()
+    assert list(history["operation"]) == ["multiply"]
+    assert history["result"].iloc[0] == Decimal("42")
+
+
+def test_perform_many_with_decimal_pairs():
+    pairs = [(Decimal("1"), Decimal("2")), (Decimal("2.5"), Decimal("0.5"))]
+    assert Calculator.perform_many(pairs, add) == [Decimal("3"), Decimal("3.0")]
+    history = Calculations.get_all_calculations()
+    assert len(history) == 2
+    assert list(history["num1"]) == [Decimal("1"), Decimal("2.5")]
+
+
+def test_perform_many_computes_each_result_once():
+    calls = []
+
+    def counting_add(a, b):
+        calls.append((a, b))
+        return a + b
+
+    Calculator.perform_many([(Decimal(i), Decimal(1)) for i in range(10)], counting_add)
+    assert len(calls) == 10
+
+
+def test_perform_many_vectorized_array():
+    operands = np.array([[6.0, 3.0], [1.0, 4.0], [-2.0, 8.0]])
+    results = Calculator.perform_many(operands, divide)
+    assert isinstance(results, np.ndarray)
+    assert np.allclose(results, [2.0, 0.25, -0.25])
+    assert list(Calculations.filter_by_operation("divide")["result"]) == [Decimal("2"), Decimal("0.25"), Decimal("-0.25")]
+
+
+@pytest.mark.parametrize("operation, expected", [(add, [3, 7]), (subtract, [-1, -1]), (multiply, [2, 12])])
+def test_perform_many_integer_array(operation, expected):
+    results = Calculator.perform_many(np.array([[1, 2], [3, 4]]), operation)
+    assert list(results) == expected
+
+
+def test_perform_many_division_by_zero_records_nothing():
+    with pytest.raises(ValueError, match="Cannot divide by zero"):
+        Calculator.perform_many(np.array([[1.0, 1.0], [1.0, 0.0]]), divide)
+    with pytest.raises(ValueError, match="Cannot divide by zero"):
+        Calculator.perform_many([(Decimal(1), Decimal(1)), (Decimal(1), Decimal(0))], divide)
+    assert Calculations.get_all_calculations().empty
+
+
+def test_perform_many_rejects_bad_shape():
+    with pytest.raises(ValueError, match="shape"):
+        Calculator.perform_many(np.array([1.0, 2.0, 3.0]), add)
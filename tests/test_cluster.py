@@ -0,0 +1,142 @@
+import json
+import socket
+import threading
+import time
+import pytest
+from decimal import Decimal
+from app.cluster import ClusterCoordinator, ClusterWorker, execute_job, parse_address
+from app.dispatcher import AdaptiveDispatcher
+from app.command import CommandError
+from app.pandas_facade import PandasFacade
+from main import load_plugins, run_cluster_batch
+
+load_plugins()
+
+
+class SlowDispatcher:
+    def run(self, command):
+        time.sleep(0.02)
+        return command.result
+
+
+def start_worker(dispatcher=None):
+    worker = ClusterWorker(("127.0.0.1", 0), dispatcher)
+    threading.Thread(target=worker.serve_forever, args=(0.05,), daemon=True).start()
+    return worker
+
+
+def unused_address():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()
+
+
+@pytest.fixture
+def workers():
+    started = [start_worker() for _ in range(3)]
+    yield started
+    for worker in started:
+        worker.shutdown()
+        worker.server_close()
+
+
+def test_parse_address():
+    assert parse_address("example.org:7070") == ("example.org", 7070)
+    assert parse_address("7070") == ("127.0.0.1", 7070)
+
+
+def test_batch_runs_across_workers_in_order(workers):
+    coordinator = ClusterCoordinator([worker.address for worker in workers], shard_size=4)
+    jobs = [("add", [i, 1]) for i in range(30)] + [("mean", ["1", "2", "3", "6"])]
+    history = PandasFacade()
+    outcomes = coordinator.run(jobs, history=history)
+    assert outcomes == [Decimal(i + 1) for i in range(30)] + [Decimal(3)]
+    records = history.get_all_records()
+    assert len(records) == 31
+    assert list(records["operation"][:2]) == ["add", "add"]
+    assert records["num1"].iloc[29] == Decimal("29")
+    assert records["numbers"].iloc[30] == "1, 2, 3, 6"
+
+
+def test_job_errors_are_reported_per_job(workers):
+    coordinator = ClusterCoordinator([workers[0].address])
+    outcomes = coordinator.run([("divide", ["1", "0"]), ("power", ["2", "3"]), ("add", ["x", "1"]), ("add", ["1", "1"])])
+    assert [type(outcome) for outcome in outcomes] == [CommandError, CommandError, CommandError, Decimal]
+    assert str(outcomes[0]) == "Cannot divide by zero"
+    assert "Invalid operation type: power" in str(outcomes[1])
+
+
+def test_vector_jobs_run_on_workers(workers):
+    coordinator = ClusterCoordinator([workers[0].address])
+    outcomes = coordinator.run([("add", ["[1, 2, 3]", "5"]), ("multiply", [str(list(range(30))), "2"])])
+    assert outcomes[0] == "[6, 7, 8]"
+    assert outcomes[1] == str(list(range(0, 60, 2)))
+
+
+def test_jobs_cannot_read_files_or_echo_operands(tmp_path):
+    secret = tmp_path / "secret.txt"
+    secret.write_text("secret-token", encoding="utf-8")
+    dispatcher = AdaptiveDispatcher()
+    for operands in (["@" + str(secret), "1"], ["secret-token", "1"], ["[1, secret-token]", "1"]):
+        reply = execute_job("add", operands, dispatcher)
+        assert "result" not in reply and "secret" not in reply["error"]
+    assert execute_job("add", ["[1, x]", "1"], dispatcher)["error"] == \
+        "Invalid operands for add: element 2 of operand 1 is not a valid number"
+
+
+def test_idle_workers_steal_from_slow_ones(workers):
+    slow = start_worker(SlowDispatcher())
+    try:
+        coordinator = ClusterCoordinator([slow.address, workers[0].address], shard_size=1)
+        outcomes = coordinator.run([("add", [i, i]) for i in range(20)])
+        assert outcomes == [Decimal(2 * i) for i in range(20)]
+        assert coordinator.stolen > 0
+    finally:
+        slow.shutdown()
+        slow.server_close()
+
+
+def test_shards_of_lost_workers_are_retried(workers):
+    dead = unused_address()
+    coordinator = ClusterCoordinator([dead, workers[0].address], shard_size=2, timeout=2)
+    outcomes = coordinator.run([("multiply", [i, 2]) for i in range(10)])
+    assert outcomes == [Decimal(2 * i) for i in range(10)]
+    assert coordinator.lost_workers == [dead]
+    assert coordinator.retried >= 1
+
+
+@pytest.mark.parametrize("reply", ["[1, 2]", '{"replies": ["3"]}', '"done"'])
+def test_malformed_replies_fail_over(workers, reply):
+    broken = socket.create_server(("127.0.0.1", 0))
+    address = broken.getsockname()
+
+    def answer():
+        connection, _ = broken.accept()
+        with connection, connection.makefile("rb") as reader:
+            reader.readline()
+            connection.sendall(reply.encode() + b"\n")
+
+    threading.Thread(target=answer, daemon=True).start()
+    try:
+        coordinator = ClusterCoordinator([address, workers[0].address], shard_size=1, timeout=2)
+        outcomes = coordinator.run([("add", [i, 1]) for i in range(4)])
+    finally:
+        broken.close()
+    assert outcomes == [Decimal(i + 1) for i in range(4)]
+    assert coordinator.lost_workers == [address]
+
+
+def test_jobs_fail_when_every_worker_is_lost():
+    coordinator = ClusterCoordinator([unused_address()], timeout=2)
+    outcomes = coordinator.run([("add", ["1", "2"])])
+    assert isinstance(outcomes[0], CommandError)
+
+
+def test_cluster_batch_from_the_command_line(workers, tmp_path, capsys):
+    jobs_path = tmp_path / "jobs.jsonl"
+    jobs_path.write_text("\n".join(json.dumps({"operation": "subtract", "operands": [str(i), "1"]}) for i in range(3)))
+    addresses = ",".join(f"{host}:{port}" for host, port in (worker.address for worker in workers))
+    run_cluster_batch(str(jobs_path), addresses)
+    output = capsys.readouterr().out
+    assert "subtract 2 1 = 1" in output
+    assert "Ran 3 jobs on 3 of 3 workers." in output
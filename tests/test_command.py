@@ -45,4 +45,12 @@ def test_execute_in_process_error_handling():
     divide_command.execute_in_process(result_queue)
     result = result_queue.get()
     assert isinstance(result, ValueError)
-    assert str(result) == "Cannot divide by zero"
\ No newline at end of file
+    assert str(result) == "Cannot divide by zero"
+
+def test_command_result_is_memoized():
+    # The result property executes once and commands carry no __dict__
+    add_command = AddCommand(Decimal("5"), Decimal("3"))
+    assert not hasattr(add_command, "__dict__")
+    assert add_command.result == Decimal("8")
+    add_command.operand1 = Decimal("100")
+    assert add_command.result == Decimal("8")
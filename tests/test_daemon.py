@@ -0,0 +1,78 @@
+import os
+import threading
+import pytest
+from app.daemon import CalculatorDaemon, forward_to_daemon
+from main import run_daemon_request, load_plugins
+
+load_plugins()
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    socket_path = str(tmp_path / "calculator.sock")
+    daemon = CalculatorDaemon(run_daemon_request, socket_path)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    daemon.server_close()
+    thread.join()
+
+
+def test_forward_without_daemon_returns_none(tmp_path):
+    assert forward_to_daemon(["5", "3", "add"], str(tmp_path / "missing.sock")) is None
+
+
+def test_forward_runs_calculation_in_daemon(running_daemon):
+    output = forward_to_daemon(["5", "3", "add"], running_daemon.socket_path)
+    assert output == "The result of 5 add 3 is 8\n"
+
+
+def test_forward_reports_errors(running_daemon):
+    output = forward_to_daemon(["10", "0", "divide"], running_daemon.socket_path)
+    assert "An error occurred: Cannot divide by zero" in output
+    output = forward_to_daemon(["5"], running_daemon.socket_path)
+    assert "Invalid input format" in output
+
+
+def test_second_daemon_on_same_socket_is_rejected(running_daemon):
+    with pytest.raises(RuntimeError, match="already listening"):
+        CalculatorDaemon(run_daemon_request, running_daemon.socket_path)
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    socket_path = str(tmp_path / "stale.sock")
+    open(socket_path, "w").close()
+    daemon = CalculatorDaemon(run_daemon_request, socket_path)
+    daemon.server_close()
+    assert not os.path.exists(socket_path)
+
+
+def test_main_forwards_to_daemon(running_daemon, monkeypatch, capsys):
+    import main
+    monkeypatch.setenv("CALCULATOR_SOCKET", running_daemon.socket_path)
+    monkeypatch.setattr("sys.argv", ["main.py", "6", "7", "multiply"])
+    main.main()
+    assert capsys.readouterr().out == "The result of 6 multiply 7 is 42\n"
+
+
+def test_daemon_refuses_file_operands(running_daemon, tmp_path):
+    numbers = tmp_path / "numbers.txt"
+    numbers.write_text("1\n2\n")
+    output = forward_to_daemon([f"@{numbers}", "1", "add"], running_daemon.socket_path)
+    assert "does not read '@file' operands" in output
+    assert str(numbers) not in output
+
+
+def test_main_reads_file_operands_without_the_daemon(running_daemon, monkeypatch, capsys, tmp_path):
+    import main
+    numbers = tmp_path / "numbers.txt"
+    numbers.write_text("1\n2\n")
+    forwarded = []
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "forward_to_daemon", lambda args: forwarded.append(args))
+    monkeypatch.setenv("CALCULATOR_SOCKET", running_daemon.socket_path)
+    monkeypatch.setattr("sys.argv", ["main.py", f"@{numbers}", "1", "add"])
+    main.main()
+    assert not forwarded
+    assert "[2, 3]" in capsys.readouterr().out
@@ -0,0 +1,79 @@
+import threading
+import pytest
+from decimal import Decimal
+from app.command import AddCommand, DivideCommand
+from app.dispatcher import AdaptiveDispatcher, INLINE, PROCESS, THREAD
+from app.plugins.mean_command import MeanCommand
+from app.plugins.standard_deviation_command import StdDevCommand
+
+
+class PinnedAddCommand(AddCommand):
+    __slots__ = ()
+    execution_mode = PROCESS
+
+
+def test_unmeasured_commands_choose_by_input_size():
+    dispatcher = AdaptiveDispatcher()
+    assert dispatcher.choose(AddCommand(Decimal("1"), Decimal("2"))) == INLINE
+    assert dispatcher.choose(MeanCommand(*[Decimal(1)] * 5000)) == THREAD
+
+
+def test_measured_cost_selects_the_mode():
+    dispatcher = AdaptiveDispatcher(inline_limit=0.01, process_limit=1.0)
+    dispatcher.observe(StdDevCommand(*[Decimal(1)] * 1000), 0.1)
+    assert dispatcher.costs[StdDevCommand].seconds_per_unit == pytest.approx(1e-4)
+    assert dispatcher.choose(StdDevCommand(Decimal(1), Decimal(2))) == INLINE
+    assert dispatcher.choose(StdDevCommand(*[Decimal(1)] * 1000)) == THREAD
+    assert dispatcher.choose(StdDevCommand(*[Decimal(1)] * 100_000)) == PROCESS
+
+
+def test_overrides_take_precedence():
+    dispatcher = AdaptiveDispatcher()
+    assert dispatcher.choose(PinnedAddCommand(Decimal("1"), Decimal("2"))) == PROCESS
+    dispatcher.override(PinnedAddCommand, THREAD)
+    assert dispatcher.choose(PinnedAddCommand(Decimal("1"), Decimal("2"))) == THREAD
+    dispatcher.override(PinnedAddCommand, None)
+    assert dispatcher.choose(PinnedAddCommand(Decimal("1"), Decimal("2"))) == PROCESS
+    with pytest.raises(ValueError, match="Unknown execution mode"):
+        dispatcher.override(AddCommand, "gpu")
+
+
+def test_every_mode_returns_results_and_reported_errors():
+    dispatcher = AdaptiveDispatcher()
+    for mode in (INLINE, THREAD, PROCESS):
+        dispatcher.override(AddCommand, mode)
+        dispatcher.override(DivideCommand, mode)
+        assert dispatcher.run(AddCommand(Decimal("5"), Decimal("3"))) == Decimal("8")
+        error = dispatcher.run(DivideCommand(Decimal("1"), Decimal("0")))
+        assert isinstance(error, ValueError) and str(error) == "Cannot divide by zero"
+    assert dispatcher.costs[AddCommand].samples == 3
+    dispatcher.shutdown()
+
+
+def test_thread_mode_runs_off_the_calling_thread():
+    dispatcher = AdaptiveDispatcher()
+
+    class ThreadRecordingMean(MeanCommand):
+        __slots__ = ()
+
+        def execute(self):
+            return threading.current_thread().name
+
+    dispatcher.override(ThreadRecordingMean, THREAD)
+    assert dispatcher.run(ThreadRecordingMean(Decimal(1))).startswith("dispatch")
+    dispatcher.shutdown()
+
+
+def test_process_mode_shares_large_operands_and_releases_them():
+    dispatcher = AdaptiveDispatcher()
+    dispatcher.override(MeanCommand, PROCESS)
+    command = MeanCommand(*[Decimal(2)] * 20_000)
+    assert dispatcher.run(command) == Decimal(2)
+    assert dispatcher.costs[MeanCommand].samples == 1
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError, match="inline_limit"):
+        AdaptiveDispatcher(inline_limit=1.0, process_limit=0.5)
+    with pytest.raises(ValueError, match="smoothing"):
+        AdaptiveDispatcher(smoothing=0)
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+from decimal import Decimal
+from app.fixed_point import FixedPointColumn, OverflowColumn, parse_decimal
+from app.pandas_facade import PandasFacade
+
+
+def encode(column, values, existing=None):
+    existing = pd.Series([], dtype="Int64") if existing is None else existing
+    return column.encode(existing, values)
+
+
+def test_parse_decimal_missing_values():
+    assert parse_decimal(None) is None
+    assert parse_decimal(float("nan")) is None
+    assert parse_decimal("") is None
+    assert parse_decimal("1.50") == Decimal("1.50")
+
+
+def test_encode_raises_scale_and_rescales_existing():
+    column = FixedPointColumn()
+    existing, mantissas, _, overflow = encode(column, [Decimal("3"), "4"])
+    assert list(mantissas) == [3, 4] and column.scale == 0
+
+    existing, mantissas, _, overflow = encode(column, [Decimal("0.25")], existing=mantissas)
+    assert column.scale == 2
+    assert list(existing) == [300, 400]
+    assert list(mantissas) == [25]
+    assert overflow.empty
+
+
+def test_encode_overflows_values_that_do_not_fit():
+    column = FixedPointColumn()
+    third = Decimal(1) / Decimal(3)
+    _, mantissas, _, overflow = encode(column, [third, Decimal("1E+30"), "ZeroDivisionError", Decimal("2")])
+    assert overflow.to_dict() == {0: str(third), 1: "1E+30", 2: "ZeroDivisionError"}
+    assert mantissas.isna().tolist() == [True, True, True, False]
+
+
+def test_scale_stops_where_existing_values_would_overflow():
+    column = FixedPointColumn()
+    _, big, _, _ = encode(column, [Decimal(10 ** 15)])
+    big, mantissas, _, overflow = encode(column, [Decimal("0.125")], existing=big)
+    assert column.scale == 3
+    assert list(big) == [10 ** 18]
+    assert list(mantissas) == [125]
+
+    _, mantissas, _, overflow = encode(column, [Decimal("0.00001")], existing=big)
+    assert column.scale == 3
+    assert overflow.to_dict() == {0: "0.00001"}
+
+
+def test_encode_reads_plain_decimal_text():
+    column = FixedPointColumn()
+    _, mantissas, _, overflow = encode(column, ["-1.25", " 3 ", Decimal("1.50E+1"), 2, "0E-3", "1_000", "inf", ""])
+    assert column.scale == 3
+    assert mantissas.tolist()[:5] == [-1250, 3000, 15000, 2000, 0]
+    assert overflow.to_dict() == {5: "1_000", 6: "inf"}
+    assert mantissas.isna().tolist()[5:] == [True, True, True]
+
+
+def test_encode_keeps_values_at_the_int64_limit():
+    column = FixedPointColumn()
+    _, mantissas, _, overflow = encode(column, ["9223372036854775807", "9223372036854775808"])
+    assert mantissas.tolist()[0] == 9223372036854775807
+    assert overflow.to_dict() == {1: "9223372036854775808"}
+
+
+def test_overflow_column_packs_text():
+    overflow = OverflowColumn.from_text(np.array([7, 3]), ["ZeroDivisionError", "1E+400"])
+    assert list(overflow.keys) == [3, 7]
+    assert overflow.data.dtype == np.uint8
+    assert np.isinf(overflow.floats[0]) and np.isnan(overflow.floats[1])
+    positions, entries = overflow.lookup(np.array([1, 7, 3]))
+    assert list(positions) == [1, 2]
+    assert overflow.values(entries) == ["ZeroDivisionError", Decimal("1E+400")]
+
+    combined = overflow.concat(OverflowColumn.from_text(np.array([5]), ["1/3"])).without(np.array([3]))
+    assert list(combined.keys) == [5, 7]
+    assert combined.texts(np.arange(2)) == ["1/3", "ZeroDivisionError"]
+
+
+def test_decode_round_trip():
+    column = FixedPointColumn()
+    _, mantissas, _, _ = encode(column, [Decimal("1.5"), None, Decimal("-2.25")])
+    decoded = column.decode(mantissas)
+    assert decoded[0] == Decimal("1.5") and decoded[2] == Decimal("-2.25")
+    assert np.isnan(decoded[1])
+    assert np.allclose(column.to_float(mantissas), [1.5, np.nan, -2.25], equal_nan=True)
+
+
+def test_decode_keeps_each_values_exponent():
+    column = FixedPointColumn()
+    existing, first, first_exponents, _ = encode(column, ["3", "1E+2"])
+    existing, second, second_exponents, _ = encode(column, ["1.25", "1.50", "0E-3"], existing=first)
+    assert column.scale == 3
+    assert [str(value) for value in column.decode(existing, first_exponents)] == ["3", "1E+2"]
+    assert [str(value) for value in column.decode(second, second_exponents)] == ["1.25", "1.50", "0.000"]
+    assert str(column.decode(existing)[0]) == "3.000"
+
+
+def test_facade_round_trips_mixed_scales(tmp_path):
+    from app.mapped_history import MappedHistory
+    facade = PandasFacade()
+    facade.add_record({"operation": "add", "num1": "3", "num2": "-2.0", "result": "1.0"})
+    facade.add_record({"operation": "add", "num1": "1.25", "num2": "1E+1", "result": "11.25"})
+    path = str(tmp_path / "history.csv")
+    facade.save_to_csv(path)
+    saved = pd.read_csv(path, dtype=str)
+    assert list(saved["num1"]) == ["3", "1.25"]
+    assert list(saved["num2"]) == ["-2.0", "1E+1"]
+    assert list(saved["result"]) == ["1.0", "11.25"]
+
+    mapped = MappedHistory.write(str(tmp_path / "mapped"), saved)
+    assert [str(value) for value in mapped.get_all_records()["num2"]] == ["-2.0", "1E+1"]
+    reloaded = PandasFacade()
+    reloaded.add_record({"operation": "add", "num1": "0.125", "num2": "1", "result": "1.125"})
+    reloaded.load_from_csv(path, merge=True)
+    assert sorted(str(value) for value in reloaded.dataframe["num1"]) == ["0.125", "1.25", "3"]
+
+
+def test_facade_stores_numbers_as_int64():
+    facade = PandasFacade()
+    facade.add_record({"operation": "add", "num1": Decimal("1.5"), "num2": "2", "result": "3.5"})
+    facade.add_record({"operation": "divide", "num1": "1", "num2": "3", "result": Decimal(1) / Decimal(3)})
+    assert str(facade.snapshot().frame["num1"].dtype) == "Int64"
+    assert list(facade.dataframe["result"]) == [Decimal("3.5"), Decimal(1) / Decimal(3)]
+    assert np.allclose(facade.numeric_column("result"), [3.5, 1 / 3])
+
+
+def test_facade_keeps_compact_rows_small():
+    facade = PandasFacade()
+    for i in range(200):
+        facade.add_record({"operation": "add", "num1": Decimal(i), "num2": Decimal("0.5"), "result": Decimal(i) + Decimal("0.5")})
+    assert facade.memory_usage() / 200 < 64
+    assert facade.dataframe["result"].iloc[-1] == Decimal("199.5")
+
+
+def test_facade_keeps_overflowing_rows_small():
+    facade = PandasFacade()
+    facade.add_records([{"operation": "divide", "num1": Decimal(i + 1), "num2": Decimal(3),
+                         "result": Decimal(i + 1) / Decimal(3)} for i in range(300)])
+    assert facade.snapshot().overflow_count == 200
+    assert facade.dataframe["result"].iloc[0] == Decimal(1) / Decimal(3)
+    assert np.allclose(facade.numeric_column("result")[:3], [1 / 3, 2 / 3, 1])
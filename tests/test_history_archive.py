@@ -0,0 +1,125 @@
+import os
+import pandas as pd
+import pytest
+from decimal import Decimal
+from app.calculations import Calculations
+from app.history_archive import HistoryArchive
+
+DAY = 86400.0
+
+
+def records():
+    rows = []
+    for day in range(3):
+        for i, operation in enumerate(["add", "divide", "add"]):
+            value = day * 10 + i
+            rows.append({"operation": operation, "num1": str(value), "num2": "2", "result": str(value / 2),
+                         "timestamp": day * DAY + i})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = HistoryArchive(str(tmp_path / "archive"))
+    archive.append(records())
+    return archive
+
+
+def test_layout_is_partitioned_and_compressed(archive):
+    assert len(archive) == 9
+    assert len(archive.segments) == 6
+    paths = sorted(segment["path"] for segment in archive.segments)
+    assert paths[0] == os.path.join("date=1970-01-01", "operation=add", "segment-00000.csv.gz")
+    assert HistoryArchive.is_archive(archive.root)
+    reopened = HistoryArchive(archive.root)
+    assert reopened.segments == archive.segments
+
+
+def test_operation_predicate_prunes_partitions(archive):
+    segments = archive.matching_segments(operation="divide")
+    assert {segment["operation"] for segment in segments} == {"divide"}
+    assert list(archive.read(operation="divide")["num1"]) == ["1", "11", "21"]
+
+
+def test_time_predicate_prunes_dates(archive):
+    segments = archive.matching_segments(start=DAY, end=DAY + 10)
+    assert {segment["date"] for segment in segments} == {"1970-01-02"}
+    assert list(archive.read(start=DAY, end=DAY + 1)["num1"]) == ["10", "11"]
+
+
+def test_value_ranges_use_segment_statistics(archive):
+    segments = archive.matching_segments(ranges={"num1": (20, None)})
+    assert {segment["date"] for segment in segments} == {"1970-01-03"}
+    assert list(archive.read(ranges={"result": (None, 0.5)})["num1"]) == ["0", "1"]
+
+
+def test_read_opens_only_matching_segments(archive, monkeypatch):
+    opened = []
+    original = pd.read_csv
+
+    def tracking_read_csv(path, *args, **kwargs):
+        opened.append(path)
+        return original(path, *args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", tracking_read_csv)
+    archive.read(operation="add", start=2 * DAY)
+    assert len(opened) == 1
+
+
+def test_appends_add_segments(archive):
+    archive.append(records())
+    assert len(HistoryArchive(archive.root)) == 18
+    assert sorted(s["path"] for s in archive.segments)[1].endswith("segment-00001.csv.gz")
+
+
+def test_clear(archive):
+    archive.clear()
+    assert not HistoryArchive.is_archive(archive.root)
+    assert archive.read().empty
+
+
+def test_calculations_archive_round_trip(tmp_path):
+    root = str(tmp_path / "archive")
+    Calculations.clear_calculations()
+    Calculations.history.add_records(records())
+    Calculations.archive_history(root)
+    Calculations.clear_calculations()
+
+    divides = Calculations.filter_by_operation("divide", archive=root)
+    assert list(divides["result"]) == [Decimal("0.5"), Decimal("5.5"), Decimal("10.5")]
+
+    Calculations.load_history(root, operation="add", start=DAY)
+    history = Calculations.get_all_calculations()
+    assert list(history["num1"]) == [Decimal(10), Decimal(12), Decimal(20), Decimal(22)]
+    Calculations.clear_calculations()
+
+
+def test_calculations_archive_appends_only_new_records(tmp_path):
+    root = str(tmp_path / "archive")
+    Calculations.clear_calculations()
+    Calculations.history.add_records(records())
+    Calculations.archive_history(root)
+    Calculations.archive_history(root)
+    assert len(HistoryArchive(root)) == 9
+
+    Calculations.history.add_record({"operation": "add", "num1": "1", "num2": "1", "result": "2",
+                                     "timestamp": 3 * DAY})
+    Calculations.archive_history(root)
+    assert len(HistoryArchive(root)) == 10
+
+    # A reloaded history is compared with the archive instead of being written again
+    Calculations.load_history(root)
+    Calculations.archive_history(root)
+    assert len(HistoryArchive(root)) == 10
+    Calculations.clear_calculations()
+
+
+def test_operation_names_cannot_leave_their_partition(tmp_path):
+    archive = HistoryArchive(str(tmp_path / "archive"))
+    rows = records().head(1).assign(operation="../../escaped")
+    archive.append(rows)
+    path = archive.segments[0]["path"]
+    assert path.startswith(os.path.join("date=1970-01-01", "operation=..%2F..%2Fescaped"))
+    assert os.path.isfile(os.path.join(archive.root, path))
+    assert not os.path.exists(tmp_path / "escaped")
+    assert list(archive.read(operation="../../escaped")["num1"]) == ["0"]
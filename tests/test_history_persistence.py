@@ -0,0 +1,251 @@
+import threading
+import pandas as pd
+import pytest
+from decimal import Decimal
+from app.history_persistence import HistoryAutosaver, load_in_background, read_history_csv, save_in_background
+from app.pandas_facade import PandasFacade
+
+
+def add(facade, count, start=0):
+    for i in range(start, start + count):
+        facade.add_record({"operation": "add", "num1": str(i), "num2": "1", "result": str(i + 1)})
+
+
+def test_autosave_appends_only_new_rows(tmp_path):
+    facade = PandasFacade()
+    autosaver = HistoryAutosaver(facade, str(tmp_path / "autosave.csv"))
+    add(facade, 3)
+    assert autosaver.dirty_rows == 3
+    assert autosaver.flush() == 3
+    assert autosaver.dirty_rows == 0
+    add(facade, 2, start=3)
+    assert autosaver.flush() == 2
+    assert list(pd.read_csv(autosaver.filepath)["num1"]) == [0, 1, 2, 3, 4]
+
+
+def test_autosave_rewrites_after_removal_and_new_columns(tmp_path):
+    facade = PandasFacade()
+    autosaver = HistoryAutosaver(facade, str(tmp_path / "autosave.csv"))
+    add(facade, 3)
+    autosaver.flush()
+    facade.remove_record(0)
+    assert autosaver.flush() == 2
+    facade.add_record({"operation": "mean", "numbers": "1, 2", "result": "1.5"})
+    autosaver.flush()
+    saved = pd.read_csv(autosaver.filepath)
+    assert list(saved["operation"]) == ["add", "add", "mean"]
+    assert saved["numbers"].iloc[-1] == "1, 2"
+
+
+def test_autosave_thread_flushes_on_row_threshold(tmp_path):
+    facade = PandasFacade()
+    autosaver = HistoryAutosaver(facade, str(tmp_path / "autosave.csv"), interval=3600, row_threshold=5)
+    autosaver.POLL_SECONDS = 0.01
+    autosaver.start()
+    try:
+        add(facade, 5)
+        for _ in range(500):
+            if autosaver.dirty_rows == 0:
+                break
+            autosaver._stopping.wait(0.01)
+        assert autosaver.dirty_rows == 0
+    finally:
+        autosaver.stop()
+    assert len(pd.read_csv(autosaver.filepath)) == 5
+
+
+def test_autosave_thread_survives_a_failed_flush(tmp_path, monkeypatch, caplog):
+    facade = PandasFacade()
+    autosaver = HistoryAutosaver(facade, str(tmp_path / "autosave.csv"), interval=0.01, row_threshold=1)
+    autosaver.POLL_SECONDS = 0.01
+    changes_since = facade.changes_since
+    failures = iter([RuntimeError("cannot encode")])
+
+    def flaky(mark):
+        for error in failures:
+            raise error
+        return changes_since(mark)
+
+    monkeypatch.setattr(facade, "changes_since", flaky)
+    autosaver.start()
+    try:
+        add(facade, 2)
+        for _ in range(500):
+            if autosaver.dirty_rows == 0:
+                break
+            autosaver._stopping.wait(0.01)
+        assert autosaver.dirty_rows == 0
+    finally:
+        autosaver.stop()
+    assert "cannot encode" in caplog.text
+    assert len(pd.read_csv(autosaver.filepath)) == 2
+
+
+def test_autosave_rewrites_after_a_failed_write(tmp_path, monkeypatch):
+    facade = PandasFacade()
+    autosaver = HistoryAutosaver(facade, str(tmp_path / "autosave.csv"))
+    add(facade, 1)
+    autosaver.flush()
+    add(facade, 1, start=1)
+    to_csv = pd.DataFrame.to_csv
+    failures = iter([OSError("disk full")])
+
+    def flaky(self, *args, **kwargs):
+        for error in failures:
+            raise error
+        return to_csv(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_csv", flaky)
+    with pytest.raises(OSError, match="disk full"):
+        autosaver.flush()
+    assert autosaver.dirty_rows > 0
+    add(facade, 1, start=2)
+    autosaver.flush()
+    assert list(pd.read_csv(autosaver.filepath)["num1"]) == [0, 1, 2]
+    assert autosaver.dirty_rows == 0
+
+
+def test_autosave_rejects_invalid_settings(tmp_path):
+    with pytest.raises(ValueError, match="interval must be positive"):
+        HistoryAutosaver(PandasFacade(), str(tmp_path / "autosave.csv"), interval=0)
+
+
+def test_background_save_and_load_report_progress(tmp_path):
+    source = PandasFacade()
+    add(source, 10)
+    filepath = str(tmp_path / "history.csv")
+    save = save_in_background(source, filepath)
+    assert save.wait(10)
+    assert save.error is None and save.progress == 1.0
+    assert save.status() == f"Saving history to {filepath}: done"
+
+    target = PandasFacade()
+    load = load_in_background(target, filepath)
+    assert load.wait(10)
+    assert load.completed == load.total
+    assert len(target.dataframe) == 10
+
+
+def test_background_load_reports_failure(tmp_path):
+    job = load_in_background(PandasFacade(), str(tmp_path / "missing.csv"))
+    assert job.wait(10)
+    assert isinstance(job.error, FileNotFoundError)
+    assert "failed" in job.status()
+
+
+MIXED_HISTORY = """operation,num1,num2,result,numbers,timestamp,duration,note
+add,0.10,0.20,0.30,,1700000000.123456,0.001,007
+mean,,,2,"1, 2, 3",1700000001.5,,
+divide,1,3,0.3333333333333333333333333333,,1700000002.25,,x
+add,1e3,1,1001,,1700000003.75,,
+"""
+
+
+def write_mixed_history(tmp_path):
+    path = tmp_path / "mixed.csv"
+    path.write_text(MIXED_HISTORY)
+    return str(path)
+
+
+def test_history_csv_is_read_with_the_schema(tmp_path):
+    path = write_mixed_history(tmp_path)
+    chunks = list(read_history_csv(path, chunk_rows=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2]
+    records = pd.concat(chunks)
+    assert list(records["num1"].iloc[[0, 3]]) == ["0.10", "1e3"]
+    assert records["numbers"].iloc[1] == "1, 2, 3"
+    assert records["note"].iloc[0] == "007"
+    assert records["timestamp"].iloc[0] == 1700000000.123456
+
+
+def test_history_csv_columns_operations_and_time_range(tmp_path):
+    path = write_mixed_history(tmp_path)
+    records = pd.concat(read_history_csv(path, columns=["result"], operations=["add", "mean"], start=1700000001))
+    assert list(records.columns) == ["operation", "result", "timestamp"]
+    assert list(records["result"]) == ["2", "1001"]
+
+
+def test_load_from_csv_merges_into_the_history(tmp_path):
+    path = write_mixed_history(tmp_path)
+    facade = PandasFacade()
+    add(facade, 2)
+    facade.load_from_csv(path, operations=["add"], merge=True)
+    records = facade.get_all_records()
+    # Loaded rows are older than the ones added now, so they come first
+    assert list(records["num1"]) == [Decimal("0.10"), Decimal("1E+3"), Decimal(0), Decimal(1)]
+    assert facade.operation_stats().loc[("add", "result"), "count"] == 4
+
+    facade.load_from_csv(path, columns=["num1", "num2", "result"])
+    assert len(facade.get_all_records()) == 4
+    assert "numbers" not in facade.get_all_records()
+    assert facade.get_all_records()["result"].iloc[2] == Decimal("0.3333333333333333333333333333")
+
+
+def test_malformed_csv_leaves_the_history_unchanged(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("operation,num1,num2,result,timestamp\nadd,1,2,3,yesterday\n")
+    facade = PandasFacade()
+    add(facade, 3)
+    with pytest.raises(ValueError):
+        facade.load_from_csv(str(path))
+    assert len(facade.get_all_records()) == 3
+    assert facade.operation_stats().loc[("add", "result"), "count"] == 3
+
+
+def test_background_merge(tmp_path):
+    facade = PandasFacade()
+    add(facade, 1)
+    job = load_in_background(facade, write_mixed_history(tmp_path), merge=True, operations=["mean"])
+    assert job.wait(10) and job.error is None
+    assert job.status().startswith("Merging history from")
+    assert list(facade.get_all_records()["operation"]) == ["mean", "add"]
+
+
+def test_autosave_keeps_the_previous_session(tmp_path):
+    filepath = str(tmp_path / "autosave.csv")
+    first = PandasFacade()
+    previous = HistoryAutosaver(first, filepath)
+    add(first, 1)
+    previous.flush()
+
+    facade = PandasFacade()
+    autosaver = HistoryAutosaver(facade, filepath, interval=0.01)
+    assert autosaver.dirty_rows == 0
+    autosaver.POLL_SECONDS = 0.01
+    autosaver.start()
+    autosaver._stopping.wait(0.1)
+    autosaver.stop()
+    assert list(pd.read_csv(filepath)["num1"]) == [0]
+
+    add(facade, 2, start=1)
+    assert autosaver.flush() == 2
+    facade.remove_record(0)
+    facade.add_record({"operation": "mean", "numbers": "1, 2", "result": "1.5"})
+    autosaver.flush()
+    saved = pd.read_csv(filepath)
+    assert list(saved["num1"].iloc[:2]) == [0, 2]
+    assert list(saved["operation"]) == ["add", "add", "mean"]
+
+
+def test_load_keeps_the_history_usable_and_keeps_records_added_meanwhile(tmp_path):
+    facade = PandasFacade()
+    add(facade, 2)
+    seen = []
+
+    def meanwhile(position):
+        # Runs on another thread while the loading thread is between chunks
+        def use_history():
+            seen.append(len(facade.get_all_records()))
+            facade.add_record({"operation": "multiply", "num1": "2", "num2": "3", "result": "6"})
+            facade.flush()
+        worker = threading.Thread(target=use_history)
+        worker.start()
+        worker.join(5)
+        assert not worker.is_alive()
+
+    facade.load_from_csv(write_mixed_history(tmp_path), progress=meanwhile)
+    assert seen == [2]
+    records = facade.get_all_records()
+    assert list(records["operation"]) == ["add", "mean", "divide", "add", "multiply"]
+    assert facade.operation_stats().loc[("multiply", "result"), "count"] == 1
+    assert facade.operation_stats().loc[("add", "result"), "count"] == 2
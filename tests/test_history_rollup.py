@@ -0,0 +1,73 @@
+import math
+import numpy as np
+import pytest
+from decimal import Decimal
+from app import operations
+from app.calculation import Calculation
+from app.calculations import Calculations
+from app.history_rollup import RunningStats
+from app.pandas_facade import PandasFacade
+from app.retention_policy import RetentionPolicy
+
+
+def summarize(stats, values):
+    values = np.asarray(values, dtype="float64")
+    stats.add(len(values), values.sum(), values.var() * len(values), values.min(), values.max())
+
+
+def test_running_stats_merge_and_reverse_batches():
+    stats = RunningStats()
+    summarize(stats, [1.0, 2.0, 3.0])
+    summarize(stats, [10.0, 20.0])
+    assert stats.count == 5 and stats.total == 36.0
+    assert stats.mean == pytest.approx(7.2)
+    assert stats.variance == pytest.approx(np.var([1, 2, 3, 10, 20], ddof=1))
+
+    stats.remove(2, 30.0, 50.0, 10.0, 20.0)
+    assert stats.mean == pytest.approx(2.0)
+    assert stats.variance == pytest.approx(1.0)
+    assert stats.extrema_stale
+    stats.remove(3, 6.0, 2.0, 1.0, 3.0)
+    assert stats.count == 0 and math.isnan(stats.mean)
+
+
+def test_rollup_matches_a_full_groupby():
+    facade = PandasFacade()
+    rows = [("add", "1", "2", "3"), ("add", "2.5", "4", "6.5"), ("divide", "1", "0", "not a number"),
+            ("divide", "9", "3", "3"), ("add", "-4", "1", "-3")]
+    for operation, num1, num2, result in rows:
+        facade.add_record({"operation": operation, "num1": num1, "num2": num2, "result": result})
+    stats = facade.operation_stats()
+    records = facade.get_all_records()
+    for (operation, column), row in stats.iterrows():
+        values = records[records["operation"] == operation][column].map(facade._to_float)
+        assert row["count"] == values.count()
+        assert row["sum"] == pytest.approx(values.sum())
+        assert row["variance"] == pytest.approx(values.var()) or math.isnan(row["variance"])
+        assert row["min"] == values.min() and row["max"] == values.max()
+    assert stats.loc[("divide", "result"), "non_numeric"] == 1
+
+
+def test_rollup_follows_removal_and_eviction():
+    facade = PandasFacade()
+    for value in (5, 1, 9):
+        facade.add_record({"operation": "add", "num1": str(value), "num2": "0", "result": str(value)})
+    facade.remove_record(2)
+    stats = facade.operation_stats("add").loc[("add", "result")]
+    assert stats["records"] == 2 and stats["max"] == 5.0 and stats["mean"] == 3.0
+
+    facade.set_policy(RetentionPolicy(max_rows=1))
+    stats = facade.operation_stats().loc[("add", "result")]
+    assert stats["records"] == 1 and stats["min"] == 1.0
+    facade.clear_data()
+    assert facade.operation_stats().empty
+
+
+def test_calculations_statistics_track_add_and_delete():
+    Calculations.clear_calculations()
+    Calculations.add_calculation(Calculation(Decimal("6"), Decimal("3"), operations.divide))
+    Calculations.add_calculation(Calculation(Decimal("8"), Decimal("2"), operations.divide))
+    assert Calculations.get_statistics("divide").loc[("divide", "result"), "mean"] == 3.0
+    Calculations.delete_calculation(0)
+    assert Calculations.get_statistics().loc[("divide", "num1"), "sum"] == 8.0
+    Calculations.clear_calculations()
@@ -0,0 +1,96 @@
+import pytest
+from app.log_replay import ReplayEvent, ReplayReport, calculator_runner, load_events, log_files, parse_log, replay
+from main import load_plugins
+
+SESSION = """\
+2026-10-19 12:00:00,000 - root - INFO - Application started.
+2026-10-19 12:00:01,000 - root - INFO - User input received: add 5 3
+2026-10-19 12:00:01,001 - root - INFO - Performing calculation: add with values 5 and 3
+2026-10-19 12:00:02,500 - root - INFO - User input received: mean 1 2 3
+2026-10-19 12:00:03,000 - root - INFO - User input received: history
+2026-10-19 12:00:04,250 - root - INFO - Performing calculation: divide with values 1 and 0
+not a log line
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_parse_log_recovers_each_calculation_once():
+    events = list(parse_log(SESSION.splitlines(True)))
+    assert [(event.operation, event.operands) for event in events] == [
+        ("add", ["5", "3"]), ("mean", ["1", "2", "3"]), ("divide", ["1", "0"])]
+    assert events[2].timestamp - events[0].timestamp == pytest.approx(3.249)
+
+
+def test_rotated_files_are_read_oldest_first(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("2026-10-19 12:00:09,000 - root - INFO - Performing calculation: add with values 9 and 9\n")
+    (tmp_path / "app.log.1").write_text(
+        "2026-10-19 12:00:05,000 - root - INFO - Performing calculation: add with values 5 and 5\n")
+    (tmp_path / "app.log.2").write_text(
+        "2026-10-19 12:00:01,000 - root - INFO - Performing calculation: add with values 1 and 1\n")
+    (tmp_path / "app.log.bak").write_text("")
+    assert log_files(str(path)) == [str(path) + ".2", str(path) + ".1", str(path)]
+    assert [event.operands[0] for event in load_events([str(path)])] == ["1", "5", "9"]
+
+
+def test_replay_keeps_original_pace_and_charges_queueing_to_latency():
+    clock = FakeClock()
+    events = [ReplayEvent(100.0, "add", []), ReplayEvent(101.0, "add", []), ReplayEvent(101.5, "add", [])]
+    durations = iter([0.2, 1.0, 0.1])
+
+    def run(operation, operands):
+        clock.now += next(durations)
+        return operation == "add"
+
+    report = replay(events, run, speed=1.0, clock=clock, sleep=clock.sleep)
+    assert report.service_times.tolist() == pytest.approx([0.2, 1.0, 0.1])
+    # The third calculation was due at 1.5 s but started at 2.0 s
+    assert report.latencies.tolist() == pytest.approx([0.2, 1.0, 0.6])
+    assert report.elapsed == pytest.approx(2.1) and report.errors == 0
+
+    clock.now = 0.0
+    durations = iter([0.2, 1.0, 0.1])
+    fast = replay(events, run, speed=None, clock=clock, sleep=clock.sleep)
+    assert fast.elapsed == pytest.approx(1.3)
+    with pytest.raises(ValueError):
+        replay(events, run, speed=0)
+
+
+def test_report_percentiles_and_summary():
+    report = ReplayReport([0.001 * n for n in range(1, 101)], [0.001] * 100, 2, 0.5)
+    points = report.percentiles()
+    assert points[50] == pytest.approx(0.0505) and points[100] == pytest.approx(0.1)
+    assert report.throughput == 200
+    summary = report.summary()
+    assert "100 calculations (2 errors)" in summary and "p99.9" in summary and "max 100.000 ms" in summary
+    assert ReplayReport([], [], 0, 0.0).percentiles() == {}
+
+
+def test_calculator_runner_reports_errors():
+    load_plugins()
+    run = calculator_runner()
+    assert run("add", ["5", "3"]) and run("mean", ["1", "2", "3"])
+    assert not run("divide", ["1", "0"])
+    assert not run("power", ["2", "3"])
+
+
+def test_vector_calculations_are_replayed():
+    lines = ["2026-10-19 12:00:01,000 - root - INFO - Performing calculation: add with values [1, 2, 3] and 5\n",
+             "2026-10-19 12:00:02,000 - root - INFO - Performing calculation: multiply with values 2 and [4 5]\n"]
+    events = list(parse_log(lines))
+    assert [(event.operation, event.operands) for event in events] == [
+        ("add", ["[1, 2, 3]", "5"]), ("multiply", ["2", "[4 5]"])]
+    load_plugins()
+    run = calculator_runner()
+    assert all(run(event.operation, event.operands) for event in events)
+    assert not run("add", ["[1, x]", "5"])
@@ -57,4 +57,19 @@ def test_menu_display(capsys):
     from main import display_menu
     display_menu()
     captured = capsys.readouterr()
-    assert "Available commands: add, subtract, multiply, divide" in captured.out
\ No newline at end of file
+    assert "Available commands: add, subtract, multiply, divide" in captured.out
+
+
+def test_profile_command(capsys, tmp_path):
+    # Profile a calculation several times and dump the statistics
+    from main import profile_command
+    path = str(tmp_path / "add.prof")
+    profile_command(["-n", "3", "-o", path, "add", "5", "3"])
+    captured = capsys.readouterr()
+    assert captured.out.count("The result of 5 add 3 is 8") == 1
+    assert "Profiled 3 run(s)" in captured.out and "perform_calculation_and_display" in captured.out
+    assert f"Statistics written to {path}" in captured.out
+
+    # The command line puts the operation last
+    profile_command(["6", "3", "divide"], command_line=True)
+    assert "The result of 6 divide 3 is 2" in capsys.readouterr().out
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+from decimal import Decimal
+from app import operations
+from app.calculation import Calculation
+from app.calculations import Calculations
+from app.mapped_history import MappedHistory
+
+
+def records():
+    return pd.DataFrame({
+        "operation": ["add", "divide", "add", "multiply"],
+        "num1": ["1.5", "6", "not a number", "2"],
+        "num2": ["2", "3", "1", None],
+        "result": ["3.5", "2", "1E+400", "4"],
+        "timestamp": [10.0, 20.0, 30.0, 40.0],
+    })
+
+
+@pytest.fixture
+def mapped(tmp_path):
+    return MappedHistory.write(str(tmp_path / "mapped"), records())
+
+
+def test_columns_are_memory_mapped(mapped):
+    assert MappedHistory.is_mapped(mapped.path)
+    assert len(mapped) == 4
+    assert isinstance(mapped.column("num1"), np.memmap)
+    assert mapped.column("operation").dtype == np.int32
+    assert mapped.dictionaries["operation"] == ["add", "divide", "multiply"]
+
+
+def test_records_round_trip_exactly(mapped):
+    history = mapped.get_all_records()
+    assert list(history["operation"]) == ["add", "divide", "add", "multiply"]
+    assert history.at[0, "num1"] == Decimal("1.5")
+    assert history.at[2, "num1"] == "not a number"
+    assert history.at[2, "result"] == Decimal("1E+400")
+    assert pd.isna(history.at[3, "num2"])
+
+
+def test_queries_decode_only_matching_rows(mapped):
+    assert list(mapped.filter_operations("add")["timestamp"]) == [10.0, 30.0]
+    assert mapped.filter_operations("power").empty
+    assert list(mapped.filter_by_time(15, 30)["operation"]) == ["divide", "add"]
+    assert mapped.get_latest_record()["result"] == Decimal("4")
+    assert mapped.numeric_column("result")[1] == 2.0
+
+
+def test_convert_csv_streams_in_chunks(tmp_path):
+    csv_path = str(tmp_path / "history.csv")
+    records().to_csv(csv_path, index=False)
+    converted = MappedHistory.convert_csv(csv_path, str(tmp_path / "converted"), chunk_size=3)
+    expected = MappedHistory.write(str(tmp_path / "written"), records())
+    pd.testing.assert_frame_equal(converted.get_all_records(), expected.get_all_records())
+
+
+def test_unsorted_timestamps_fall_back_to_a_scan(tmp_path):
+    shuffled = MappedHistory.write(str(tmp_path / "shuffled"), records().iloc[::-1])
+    assert not shuffled.sorted_by_time
+    assert list(shuffled.filter_by_time(15, 30)["timestamp"]) == [30.0, 20.0]
+
+
+def test_load_history_maps_instead_of_loading(mapped):
+    Calculations.load_history(mapped.path)
+    assert Calculations.history.dataframe.empty
+    assert len(Calculations.get_all_calculations()) == 4
+    assert Calculations.get_latest().result == Decimal("4")
+    assert Calculations.get_statistics().loc[("add", "num1"), "non_numeric"] == 1
+
+    Calculations.add_calculation(Calculation(Decimal("1"), Decimal("1"), operations.add))
+    assert len(Calculations.filter_by_operation("add")) == 3
+    assert Calculations.get_latest().result == Decimal("2")
+    Calculations.clear_calculations()
+    assert Calculations.get_all_calculations().empty
+
+
+def test_partial_reads_apply_overflow(mapped):
+    assert mapped.rows(2, 4)["result"].tolist() == [Decimal("1E+400"), Decimal("4")]
+    assert mapped.rows(0, 2)["num1"].tolist() == [Decimal("1.5"), Decimal("6")]
+    assert mapped.filter_operations("add")["num1"].tolist() == [Decimal("1.5"), "not a number"]
+    assert mapped.get_latest_record()["num1"] == Decimal("2")
+
+
+def test_replacing_loads_detach_the_mapped_history(mapped, tmp_path):
+    from app.pandas_facade import PandasFacade
+    csv_path = tmp_path / "loaded.csv"
+    csv_path.write_text("operation,num1,num2,result\nsubtract,5,3,2\n")
+    facade = PandasFacade()
+    facade.load_mapped(mapped.path)
+    facade.load_from_csv(str(csv_path))
+    assert facade.mapped is None
+    assert list(facade.get_all_records()["operation"]) == ["subtract"]
+
+    facade.load_mapped(mapped.path)
+    facade.replace_records(pd.DataFrame([{"operation": "add", "num1": "1", "num2": "1", "result": "2"}]))
+    assert list(facade.get_all_records()["operation"]) == ["add"]
+    assert facade.operation_stats().loc[("add", "result"), "count"] == 1
+
+
+def test_overflow_is_mapped_not_read_on_open(mapped, tmp_path):
+    with open(tmp_path / "mapped" / MappedHistory.HEADER, encoding="utf-8") as header:
+        assert "overflow" not in header.read()
+    reopened = MappedHistory(mapped.path)
+    assert not reopened._overflow
+    assert reopened.rows(2, 3)["result"].tolist() == [Decimal("1E+400")]
+    overflow = reopened.overflow("result")
+    assert isinstance(overflow.keys, np.memmap) and list(overflow.keys) == [2]
+    assert np.isinf(reopened.numeric_column("result")[2])
+
+
+def test_empty_history_round_trips(tmp_path):
+    empty = MappedHistory.write(str(tmp_path / "empty"), records().iloc[0:0])
+    assert len(empty) == 0
+    assert empty.get_all_records().empty
+    assert len(empty.overflow("num1")) == 0
@@ -0,0 +1,96 @@
+import os
+import tracemalloc
+from decimal import Decimal
+import pytest
+from app.memory_report import (MemoryMonitor, allocations_by_subsystem, collect_memory_report, command_memory,
+                               format_bytes, subsystem_of, take_snapshot)
+from app.pandas_facade import PandasFacade
+from app.plugins.add_command import AddCommand
+from app.plugins.mean_command import MeanCommand
+
+APP = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app")
+
+
+@pytest.fixture
+def tracing():
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(16)
+    yield
+    if started:
+        tracemalloc.stop()
+
+
+def test_subsystem_of_and_format_bytes():
+    assert subsystem_of(os.path.join(APP, "pandas_facade.py")) == "history"
+    assert subsystem_of(os.path.join(APP, "plugins", "add_command.py")) == "commands"
+    assert subsystem_of(os.path.join(APP, "scheduler.py")) == "execution"
+    assert subsystem_of(os.path.join(APP, "workload.py")) == "other"
+    assert subsystem_of(pytest.__file__) is None
+    assert format_bytes(512) == "512 B" and format_bytes(1536) == "1.5 KiB" and format_bytes(3 * 2 ** 30) == "3.0 GiB"
+
+
+def test_history_figures_come_from_deep_memory_usage():
+    facade = PandasFacade()
+    facade.add_records([{"operation": "add", "num1": "1", "num2": str(n), "result": str(n + 1)} for n in range(100)])
+    report = collect_memory_report(facade)
+    assert report.history["rows"] == 100
+    assert report.history["bytes"] == facade.memory_usage()
+    assert report.history["bytes_per_row"] == pytest.approx(facade.memory_usage() / 100)
+    assert set(report.history_columns) >= {"operation", "num1", "num2", "result"}
+    assert report.caches["rollup operations"] == 1
+    assert "decoded history bytes" not in report.caches
+    facade.dataframe
+    assert collect_memory_report(facade).caches["decoded history bytes"] > 0
+    assert "100 resident rows" in report.summary() and "tracing is off" in report.summary()
+
+
+def test_live_commands_are_counted():
+    commands = [AddCommand(Decimal(n), Decimal(1)) for n in range(50)] + [MeanCommand(*[Decimal(1)] * 10)]
+    counts = command_memory()
+    assert counts["AddCommand"][0] >= 50 and counts["MeanCommand"][0] >= 1
+    assert counts["MeanCommand"][1] > counts["AddCommand"][1] / counts["AddCommand"][0]
+    del commands
+
+
+def test_traced_allocations_are_attributed_to_the_calling_subsystem(tracing):
+    facade = PandasFacade()
+    facade.add_records([{"operation": "add", "num1": "1", "num2": "2", "result": "3"}] * 500)
+    subsystems = allocations_by_subsystem(take_snapshot())
+    # pandas made the allocations, on behalf of the history
+    assert subsystems.get("history", 0) > 4_000
+    report = collect_memory_report(facade, top=3)
+    assert report.traced is not None and len(report.top_sites) == 3
+    assert "Top allocation sites" in report.summary()
+
+
+def test_monitor_reports_growth_and_suspects_leaks(tracing, caplog):
+    monitor = MemoryMonitor(interval=60, keep=3)
+    leak = []
+    for _ in range(3):
+        leak.append(bytearray(200_000))
+        monitor.sample()
+    assert monitor.leak_suspected()
+    assert "grew in each of the last 3 samples" in caplog.text
+    growth = monitor.growth(top=1)
+    assert growth and growth[0].size_diff >= 400_000 and growth[0].traceback[-1].filename == __file__
+    leak.clear()
+    monitor.sample()
+    assert not monitor.leak_suspected()
+    with pytest.raises(ValueError):
+        MemoryMonitor(keep=1)
+
+
+def test_monitor_thread_starts_and_stops_tracing():
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc is already tracing")
+    monitor = MemoryMonitor(interval=0.01)
+    monitor.start()
+    assert tracemalloc.is_tracing() and monitor.running
+    monitor.stop()
+    assert not tracemalloc.is_tracing() and not monitor.running and len(monitor.samples) >= 1
+
+
+def test_format_bytes_units():
+    assert [format_bytes(size) for size in (512, 1536, 3 * 2 ** 20, 5 * 2 ** 30, 2 ** 42)] == [
+        "512 B", "1.5 KiB", "3.0 MiB", "5.0 GiB", "4096.0 GiB"]
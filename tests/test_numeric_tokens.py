@@ -0,0 +1,93 @@
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pytest
+
+from app.numeric_tokens import MalformedNumber, parse_decimal_tokens, parse_decimals, parse_floats, tokenize
+from main import execute_calculation
+
+
+def test_tokenize_splits_on_whitespace_and_commas():
+    assert tokenize("mean 1, 2.5\t3\n4,,5", start=4) == ["1", "2.5", "3", "4", "5"]
+    assert tokenize("  ") == []
+
+
+def test_parse_decimals_keeps_numbers_exact():
+    assert parse_decimals("0.1, 0.20 -3e2") == [Decimal("0.1"), Decimal("0.20"), Decimal("-3E+2")]
+    assert parse_decimal_tokens(["1", "2.50"]) == [Decimal(1), Decimal("2.50")]
+
+
+def test_parse_floats_returns_an_array():
+    values = parse_floats("1 -2.5e3, .5 inf")
+    assert values.dtype == np.float64
+    assert values.tolist() == [1.0, -2500.0, 0.5, float("inf")]
+    assert parse_floats("").size == 0
+
+
+VALID_TOKENS = ["0", "-12", "+3.", ".5", "1.25e-3", "4E+2", "007", "inf", "-Infinity", "NaN", "+nan"]
+INVALID_TOKENS = ["1_000", "sNaN", "nan5", "nan(1)", "0x10", "\u0663", "1e", ".", "e5", "1.5.5", "1-2", "infinit"]
+
+
+@pytest.mark.parametrize("parse", [parse_decimals, parse_floats])
+def test_parsers_share_one_grammar(parse):
+    values = [float(value) for value in parse(" ".join(VALID_TOKENS))]
+    expected = [float(token) for token in VALID_TOKENS]
+    assert np.array_equal(values, expected, equal_nan=True)
+    for token in INVALID_TOKENS:
+        with pytest.raises(MalformedNumber) as error:
+            parse(f"1, {token} 2")
+        assert (error.value.token, error.value.index) == (token, 1)
+
+
+def test_token_lists_share_the_grammar():
+    assert parse_decimal_tokens(VALID_TOKENS)[4] == Decimal("0.00125")
+    for token in INVALID_TOKENS + [" 1"]:
+        with pytest.raises(MalformedNumber):
+            parse_decimal_tokens(["1", token])
+
+
+def test_unusual_whitespace_still_separates_numbers():
+    assert parse_floats("1\u00a02").tolist() == [1.0, 2.0]
+    assert parse_decimals("1\u20032") == [Decimal(1), Decimal(2)]
+
+
+@pytest.mark.parametrize("parse", [parse_decimals, parse_floats])
+def test_malformed_tokens_are_located(parse):
+    with pytest.raises(MalformedNumber) as error:
+        parse("stddev 1 2x3 4", start=6)
+    assert (error.value.token, error.value.index, error.value.line, error.value.column) == ("2x3", 1, None, 10)
+    with pytest.raises(MalformedNumber, match="'x' is not a valid number at line 2, column 3"):
+        parse("1 2\n3 x\n5")
+    # Existing handlers of Decimal's error keep catching it
+    with pytest.raises(InvalidOperation):
+        parse("1 .")
+
+
+def test_malformed_token_in_a_token_list():
+    with pytest.raises(MalformedNumber, match=r"'y' is not a valid number \(number 2\)"):
+        parse_decimal_tokens(["1", "y"])
+
+
+def test_repl_statistics_report_the_bad_column(capsys):
+    execute_calculation("stddev 2 4 4 4 5 5 7 9")
+    assert "The standard deviation of 2, 4, 4, 4, 5, 5, 7, 9 is 2.138089935299395" in capsys.readouterr().out
+    execute_calculation("mean 1 2 three")
+    assert "Invalid input: 'three' is not a valid number at column 10." in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("text", ["", " ", "\n", " , ,"])
+def test_blank_text_has_no_numbers(text):
+    assert parse_floats(text).size == 0
+    assert parse_decimals(text) == []
+
+
+def test_blank_vectors_are_empty(tmp_path, capsys):
+    from app.vector_operands import parse_operand
+    assert parse_operand("[ ]").size == 0
+    path = tmp_path / "empty.txt"
+    path.write_text("\n")
+    assert parse_operand(f"@{path}").size == 0
+    execute_calculation("add [ ] 5")
+    assert "is []" in capsys.readouterr().out
+    execute_calculation("mode , ,")
+    assert "Mode calculation failed" in capsys.readouterr().out
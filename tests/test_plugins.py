@@ -131,3 +131,18 @@ def test_mode_negative_values():
     result = command.execute()
     assert result == Decimal('-5.0')
 
+
+
+# Test that plugin commands are slot-based
+@pytest.mark.parametrize("command", [
+    AddCommand(Decimal('1'), Decimal('2')),
+    DivideCommand(Decimal('1'), Decimal('2')),
+    MultiplyCommand(Decimal('1'), Decimal('2')),
+    SubtractCommand(Decimal('1'), Decimal('2')),
+    MeanCommand(Decimal('1'), Decimal('2')),
+    StdDevCommand(Decimal('1'), Decimal('2')),
+    ModeCommand(Decimal('1'), Decimal('2')),
+])
+def test_plugin_has_no_instance_dict(command):
+    assert not hasattr(command, '__dict__')
+    assert command.result == command.execute()
@@ -0,0 +1,40 @@
+import pstats
+import pytest
+from app.profiling import parse_profile_arguments, profile_calls
+
+
+def test_parse_profile_arguments():
+    options = parse_profile_arguments(["-n", "50", "-o", "add.prof", "--top", "5", "--sort", "tottime", "add", "5", "3"])
+    assert options.command == ["add", "5", "3"]
+    assert (options.repeat, options.output, options.top, options.sort) == (50, "add.prof", 5, "tottime")
+    defaults = parse_profile_arguments(["--", "subtract", "-1", "2"])
+    assert defaults.command == ["subtract", "-1", "2"] and defaults.repeat == 1 and defaults.output is None
+
+
+@pytest.mark.parametrize("words,message", [([], "Nothing to profile"), (["-n", "0", "add"], "at least 1"),
+                                           (["-n", "x", "add"], "whole number"), (["--sort", "name", "add"], "sort key"),
+                                           (["--fast", "1", "add"], "Unknown option"), (["add", "-o"], None)])
+def test_parse_profile_arguments_rejects_bad_input(words, message):
+    if message is None:
+        # Options end at the command; what follows belongs to it
+        assert parse_profile_arguments(words).command == ["add", "-o"]
+        return
+    with pytest.raises(ValueError, match=message):
+        parse_profile_arguments(words)
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_profile_calls_accumulates_repetitions(tmp_path):
+    report = profile_calls(lambda: busy(1000), repeat=4)
+    assert report.repeat == 4 and report.elapsed > 0
+    table = report.hot_functions(top=3)
+    assert table.startswith("Profiled 4 run(s)") and "busy" in table
+    path = str(tmp_path / "busy.prof")
+    report.dump(path)
+    calls = {function[2]: stats[0] for function, stats in pstats.Stats(path).stats.items()}
+    assert calls["busy"] == 4
+    with pytest.raises(ValueError):
+        profile_calls(busy, repeat=0)
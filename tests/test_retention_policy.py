@@ -0,0 +1,155 @@
+import os
+import pandas as pd
+import pytest
+from decimal import Decimal
+from app.pandas_facade import PandasFacade
+from app.retention_policy import RetentionPolicy, HistorySpill
+
+
+def make_record(index, operation="add"):
+    return {"operation": operation, "num1": str(index), "num2": "1", "result": str(index + 1)}
+
+
+def test_unbounded_by_default():
+    facade = PandasFacade()
+    for i in range(20):
+        facade.add_record(make_record(i))
+    assert len(facade.dataframe) == 20
+
+
+def test_max_rows_drops_oldest():
+    facade = PandasFacade(RetentionPolicy(max_rows=3))
+    for i in range(5):
+        facade.add_record(make_record(i))
+    assert len(facade.dataframe) == 3
+    assert list(facade.dataframe["num1"]) == [Decimal("2"), Decimal("3"), Decimal("4")]
+    assert len(facade.get_all_records()) == 3
+
+
+def test_max_age_evicts_expired_rows():
+    facade = PandasFacade()
+    facade.add_record(make_record(0))
+    facade.add_record(make_record(1))
+    facade.set_policy(RetentionPolicy(max_age=0))
+    assert facade.dataframe.empty
+
+
+def test_max_bytes_limits_resident_memory():
+    facade = PandasFacade(RetentionPolicy(max_bytes=2000))
+    for i in range(100):
+        facade.add_record(make_record(i))
+    assert 0 < len(facade.dataframe) < 100
+    assert facade.memory_usage() <= 2500
+
+
+def test_max_bytes_counts_overflow_values():
+    facade = PandasFacade(RetentionPolicy(max_bytes=4000))
+    facade.add_records([{"operation": "divide", "num1": str(i + 1), "num2": "7", "result": Decimal(i + 1) / Decimal(7)}
+                        for i in range(200)])
+    assert facade.snapshot().overflow_bytes > 0
+    assert 0 < len(facade.dataframe) < 200
+    assert facade.memory_usage() <= 4500
+    assert facade.dataframe["result"].iloc[-1] == Decimal(200) / Decimal(7)
+
+
+def test_spilled_rows_remain_queryable(tmp_path):
+    spill_path = str(tmp_path / "spill.csv")
+    facade = PandasFacade(RetentionPolicy(max_rows=2, spill_path=spill_path))
+    for i in range(6):
+        facade.add_record(make_record(i, "add" if i % 2 == 0 else "subtract"))
+
+    assert len(facade.dataframe) == 2
+    assert len(facade.spill) == 4
+    everything = facade.get_all_records()
+    assert list(everything["num1"]) == [Decimal(i) for i in range(6)]
+    assert list(facade.filter_operations("add")["num1"]) == [Decimal("0"), Decimal("2"), Decimal("4")]
+
+
+def test_spill_widens_header_for_new_columns(tmp_path):
+    spill = HistorySpill(str(tmp_path / "spill.csv"))
+    facade = PandasFacade(RetentionPolicy(max_rows=1, spill_path=spill.path))
+    for record in (make_record(0), make_record(1), {"operation": "mean", "numbers": "1, 2, 3", "result": "2"},
+                   make_record(3)):
+        facade.add_record(record)
+        facade.flush()
+    assert len(facade.dataframe) == 1
+    spilled = facade.spill.read()
+    assert list(spilled["operation"]) == ["add", "add", "mean"]
+    assert spilled["numbers"].tolist() == ["", "", "1, 2, 3"]
+
+    # The widened rows went to a segment of their own; the first one was not rewritten
+    assert "numbers" not in (tmp_path / "spill.csv").read_text()
+    assert (tmp_path / "spill.csv.1").exists()
+    reopened = HistorySpill(spill.path)
+    assert len(reopened) == 3
+    assert list(reopened.filter_operations("add")["num1"]) == ["0", "1"]
+    reopened.clear()
+    assert not (tmp_path / "spill.csv.1").exists()
+
+
+def test_clear_removes_spill(tmp_path):
+    spill_path = tmp_path / "spill.csv"
+    facade = PandasFacade(RetentionPolicy(max_rows=1, spill_path=str(spill_path)))
+    for i in range(3):
+        facade.add_record(make_record(i))
+    facade.clear_data()
+    assert not spill_path.exists()
+    assert facade.get_all_records().empty
+
+
+def test_policy_from_environment():
+    policy = RetentionPolicy.from_environment({"HISTORY_MAX_ROWS": "10", "HISTORY_MAX_AGE": "1.5"})
+    assert policy.max_rows == 10
+    assert policy.max_age == 1.5
+    assert policy.max_bytes is None
+    assert policy.spill_path is None
+
+
+def test_negative_limit_rejected():
+    with pytest.raises(ValueError, match="max_rows must not be negative"):
+        RetentionPolicy(max_rows=-1)
+
+
+def spilled_facade(tmp_path):
+    facade = PandasFacade(RetentionPolicy(max_rows=2, spill_path=str(tmp_path / "spill.csv")))
+    for i in range(5):
+        facade.add_record(make_record(i))
+    facade.snapshot()
+    assert len(facade.spill) == 3
+    return facade
+
+
+def test_replacing_the_history_discards_spilled_rows(tmp_path):
+    csv_path = tmp_path / "loaded.csv"
+    csv_path.write_text("operation,num1,num2,result\nmultiply,2,3,6\n")
+    facade = spilled_facade(tmp_path)
+    facade.load_from_csv(str(csv_path))
+    assert list(facade.get_all_records()["operation"]) == ["multiply"]
+    assert facade.operation_stats().index.get_level_values("operation").unique().tolist() == ["multiply"]
+
+    facade = spilled_facade(tmp_path)
+    facade.replace_records(pd.DataFrame([make_record(9, "subtract")]))
+    assert list(facade.get_all_records()["operation"]) == ["subtract"]
+
+    from app.mapped_history import MappedHistory
+    MappedHistory.convert_csv(str(csv_path), str(tmp_path / "mapped"))
+    facade = spilled_facade(tmp_path)
+    facade.load_mapped(str(tmp_path / "mapped"))
+    assert list(facade.get_all_records()["operation"]) == ["multiply"]
+
+
+def test_replacing_load_spills_its_own_rows(tmp_path):
+    csv_path = tmp_path / "loaded.csv"
+    csv_path.write_text("operation,num1,num2,result,timestamp\n" +
+                        "".join(f"multiply,{i},2,{2 * i},{1700000000 + i}\n" for i in range(3)))
+    facade = spilled_facade(tmp_path)
+    facade.load_from_csv(str(csv_path))
+    assert len(facade.spill) == 1
+    assert list(facade.get_all_records()["num1"]) == [Decimal(0), Decimal(1), Decimal(2)]
+
+    # A malformed file leaves the history, spilled rows included, as it was
+    csv_path.write_text("operation,num1,num2,result,timestamp\nadd,1,2,3,never\n")
+    with pytest.raises(ValueError):
+        facade.load_from_csv(str(csv_path))
+    assert len(facade.get_all_records()) == 3
+    assert not os.path.exists(facade.spill.path + ".loading")
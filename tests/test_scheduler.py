@@ -0,0 +1,134 @@
+import threading
+import time
+import pytest
+from decimal import Decimal
+from app.command import AddCommand, CommandTimeout
+from app.dispatcher import INLINE, THREAD, AdaptiveDispatcher
+from app.scheduler import BULK, DROP, INTERACTIVE, NORMAL, JobScheduler, SchedulerFull
+
+
+class RecordingDispatcher:
+    """Runs jobs by name, holding 'gate' jobs until released."""
+
+    last_mode = None
+
+    def __init__(self):
+        self.order = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def run(self, command, timeout=None):
+        if command == "gate":
+            self.started.set()
+            self.release.wait(5)
+        self.order.append((command, threading.current_thread().name))
+        return command
+
+
+def blocked_scheduler(**options):
+    dispatcher = RecordingDispatcher()
+    scheduler = JobScheduler(dispatcher, concurrency=1, **options)
+    gate = scheduler.submit("gate")
+    assert dispatcher.started.wait(5)
+    return scheduler, dispatcher, gate
+
+
+def test_most_urgent_class_runs_first():
+    scheduler, dispatcher, gate = blocked_scheduler()
+    futures = [scheduler.submit("bulk 1", BULK), scheduler.submit("bulk 2", BULK),
+               scheduler.submit("normal", NORMAL), scheduler.submit("interactive", INTERACTIVE)]
+    dispatcher.release.set()
+    assert [future.result(5) for future in futures] == ["bulk 1", "bulk 2", "normal", "interactive"]
+    assert [name for name, _ in dispatcher.order] == ["gate", "interactive", "normal", "bulk 1", "bulk 2"]
+    scheduler.shutdown()
+
+
+def test_full_queues_push_back():
+    scheduler, dispatcher, gate = blocked_scheduler(capacity={INTERACTIVE: 5, NORMAL: 5, BULK: 2})
+    scheduler.submit("bulk 1", BULK)
+    scheduler.submit("bulk 2", BULK)
+    assert scheduler.pressure(BULK) == 1.0
+    with pytest.raises(SchedulerFull):
+        scheduler.submit("bulk 3", BULK, block=False)
+    started = time.monotonic()
+    with pytest.raises(SchedulerFull):
+        scheduler.submit("bulk 3", BULK, wait=0.1)
+    assert time.monotonic() - started >= 0.1
+    assert scheduler.rejected == 2
+    # Other classes keep their own room
+    interactive = scheduler.submit("interactive", INTERACTIVE, block=False)
+    # A blocked producer resumes once a worker takes a job
+    threading.Timer(0.1, dispatcher.release.set).start()
+    assert scheduler.submit("bulk 3", BULK, wait=5).result(5) == "bulk 3"
+    assert interactive.result(5) == "interactive"
+    scheduler.shutdown()
+
+
+def test_expired_jobs_fail_or_drop():
+    scheduler, dispatcher, gate = blocked_scheduler()
+    late = scheduler.submit("late", timeout=0.05)
+    time.sleep(0.1)
+    dispatcher.release.set()
+    assert isinstance(late.result(5), CommandTimeout)
+    assert scheduler.expired == 1
+    scheduler.shutdown()
+
+    scheduler, dispatcher, gate = blocked_scheduler(on_expire=DROP)
+    late = scheduler.submit("late", timeout=0.05)
+    time.sleep(0.1)
+    dispatcher.release.set()
+    gate.result(5)
+    scheduler.shutdown(cancel_pending=False)
+    assert late.cancelled()
+    assert "late" not in [name for name, _ in dispatcher.order]
+
+
+def test_run_uses_the_calling_thread_when_idle():
+    dispatcher = RecordingDispatcher()
+    scheduler = JobScheduler(dispatcher, concurrency=1)
+    assert scheduler.run("direct") == "direct"
+    assert dispatcher.order == [("direct", threading.current_thread().name)]
+    assert scheduler.completed == 1
+
+
+def test_shutdown_cancels_queued_jobs():
+    scheduler, dispatcher, gate = blocked_scheduler()
+    queued = scheduler.submit("queued", BULK)
+    threading.Timer(0.1, dispatcher.release.set).start()
+    scheduler.shutdown()
+    assert queued.cancelled()
+    assert gate.result() == "gate"
+    with pytest.raises(RuntimeError, match="shut down"):
+        scheduler.submit("after", BULK)
+
+
+def test_scheduler_executes_commands_through_the_dispatcher():
+    scheduler = JobScheduler(AdaptiveDispatcher(), concurrency=2)
+    futures = [scheduler.submit(AddCommand(Decimal(i), Decimal(1)), BULK) for i in range(10)]
+    assert [future.result(5) for future in futures] == [Decimal(i + 1) for i in range(10)]
+    assert scheduler.run(AddCommand(Decimal("5"), Decimal("3"))) == Decimal("8")
+    scheduler.shutdown()
+
+
+def test_run_reports_the_mode_the_dispatcher_used():
+    dispatcher = AdaptiveDispatcher()
+    scheduler = JobScheduler(dispatcher, concurrency=1)
+    assert scheduler.run(AddCommand(Decimal("5"), Decimal("3"))) == Decimal("8")
+    assert dispatcher.last_mode == INLINE
+    dispatcher.override(AddCommand, THREAD)
+    assert scheduler.run(AddCommand(Decimal("5"), Decimal("3"))) == Decimal("8")
+    assert dispatcher.last_mode == THREAD
+    # A queued command runs on a scheduler thread; its mode is still reported to the caller
+    release = threading.Event()
+    blocker = threading.Thread(target=lambda: scheduler.run(AddCommand(Decimal(1), Decimal(1))))
+    dispatcher.override(AddCommand, INLINE)
+    original = dispatcher.run
+    dispatcher.run = lambda command, timeout=None: (release.wait(5), original(command, timeout))[1]
+    blocker.start()
+    time.sleep(0.1)
+    dispatcher.last_mode = None
+    threading.Timer(0.1, release.set).start()
+    assert scheduler.run(AddCommand(Decimal("2"), Decimal("2"))) == Decimal("4")
+    assert dispatcher.last_mode == INLINE
+    blocker.join(5)
+    scheduler.shutdown()
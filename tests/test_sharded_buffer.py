@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from app import Calculator
+from app.calculations import Calculations
+from app.pandas_facade import PandasFacade
+from app.sharded_buffer import ShardedAppendBuffer
+
+
+def test_drain_returns_items_in_append_order():
+    buffer = ShardedAppendBuffer()
+    for i in range(5):
+        buffer.append(i)
+    assert len(buffer) == 5
+    assert buffer.drain() == [0, 1, 2, 3, 4]
+    assert len(buffer) == 0
+
+
+def test_append_reports_pending_count_of_own_shard():
+    buffer = ShardedAppendBuffer()
+    assert buffer.append("a") == 1
+    assert buffer.append("b") == 2
+    worker = threading.Thread(target=lambda: buffer.append("c"))
+    worker.start()
+    worker.join()
+    assert len(buffer) == 3
+    assert sorted(buffer.drain()) == ["a", "b", "c"]
+
+
+def test_finished_threads_release_their_shards():
+    buffer = ShardedAppendBuffer()
+    threads = [threading.Thread(target=buffer.append, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(buffer.drain()) == [0, 1, 2, 3]
+    assert buffer._shards == []
+
+
+def test_concurrent_writers_lose_no_records():
+    facade = PandasFacade()
+    writers, per_writer = 8, 400
+
+    def write(writer):
+        for i in range(per_writer):
+            facade.add_record({"operation": f"op{writer}", "num1": i, "num2": 1, "result": i + 1})
+
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        list(pool.map(write, range(writers)))
+
+    history = facade.dataframe
+    assert len(history) == writers * per_writer
+    for writer in range(writers):
+        rows = facade.filter_operations(f"op{writer}")
+        assert list(rows["num1"]) == [Decimal(i) for i in range(per_writer)]
+
+
+def test_readers_see_complete_snapshots():
+    facade = PandasFacade()
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        while not stop.is_set():
+            snapshot = facade.snapshot()
+            if len(snapshot.frame) != len(snapshot.timestamps):
+                errors.append(len(snapshot.frame))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(300):
+        facade.add_record({"operation": "add", "num1": i, "num2": 0, "result": i})
+    stop.set()
+    reader.join()
+    assert not errors
+    assert len(facade.dataframe) == 300
+
+
+def test_writers_read_their_records_during_another_merge(monkeypatch):
+    facade = PandasFacade()
+    append = facade._append
+    drained = threading.Event()
+
+    def slow_append(*args, **kwargs):
+        drained.set()
+        threading.Event().wait(0.2)
+        return append(*args, **kwargs)
+
+    monkeypatch.setattr(facade, "_append", slow_append)
+    facade.add_record({"operation": "add", "num1": 1, "num2": 1, "result": 2})
+    merger = threading.Thread(target=facade.flush)
+    merger.start()
+    drained.wait()
+    assert len(facade.snapshot().frame) == 1
+    merger.join()
+
+
+def test_calculator_perform_from_thread_pool():
+    Calculations.clear_calculations()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda i: Calculator.add(Decimal(i), Decimal(1)), range(200)))
+    assert results == [Decimal(i + 1) for i in range(200)]
+    assert len(Calculations.get_all_calculations()) == 200
+    Calculations.clear_calculations()
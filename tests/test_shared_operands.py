@@ -0,0 +1,80 @@
+import multiprocessing
+import pickle
+import queue
+import numpy as np
+import pytest
+from decimal import Decimal
+from multiprocessing import shared_memory
+from app.command import Command
+from app.plugins.mean_command import MeanCommand
+from app.plugins.standard_deviation_command import StdDevCommand
+from app.shared_operands import SharedArray, SharedOperands
+
+
+def is_released(name):
+    try:
+        shared_memory.SharedMemory(name=name).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+
+def test_shared_operands_keep_decimals_exact():
+    shared = SharedOperands.create([Decimal("1.25"), Decimal("-3"), Decimal("1E+2")])
+    try:
+        assert list(shared) == [Decimal("1.25"), Decimal("-3"), Decimal("100")]
+        assert shared.exact_sum() == Decimal("98.25")
+        assert shared.floats().tolist() == [1.25, -3.0, 100.0]
+    finally:
+        shared.release()
+    assert is_released(shared.mantissas.name)
+
+
+@pytest.mark.parametrize("numbers", [[Decimal("NaN")], [Decimal("1E+30")], [Decimal("0.123456789")]])
+def test_unrepresentable_operands_are_not_shared(numbers):
+    assert SharedOperands.create(numbers) is None
+    assert not MeanCommand(*numbers).share_operands(threshold=0)
+
+
+def test_shared_command_pickles_as_a_handle():
+    numbers = [Decimal(i) / 4 for i in range(20000)]
+    command = MeanCommand(*numbers)
+    assert command.share_operands()
+    try:
+        assert len(pickle.dumps(command)) < 1000
+        assert command.execute() == MeanCommand(*numbers).execute()
+        assert StdDevCommand(*numbers).execute() == pickle.loads(pickle.dumps(StdDevCommand(*numbers))).execute()
+    finally:
+        command.release_operands()
+
+
+def test_spawned_worker_reads_shared_operands():
+    numbers = [Decimal(i) / 8 for i in range(20000)]
+    command = MeanCommand(*numbers)
+    command.share_operands()
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    process = context.Process(target=command.execute_in_process, args=(result_queue,))
+    process.start()
+    result = Command.receive_result(result_queue.get(timeout=60))
+    process.join()
+    command.release_operands()
+    assert result == sum(numbers) / len(numbers)
+    assert is_released(command.numbers.mantissas.name)
+
+
+class RangeCommand(Command):
+    __slots__ = ()
+
+    def execute(self):
+        return np.arange(Command.SHARED_RESULT_SIZE, dtype="float64")
+
+
+def test_large_array_results_travel_through_shared_memory():
+    result_queue = queue.Queue()
+    RangeCommand().execute_in_process(result_queue)
+    handle = result_queue.get()
+    assert isinstance(handle, SharedArray)
+    result = Command.receive_result(handle)
+    assert result[-1] == Command.SHARED_RESULT_SIZE - 1
+    assert is_released(handle.name)
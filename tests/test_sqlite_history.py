@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import sqlite3
+import subprocess
+import sys
+import pandas as pd
+import pytest
+from decimal import Decimal
+from app.pandas_facade import PandasFacade
+from app.sqlite_history import SQLiteHistoryBackend
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteHistoryBackend(str(tmp_path / "history.db"))
+    yield backend
+    backend.close()
+
+
+def test_database_uses_wal_and_indexes(backend):
+    connection = backend._connection()
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row[1] for row in connection.execute("PRAGMA index_list(history)")}
+    assert {"history_timestamp", "history_operation"} <= indexes
+
+
+def test_records_round_trip_exactly(backend):
+    facade = PandasFacade(backend=backend)
+    facade.add_record({"operation": "divide", "num1": Decimal("1"), "num2": Decimal("3"),
+                       "result": Decimal("0.3333333333333333333333333333")})
+    facade.add_record({"operation": "mean", "numbers": "1, 2", "result": "1.5"})
+    records = facade.get_all_records()
+    assert records.at[0, "result"] == Decimal("0.3333333333333333333333333333")
+    assert records.at[1, "numbers"] == "1, 2"
+    assert pd.isna(records.at[1, "num1"])
+    assert facade.get_latest_record()["operation"] == "mean"
+    assert facade.dataframe.equals(records)
+
+
+def test_queries_use_the_database(backend):
+    facade = PandasFacade(backend=backend)
+    facade.add_records([{"operation": operation, "num1": "1", "num2": "2", "result": "3", "timestamp": float(t)}
+                        for t, operation in enumerate(["add", "subtract", "add"])])
+    assert list(facade.filter_operations("add")["timestamp"]) == [0.0, 2.0]
+    assert list(facade.filter_by_time(1, 2)["operation"]) == ["subtract", "add"]
+    assert facade.aggregate_by_time(60)["count"].iloc[0] == 3
+    facade.remove_record(0)
+    assert list(facade.get_all_records()["operation"]) == ["subtract", "add"]
+    facade.clear_data()
+    assert len(backend) == 0
+
+
+def append_from_process(path, worker):
+    facade = PandasFacade(backend=SQLiteHistoryBackend(path))
+    for i in range(50):
+        facade.add_record({"operation": "add", "num1": str(worker), "num2": str(i), "result": str(worker + i)})
+    facade.snapshot()
+
+
+def test_processes_share_one_history(backend):
+    workers = [multiprocessing.Process(target=append_from_process, args=(backend.path, worker)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert len(backend) == 200
+    assert len(backend.filter_operations("add")) == 200
+
+
+def test_records_reach_the_database_before_the_process_exits(tmp_path):
+    path = str(tmp_path / "history.db")
+    main_py = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+    environment = dict(os.environ, HISTORY_DATABASE=path)
+    subprocess.run([sys.executable, main_py, "5", "3", "add"], cwd=tmp_path, env=environment, check=True,
+                   capture_output=True, timeout=60)
+    subprocess.run([sys.executable, main_py], cwd=tmp_path, env=environment, check=True, capture_output=True,
+                   input="add 1 2\nmultiply 3 4\nexit\n", text=True, timeout=60)
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute("SELECT operation FROM history ORDER BY timestamp").fetchall()
+    assert rows == [("add",), ("add",), ("multiply",)]
+
+
+def test_added_records_are_visible_to_other_connections(backend):
+    PandasFacade(backend=backend).add_record({"operation": "add", "num1": "1", "num2": "2", "result": "3"})
+    other = SQLiteHistoryBackend(backend.path)
+    assert len(other) == 1
+    other.close()
+
+
+def test_malformed_load_keeps_the_stored_history(backend, tmp_path):
+    facade = PandasFacade(backend=backend)
+    facade.add_records([{"operation": "add", "num1": "1", "num2": str(n), "result": str(n + 1)} for n in range(3)])
+    bad = tmp_path / "bad.csv"
+    bad.write_text("operation,num1,num2,result,timestamp\nmultiply,2,3,6,1\nadd,1,2,3,never\n")
+    with pytest.raises(ValueError):
+        facade.load_from_csv(str(bad))
+    assert len(backend) == 3
+    assert backend._connection().execute("SELECT COUNT(*) FROM temp.history_staging").fetchone()[0] == 0
+
+    good = tmp_path / "good.csv"
+    good.write_text("operation,num1,num2,result,timestamp\nmultiply,2,3,6,1\nsubtract,5,3,2,2\n")
+    facade.load_from_csv(str(good))
+    assert list(facade.get_all_records()["operation"]) == ["multiply", "subtract"]
+    facade.load_from_csv(str(good), merge=True)
+    assert len(backend) == 4
@@ -0,0 +1,127 @@
+import os
+import queue
+import time
+import pytest
+from decimal import Decimal
+from app.command import AddCommand, Command, CommandError, CommandTimeout, DivideCommand
+from app.dispatcher import AdaptiveDispatcher, PROCESS, THREAD
+from app.supervisor import WorkerSupervisor
+
+
+class CrashingCommand(Command):
+    __slots__ = ()
+
+    def execute(self):
+        os._exit(3)
+
+
+class HangingCommand(Command):
+    __slots__ = ()
+    timeout = 0.5
+
+    def execute(self):
+        time.sleep(60)
+
+
+class BrokenCommand(Command):
+    __slots__ = ()
+
+    def execute(self):
+        raise KeyError("missing operand")
+
+
+class PidCommand(Command):
+    __slots__ = ()
+
+    def execute(self):
+        return os.getpid()
+
+
+def refuse_unpickling():
+    raise RuntimeError("cannot rebuild the result")
+
+
+class Unreadable:
+    def __reduce__(self):
+        return refuse_unpickling, ()
+
+
+class UnreadableCommand(Command):
+    __slots__ = ()
+
+    def execute(self):
+        return Unreadable()
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = WorkerSupervisor(max_workers=1, grace=0.2)
+    yield supervisor
+    supervisor.shutdown()
+
+
+def test_workers_are_reused(supervisor):
+    assert supervisor.run(AddCommand(Decimal("5"), Decimal("3")))[0] == Decimal("8")
+    error, _ = supervisor.run(DivideCommand(Decimal("1"), Decimal("0")))
+    assert isinstance(error, ValueError)
+    assert supervisor.run(PidCommand())[0] == supervisor.run(PidCommand())[0]
+    assert supervisor.worker_count == 1
+
+
+def test_crashed_worker_is_reported_and_replaced(supervisor):
+    first_pid = supervisor.run(PidCommand())[0]
+    error, _ = supervisor.run(CrashingCommand())
+    assert isinstance(error, CommandError) and "exit code 3" in str(error)
+    assert supervisor.crashes == 1
+    assert supervisor.run(PidCommand())[0] != first_pid
+    assert supervisor.worker_count == 1
+
+
+def test_hung_worker_is_killed_at_its_deadline(supervisor):
+    started = time.monotonic()
+    error, waited = supervisor.run(HangingCommand())
+    assert isinstance(error, CommandTimeout)
+    assert 0.5 <= waited < 2 and time.monotonic() - started < 3
+    assert supervisor.timeouts == 1
+    assert supervisor.run(AddCommand(Decimal("1"), Decimal("1")))[0] == Decimal("2")
+
+
+def test_unreadable_result_replaces_the_worker(supervisor):
+    first_pid = supervisor.run(PidCommand())[0]
+    error, _ = supervisor.run(UnreadableCommand())
+    assert isinstance(error, CommandError) and "cannot rebuild the result" in str(error)
+    assert supervisor.run(PidCommand())[0] != first_pid
+    assert supervisor.worker_count == 1
+
+
+def test_result_conversion_errors_do_not_replace_the_worker(supervisor, monkeypatch):
+    first_pid = supervisor.run(PidCommand())[0]
+
+    def missing_block(result):
+        raise FileNotFoundError("shared block already released")
+
+    monkeypatch.setattr(Command, "receive_result", staticmethod(missing_block))
+    with pytest.raises(FileNotFoundError):
+        supervisor.run(PidCommand())
+    monkeypatch.undo()
+    assert supervisor.crashes == 0
+    assert supervisor.run(PidCommand())[0] == first_pid
+
+
+def test_unexpected_exceptions_are_reported_not_raised(supervisor):
+    error, _ = supervisor.run(BrokenCommand())
+    assert isinstance(error, CommandError) and "KeyError" in str(error)
+    result_queue = queue.Queue()
+    BrokenCommand().execute_in_process(result_queue)
+    assert isinstance(result_queue.get_nowait(), CommandError)
+
+
+def test_dispatcher_abandons_threads_at_the_deadline():
+    dispatcher = AdaptiveDispatcher(timeout=0.2, supervisor=WorkerSupervisor(max_workers=1, grace=0.2))
+    dispatcher.override(HangingCommand, THREAD)
+    started = time.monotonic()
+    assert isinstance(dispatcher.run(HangingCommand()), CommandTimeout)
+    assert time.monotonic() - started < 2
+    dispatcher.override(HangingCommand, None)
+    assert dispatcher.choose(HangingCommand()) == PROCESS
+    dispatcher.shutdown()
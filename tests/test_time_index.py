@@ -0,0 +1,92 @@
+import pandas as pd
+import pytest
+from decimal import Decimal
+from app.calculation import Calculation
+from app.calculations import Calculations
+from app.operations import add
+from app.pandas_facade import PandasFacade, history_time
+from app.retention_policy import RetentionPolicy
+
+
+def record(timestamp, operation="add", duration=None):
+    entry = {"operation": operation, "num1": "1", "num2": "2", "result": "3", "timestamp": timestamp}
+    if duration is not None:
+        entry["duration"] = duration
+    return entry
+
+
+def test_records_are_stamped_in_order():
+    facade = PandasFacade()
+    before = history_time()
+    facade.add_record({"operation": "add", "num1": "1", "num2": "2", "result": "3"})
+    facade.add_record({"operation": "add", "num1": "2", "num2": "2", "result": "4"})
+    timestamps = list(facade.dataframe["timestamp"])
+    assert before <= timestamps[0] <= timestamps[1] <= history_time()
+
+
+def test_out_of_order_records_are_sorted():
+    facade = PandasFacade()
+    facade.add_records([record(30.0), record(10.0), record(20.0)])
+    facade.add_record(record(5.0))
+    assert list(facade.dataframe["timestamp"]) == [5.0, 10.0, 20.0, 30.0]
+
+
+def test_filter_by_time_is_inclusive():
+    facade = PandasFacade()
+    facade.add_records([record(float(t)) for t in range(0, 100, 10)])
+    assert list(facade.filter_by_time(20.0, 50.0)["timestamp"]) == [20.0, 30.0, 40.0, 50.0]
+    assert list(facade.filter_by_time(start=85.0)["timestamp"]) == [90.0]
+    assert list(facade.filter_by_time(end=5.0)["timestamp"]) == [0.0]
+    assert facade.filter_by_time(41.0, 49.0).empty
+
+
+def test_filter_by_time_reaches_into_spill(tmp_path):
+    facade = PandasFacade(RetentionPolicy(max_rows=2, spill_path=str(tmp_path / "spill.csv")))
+    facade.add_records([record(float(t)) for t in range(6)])
+    assert len(facade.dataframe) == 2
+    assert list(facade.filter_by_time(1.0, 4.0)["timestamp"]) == [1.0, 2.0, 3.0, 4.0]
+    assert list(facade.filter_by_time(4.0)["timestamp"]) == [4.0, 5.0]
+
+
+def test_aggregate_by_time_buckets():
+    facade = PandasFacade()
+    facade.add_records([record(0.0, duration=0.2), record(30.0, duration=0.4), record(61.0), record(200.0, duration=1.0)])
+    summary = facade.aggregate_by_time(60)
+    assert list(summary["count"]) == [2, 1, 1]
+    assert summary["mean_duration"].iloc[0] == pytest.approx(0.3)
+    assert pd.isna(summary["mean_duration"].iloc[1])
+    assert summary.index[2] == pd.Timestamp(180, unit="s")
+
+
+def test_aggregate_by_time_rejects_empty_buckets():
+    with pytest.raises(ValueError, match="bucket_seconds must be positive"):
+        PandasFacade().aggregate_by_time(0)
+
+
+def test_max_age_uses_record_timestamps():
+    facade = PandasFacade()
+    now = history_time()
+    facade.add_records([record(now - 120.0), record(now - 30.0), record(now)])
+    facade.set_policy(RetentionPolicy(max_age=60))
+    assert len(facade.dataframe) == 2
+
+
+def test_timestamps_survive_save_and_load(tmp_path):
+    facade = PandasFacade()
+    facade.add_records([record(2.0, duration=0.5), record(1.0)])
+    path = str(tmp_path / "history.csv")
+    facade.save_to_csv(path)
+    loaded = PandasFacade()
+    loaded.load_from_csv(path)
+    assert list(loaded.dataframe["timestamp"]) == [1.0, 2.0]
+    assert loaded.dataframe["duration"].iloc[1] == 0.5
+
+
+def test_calculations_time_queries():
+    Calculations.clear_calculations()
+    start = history_time()
+    Calculations.add_calculation(Calculation(Decimal("1"), Decimal("2"), add), duration=0.01)
+    assert len(Calculations.filter_by_time(start)) == 1
+    assert Calculations.filter_by_time(end=start - 1).empty
+    assert Calculations.aggregate_by_time(60)["count"].sum() == 1
+    Calculations.clear_calculations()
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import pytest
+from decimal import Decimal
+from app.command import AddCommand
+from app.dispatcher import AdaptiveDispatcher, PROCESS, THREAD
+from app.scheduler import NORMAL, JobScheduler
+from app.tracing import NO_SPAN, Tracer, tracer
+
+
+@pytest.fixture
+def sampled():
+    tracer.sample_rate = 1.0
+    tracer.clear()
+    yield tracer
+    tracer.sample_rate = 0.0
+    tracer.clear()
+
+
+def names(source):
+    return [event[0] for event in source.events]
+
+
+def test_sampling_is_decided_once_per_request():
+    local = Tracer(sample_rate=0.5, seed=3)
+    outcomes = []
+    for _ in range(200):
+        with local.trace("request"):
+            outcomes.append(local.sampling())
+            # A nested trace belongs to the request, whatever a fresh draw would say
+            with local.trace("inner"), local.span("stage"):
+                pass
+    assert 60 < sum(outcomes) < 140
+    assert names(local).count("request") == sum(outcomes)
+    assert names(local).count("inner") == names(local).count("stage") == sum(outcomes)
+    assert not local.sampling()
+
+
+def test_spans_outside_sampled_requests_record_nothing():
+    local = Tracer()
+    assert local.span("stage") is NO_SPAN
+    with local.trace("request") as request:
+        request.annotate(ignored=True)
+        assert local.span("stage") is NO_SPAN
+    local.add_span("elsewhere", 0, 1)
+    assert not local.events
+    with pytest.raises(ValueError):
+        Tracer(sample_rate=1.5)
+
+
+def test_chrome_trace_export(tmp_path):
+    local = Tracer(sample_rate=1.0, max_events=3)
+    with pytest.raises(KeyError):
+        with local.trace("request", operation="add") as request:
+            with local.span("stage"):
+                pass
+            request.annotate(rows=2)
+            raise KeyError("boom")
+    with local.trace("second"):
+        local.add_span("worker", 0, 0, pid=-1, tid=-1, process_name="worker")
+    path = str(tmp_path / "trace" / "trace.json")
+    # Only the newest spans are kept
+    assert local.export(path) == 3
+    events = json.load(open(path))["traceEvents"]
+    metadata = {(event["name"], event["args"]["name"]) for event in events if event["ph"] == "M"}
+    assert ("process_name", "worker") in metadata and ("thread_name", threading.current_thread().name) in metadata
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert set(spans) == {"request", "worker", "second"}
+    assert spans["request"]["args"] == {"operation": "add", "rows": "2", "error": "KeyError"}
+    assert spans["request"]["dur"] >= 0 and spans["request"]["cat"] == "request"
+
+
+def test_spans_follow_the_request_onto_dispatch_threads(sampled):
+    dispatcher = AdaptiveDispatcher()
+    dispatcher.override(AddCommand, THREAD)
+    with sampled.trace("calculation"):
+        assert dispatcher.run(AddCommand(Decimal(1), Decimal(2))) == 3
+    execute = next(event for event in sampled.events if event[0] == "command.execute")
+    assert execute[4] != threading.get_native_id()
+    assert names(sampled)[-2:] == ["dispatcher.run", "calculation"]
+
+
+def test_worker_execution_is_recorded_in_its_own_process(sampled):
+    dispatcher = AdaptiveDispatcher()
+    dispatcher.override(AddCommand, PROCESS)
+    try:
+        with sampled.trace("calculation"):
+            assert dispatcher.run(AddCommand(Decimal(1), Decimal(2))) == 3
+    finally:
+        dispatcher.shutdown()
+    recorded = {event[0]: event for event in sampled.events}
+    assert {"supervisor.pickle", "supervisor.acquire", "worker.spawn", "supervisor.transfer",
+            "supervisor.receive", "command.execute"} <= set(recorded)
+    assert recorded["command.execute"][3] != os.getpid()
+
+
+def test_queued_jobs_record_their_wait(sampled):
+    scheduler = JobScheduler(AdaptiveDispatcher(), concurrency=1)
+    with sampled.trace("batch"):
+        future = scheduler.submit(AddCommand(Decimal(1), Decimal(2)), NORMAL)
+        assert future.result(5) == 3
+    scheduler.shutdown()
+    assert "scheduler.queued" in names(sampled) and "command.execute" in names(sampled)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from decimal import Decimal, InvalidOperation
+from app.command import AddCommand, DivideCommand, MultiplyCommand, SubtractCommand
+from app.dispatcher import AdaptiveDispatcher, PROCESS
+from app.plugins.add_command import AddCommand as AddPlugin
+from app.plugins.divide_command import DivideCommand as DividePlugin
+from app.vector_operands import as_array, format_vector, parse_operand, parse_vector
+from main import perform_calculation_and_display
+
+
+def test_as_array_keeps_small_integers_exact():
+    assert as_array([Decimal(1), Decimal("2.0"), 3]).dtype == np.int64
+    assert as_array([Decimal("1.5"), 2]).dtype == np.float64
+    assert as_array([2 ** 40, 1]).dtype == np.float64
+    assert as_array(np.array([1, 2], dtype=np.int32)).dtype == np.int32
+    assert as_array(np.array([True, False])).tolist() == [1, 0]
+    with pytest.raises(ValueError, match="only numbers"):
+        as_array(["a", 1])
+
+
+@pytest.mark.parametrize("command_class,expected", [(AddCommand, [11, 12, 13]), (SubtractCommand, [-9, -8, -7]),
+                                                    (MultiplyCommand, [10, 20, 30]), (DivideCommand, [0.1, 0.2, 0.3])])
+def test_scalars_broadcast_against_vectors(command_class, expected):
+    result = command_class([Decimal(1), Decimal(2), Decimal(3)], Decimal(10)).result
+    assert isinstance(result, np.ndarray)
+    assert result.tolist() == pytest.approx(expected)
+
+
+def test_vectors_broadcast_against_each_other():
+    result = AddPlugin(np.arange(3).reshape(3, 1), np.array([10, 20])).result
+    assert result.tolist() == [[10, 20], [11, 21], [12, 22]]
+    assert MultiplyCommand((1, 2), [3, 4]).result.tolist() == [3, 8]
+    # Two scalars still give an exact Decimal
+    assert AddPlugin(Decimal("0.1"), Decimal("0.2")).result == Decimal("0.3")
+
+
+def test_vector_errors_are_reported_like_scalar_ones():
+    assert str(DividePlugin([Decimal(1), Decimal(2)], [Decimal(1), Decimal(0)]).outcome()) == "Cannot divide by zero"
+    error = SubtractCommand([1, 2], [1, 2, 3]).outcome()
+    assert isinstance(error, ValueError) and "shapes (2,) and (3,)" in str(error)
+
+
+def test_input_size_counts_elements():
+    assert AddCommand(Decimal(1), Decimal(2)).input_size == 2
+    assert AddCommand(np.zeros(5000), Decimal(2)).input_size == 5000
+    assert AddPlugin(Decimal(2), [Decimal(1)] * 30).input_size == 30
+
+
+def test_vector_commands_run_in_worker_processes():
+    dispatcher = AdaptiveDispatcher()
+    dispatcher.override(AddPlugin, PROCESS)
+    try:
+        result = dispatcher.run(AddPlugin(np.arange(20_000), Decimal(1)))
+    finally:
+        dispatcher.shutdown()
+    assert np.array_equal(result, np.arange(1, 20_001))
+
+
+def test_parse_and_format_vectors(tmp_path):
+    vector = parse_vector("[1, 2.5 ,3]")
+    assert vector.dtype == np.float64 and vector.tolist() == [1, 2.5, 3]
+    assert parse_vector("[1, 2.0, -3]").dtype == np.int64
+    assert parse_vector("[]").size == 0 and parse_vector("4") is None
+    path = tmp_path / "values.txt"
+    path.write_text("1 2\n3,4\n")
+    assert parse_operand(f"@{path}").tolist() == [1, 2, 3, 4]
+    assert parse_operand("-1.5") == Decimal("-1.5")
+    with pytest.raises(InvalidOperation, match="'x' is not a valid number at column 5"):
+        parse_operand("[1, x]")
+    assert format_vector(np.array([0.5, 1.0])) == "[0.5, 1.0]"
+    assert format_vector(np.arange(100)) == "[0, 1, 2, ..., 97, 98, 99]"
+
+
+def test_repl_calculation_with_vectors(capsys):
+    perform_calculation_and_display("[1, 2, 3]", "2", "multiply")
+    assert "The result of [1, 2, 3] multiply 2 is [2, 4, 6]" in capsys.readouterr().out
+    perform_calculation_and_display("[1, 2]", "[0, 1]", "divide")
+    assert "An error occurred: Cannot divide by zero" in capsys.readouterr().out
+
+
+def test_history_keeps_long_vector_results_in_full(capsys):
+    from main import history_manager
+    perform_calculation_and_display(str(list(range(30))), "1", "add")
+    assert "[1, 2, 3, ..., 28, 29, 30]" in capsys.readouterr().out
+    assert history_manager.get_latest_record()["result"] == str(list(range(1, 31)))
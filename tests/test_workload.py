@@ -0,0 +1,73 @@
+import io
+import json
+import numpy as np
+import pytest
+from decimal import Decimal
+from app.workload import Workload, WorkloadGenerator, parse_mix
+
+
+def test_same_seed_gives_same_records_however_consumed():
+    generator = WorkloadGenerator(mix={"add": 1, "mean": 1}, seed=7)
+    generator.CHUNK_RECORDS = 1000
+    whole = generator.generate(2500)
+    chunked = Workload.concat(list(generator.chunks(2500)))
+    assert len(whole) == 2500
+    assert np.array_equal(whole.values, chunked.values) and np.array_equal(whole.offsets, chunked.offsets)
+    other = WorkloadGenerator(mix={"add": 1, "mean": 1}, seed=8).generate(2500)
+    assert not np.array_equal(whole.values[:100], other.values[:100])
+
+
+def test_mix_sizes_and_zero_divisors():
+    generator = WorkloadGenerator(mix={"divide": 3, "stddev": 1}, zero_divisor_rate=0.25,
+                                  variadic_size=(3, 5), seed=1)
+    workload = generator.generate(20_000)
+    operations = workload.operations
+    assert abs((operations == "divide").mean() - 0.75) < 0.02
+    sizes = np.diff(workload.offsets)
+    assert set(sizes[operations == "divide"]) == {2}
+    assert set(sizes[operations == "stddev"]) == {3, 4, 5}
+    divisors = workload.values[workload.offsets[:-1][operations == "divide"] + 1]
+    assert abs((divisors == 0).mean() - 0.25) < 0.02
+
+
+@pytest.mark.parametrize("distribution,low,high", [("uniform", -5, 5), ("integers", 0, 9),
+                                                   ("normal", -5, 5), ("loguniform", 0.01, 1000)])
+def test_operands_stay_in_range(distribution, low, high):
+    workload = WorkloadGenerator(distribution=distribution, low=low, high=high, scale=3, seed=3).generate(5000)
+    floats = workload.operand_floats()
+    assert floats.min() >= low and floats.max() <= high
+    if distribution == "integers":
+        assert (workload.values % 1000 == 0).all()
+
+
+def test_jsonl_and_binary_round_trip(tmp_path):
+    workload = WorkloadGenerator(mix={"subtract": 1, "mode": 1}, scale=2, seed=5).generate(50)
+    handle = io.StringIO()
+    workload.write_jsonl(handle)
+    lines = [json.loads(line) for line in handle.getvalue().splitlines()]
+    assert [(line["operation"], line["operands"]) for line in lines] == list(workload.jobs())
+    first = lines[0]["operands"][0]
+    assert Decimal(first) == Decimal(int(workload.values[0])).scaleb(-2)
+
+    path = str(tmp_path / "workload.npz")
+    workload.save(path)
+    loaded = Workload.load(path)
+    assert loaded.names == workload.names and loaded.scale == 2
+    assert list(loaded.jobs()) == list(workload.jobs())
+
+
+def test_large_mantissas_format_exactly():
+    workload = Workload(("add",), np.zeros(1, dtype=np.int8), np.array([0, 2]), np.array([-10 ** 17 - 5, 7]), 2)
+    assert workload.operand_texts() == ["-1000000000000000.05", "0.07"]
+
+
+def test_invalid_settings_are_rejected():
+    assert parse_mix("add=3, divide ,mean=0.5") == {"add": 3.0, "divide": 1.0, "mean": 0.5}
+    with pytest.raises(ValueError, match="Unknown operations"):
+        WorkloadGenerator(mix={"power": 1})
+    with pytest.raises(ValueError, match="loguniform"):
+        WorkloadGenerator(distribution="loguniform", low=0)
+    with pytest.raises(ValueError, match="scale"):
+        WorkloadGenerator(scale=12)
+    with pytest.raises(ValueError, match="do not fit"):
+        WorkloadGenerator(high=1e12, scale=8)